@@ -33,6 +33,49 @@ from .config import (
     AUDIO_CONTENT_CHANNEL_ID,
     VIDEO_CONTENT_CHANNEL_ID,
     PUBLISH_TO_CHANNELS,
+    YOUTUBE_PREFETCH_ENABLED,
+    YOUTUBE_PREFETCH_MAX_CONCURRENT,
+    YOUTUBE_PREFETCH_RATE_LIMIT_KBPS,
+    YOUTUBE_PREFETCH_MAX_DISK_MB,
+    YOUTUBE_PREFETCH_MIN_FREE_DISK_MB,
+    YOUTUBE_PREFETCH_TTL_MINUTES,
+    YOUTUBE_STREAMING_TRANSCODE,
+    ARTIFACT_STORE_ENABLED,
+    ARTIFACT_STORE_PATH,
+    ARTIFACT_STORE_MAX_MB,
+    TELEGRAM_FANOUT_CONCURRENCY,
+    TELEGRAM_FLOODWAIT_MAX_RETRIES,
+    TELEGRAM_FILE_ID_CACHE_PATH,
+    TELEGRAM_PARALLEL_UPLOAD_MIN_MB,
+    TELEGRAM_UPLOAD_CONNECTIONS,
+    TELEGRAM_UPLOAD_PART_SIZE_KB,
+    EXTRA_USERBOT_SESSIONS,
+    STATUS_EDIT_MIN_INTERVAL,
+    TELEGRAM_API_CALLS_PER_SECOND,
+    TELEGRAM_GROUP_CALLS_PER_MINUTE,
+    WHATSAPP_HEALTH_CHECK_INTERVAL,
+    WHATSAPP_READY_TIMEOUT,
+    WHATSAPP_HTTP_POOL_SIZE,
+    WHATSAPP_UPLOAD_MODE,
+    WHATSAPP_JOB_POLL_WAIT,
+    WHATSAPP_JOB_TIMEOUT,
+    WHATSAPP_SERVICE_URLS,
+    WHATSAPP_DRAIN_TIMEOUT,
+    WHATSAPP_OUTBOX_ENABLED,
+    WHATSAPP_OUTBOX_PATH,
+    WHATSAPP_OUTBOX_TTL_HOURS,
+    WHATSAPP_OUTBOX_RETRY_BASE,
+    WHATSAPP_OUTBOX_RETRY_MAX,
+    WHATSAPP_ROUTING_ENABLED,
+    WHATSAPP_ROUTE_ORDER,
+    WHATSAPP_ROUTE_MIN_SUCCESS_RATE,
+    WHATSAPP_ROUTE_MIN_SAMPLES,
+    WHATSAPP_ROUTE_MAX_SEND_SEC,
+    WHATSAPP_ROUTE_MAX_ENCODE_DURATION,
+    WHATSAPP_ROUTE_REPROBE_HOURS,
+    WHATSAPP_DOCUMENT_MAX_MB,
+    WHATSAPP_PREVIEW_SECONDS,
+    WHATSAPP_ROUTE_STATS_PATH,
     validate_config,
     get_config_info,
 )
@@ -68,6 +111,49 @@ __all__ = [
     "AUDIO_CONTENT_CHANNEL_ID",
     "VIDEO_CONTENT_CHANNEL_ID",
     "PUBLISH_TO_CHANNELS",
+    "YOUTUBE_PREFETCH_ENABLED",
+    "YOUTUBE_PREFETCH_MAX_CONCURRENT",
+    "YOUTUBE_PREFETCH_RATE_LIMIT_KBPS",
+    "YOUTUBE_PREFETCH_MAX_DISK_MB",
+    "YOUTUBE_PREFETCH_MIN_FREE_DISK_MB",
+    "YOUTUBE_PREFETCH_TTL_MINUTES",
+    "YOUTUBE_STREAMING_TRANSCODE",
+    "ARTIFACT_STORE_ENABLED",
+    "ARTIFACT_STORE_PATH",
+    "ARTIFACT_STORE_MAX_MB",
+    "TELEGRAM_FANOUT_CONCURRENCY",
+    "TELEGRAM_FLOODWAIT_MAX_RETRIES",
+    "TELEGRAM_FILE_ID_CACHE_PATH",
+    "TELEGRAM_PARALLEL_UPLOAD_MIN_MB",
+    "TELEGRAM_UPLOAD_CONNECTIONS",
+    "TELEGRAM_UPLOAD_PART_SIZE_KB",
+    "EXTRA_USERBOT_SESSIONS",
+    "STATUS_EDIT_MIN_INTERVAL",
+    "TELEGRAM_API_CALLS_PER_SECOND",
+    "TELEGRAM_GROUP_CALLS_PER_MINUTE",
+    "WHATSAPP_HEALTH_CHECK_INTERVAL",
+    "WHATSAPP_READY_TIMEOUT",
+    "WHATSAPP_HTTP_POOL_SIZE",
+    "WHATSAPP_UPLOAD_MODE",
+    "WHATSAPP_JOB_POLL_WAIT",
+    "WHATSAPP_JOB_TIMEOUT",
+    "WHATSAPP_SERVICE_URLS",
+    "WHATSAPP_DRAIN_TIMEOUT",
+    "WHATSAPP_OUTBOX_ENABLED",
+    "WHATSAPP_OUTBOX_PATH",
+    "WHATSAPP_OUTBOX_TTL_HOURS",
+    "WHATSAPP_OUTBOX_RETRY_BASE",
+    "WHATSAPP_OUTBOX_RETRY_MAX",
+    "WHATSAPP_ROUTING_ENABLED",
+    "WHATSAPP_ROUTE_ORDER",
+    "WHATSAPP_ROUTE_MIN_SUCCESS_RATE",
+    "WHATSAPP_ROUTE_MIN_SAMPLES",
+    "WHATSAPP_ROUTE_MAX_SEND_SEC",
+    "WHATSAPP_ROUTE_MAX_ENCODE_DURATION",
+    "WHATSAPP_ROUTE_REPROBE_HOURS",
+    "WHATSAPP_DOCUMENT_MAX_MB",
+    "WHATSAPP_PREVIEW_SECONDS",
+    "WHATSAPP_ROUTE_STATS_PATH",
     "validate_config",
     "get_config_info",
     # Executor
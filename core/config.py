@@ -71,6 +71,99 @@ VIDEO_CONTENT_CHANNEL_ID = int(_video_channel) if _video_channel else None
 # האם לפרסם בערוצים
 PUBLISH_TO_CHANNELS = os.getenv("PUBLISH_TO_CHANNELS", "false").lower() == "true"
 
+# YouTube Prefetch Configuration
+# הורדה מוקדמת (ספקולטיבית) של הקליפ ברגע שהפרטים מתקבלים - לפני שהמשימה מגיעה לראש התור
+YOUTUBE_PREFETCH_ENABLED = os.getenv("YOUTUBE_PREFETCH_ENABLED", "true").lower() == "true"
+YOUTUBE_PREFETCH_MAX_CONCURRENT = int(os.getenv("YOUTUBE_PREFETCH_MAX_CONCURRENT", 1))
+# מגבלת רוחב פס להורדה מוקדמת (KB/s), 0 = ללא הגבלה
+YOUTUBE_PREFETCH_RATE_LIMIT_KBPS = int(os.getenv("YOUTUBE_PREFETCH_RATE_LIMIT_KBPS", 0))
+# תקציב דיסק לקבצים שהורדו מראש ועדיין לא נלקחו ע"י משימה
+YOUTUBE_PREFETCH_MAX_DISK_MB = int(os.getenv("YOUTUBE_PREFETCH_MAX_DISK_MB", 2048))
+# מקום פנוי מינימלי בדיסק כדי להתחיל הורדה מוקדמת
+YOUTUBE_PREFETCH_MIN_FREE_DISK_MB = int(os.getenv("YOUTUBE_PREFETCH_MIN_FREE_DISK_MB", 2048))
+# זמן חיים לקבצים שהורדו מראש ולא נלקחו
+YOUTUBE_PREFETCH_TTL_MINUTES = int(os.getenv("YOUTUBE_PREFETCH_TTL_MINUTES", 60))
+
+# המרה תוך כדי הורדה (AV1/VP9/Opus) - FFmpeg קורא את ה-streams ישירות מהרשת
+YOUTUBE_STREAMING_TRANSCODE = os.getenv("YOUTUBE_STREAMING_TRANSCODE", "true").lower() == "true"
+
+# Artifact Store Configuration
+# מאגר תוצרים (וידאו מומר, MP3 מתויג, thumbnails) לשימוש חוזר בפרסום חוזר
+ARTIFACT_STORE_ENABLED = os.getenv("ARTIFACT_STORE_ENABLED", "true").lower() == "true"
+ARTIFACT_STORE_PATH = ROOT_DIR / os.getenv("ARTIFACT_STORE_PATH", "data/artifacts")
+ARTIFACT_STORE_MAX_MB = int(os.getenv("ARTIFACT_STORE_MAX_MB", 10240))
+
+# Telegram Fan-out Configuration
+# מספר שליחות file_id במקביל לערוצים נוספים (אחרי ההעלאה לערוץ הראשון)
+TELEGRAM_FANOUT_CONCURRENCY = int(os.getenv("TELEGRAM_FANOUT_CONCURRENCY", 5))
+# מספר ניסיונות חוזרים לערוץ אחרי FloodWait / SlowmodeWait
+TELEGRAM_FLOODWAIT_MAX_RETRIES = int(os.getenv("TELEGRAM_FLOODWAIT_MAX_RETRIES", 3))
+
+# Telegram File ID Cache
+# hash תוכן → file_id, כדי לא להעלות שוב קבצים זהים (פרסום חוזר, fallback, retry)
+TELEGRAM_FILE_ID_CACHE_PATH = ROOT_DIR / os.getenv("TELEGRAM_FILE_ID_CACHE_PATH", "data/telegram_file_ids.json")
+
+# Parallel Big File Upload
+# וידאו מעל הגודל הזה מועלה ב-parts במקביל על כמה חיבורי media
+TELEGRAM_PARALLEL_UPLOAD_MIN_MB = int(os.getenv("TELEGRAM_PARALLEL_UPLOAD_MIN_MB", 50))
+# מספר חיבורי media במקביל להעלאה
+TELEGRAM_UPLOAD_CONNECTIONS = int(os.getenv("TELEGRAM_UPLOAD_CONNECTIONS", 4))
+# גודל part ב-KB (כפולה של 1KB שמחלקת את 512KB, מקסימום 512)
+TELEGRAM_UPLOAD_PART_SIZE_KB = int(os.getenv("TELEGRAM_UPLOAD_PART_SIZE_KB", 512))
+
+# Telegram Client Pool
+# userbots נוספים לפרסום בערוצים (שמות session מופרדים בפסיק, session מחובר מראש בתיקיית הפרויקט)
+EXTRA_USERBOT_SESSIONS = [name.strip() for name in os.getenv("EXTRA_USERBOT_SESSIONS", "").split(",") if name.strip()]
+
+# Status Message Renderer
+# זמן מינימלי (שניות) בין עריכות של הודעת סטטוס - עדכונים בינתיים מתאחדים
+STATUS_EDIT_MIN_INTERVAL = float(os.getenv("STATUS_EDIT_MIN_INTERVAL", 2.0))
+
+# Outbound Rate Limiting
+# תקציב קריאות יוצאות ל-Telegram API לכל client (0 = ללא הגבלה)
+TELEGRAM_API_CALLS_PER_SECOND = float(os.getenv("TELEGRAM_API_CALLS_PER_SECOND", 25))
+# תקציב קריאות לכל קבוצה/ערוץ בדקה
+TELEGRAM_GROUP_CALLS_PER_MINUTE = float(os.getenv("TELEGRAM_GROUP_CALLS_PER_MINUTE", 20))
+
+# WhatsApp client - session HTTP משותף ובדיקת זמינות ברקע
+WHATSAPP_HEALTH_CHECK_INTERVAL = float(os.getenv("WHATSAPP_HEALTH_CHECK_INTERVAL", "15"))  # שניות בין בדיקות /status
+WHATSAPP_READY_TIMEOUT = float(os.getenv("WHATSAPP_READY_TIMEOUT", "60"))  # זמן המתנה מקסימלי לשירות מוכן
+WHATSAPP_HTTP_POOL_SIZE = int(os.getenv("WHATSAPP_HTTP_POOL_SIZE", "10"))  # חיבורים פתוחים לשירות
+
+# העברת קבצים לשירות הוואטסאפ: 'path' (אותה מערכת קבצים) או 'stream' (העלאה בזרימה)
+WHATSAPP_UPLOAD_MODE = os.getenv("WHATSAPP_UPLOAD_MODE", "path").lower()
+
+# שליחות כ-jobs: long-poll אחד לכל ה-jobs הפתוחים, ומשך מקסימלי להמתנה ל-job
+WHATSAPP_JOB_POLL_WAIT = float(os.getenv("WHATSAPP_JOB_POLL_WAIT", "25"))  # שניות לכל long-poll
+WHATSAPP_JOB_TIMEOUT = float(os.getenv("WHATSAPP_JOB_TIMEOUT", "1800"))  # שניות עד שמוותרים על job
+
+# כמה מופעי whatsapp_service (לכל אחד auth ופורט משלו) - ברירת מחדל: WHATSAPP_SERVICE_URL בלבד
+WHATSAPP_SERVICE_URLS = [
+    url.strip().rstrip('/') for url in os.getenv("WHATSAPP_SERVICE_URLS", WHATSAPP_SERVICE_URL).split(",") if url.strip()
+]
+WHATSAPP_DRAIN_TIMEOUT = float(os.getenv("WHATSAPP_DRAIN_TIMEOUT", "300"))  # המתנה לסיום שליחות לפני reset של מופע
+
+# תור שליחות וואטסאפ על הדיסק: שליחות שנכשלו (שירות לא זמין / ניתוק) נשלחות שוב ברקע
+WHATSAPP_OUTBOX_ENABLED = os.getenv("WHATSAPP_OUTBOX_ENABLED", "true").lower() == "true"
+WHATSAPP_OUTBOX_PATH = ROOT_DIR / os.getenv("WHATSAPP_OUTBOX_PATH", "data/whatsapp_outbox")
+WHATSAPP_OUTBOX_TTL_HOURS = float(os.getenv("WHATSAPP_OUTBOX_TTL_HOURS", "24"))  # אחרי כמה זמן מוותרים על שליחה
+WHATSAPP_OUTBOX_RETRY_BASE = float(os.getenv("WHATSAPP_OUTBOX_RETRY_BASE", "30"))  # שניות עד הניסיון הראשון (מוכפל בכל ניסיון)
+WHATSAPP_OUTBOX_RETRY_MAX = float(os.getenv("WHATSAPP_OUTBOX_RETRY_MAX", "1800"))  # המתנה מקסימלית בין ניסיונות
+
+# ניתוב וידאו לכל קבוצה: וידאו מוטמע / מסמך / קליפ תצוגה מקדימה (לפי גודל, אורך והיסטוריית הקבוצה)
+WHATSAPP_ROUTING_ENABLED = os.getenv("WHATSAPP_ROUTING_ENABLED", "true").lower() == "true"
+WHATSAPP_ROUTE_ORDER = [
+    strategy.strip() for strategy in os.getenv("WHATSAPP_ROUTE_ORDER", "video,document,preview").split(",") if strategy.strip()
+]
+WHATSAPP_ROUTE_MIN_SUCCESS_RATE = float(os.getenv("WHATSAPP_ROUTE_MIN_SUCCESS_RATE", "0.5"))  # מתחת - האפשרות נפסלת לקבוצה
+WHATSAPP_ROUTE_MIN_SAMPLES = int(os.getenv("WHATSAPP_ROUTE_MIN_SAMPLES", "3"))  # שליחות עד שההיסטוריה קובעת
+WHATSAPP_ROUTE_MAX_SEND_SEC = float(os.getenv("WHATSAPP_ROUTE_MAX_SEND_SEC", "300"))  # זמן שליחה צפוי מקסימלי לקבוצה
+WHATSAPP_ROUTE_MAX_ENCODE_DURATION = float(os.getenv("WHATSAPP_ROUTE_MAX_ENCODE_DURATION", "900"))  # וידאו ארוך מזה לא נדחס לוידאו מוטמע
+WHATSAPP_ROUTE_REPROBE_HOURS = float(os.getenv("WHATSAPP_ROUTE_REPROBE_HOURS", "24"))  # אפשרות שנפסלה נבדקת שוב אחרי
+WHATSAPP_DOCUMENT_MAX_MB = float(os.getenv("WHATSAPP_DOCUMENT_MAX_MB", "100"))  # גודל מקסימלי לשליחה כמסמך
+WHATSAPP_PREVIEW_SECONDS = float(os.getenv("WHATSAPP_PREVIEW_SECONDS", "30"))  # אורך קליפ התצוגה המקדימה
+WHATSAPP_ROUTE_STATS_PATH = ROOT_DIR / os.getenv("WHATSAPP_ROUTE_STATS_PATH", "data/whatsapp_routes.json")
+
 
 def validate_config():
     """
@@ -134,6 +227,9 @@ def get_config_info():
         "PUBLISH_TO_CHANNELS": PUBLISH_TO_CHANNELS,
         "AUDIO_CONTENT_CHANNEL": AUDIO_CONTENT_CHANNEL_ID if AUDIO_CONTENT_CHANNEL_ID else "Not Set",
         "VIDEO_CONTENT_CHANNEL": VIDEO_CONTENT_CHANNEL_ID if VIDEO_CONTENT_CHANNEL_ID else "Not Set",
+        "YOUTUBE_PREFETCH_ENABLED": YOUTUBE_PREFETCH_ENABLED,
+        "ARTIFACT_STORE_ENABLED": ARTIFACT_STORE_ENABLED,
+        "ARTIFACT_STORE_MAX_MB": ARTIFACT_STORE_MAX_MB,
     }
 
 
@@ -25,6 +25,7 @@ logger = logging.getLogger(__name__)
 # משתנים גלובליים לגישה מהפלאגינים
 bot = None
 userbot = None
+extra_userbots = []
 
 
 async def periodic_session_cleanup():
@@ -42,6 +43,12 @@ async def periodic_session_cleanup():
             files_cleaned = state_manager.cleanup_files_periodically(max_files_per_session=50)
             if files_cleaned > 0:
                 logger.info(f"🧹 Cleaned {files_cleaned} old file references")
+            
+            # ניקוי הורדות מוקדמות שלא נלקחו
+            from services.media.downloaders.prefetcher import youtube_prefetcher
+            prefetch_cleaned = youtube_prefetcher.cleanup_expired()
+            if prefetch_cleaned > 0:
+                logger.info(f"🧹 Cleaned {prefetch_cleaned} unused prefetched video(s)")
         except Exception as e:
             logger.error(f"❌ Error in periodic cleanup: {e}", exc_info=True)
 
@@ -73,7 +80,7 @@ async def main():
         # Initialize Bot Client
         from core import (
             BOT_SESSION_NAME, API_ID, API_HASH, BOT_TOKEN,
-            USERBOT_SESSION_NAME, PHONE_NUMBER, ROOT_DIR
+            USERBOT_SESSION_NAME, PHONE_NUMBER, ROOT_DIR, EXTRA_USERBOT_SESSIONS
         )
         bot = Client(
             name=BOT_SESSION_NAME,
@@ -107,6 +114,29 @@ async def main():
         context.set_userbot(userbot)
         logger.info("✅ AppContext initialized with bot and userbot")
         
+        # Additional userbot accounts for channel publishing (pre-authorized sessions)
+        for session_name in EXTRA_USERBOT_SESSIONS:
+            extra_userbot = Client(
+                name=session_name,
+                api_id=API_ID,
+                api_hash=API_HASH,
+                workdir=str(ROOT_DIR),
+                no_updates=True
+            )
+            try:
+                await extra_userbot.start()
+                extra_userbots.append(extra_userbot)
+                logger.info(f"✅ Extra userbot started: {session_name}")
+            except Exception as e:
+                logger.error(f"❌ Failed to start extra userbot {session_name}: {e}")
+        
+        # Register publishing clients in the client pool
+        from services.channels.client_pool import client_pool
+        client_pool.register(userbot, "userbot")
+        for extra_userbot in extra_userbots:
+            client_pool.register(extra_userbot, "extra_userbot")
+        client_pool.register(bot, "bot")
+        
         # Get bot info
         bot_info = await bot.get_me()
         logger.info(f"🤖 Bot: @{bot_info.username} ({bot_info.first_name})")
@@ -162,6 +192,21 @@ async def main():
         # Start periodic cleanup task for old sessions
         asyncio.create_task(periodic_session_cleanup())
         
+        # Warm up the Telegram peer cache for every pooled client (in background) -
+        # sends skip peer resolution and the pool learns which client can post where
+        from services.channels import channels_manager
+        asyncio.create_task(client_pool.warm_up(channels_manager.get_telegram_peer_ids()))
+        logger.info("🔥 Telegram peer cache warm-up started")
+        
+        # Shared WhatsApp client - background health probe (sends never wait on /status)
+        from core import WHATSAPP_ENABLED
+        from services.whatsapp import whatsapp_client, whatsapp_outbox
+        if WHATSAPP_ENABLED:
+            await whatsapp_client.start()
+            logger.info("📱 WhatsApp health probe started")
+            # שליחות שנכשלו (גם מהרצה קודמת) נשלחות שוב ברקע
+            await whatsapp_outbox.start()
+        
         # Keep the clients running
         await idle()
         
@@ -182,6 +227,12 @@ async def main():
             if 'userbot' in locals():
                 await userbot.stop()
                 logger.info("✅ Userbot stopped")
+            for extra_userbot in extra_userbots:
+                await extra_userbot.stop()
+                logger.info(f"✅ Extra userbot stopped: {extra_userbot.name}")
+            from services.whatsapp import whatsapp_client, whatsapp_outbox
+            await whatsapp_outbox.stop()
+            await whatsapp_client.close()
         except Exception as e:
             logger.error(f"Error stopping clients: {e}")
         logger.info("🏁 Shutdown complete")
@@ -67,6 +67,11 @@ class UserSession:
     # מעקב הודעות למחיקה בסיום
     messages_to_delete: list = field(default_factory=list)  # רשימת Message objects
     
+    # פוסטים שפורסמו בערוצים - סוג ('photo'/'audio'/'video') → {'client', 'chat_id', 'message_id', 'file_id'}
+    channel_posts: dict = field(default_factory=dict)
+    # פרסומים לערוצים שבדרך - סוג → asyncio.Event (fallback לטלגרם ממתין להם)
+    channel_posts_pending: dict = field(default_factory=dict)
+    
     def update_state(self, new_state: str):
         """עדכון מצב המשתמש"""
         self.state = new_state
@@ -136,3 +141,5 @@ class UserSession:
         self.instagram_timeout_task = None
         self.files_to_cleanup = []
         self.messages_to_delete = []
+        self.channel_posts = {}
+        self.channel_posts_pending = {}
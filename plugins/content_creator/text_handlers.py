@@ -19,6 +19,7 @@ from services.media import (
     is_instagram_reel_url
 )
 from services.processing_queue import processing_queue
+from services.media.downloaders.prefetcher import youtube_prefetcher
 from services.rate_limiter import rate_limit
 from services.content.orchestrator import process_content, process_video_only, process_instagram_upload
 from .cleanup import schedule_instagram_timeout
@@ -188,6 +189,9 @@ async def handle_video_only_details(client: Client, message: Message):
         # עדכון מצב
         session.update_state(UserState.PROCESSING)
         
+        # הורדה מוקדמת ברקע - לא ממתינים לתור
+        youtube_prefetcher.prefetch(session.youtube_url, owner_id=user.id)
+        
         # הצגת סיכום
         summary = (
             "✅ **פרטים התקבלו!**\n\n"
@@ -572,6 +576,10 @@ async def handle_details(client: Client, message: Message):
         # עדכון מצב
         session.update_state(UserState.PROCESSING)
         
+        # הורדה מוקדמת ברקע - לא ממתינים לתור
+        if session.need_video:
+            youtube_prefetcher.prefetch(session.youtube_url, owner_id=user.id)
+        
         # הצגת סיכום
         summary = (
             "✅ **פרטים התקבלו!**\n\n"
@@ -5,6 +5,7 @@ import logging
 from typing import List
 from pyrogram import Client
 from pyrogram.types import Message
+from services.rate_limiter import outbound_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +79,7 @@ async def delete_old_messages(client: Client, messages: List[Message], keep_last
                 # מוחק כל chat בנפרד
                 for chat_id, msg_ids in chat_messages.items():
                     try:
+                        await outbound_scheduler.acquire(client, chat_id)
                         await client.delete_messages(chat_id, msg_ids)
                         deleted_count += len(msg_ids)
                         logger.debug(f"🗑️ Deleted {len(msg_ids)} messages from chat {chat_id}")
@@ -88,6 +88,8 @@ async def cancel_queue_command(client: Client, message: Message):
         cancelled = await processing_queue.cancel_queue(user.id)
         
         if cancelled:
+            from services.media.downloaders.prefetcher import youtube_prefetcher
+            youtube_prefetcher.cancel_for_owner(user.id)
             await message.reply_text(
                 "✅ **התור בוטל בהצלחה!**\n\n"
                 "המיקום שלך בתור הוסר.\n"
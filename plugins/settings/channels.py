@@ -6,6 +6,7 @@ Handlers for adding, managing, and toggling channels/groups
 from pyrogram import Client, filters
 from pyrogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from services.channels import channels_manager
+from services.whatsapp import whatsapp_client
 from services.user_states import state_manager, UserState
 from services.rate_limiter import rate_limit
 from core import is_authorized_user
@@ -647,6 +648,25 @@ async def handle_add_channel(client: Client, message: Message):
         channels_manager.add_channel(platform, channel_id)
         logger.info(f"✅ Successfully added {platform} channel/group: {channel_id}")
         
+        # פתרון ה-chat ID פעם אחת - שליחות יפנו לקבוצה לפי ID ולא לפי שם
+        try:
+            matches = await whatsapp_client.resolve_group(channel_id, ready_timeout=5)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not resolve WhatsApp group '{channel_id}' now: {e}")
+            matches = None
+        if matches is None:
+            resolve_note = "⏳ שירות הוואטסאפ לא זמין כרגע - ה-ID ייפתר בשליחה הראשונה"
+        elif len(matches) == 1:
+            channels_manager.set_whatsapp_chat_id(channel_id, matches[0]['id'])
+            resolve_note = f"🆔 **ID:** `{matches[0]['id']}`"
+        elif matches:
+            resolve_note = (
+                f"⚠️ **נמצאו {len(matches)} צ'אטים בשם הזה!**\n"
+                f"שנה את שם הקבוצה בוואטסאפ כך שיהיה ייחודי והוסף אותה מחדש"
+            )
+        else:
+            resolve_note = "⚠️ הקבוצה לא נמצאה בוואטסאפ כרגע - ודא שהשם מדויק"
+        
         # איפוס מצב
         session.update_state(UserState.IDLE)
         if hasattr(session, 'adding_channel_platform'):
@@ -661,7 +681,8 @@ async def handle_add_channel(client: Client, message: Message):
         await processing_msg.edit_text(
             f"✅ **קבוצה נוספה בהצלחה!**\n\n"
             f"**פלטפורמה:** {platform_name}\n"
-            f"**שם:** {channel_id}\n\n"
+            f"**שם:** {channel_id}\n"
+            f"{resolve_note}\n\n"
             f"💾 **נשמר במאגר**\n\n"
             f"כעת תוכל לקשר אותה לתבניות דרך תפריט עריכת תבניות.",
             reply_markup=keyboard
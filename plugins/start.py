@@ -248,32 +248,27 @@ async def test_command(client: Client, message: Message):
         if all_groups:
             await status_msg.edit_text(f"📱 **שולח הודעות ל-{len(all_groups)} קבוצות וואטסאפ...**")
             
-            from services.whatsapp import WhatsAppDelivery
+            from services.whatsapp import whatsapp_client
             
-            from core import WHATSAPP_DRY_RUN
-            whatsapp = WhatsAppDelivery(dry_run=WHATSAPP_DRY_RUN)
-            try:
-                test_message_whatsapp = "🧪 *בדיקת קבוצה*\n\n" \
-                                       "אם אתה רואה את ההודעה הזו, הקבוצה פעילה ומוכנה לקבל הודעות!"
-                
-                for group_name in all_groups:
-                    try:
-                        logger.info(f"🧪 [TEST] שולח הודעה לקבוצת וואטסאפ: {group_name}")
-                        result = whatsapp.send_text(group_name, test_message_whatsapp)
+            test_message_whatsapp = "🧪 *בדיקת קבוצה*\n\n" \
+                                   "אם אתה רואה את ההודעה הזו, הקבוצה פעילה ומוכנה לקבל הודעות!"
+            
+            for group_name in all_groups:
+                try:
+                    logger.info(f"🧪 [TEST] שולח הודעה לקבוצת וואטסאפ: {group_name}")
+                    result = await whatsapp_client.send_text(group_name, test_message_whatsapp)
+                    
+                    if result.get('success'):
+                        success_whatsapp.append(group_name)
+                        logger.info(f"✅ [TEST] הודעה נשלחה בהצלחה לקבוצה: {group_name}")
+                    else:
+                        error_msg = result.get('error', 'Unknown error')
+                        failed_whatsapp.append(f"{group_name} ({error_msg})")
+                        logger.error(f"❌ [TEST] שגיאה בשליחה לקבוצה {group_name}: {error_msg}")
                         
-                        if result.get('success'):
-                            success_whatsapp.append(group_name)
-                            logger.info(f"✅ [TEST] הודעה נשלחה בהצלחה לקבוצה: {group_name}")
-                        else:
-                            error_msg = result.get('error', 'Unknown error')
-                            failed_whatsapp.append(f"{group_name} ({error_msg})")
-                            logger.error(f"❌ [TEST] שגיאה בשליחה לקבוצה {group_name}: {error_msg}")
-                            
-                    except Exception as e:
-                        logger.error(f"❌ [TEST] שגיאה בשליחה לקבוצה {group_name}: {e}")
-                        failed_whatsapp.append(f"{group_name} ({str(e)})")
-            finally:
-                whatsapp.close()
+                except Exception as e:
+                    logger.error(f"❌ [TEST] שגיאה בשליחה לקבוצה {group_name}: {e}")
+                    failed_whatsapp.append(f"{group_name} ({str(e)})")
         
         # סיכום תוצאות
         total_success = len(success_telegram) + len(success_whatsapp)
@@ -341,6 +336,10 @@ async def cancel_command(client: Client, message: Message):
     
     from services.user_states import state_manager
     from plugins.content_creator import cleanup_session_files
+    from services.media.downloaders.prefetcher import youtube_prefetcher
+    
+    # ביטול הורדות מוקדמות שעדיין רצות
+    youtube_prefetcher.cancel_for_owner(user.id)
     
     # ניקוי קבצים לפני איפוס הסשן
     session = state_manager.get_session(user.id)
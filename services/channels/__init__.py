@@ -4,7 +4,7 @@ Channels Manager
 """
 
 from .manager import channels_manager
-from .sender import send_to_telegram_channels, send_to_whatsapp_groups
+from .sender import send_to_telegram_channels, send_to_whatsapp_groups, queue_whatsapp_groups
 
-__all__ = ['channels_manager', 'send_to_telegram_channels', 'send_to_whatsapp_groups']
+__all__ = ['channels_manager', 'send_to_telegram_channels', 'send_to_whatsapp_groups', 'queue_whatsapp_groups']
 
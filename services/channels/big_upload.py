@@ -0,0 +1,248 @@
+"""
+Parallel Big File Upload
+העלאת וידאו גדול לטלגרם במקביל על כמה חיבורי media
+
+client.send_video מעלה את כל הקובץ (עד 2GB) דרך session media יחיד.
+כאן הקובץ נקרא דרך mmap ומחולק ל-parts שמועלים במקביל (upload.saveBigFilePart)
+על כמה sessions, ואז נשלחת הודעה עם ה-InputFileBig המוכן - בדיוק כמו ש-send_video עושה.
+אם ההעלאה המקבילית נכשלת - חוזרים ל-send_video הרגיל.
+"""
+import asyncio
+import logging
+import math
+import mmap
+import os
+import time
+from typing import Callable, Optional
+
+from pyrogram import Client, raw, types, utils
+from pyrogram.errors import FloodWait
+from pyrogram.session import Session
+from pyrogram.types import Message
+
+from core import (
+    TELEGRAM_PARALLEL_UPLOAD_MIN_MB,
+    TELEGRAM_UPLOAD_CONNECTIONS,
+    TELEGRAM_UPLOAD_PART_SIZE_KB,
+)
+from services.media.ffmpeg_utils import get_video_duration
+
+logger = logging.getLogger(__name__)
+
+# מגבלות טלגרם ל-saveBigFilePart
+MAX_PART_SIZE = 512 * 1024
+MAX_PARTS = 4000
+PART_RETRIES = 3
+# parts בטיסה לכל חיבור (pipelining)
+PARTS_PER_CONNECTION = 2
+# פרמטרים של send_video שיש להם מקבילה ב-SendMedia הגולמי - כל פרמטר אחר חוזר ל-send_video
+SUPPORTED_SEND_KWARGS = {
+    'file_name', 'parse_mode', 'caption_entities', 'disable_notification',
+    'protect_content', 'reply_markup', 'has_spoiler', 'progress_args',
+}
+
+
+def _part_size_bytes(part_size_kb: int = TELEGRAM_UPLOAD_PART_SIZE_KB) -> int:
+    """גודל part תקין: כפולה של 1KB שמחלקת את 512KB"""
+    part_size = part_size_kb * 1024
+    if part_size <= 0 or part_size > MAX_PART_SIZE or MAX_PART_SIZE % part_size != 0:
+        logger.warning(f"⚠️ [BIG_UPLOAD] גודל part לא תקין ({part_size_kb}KB) - משתמש ב-512KB")
+        return MAX_PART_SIZE
+    return part_size
+
+
+async def _report_progress(progress: Optional[Callable], current: int, total: int):
+    """קריאה ל-callback התקדמות בחתימה של Pyrogram (current, total) - sync או async"""
+    if not progress:
+        return
+    try:
+        result = progress(current, total)
+        if asyncio.iscoroutine(result):
+            await result
+    except Exception as e:
+        logger.debug(f"⚠️ [BIG_UPLOAD] progress callback failed: {e}")
+
+
+async def parallel_save_file(
+    client: Client,
+    file_path: str,
+    progress: Optional[Callable] = None,
+    connections: int = TELEGRAM_UPLOAD_CONNECTIONS,
+    part_size_kb: int = TELEGRAM_UPLOAD_PART_SIZE_KB
+) -> Optional[raw.types.InputFileBig]:
+    """
+    מעלה קובץ ב-parts במקביל על כמה sessions של media
+
+    Args:
+        client: ה-client שמעלה (ה-file תקף רק עבורו)
+        file_path: הקובץ להעלאה
+        progress: callback(current_bytes, total_bytes)
+        connections: מספר חיבורי media במקביל
+        part_size_kb: גודל part ב-KB (כפולה של 1KB שמחלקת את 512KB)
+
+    Returns:
+        InputFileBig מוכן לשליחה, או None אם נכשל
+    """
+    file_size = os.path.getsize(file_path)
+    part_size = _part_size_bytes(part_size_kb)
+    total_parts = math.ceil(file_size / part_size)
+    if total_parts > MAX_PARTS:
+        logger.error(f"❌ [BIG_UPLOAD] הקובץ גדול מדי ({total_parts} parts, מקסימום {MAX_PARTS})")
+        return None
+
+    file_id = client.rnd_id()
+    connections = max(1, connections)
+    dc_id = await client.storage.dc_id()
+    auth_key = await client.storage.auth_key()
+    test_mode = await client.storage.test_mode()
+    sessions = [Session(client, dc_id, auth_key, test_mode, is_media=True) for _ in range(connections)]
+
+    next_part = 0
+    uploaded_bytes = 0
+    started = time.monotonic()
+
+    try:
+        await asyncio.gather(*(session.start() for session in sessions))
+
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+
+            async def _worker(session: Session):
+                nonlocal next_part, uploaded_bytes
+                while next_part < total_parts:
+                    part = next_part
+                    next_part += 1
+                    # קריאה ישירה מה-page cache (ללא read() לבאפר ביניים)
+                    chunk = mm[part * part_size:(part + 1) * part_size]
+                    for attempt in range(1, PART_RETRIES + 1):
+                        try:
+                            await session.invoke(
+                                raw.functions.upload.SaveBigFilePart(
+                                    file_id=file_id,
+                                    file_part=part,
+                                    file_total_parts=total_parts,
+                                    bytes=chunk
+                                )
+                            )
+                            break
+                        except FloodWait as e:
+                            if attempt == PART_RETRIES:
+                                raise
+                            logger.warning(f"⏳ [BIG_UPLOAD] FloodWait על part {part} - ממתין {e.value}s")
+                            await asyncio.sleep(e.value)
+                        except Exception as e:
+                            if attempt == PART_RETRIES:
+                                raise
+                            logger.warning(f"⚠️ [BIG_UPLOAD] part {part} נכשל ({e}) - ניסיון {attempt + 1}")
+                            await asyncio.sleep(attempt)
+                    uploaded_bytes += len(chunk)
+                    await _report_progress(progress, uploaded_bytes, file_size)
+
+            await asyncio.gather(*(
+                _worker(session)
+                for session in sessions
+                for _ in range(PARTS_PER_CONNECTION)
+            ))
+    except Exception as e:
+        logger.error(f"❌ [BIG_UPLOAD] העלאה מקבילית נכשלה: {e}", exc_info=True)
+        return None
+    finally:
+        for session in sessions:
+            try:
+                await session.stop()
+            except Exception:
+                pass
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"🚀 [BIG_UPLOAD] {os.path.basename(file_path)}: {file_size / (1024 * 1024):.1f} MB, "
+        f"{total_parts} parts על {connections} חיבורים תוך {elapsed:.1f}s "
+        f"({file_size / (1024 * 1024) / max(elapsed, 0.001):.1f} MB/s)"
+    )
+    return raw.types.InputFileBig(id=file_id, parts=total_parts, name=os.path.basename(file_path))
+
+
+async def send_video_parallel(
+    client: Client,
+    chat_id,
+    video: str,
+    caption: str = "",
+    thumb: Optional[str] = None,
+    width: int = 0,
+    height: int = 0,
+    duration: int = 0,
+    supports_streaming: bool = True,
+    progress: Optional[Callable] = None,
+    **kwargs
+) -> Optional[Message]:
+    """
+    תחליף ל-client.send_video: קבצים מקומיים גדולים מועלים במקביל,
+    כל השאר (file_id, קבצים קטנים, פרמטרים ללא מקבילה ב-SendMedia, כישלון בהעלאה)
+    עוברים ל-send_video הרגיל
+    """
+    is_big_local_file = (
+        isinstance(video, str)
+        and os.path.isfile(video)
+        and os.path.getsize(video) >= TELEGRAM_PARALLEL_UPLOAD_MIN_MB * 1024 * 1024
+    )
+    unsupported = set(kwargs) - SUPPORTED_SEND_KWARGS
+    if is_big_local_file and unsupported:
+        logger.info(f"ℹ️ [BIG_UPLOAD] פרמטרים ללא תמיכה ({', '.join(sorted(unsupported))}) - העלאה רגילה")
+    elif is_big_local_file:
+        progress_args = kwargs.get('progress_args') or ()
+        upload_progress = (lambda current, total: progress(current, total, *progress_args)) if progress else None
+        input_file = await parallel_save_file(client, video, progress=upload_progress)
+        if input_file:
+            if not duration:
+                duration = int(await get_video_duration(video) or 0)
+            media = raw.types.InputMediaUploadedDocument(
+                mime_type="video/mp4",
+                file=input_file,
+                thumb=await client.save_file(thumb) if thumb else None,
+                attributes=[
+                    raw.types.DocumentAttributeVideo(
+                        supports_streaming=supports_streaming or None,
+                        duration=duration,
+                        w=width or 0,
+                        h=height or 0
+                    ),
+                    raw.types.DocumentAttributeFilename(file_name=kwargs.get('file_name') or os.path.basename(video))
+                ],
+                spoiler=kwargs.get('has_spoiler')
+            )
+            reply_markup = kwargs.get('reply_markup')
+            r = await client.invoke(
+                raw.functions.messages.SendMedia(
+                    peer=await client.resolve_peer(chat_id),
+                    media=media,
+                    silent=kwargs.get('disable_notification') or None,
+                    random_id=client.rnd_id(),
+                    noforwards=kwargs.get('protect_content'),
+                    reply_markup=await reply_markup.write(client) if reply_markup else None,
+                    **await utils.parse_text_entities(
+                        client, caption, kwargs.get('parse_mode'), kwargs.get('caption_entities')
+                    )
+                )
+            )
+            for update in r.updates:
+                if isinstance(update, (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)):
+                    return await types.Message._parse(
+                        client,
+                        update.message,
+                        {user.id: user for user in r.users},
+                        {chat.id: chat for chat in r.chats}
+                    )
+            return None
+        logger.warning("⚠️ [BIG_UPLOAD] חוזר להעלאה רגילה דרך send_video")
+
+    return await client.send_video(
+        chat_id=chat_id,
+        video=video,
+        caption=caption,
+        thumb=thumb,
+        width=width,
+        height=height,
+        duration=duration,
+        supports_streaming=supports_streaming,
+        progress=progress,
+        **kwargs
+    )
@@ -0,0 +1,205 @@
+"""
+Telegram Client Pool
+מאגר חשבונות לפרסום בערוצים: bot, userbot ו-userbots נוספים
+
+כל שליחה לערוצים מנותבת ל-client הכי פחות עמוס מבין אלה שיכולים לפרסם בערוצים.
+file_id תקף רק לחשבון שהעלה אותו - לכן כל client מעלה פעם אחת ושולח ב-file_id
+לערוצים שלו, ורק ערוצים שנכשלו (FloodWait, ניתוק, אין הרשאה) עוברים ל-client הבא.
+"""
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from pyrogram import Client
+
+from .fanout import gate_for
+from .peer_cache import peer_cache, _client_key
+from .sender import send_to_telegram_channels
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledClient:
+    """client רשום במאגר"""
+    client: Client
+    role: str  # 'bot' / 'userbot' / 'extra_userbot'
+    in_flight: int = 0
+
+    @property
+    def name(self) -> str:
+        return _client_key(self.client)
+
+    @property
+    def is_available(self) -> bool:
+        """מחובר ולא חסום ב-FloodWait"""
+        return getattr(self.client, 'is_connected', True) and gate_for(self.client).blocked_for() <= 0
+
+
+class ClientPool:
+    """
+    מאגר clients עם מעקב אחרי עומס ואחרי ערוצים שכל client יכול לפרסם בהם
+    מופע גלובלי אחד (client_pool)
+    """
+
+    def __init__(self):
+        self._clients: List[PooledClient] = []
+        # (client, ערוץ) → האם ה-client יכול לפרסם (נלמד ב-warm_up)
+        self._can_post: Dict[Tuple[str, str], bool] = {}
+
+    def register(self, client: Client, role: str):
+        if any(pooled.client is client for pooled in self._clients):
+            return
+        self._clients.append(PooledClient(client=client, role=role))
+        logger.info(f"✅ [CLIENT_POOL] נרשם {role}: {_client_key(client)}")
+
+    @property
+    def clients(self) -> List[PooledClient]:
+        return list(self._clients)
+
+    def can_post(self, pooled: PooledClient, channel: str) -> bool:
+        """ערוץ שעוד לא נבדק נחשב אפשרי - השליחה עצמה תכריע"""
+        return self._can_post.get((pooled.name, channel), True)
+
+    async def warm_up(self, channels: List[str]) -> Dict[str, int]:
+        """
+        פתרון הערוצים לכל client ורישום לאילו ערוצים כל אחד יכול לפרסם
+
+        Returns:
+            {שם client: מספר ערוצים נגישים}
+        """
+        channels = list(dict.fromkeys(channels))
+        ready = {}
+        for pooled in self._clients:
+            await peer_cache.warm_up(pooled.client, channels)
+            for channel in channels:
+                self._can_post[(pooled.name, channel)] = peer_cache.get(pooled.client, channel) is not None
+            ready[pooled.name] = sum(1 for channel in channels if self._can_post[(pooled.name, channel)])
+        return ready
+
+    def rank(self, channels: List[str], preferred: Optional[Client] = None) -> List[PooledClient]:
+        """
+        clients לפי סדר ניסיון: הכי הרבה ערוצים נגישים, אחר כך הכי פחות עמוס,
+        אחר כך ה-client המועדף. clients חסומים/מנותקים בסוף.
+        """
+        def _key(pooled: PooledClient):
+            eligible = sum(1 for channel in channels if self.can_post(pooled, channel))
+            return (
+                not pooled.is_available,
+                -eligible,
+                pooled.in_flight,
+                pooled.client is not preferred,
+            )
+        return sorted(self._clients, key=_key)
+
+    @asynccontextmanager
+    async def lease(self, pooled: PooledClient):
+        """סימון client כעסוק לזמן השליחה (לחישוב עומס)"""
+        pooled.in_flight += 1
+        try:
+            yield pooled.client
+        finally:
+            pooled.in_flight -= 1
+
+
+async def send_to_telegram_channels_pooled(
+    client: Client,
+    file_path: str,
+    file_type: str,
+    caption: str,
+    channels: List[str],
+    first_channel_peer_id_b64: Optional[str] = None,
+    protected_channels: Optional[List[str]] = None,
+    **kwargs
+) -> Dict[str, any]:
+    """
+    כמו send_to_telegram_channels, אבל דרך ה-client pool
+
+    Args:
+        client: ה-client המועדף (ומשמש לבד אם המאגר ריק)
+        (שאר הפרמטרים כמו send_to_telegram_channels)
+
+    Returns:
+        מילון תוצאות מאוחד + 'clients': {שם client: ערוצים שנשלחו דרכו}
+    """
+    if len(client_pool.clients) < 2:
+        return await send_to_telegram_channels(
+            client=client,
+            file_path=file_path,
+            file_type=file_type,
+            caption=caption,
+            channels=channels,
+            first_channel_peer_id_b64=first_channel_peer_id_b64,
+            protected_channels=protected_channels,
+            **kwargs
+        )
+
+    results = {
+        'success': False,
+        'uploaded_to': None,
+        'file_id': None,
+        'sent_to': [],
+        'errors': [],
+        'channel_results': [],
+        'clients': {}
+    }
+    remaining = list(channels)
+    candidates = client_pool.rank(remaining, preferred=client)
+
+    for index, pooled in enumerate(candidates):
+        targets = [channel for channel in remaining if client_pool.can_post(pooled, channel)]
+        if not targets:
+            continue
+        if not pooled.is_available and index < len(candidates) - 1:
+            logger.info(f"⏭️ [CLIENT_POOL] {pooled.name} לא זמין (FloodWait / מנותק) - מדלג")
+            continue
+
+        has_fallback = index < len(candidates) - 1
+        logger.info(f"📤 [CLIENT_POOL] {pooled.name} ({pooled.role}) → {len(targets)} ערוצים")
+        try:
+            async with client_pool.lease(pooled) as pooled_client:
+                result = await send_to_telegram_channels(
+                    client=pooled_client,
+                    file_path=file_path,
+                    file_type=file_type,
+                    caption=caption,
+                    channels=targets,
+                    first_channel_peer_id_b64=(
+                        first_channel_peer_id_b64 if first_channel_peer_id_b64 in targets else None
+                    ),
+                    protected_channels=protected_channels,
+                    # אם יש client נוסף - לא ממתינים ל-FloodWait, מעבירים אליו
+                    **({'floodwait_retries': 0} if has_fallback else {}),
+                    **kwargs
+                )
+        except Exception as e:
+            logger.error(f"❌ [CLIENT_POOL] {pooled.name} נכשל: {e}", exc_info=True)
+            results['errors'].append(f"{pooled.name}: {e}")
+            continue
+
+        sent_to = result.get('sent_to', [])
+        results['clients'][pooled.name] = sent_to
+        results['sent_to'].extend(sent_to)
+        results['errors'].extend(result.get('errors', []))
+        results['channel_results'].extend(result.get('channel_results', []))
+        if result.get('file_id') and not results['file_id']:
+            results['file_id'] = result['file_id']
+            results['uploaded_to'] = result.get('uploaded_to')
+            results['chat_id'] = result.get('chat_id')
+            results['message_id'] = result.get('message_id')
+            results['client'] = pooled.name
+
+        remaining = [channel for channel in remaining if channel not in sent_to]
+        if not remaining:
+            break
+        logger.warning(f"🔁 [CLIENT_POOL] {len(remaining)} ערוצים עוברים ל-client הבא")
+
+    results['success'] = bool(results['sent_to'])
+    if not results['success'] and not results['errors']:
+        results['error'] = 'No client could post to the channels'
+    return results
+
+
+# מופע גלובלי
+client_pool = ClientPool()
@@ -0,0 +1,163 @@
+"""
+Telegram Fan-out
+שליחה מקבילית (עם הגבלת in-flight) של אותו file_id להרבה ערוצים
+
+- FloodWait (ברמת החשבון) עוצר את כל השליחות עד שהזמן עובר
+- SlowmodeWait (ברמת הצ'אט) עוצר רק את הצ'אט הספציפי
+- בשני המקרים השליחה מתוזמנת מחדש אוטומטית (עד TELEGRAM_FLOODWAIT_MAX_RETRIES)
+- לכל ערוץ מוחזרים תוצאה, מספר ניסיונות ו-latency
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pyrogram.errors import FloodWait, SlowmodeWait
+
+from core import TELEGRAM_FANOUT_CONCURRENCY, TELEGRAM_FLOODWAIT_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+
+def get_wait_seconds(error: Exception) -> int:
+    """שניות ההמתנה מ-FloodWait / SlowmodeWait (value ב-Pyrogram 2, x בגרסאות ישנות)"""
+    return int(getattr(error, 'value', None) or getattr(error, 'x', 0) or 0)
+
+
+@dataclass
+class FanoutResult:
+    """תוצאת שליחה לערוץ בודד"""
+    channel: str
+    success: bool
+    latency: float = 0.0
+    attempts: int = 0
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class FloodWaitGate:
+    """
+    שער המתנה משותף לכל השליחות לטלגרם
+    מחזיק זמן "חסום עד" גלובלי ולכל צ'אט
+    """
+
+    def __init__(self):
+        self._global_until = 0.0
+        self._chat_until: Dict[str, float] = {}
+
+    async def wait(self, chat_key: Optional[str] = None):
+        """ממתין עד שגם החסימה הגלובלית וגם החסימה של הצ'אט הסתיימו"""
+        while True:
+            until = max(self._global_until, self._chat_until.get(chat_key, 0.0) if chat_key else 0.0)
+            delay = until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def blocked_for(self, chat_key: Optional[str] = None) -> float:
+        """כמה שניות נשארו לחסימה (0 אם לא חסום)"""
+        until = max(self._global_until, self._chat_until.get(chat_key, 0.0) if chat_key else 0.0)
+        return max(0.0, until - time.monotonic())
+
+    def block_global(self, seconds: int):
+        until = time.monotonic() + seconds
+        if until > self._global_until:
+            self._global_until = until
+            logger.warning(f"⏳ [FLOODWAIT] כל השליחות לטלגרם מושהות ל-{seconds}s")
+
+    def block_chat(self, chat_key: str, seconds: int):
+        until = time.monotonic() + seconds
+        if until > self._chat_until.get(chat_key, 0.0):
+            self._chat_until[chat_key] = until
+            logger.warning(f"⏳ [FLOODWAIT] צ'אט {chat_key[:20]} מושהה ל-{seconds}s")
+
+    def handle_error(self, error: Exception, chat_key: Optional[str] = None) -> bool:
+        """
+        רושם חסימה לפי סוג השגיאה
+
+        Returns:
+            True אם זו שגיאת המתנה (כדאי לנסות שוב), False אחרת
+        """
+        if isinstance(error, SlowmodeWait) and chat_key:
+            self.block_chat(chat_key, get_wait_seconds(error) + 1)
+            return True
+        if isinstance(error, FloodWait):
+            self.block_global(get_wait_seconds(error) + 1)
+            return True
+        return False
+
+
+async def fan_out(
+    channels: List[str],
+    send_one: Callable[[str], Awaitable[None]],
+    max_in_flight: int = TELEGRAM_FANOUT_CONCURRENCY,
+    max_retries: int = TELEGRAM_FLOODWAIT_MAX_RETRIES,
+    gate: Optional['FloodWaitGate'] = None
+) -> List[FanoutResult]:
+    """
+    שולח לכל הערוצים במקביל, עד max_in_flight בו-זמנית
+
+    Args:
+        channels: רשימת ערוצים (peer_id_b64)
+        send_one: coroutine ששולח לערוץ בודד ומעלה exception בכישלון
+        max_in_flight: מספר שליחות מקסימלי במקביל
+        max_retries: ניסיונות חוזרים אחרי FloodWait / SlowmodeWait
+        gate: שער ההמתנה של החשבון השולח (ברירת מחדל: flood_gate)
+
+    Returns:
+        רשימת FanoutResult באותו סדר כמו channels
+    """
+    semaphore = asyncio.Semaphore(max(1, max_in_flight))
+    gate = gate or flood_gate
+
+    async def _send(channel: str) -> FanoutResult:
+        result = FanoutResult(channel=channel, success=False)
+        started = time.monotonic()
+        async with semaphore:
+            while True:
+                await gate.wait(channel)
+                result.attempts += 1
+                try:
+                    await send_one(channel)
+                    result.success = True
+                    break
+                except Exception as e:
+                    if gate.handle_error(e, channel) and result.attempts <= max_retries:
+                        logger.info(
+                            f"🔁 [FANOUT] {channel[:20]}... ינסה שוב אחרי המתנה "
+                            f"(ניסיון {result.attempts}/{max_retries + 1})"
+                        )
+                        continue
+                    result.error = str(e)
+                    break
+        result.latency = round(time.monotonic() - started, 3)
+        return result
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(_send(channel) for channel in channels))
+    succeeded = sum(1 for r in results if r.success)
+    logger.info(
+        f"📡 [FANOUT] {succeeded}/{len(results)} ערוצים תוך {time.monotonic() - started:.1f}s "
+        f"(עד {max_in_flight} במקביל)"
+    )
+    return list(results)
+
+
+# מופע גלובלי - משותף לכל השליחות לטלגרם
+flood_gate = FloodWaitGate()
+
+# FloodWait הוא לכל חשבון - שער נפרד לכל client
+_client_gates: Dict[str, FloodWaitGate] = {}
+
+
+def gate_for(client) -> FloodWaitGate:
+    """שער ההמתנה של client מסוים (נוצר בפעם הראשונה)"""
+    if client is None:
+        return flood_gate
+    key = getattr(client, 'name', None) or str(id(client))
+    if key not in _client_gates:
+        _client_gates[key] = FloodWaitGate()
+    return _client_gates[key]
@@ -0,0 +1,183 @@
+"""
+Telegram File ID Cache
+cache מתמיד: hash תוכן + סוג מדיה → file_id של טלגרם
+
+שליחה חוזרת של אותם bytes (ערוץ, משתמש, retry, פרסום חוזר) משתמשת ב-file_id
+במקום להעלות שוב עד 2GB. file_id תקף רק לחשבון שהעלה אותו - לכן המפתח כולל את ה-client.
+file_id שפג תוקפו (FileReferenceExpired / FileIdInvalid / MediaEmpty) נמחק והקובץ מועלה מחדש.
+
+החיפוש משתמש רק ב-hash שכבר ידוע (known_hash - תוצרי artifact store, קבצים שכבר נשלחו,
+ועותקי העלאה שלהם - create_upload_copy מעביר את ה-hash), כך שהעלאה ראשונה לא ממתינה
+ל-SHA-256 מלא; ה-hash מחושב רק אחרי ההעלאה, לשמירה.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from pyrogram import Client
+from pyrogram.types import Message
+from pyrogram.errors import FileReferenceExpired, FileIdInvalid, MediaEmpty
+
+from core import TELEGRAM_FILE_ID_CACHE_PATH
+from services.media.artifact_store import hash_file, known_hash
+
+logger = logging.getLogger(__name__)
+
+# מספר רשומות מקסימלי - מעבר לזה נמחקות הרשומות שלא היו בשימוש הכי הרבה זמן
+MAX_ENTRIES = 5000
+
+# שגיאות שמשמעותן ש-file_id כבר לא שמיש
+STALE_FILE_ID_ERRORS = (FileReferenceExpired, FileIdInvalid, MediaEmpty)
+
+
+def _client_key(client: Client) -> str:
+    return getattr(client, 'name', None) or str(id(client))
+
+
+def extract_media(message: Message, kind: str) -> Optional[Any]:
+    """אובייקט המדיה מהודעה שנשלחה ('photo' / 'audio' / 'video' / 'document')"""
+    if not message:
+        return None
+    return getattr(message, kind, None)
+
+
+class FileIdCache:
+    """
+    cache עם קובץ JSON:
+    {"<client>:<kind>:<sha256>": {"file_id", "file_unique_id", "created_at", "last_used"}}
+    """
+
+    def __init__(self, file_path: Path = TELEGRAM_FILE_ID_CACHE_PATH):
+        self.file_path = Path(file_path)
+        # _lock מגן על הרשומות בזיכרון בלבד - בלי IO בתוכו
+        self._lock = threading.Lock()
+        # _save_lock מסדר את הכתיבות לקובץ
+        self._save_lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self.file_path.exists():
+            try:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"❌ [FILE_ID_CACHE] Failed to load cache: {e}")
+        return {}
+
+    def _save(self):
+        """
+        שמירה אטומית (כתיבה לקובץ זמני והחלפה) - רצה ב-executor
+
+        ה-snapshot נלקח אחרי _save_lock, כך שהכתיבה האחרונה תמיד מכילה את המצב העדכני
+        """
+        try:
+            with self._save_lock:
+                with self._lock:
+                    data = json.dumps(self._entries, ensure_ascii=False, indent=2)
+                self.file_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.file_path.with_suffix('.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.file_path)
+        except Exception as e:
+            logger.error(f"❌ [FILE_ID_CACHE] Failed to save cache: {e}")
+
+    def _save_in_background(self) -> asyncio.Future:
+        """כתיבת הקובץ ב-executor (לא על ה-event loop)"""
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(None, self._save)
+
+    @staticmethod
+    def _key(client: Client, sha: Optional[str], kind: str) -> Optional[str]:
+        if not sha:
+            return None
+        return f"{_client_key(client)}:{kind}:{sha}"
+
+    async def lookup(self, client: Client, file_path: str, kind: str) -> Optional[str]:
+        """file_id שמור לאותו תוכן, או None (ללא hashing - רק אם ה-hash כבר ידוע)"""
+        key = self._key(client, known_hash(file_path), kind)
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            entry["last_used"] = time.time()
+            return entry["file_id"]
+
+    async def remember(self, client: Client, file_path: str, kind: str, message: Message) -> Optional[str]:
+        """שמירת file_id מהודעה שנשלחה עם הקובץ"""
+        media = extract_media(message, kind)
+        if not media or not getattr(media, 'file_id', None):
+            return None
+        key = self._key(client, await hash_file(file_path), kind)
+        if not key:
+            return None
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {
+                "file_id": media.file_id,
+                "file_unique_id": getattr(media, 'file_unique_id', None),
+                "created_at": self._entries.get(key, {}).get("created_at", now),
+                "last_used": now,
+            }
+            if len(self._entries) > MAX_ENTRIES:
+                oldest = sorted(self._entries, key=lambda k: self._entries[k]["last_used"])
+                for stale_key in oldest[:len(self._entries) - MAX_ENTRIES]:
+                    del self._entries[stale_key]
+        await self._save_in_background()
+        return media.file_id
+
+    def evict(self, file_id: str):
+        """מחיקת file_id שכבר לא שמיש"""
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry["file_id"] == file_id]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            self._save_in_background()
+            logger.info(f"🧹 [FILE_ID_CACHE] Evicted stale file_id {file_id[:20]}...")
+
+
+async def send_cached_media(
+    client: Client,
+    send_method: Callable,
+    kind: str,
+    file_path: str,
+    **params
+) -> Message:
+    """
+    שליחת מדיה עם שימוש חוזר ב-file_id אם אותו תוכן כבר הועלה ע"י ה-client
+
+    Args:
+        client: ה-client שמבצע את השליחה (file_id תקף רק עבורו)
+        send_method: client.send_video / message.reply_audio וכו'
+        kind: 'photo' / 'audio' / 'video' / 'document' (שם הפרמטר של המדיה)
+        file_path: קובץ מקומי (להעלאה אם אין file_id שמיש)
+        **params: שאר הפרמטרים ל-send_method (chat_id, caption, thumb...)
+
+    Returns:
+        ההודעה שנשלחה
+    """
+    cached_file_id = await file_id_cache.lookup(client, file_path, kind)
+    if cached_file_id:
+        try:
+            message = await send_method(**{**params, kind: cached_file_id})
+            logger.info(f"♻️ [FILE_ID_CACHE] Sent {kind} by cached file_id (no upload)")
+            return message
+        except STALE_FILE_ID_ERRORS as e:
+            logger.warning(f"⚠️ [FILE_ID_CACHE] Cached file_id unusable ({type(e).__name__}), re-uploading")
+            file_id_cache.evict(cached_file_id)
+
+    message = await send_method(**{**params, kind: file_path})
+    await file_id_cache.remember(client, file_path, kind, message)
+    return message
+
+
+# מופע גלובלי
+file_id_cache = FileIdCache()
@@ -130,6 +130,14 @@ class ChannelsManager:
                     return item.get("title")
         return None
     
+    def get_whatsapp_chat_id(self, group_name: str) -> Optional[str]:
+        """chat ID שמור של קבוצת וואטסאפ (או None אם עוד לא נפתר)"""
+        return self.storage.get_whatsapp_chat_id(group_name)
+    
+    def set_whatsapp_chat_id(self, group_name: str, chat_id: str):
+        """שמירת chat ID של קבוצת וואטסאפ (שליחות יפנו לקבוצה לפי ID ולא לפי שם)"""
+        self.storage.set_whatsapp_chat_id(group_name, chat_id)
+    
     # ========== ניהול קישורים לתבניות ==========
     
     def get_template_channels(self, template_name: str, platform: str) -> List[str]:
@@ -0,0 +1,185 @@
+"""
+Peer Cache
+cache של ערוצי טלגרם שכבר נפתרו - רשומת ערוץ (peer_id_b64 / ID) → chat_id מוכן לשליחה
+
+Pyrogram שולח לפי chat_id רק אם ה-peer (כולל access_hash) כבר נמצא ב-storage של ה-client.
+ה-cache מבצע את הפתרון (resolve_peer / get_chat) פעם אחת לכל client + ערוץ -
+במקביל בעליית הבוט - כך שבזמן שליחה אין round trips של פתרון.
+על PeerIdInvalid הרשומה מתרעננת ברקע.
+ערוץ שלא נפתר נשמר ככישלון ל-NEGATIVE_TTL שניות - בלי get_chat חוזר בכל שליחה.
+"""
+import asyncio
+import base64
+import logging
+import struct
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from pyrogram import Client
+from pyrogram.errors import PeerIdInvalid, ChannelInvalid
+
+from services.rate_limiter import outbound_scheduler
+
+from .fanout import fan_out
+
+logger = logging.getLogger(__name__)
+
+ChatId = Union[int, str]
+
+# כמה זמן ערוץ שלא נפתר לא ננסה לפתור שוב (שניות)
+NEGATIVE_TTL = 300.0
+
+
+def _client_key(client: Client) -> str:
+    return getattr(client, 'name', None) or str(id(client))
+
+
+def _chat_id_from_peer_bytes(peer_bytes: bytes) -> Optional[int]:
+    """peer_id bytes בפורמט channel_id + access_hash (>qq) → chat_id של ערוץ (-100...)"""
+    if len(peer_bytes) != 16:
+        return None
+    channel_id, _access_hash = struct.unpack('>qq', peer_bytes)
+    return int(f"-100{channel_id}")
+
+
+class PeerCache:
+    """
+    cache פתרון ערוצים לכל client
+    מופע גלובלי אחד (peer_cache)
+    """
+
+    def __init__(self):
+        self._resolved: Dict[Tuple[str, str], ChatId] = {}
+        # ערוצים שלא נפתרו → זמן (monotonic) שבו מותר לנסות שוב
+        self._failed: Dict[Tuple[str, str], float] = {}
+        self._legacy_ids: Dict[str, int] = {}
+        # revision של המאגר שממנה נבנה האינדקס (None = עוד לא נטען)
+        self._legacy_revision: Optional[int] = None
+        self._refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def _load_legacy_ids(self):
+        """אינדקס peer_id_b64 → legacy_id מהמאגר (במקום סריקה לינארית בכל שליחה)"""
+        from .manager import channels_manager
+        self._legacy_revision = channels_manager.storage.revision
+        legacy_ids = {}
+        for item in channels_manager.get_repository("telegram"):
+            if isinstance(item, dict) and item.get("peer_id_b64") and item.get("legacy_id"):
+                try:
+                    legacy_ids[item["peer_id_b64"]] = int(item["legacy_id"])
+                except (TypeError, ValueError):
+                    pass
+        self._legacy_ids = legacy_ids
+
+    def legacy_id_for(self, channel: str) -> Optional[int]:
+        """
+        legacy_id של ערוץ - מהאינדקס, או מהמחרוזת עצמה אם היא ID
+
+        האינדקס נבנה מחדש רק כשהמאגר השתנה (revision), כך שערוץ בלי legacy_id
+        לא גורם לסריקה של כל המאגר בכל שליחה
+        """
+        if channel.startswith('-') or channel.lstrip('-').isdigit():
+            try:
+                return int(channel)
+            except ValueError:
+                pass
+        from .manager import channels_manager
+        if self._legacy_revision != channels_manager.storage.revision:
+            self._load_legacy_ids()
+        return self._legacy_ids.get(channel)
+
+    def _candidates(self, channel: str) -> List[ChatId]:
+        """chat_id אפשריים לערוץ, לפי סדר עדיפות"""
+        candidates: List[ChatId] = []
+        legacy_id = self.legacy_id_for(channel)
+        if legacy_id is not None:
+            candidates.append(legacy_id)
+        try:
+            peer_bytes = base64.b64decode(channel.encode("utf-8"), validate=True)
+            chat_id = _chat_id_from_peer_bytes(peer_bytes)
+            if chat_id is not None and chat_id not in candidates:
+                candidates.append(chat_id)
+        except Exception:
+            pass
+        if not candidates:
+            candidates.append(channel)  # username / מזהה אחר - Pyrogram יפתור בעצמו
+        return candidates
+
+    def get(self, client: Client, channel: str) -> Optional[ChatId]:
+        """chat_id מוכן מה-cache (ללא IO), או None"""
+        return self._resolved.get((_client_key(client), channel))
+
+    async def resolve(self, client: Client, channel: str) -> Optional[ChatId]:
+        """
+        מחזיר chat_id מוכן לשליחה - מה-cache, או פותר פעם אחת ושומר
+
+        Returns:
+            chat_id (int/str) או None אם הערוץ לא נגיש ל-client
+        """
+        key = (_client_key(client), channel)
+        if key in self._resolved:
+            return self._resolved[key]
+        retry_at = self._failed.get(key)
+        if retry_at is not None:
+            if time.monotonic() < retry_at:
+                return None
+            del self._failed[key]
+
+        for chat_id in self._candidates(channel):
+            try:
+                await client.resolve_peer(chat_id)
+            except (PeerIdInvalid, ChannelInvalid, KeyError, ValueError):
+                # לא ב-storage - get_chat טוען את ה-peer (כולל access_hash)
+                try:
+                    await outbound_scheduler.acquire(client)
+                    await client.get_chat(chat_id)
+                except (PeerIdInvalid, ChannelInvalid, KeyError, ValueError) as e:
+                    logger.debug(f"⚠️ [PEER_CACHE] {chat_id} לא נפתר: {e}")
+                    continue
+            self._resolved[key] = chat_id
+            self._failed.pop(key, None)
+            logger.debug(f"✅ [PEER_CACHE] {channel[:20]}... → {chat_id}")
+            return chat_id
+
+        self._failed[key] = time.monotonic() + NEGATIVE_TTL
+        logger.warning(
+            f"⚠️ [PEER_CACHE] ערוץ לא נגיש ל-{key[0]}: {channel[:20]}... "
+            f"(לא ננסה שוב {NEGATIVE_TTL:.0f}s)"
+        )
+        return None
+
+    def invalidate(self, client: Client, channel: str):
+        """הסרת ערוץ מה-cache ופתרון מחדש ברקע (למשל אחרי PeerIdInvalid)"""
+        key = (_client_key(client), channel)
+        self._resolved.pop(key, None)
+        self._failed.pop(key, None)
+        if key in self._refreshing and not self._refreshing[key].done():
+            return
+        logger.info(f"🔄 [PEER_CACHE] מרענן ערוץ ברקע: {channel[:20]}...")
+        task = asyncio.create_task(self.resolve(client, channel))
+        task.add_done_callback(lambda _task: self._refreshing.pop(key, None))
+        self._refreshing[key] = task
+
+    async def warm_up(self, client: Client, channels: List[str]) -> int:
+        """
+        פתרון מקבילי של כל הערוצים (בעליית הבוט / לפני שליחה)
+
+        Returns:
+            מספר הערוצים שמוכנים לשליחה
+        """
+        channels = list(dict.fromkeys(channels))
+        if not channels:
+            return 0
+        self._load_legacy_ids()
+
+        async def _resolve_one(channel: str):
+            if await self.resolve(client, channel) is None:
+                raise ValueError("channel not accessible")
+
+        results = await fan_out(channels, _resolve_one)
+        ready = sum(1 for r in results if r.success)
+        logger.info(f"🔥 [PEER_CACHE] {ready}/{len(channels)} ערוצים מוכנים ל-{_client_key(client)}")
+        return ready
+
+
+# מופע גלובלי
+peer_cache = PeerCache()
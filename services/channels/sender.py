@@ -6,10 +6,20 @@ Smart Channel Sender
 
 import base64
 import logging
+from functools import partial
 from typing import List, Dict, Optional, Tuple
 from pyrogram import Client
 from pyrogram.types import Message
-from pyrogram.errors import PeerIdInvalid, ChannelInvalid, UsernameInvalid
+from pyrogram.errors import PeerIdInvalid, ChannelInvalid, UsernameInvalid, FloodWait, SlowmodeWait
+
+from core import TELEGRAM_FLOODWAIT_MAX_RETRIES
+
+from services.rate_limiter import outbound_scheduler
+
+from .fanout import fan_out, gate_for
+from .peer_cache import peer_cache
+from .file_id_cache import file_id_cache, send_cached_media
+from .big_upload import send_video_parallel
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +57,15 @@ def decode_peer_id(peer_id_b64: str):
         return peer_id_b64
 
 
+async def _resolve_cached(client: Client, channel: str):
+    """chat_id מוכן מה-peer cache (פתרון חד-פעמי אם חסר), או None - ואז נופלים ללוגיקה הישנה"""
+    try:
+        return await peer_cache.resolve(client, channel)
+    except Exception as e:
+        logger.debug(f"⚠️ [PEER_CACHE] resolve failed for {channel[:20]}...: {e}")
+        return None
+
+
 async def send_to_telegram_channels(
     client: Client,
     file_path: str,
@@ -55,6 +74,7 @@ async def send_to_telegram_channels(
     channels: List[str],  # רשימת peer_id_b64
     first_channel_peer_id_b64: Optional[str] = None,  # ערוץ ראשון להעלאה
     protected_channels: Optional[List[str]] = None,  # ערוצים מוגנים (peer_id_b64)
+    floodwait_retries: int = TELEGRAM_FLOODWAIT_MAX_RETRIES,  # 0 = לא להמתין ל-FloodWait (ל-failover)
     **kwargs  # פרמטרים נוספים (title, performer, duration, thumb, width, height)
 ) -> Dict[str, any]:
     """
@@ -69,10 +89,12 @@ async def send_to_telegram_channels(
         channels: רשימת peer_id_b64
         first_channel_peer_id_b64: peer_id_b64 של ערוץ ראשון להעלאה (אם None, משתמש בערוץ הראשון ברשימה)
         protected_channels: רשימת peer_id_b64 של ערוצים מוגנים שלא יוסרו גם אם הבדיקה נכשלת
+        floodwait_retries: ניסיונות חוזרים לערוץ אחרי FloodWait / SlowmodeWait
         **kwargs: פרמטרים נוספים (title, performer, duration, thumb, width, height)
     
     Returns:
-        מילון עם תוצאות: {'success': bool, 'uploaded_to': str, 'file_id': str, 'sent_to': List[str], 'errors': List[str]}
+        מילון עם תוצאות: {'success': bool, 'uploaded_to': str, 'file_id': str, 'sent_to': List[str], 'errors': List[str],
+                          'channel_results': List[dict] (תוצאה, ניסיונות ו-latency לכל ערוץ נוסף)}
     """
     if not channels:
         return {'success': False, 'error': 'No channels provided'}
@@ -104,7 +126,7 @@ async def send_to_telegram_channels(
         send_method = {
             'photo': client.send_photo,
             'audio': client.send_audio,
-            'video': client.send_video
+            'video': partial(send_video_parallel, client)  # וידאו גדול - העלאה מקבילית
         }.get(file_type)
         
         if not send_method:
@@ -125,34 +147,21 @@ async def send_to_telegram_channels(
                 logger.debug(f"📊 [TELEGRAM] Using regular channel ID: {peer_id}")
             else:
                 logger.debug(f"📊 [TELEGRAM] Using peer_id (bytes/str): {type(peer_id).__name__}")
-                # ננסה לחלץ legacy_id מהמאגר או מהמחרוזת המקורית
-                # קודם ננסה מהמאגר
-                try:
-                    from services.channels import channels_manager
-                    repository = channels_manager.get_repository("telegram")
-                    for item in repository:
-                        if isinstance(item, dict) and item.get("peer_id_b64") == upload_channel_peer_id_b64:
-                            if item.get("legacy_id"):
-                                legacy_id = int(item["legacy_id"])
-                                logger.debug(f"📊 [TELEGRAM] Found legacy_id from repository: {legacy_id}")
-                                break
-                except Exception as e:
-                    logger.debug(f"⚠️ [TELEGRAM] Could not get legacy_id from repository: {e}")
-                
-                # אם לא מצאנו במאגר, ננסה מהמחרוזת המקורית
-                if legacy_id is None:
-                    if upload_channel_peer_id_b64.startswith('-') or upload_channel_peer_id_b64.lstrip('-').isdigit():
-                        try:
-                            legacy_id = int(upload_channel_peer_id_b64)
-                            logger.debug(f"📊 [TELEGRAM] Extracted legacy_id from string: {legacy_id}")
-                        except ValueError:
-                            pass
+                # legacy_id מהאינדקס של ה-peer cache (מהמאגר או מהמחרוזת המקורית)
+                legacy_id = peer_cache.legacy_id_for(upload_channel_peer_id_b64)
+                if legacy_id is not None:
+                    logger.debug(f"📊 [TELEGRAM] Found legacy_id: {legacy_id}")
         except Exception as e:
             error_msg = f"Failed to decode peer_id: {e}"
             logger.error(f"❌ [TELEGRAM] {error_msg}")
             results['errors'].append(error_msg)
             return results
         
+        # chat_id שכבר נפתר (ה-peer ב-storage) - ללא round trips של פתרון
+        cached_chat_id = await _resolve_cached(client, upload_channel_peer_id_b64)
+        if cached_chat_id is not None:
+            legacy_id = cached_chat_id
+        
         # בניית פרמטרים - נשתמש ב-legacy_id אם יש (למניעת שגיאות השוואה)
         if legacy_id is not None:
             params = {
@@ -178,14 +187,26 @@ async def send_to_telegram_channels(
         logger.info(f"📤 [TELEGRAM] Sending {file_type} to channel (peer_id_b64: {upload_channel_peer_id_b64[:20]}...)")
         sent_message = None
         upload_successful = False
+        file_id_remembered = False
         
         try:
-            sent_message: Message = await send_method(**params)
+            await outbound_scheduler.acquire(client, params['chat_id'])
+            # אותו תוכן כבר הועלה ע"י ה-client? שליחה לפי file_id במקום העלאה חוזרת
+            sent_message: Message = await send_cached_media(
+                client, send_method, file_type, file_path,
+                **{key: value for key, value in params.items() if key != file_type}
+            )
+            # send_cached_media כבר שמר את ה-file_id
+            file_id_remembered = True
             upload_successful = True
             logger.info(f"✅ [TELEGRAM] Successfully sent using primary method")
         except Exception as upload_error:
             error_msg = f"Failed to upload to channel: {upload_error}"
             logger.warning(f"⚠️ [TELEGRAM] Primary method failed: {upload_error}")
+            if isinstance(upload_error, PeerIdInvalid):
+                peer_cache.invalidate(client, upload_channel_peer_id_b64)
+            # FloodWait חוסם את החשבון - ה-client pool יעביר את השליחה ל-client אחר
+            gate_for(client).handle_error(upload_error, upload_channel_peer_id_b64)
             
             # אם נכשל עם legacy_id, ננסה עם resolve_peer (אם זה bytes)
             if legacy_id is not None and isinstance(peer_id, bytes):
@@ -288,6 +309,12 @@ async def send_to_telegram_channels(
             return {'success': False, 'error': 'Could not extract file_id from sent message'}
         
         results['file_id'] = file_id
+        # מיקום הפוסט - מאפשר copy_message במקום העלאה חוזרת
+        results['chat_id'] = sent_message.chat.id if sent_message.chat else None
+        results['message_id'] = sent_message.id
+        if not file_id_remembered:
+            # נשלח באחד ממסלולי הגיבוי (send_method ישירות)
+            await file_id_cache.remember(client, file_path, file_type, sent_message)
         results['sent_to'].append(upload_channel_peer_id_b64)
         logger.info(f"✅ [TELEGRAM] Uploaded to channel, file_id: {file_id[:20]}...")
         
@@ -295,67 +322,81 @@ async def send_to_telegram_channels(
         if other_channels:
             logger.info(f"📤 [TELEGRAM] Sending to {len(other_channels)} additional channels using file_id")
             
-            for channel_peer_id_b64 in other_channels:
+            async def _send_one(channel_peer_id_b64: str):
+                # פענוח peer_id - ננסה גם peer_id_b64 וגם ID רגיל
+                peer_id = decode_peer_id(channel_peer_id_b64)
+                legacy_id = None
+                
+                # אם זה ID רגיל, נשמור אותו
+                if isinstance(peer_id, int):
+                    legacy_id = peer_id
+                # אם זה bytes, ננסה לחלץ ID רגיל מהמחרוזת המקורית
+                elif isinstance(peer_id, bytes):
+                    # ננסה לחלץ ID רגיל מהמחרוזת המקורית אם אפשר
+                    if channel_peer_id_b64.startswith('-') or channel_peer_id_b64.lstrip('-').isdigit():
+                        try:
+                            legacy_id = int(channel_peer_id_b64)
+                            logger.debug(f"📊 [TELEGRAM] Extracted legacy ID from bytes peer_id: {legacy_id}")
+                        except ValueError:
+                            pass
+                
+                # chat_id שכבר נפתר מה-peer cache
+                cached_chat_id = await _resolve_cached(client, channel_peer_id_b64)
+                if cached_chat_id is not None:
+                    legacy_id = cached_chat_id
+                
+                # ננסה קודם עם ID רגיל אם יש (למניעת שגיאות השוואה)
+                if legacy_id is not None:
+                    params = {
+                        'chat_id': legacy_id,  # שימוש ב-ID רגיל (int)
+                        file_type: file_id  # שימוש ב-file_id במקום נתיב
+                    }
+                else:
+                    params = {
+                        'chat_id': peer_id,  # שימוש ב-peer_id (bytes, int או str)
+                        file_type: file_id  # שימוש ב-file_id במקום נתיב
+                    }
+                
+                # הוספת caption רק אם הוא לא ריק
+                if caption and caption.strip():
+                    params['caption'] = caption
+                    logger.debug(f"📝 Adding caption to {file_type} using file_id ({len(caption)} characters)")
+                else:
+                    logger.warning(f"⚠️ Caption is empty or None for {file_type} - sending without caption")
+                
+                params.update(kwargs)
+                
+                # ננסה לשלוח - אם נכשל, ננסה עם peer_id המקורי
                 try:
-                    # פענוח peer_id - ננסה גם peer_id_b64 וגם ID רגיל
-                    peer_id = decode_peer_id(channel_peer_id_b64)
-                    legacy_id = None
-                    
-                    # אם זה ID רגיל, נשמור אותו
-                    if isinstance(peer_id, int):
-                        legacy_id = peer_id
-                    # אם זה bytes, ננסה לחלץ ID רגיל מהמחרוזת המקורית
-                    elif isinstance(peer_id, bytes):
-                        # ננסה לחלץ ID רגיל מהמחרוזת המקורית אם אפשר
-                        if channel_peer_id_b64.startswith('-') or channel_peer_id_b64.lstrip('-').isdigit():
-                            try:
-                                legacy_id = int(channel_peer_id_b64)
-                                logger.debug(f"📊 [TELEGRAM] Extracted legacy ID from bytes peer_id: {legacy_id}")
-                            except ValueError:
-                                pass
-                    
-                    # ננסה קודם עם ID רגיל אם יש (למניעת שגיאות השוואה)
-                    if legacy_id is not None:
-                        params = {
-                            'chat_id': legacy_id,  # שימוש ב-ID רגיל (int)
-                            file_type: file_id  # שימוש ב-file_id במקום נתיב
-                        }
-                    else:
-                        params = {
-                            'chat_id': peer_id,  # שימוש ב-peer_id (bytes, int או str)
-                            file_type: file_id  # שימוש ב-file_id במקום נתיב
-                        }
-                    
-                    # הוספת caption רק אם הוא לא ריק
-                    if caption and caption.strip():
-                        params['caption'] = caption
-                        logger.debug(f"📝 Adding caption to {file_type} using file_id ({len(caption)} characters)")
+                    await outbound_scheduler.acquire(client, params['chat_id'])
+                    await send_method(**params)
+                    logger.info(f"✅ [TELEGRAM] Sent to channel (peer_id_b64: {channel_peer_id_b64[:20]}...) using file_id")
+                except Exception as send_error:
+                    if isinstance(send_error, PeerIdInvalid):
+                        peer_cache.invalidate(client, channel_peer_id_b64)
+                    # אם נכשל עם ID רגיל, ננסה עם peer_id המקורי (bytes)
+                    # (לא ב-FloodWait - fan_out ימתין וינסה שוב)
+                    if legacy_id is not None and isinstance(peer_id, bytes) and not isinstance(send_error, (FloodWait, SlowmodeWait)):
+                        try:
+                            logger.info(f"🔄 [TELEGRAM] Trying with bytes peer_id for channel")
+                            params['chat_id'] = peer_id
+                            await send_method(**params)
+                            logger.info(f"✅ [TELEGRAM] Sent to channel using bytes peer_id")
+                        except Exception as bytes_error:
+                            raise send_error  # נזרוק את השגיאה המקורית
                     else:
-                        logger.warning(f"⚠️ Caption is empty or None for {file_type} - sending without caption")
-                    
-                    params.update(kwargs)
-                    
-                    # ננסה לשלוח - אם נכשל, ננסה עם peer_id המקורי
-                    try:
-                        await send_method(**params)
-                        results['sent_to'].append(channel_peer_id_b64)
-                        logger.info(f"✅ [TELEGRAM] Sent to channel (peer_id_b64: {channel_peer_id_b64[:20]}...) using file_id")
-                    except Exception as send_error:
-                        # אם נכשל עם ID רגיל, ננסה עם peer_id המקורי (bytes)
-                        if legacy_id is not None and isinstance(peer_id, bytes):
-                            try:
-                                logger.info(f"🔄 [TELEGRAM] Trying with bytes peer_id for channel")
-                                params['chat_id'] = peer_id
-                                await send_method(**params)
-                                results['sent_to'].append(channel_peer_id_b64)
-                                logger.info(f"✅ [TELEGRAM] Sent to channel using bytes peer_id")
-                            except Exception as bytes_error:
-                                raise send_error  # נזרוק את השגיאה המקורית
-                        else:
-                            raise send_error
-                    
-                except Exception as e:
-                    error_msg = f"Failed to send to channel: {str(e)}"
+                        raise send_error
+            
+            # שליחה מקבילית עם הגבלת in-flight ו-FloodWait (ראה fanout.py)
+            channel_results = await fan_out(
+                other_channels, _send_one, max_retries=floodwait_retries, gate=gate_for(client)
+            )
+            results['channel_results'] = [r.to_dict() for r in channel_results]
+            for channel_result in channel_results:
+                if channel_result.success:
+                    results['sent_to'].append(channel_result.channel)
+                else:
+                    error_msg = f"Failed to send to channel: {channel_result.error}"
                     results['errors'].append(error_msg)
                     logger.error(f"❌ [TELEGRAM] {error_msg}")
         
@@ -371,6 +412,31 @@ async def send_to_telegram_channels(
     return results
 
 
+def _whatsapp_targets(groups: List[str], caption: str, session=None) -> List[Tuple[str, str]]:
+    """(קבוצה, caption) לכל קבוצה - ל"הסטטוס שלי" תבנית whatsapp_status"""
+    from services.templates import template_manager
+    
+    targets = []
+    for group in groups:
+        # בדיקה אם זה "הסטטוס שלי" - אם כן, נשתמש בתבנית whatsapp_status
+        current_caption = caption
+        if group == "הסטטוס שלי" and session:
+            try:
+                # יצירת תבנית status עם המידע מה-session
+                current_caption = template_manager.render(
+                    "whatsapp_status",
+                    song_name=session.song_name if hasattr(session, 'song_name') else "",
+                    artist_name=session.artist_name if hasattr(session, 'artist_name') else "",
+                    youtube_url=session.youtube_url if hasattr(session, 'youtube_url') else ""
+                )
+                logger.info("📱 [WHATSAPP] Using whatsapp_status template for status")
+            except Exception as e:
+                logger.warning(f"⚠️ [WHATSAPP] Failed to render status template, using default: {e}")
+                # נמשיך עם התבנית הרגילה
+        targets.append((group, current_caption))
+    return targets
+
+
 async def send_to_whatsapp_groups(
     whatsapp_delivery,
     file_path: str,
@@ -382,10 +448,10 @@ async def send_to_whatsapp_groups(
     session = None  # session object למילוי תבנית status אם נדרש
 ) -> Dict[str, any]:
     """
-    שליחה לוואטסאפ - העלאה מחדש לכל קבוצה (כדי להימנע מ-"Forwarded")
+    שליחה לוואטסאפ - בקשת broadcast אחת, הודעה נפרדת לכל קבוצה (כדי להימנע מ-"Forwarded")
     
     Args:
-        whatsapp_delivery: WhatsAppDelivery instance
+        whatsapp_delivery: WhatsAppDelivery instance (בדרך כלל whatsapp_client המשותף)
         file_path: נתיב הקובץ המקומי
         file_type: סוג הקובץ ('image', 'audio', 'video')
         caption: כותרת להודעה
@@ -395,7 +461,8 @@ async def send_to_whatsapp_groups(
         session: session object למילוי תבנית status אם נדרש
     
     Returns:
-        מילון עם תוצאות: {'success': bool, 'sent_to': List[str], 'errors': List[str]}
+        מילון עם תוצאות: {'success': bool, 'sent_to': List[str], 'errors': List[str], 'queued': List[str]}
+        (queued - קבוצות שנכשלו ונוספו לתור לשליחה חוזרת)
     """
     if not groups:
         return {'success': False, 'error': 'No groups provided'}
@@ -403,69 +470,80 @@ async def send_to_whatsapp_groups(
     results = {
         'success': False,
         'sent_to': [],
-        'errors': []
+        'errors': [],
+        'queued': []
     }
     
-    logger.info(f"📱 [WHATSAPP] Sending {file_type} to {len(groups)} groups (re-uploading for each)")
+    logger.info(f"📱 [WHATSAPP] Sending {file_type} to {len(groups)} groups (one broadcast request)")
     
     # הערה: אם רוצים לחסוך bandwidth, אפשר להשתמש ב-msg.forward(chatId)
     # אבל זה יוסיף את הסימון "Forwarded"
     
-    import asyncio
-    loop = asyncio.get_event_loop()
+    targets = _whatsapp_targets(groups, caption, session)
+    link = getattr(session, 'youtube_url', None) or None
     
-    from services.templates import template_manager
+    from services.whatsapp.routing import routed_broadcast
     
-    for group in groups:
-        try:
-            logger.info(f"📤 [WHATSAPP] Sending to group: {group}")
-            
-            # בדיקה אם זה "הסטטוס שלי" - אם כן, נשתמש בתבנית whatsapp_status
-            current_caption = caption
-            if group == "הסטטוס שלי" and session:
-                try:
-                    # יצירת תבנית status עם המידע מה-session
-                    current_caption = template_manager.render(
-                        "whatsapp_status",
-                        song_name=session.song_name if hasattr(session, 'song_name') else "",
-                        artist_name=session.artist_name if hasattr(session, 'artist_name') else "",
-                        youtube_url=session.youtube_url if hasattr(session, 'youtube_url') else ""
-                    )
-                    logger.info("📱 [WHATSAPP] Using whatsapp_status template for status")
-                except Exception as e:
-                    logger.warning(f"⚠️ [WHATSAPP] Failed to render status template, using default: {e}")
-                    # נמשיך עם התבנית הרגילה
-            
-            # send_file היא sync, אז נריץ אותה ב-executor
-            result = await loop.run_in_executor(
-                None,
-                whatsapp_delivery.send_file,
-                file_path,
-                group,
-                current_caption,
-                file_type,
-                telegram_user_id,
-                telegram_fallback_callback
-            )
-            
-            if result.get('success'):
-                results['sent_to'].append(group)
-                logger.info(f"✅ [WHATSAPP] Successfully sent to {group}")
-            else:
-                error_msg = f"Failed to send to {group}: {result.get('error', 'Unknown error')}"
-                results['errors'].append(error_msg)
-                logger.error(f"❌ [WHATSAPP] {error_msg}")
-                
-        except Exception as e:
-            error_msg = f"Failed to send to {group}: {str(e)}"
+    # בקשה אחת לכל אופן שליחה (וידאו מוטמע / מסמך / קליפ - לפי הקבוצה): השירות מכין את המדיה
+    # פעם אחת ושולח לכל הקבוצות (במקביל מוגבל, עם השהיות)
+    broadcast = await routed_broadcast(
+        whatsapp_delivery,
+        file_path=file_path,
+        targets=targets,
+        file_type=file_type,
+        telegram_user_id=telegram_user_id,
+        telegram_fallback_callback=telegram_fallback_callback,
+        link=link
+    )
+    
+    from services.whatsapp.outbox import whatsapp_outbox, is_retryable
+    
+    retry_targets = []
+    for (group, current_caption), group_result in zip(targets, broadcast.get('results', [])):
+        if group_result.get('success'):
+            results['sent_to'].append(group)
+            logger.info(f"✅ [WHATSAPP] Successfully sent to {group}")
+        else:
+            error_msg = f"Failed to send to {group}: {group_result.get('error', 'Unknown error')}"
             results['errors'].append(error_msg)
-            logger.error(f"❌ [WHATSAPP] {error_msg}", exc_info=True)
+            logger.error(f"❌ [WHATSAPP] {error_msg}")
+            if is_retryable(group_result.get('error')):
+                retry_targets.append((group, current_caption))
     
     results['success'] = len(results['sent_to']) > 0
     
+    # שליחות שנכשלו בשגיאה זמנית - לתור על הדיסק, יישלחו שוב כשהשירות יחזור
+    if retry_targets:
+        results['queued'] = await whatsapp_outbox.enqueue(
+            file_path, file_type, retry_targets, telegram_user_id=telegram_user_id, error=results['errors'][-1],
+            link=link
+        )
+    
     if results['success']:
         logger.info(f"✅ [WHATSAPP] Successfully sent to {len(results['sent_to'])}/{len(groups)} groups")
     else:
         logger.error(f"❌ [WHATSAPP] Failed to send to any group")
     
     return results
+
+
+async def queue_whatsapp_groups(
+    file_path: str,
+    file_type: str,
+    caption: str,
+    groups: List[str],
+    telegram_user_id: Optional[int] = None,
+    session = None,
+    error: Optional[str] = None
+) -> List[str]:
+    """
+    הוספת כל הקבוצות לתור השליחה החוזרת בלי לנסות עכשיו (השירות לא מוכן)
+    
+    Returns:
+        הקבוצות שנוספו לתור
+    """
+    from services.whatsapp.outbox import whatsapp_outbox
+    return await whatsapp_outbox.enqueue(
+        file_path, file_type, _whatsapp_targets(groups, caption, session),
+        telegram_user_id=telegram_user_id, error=error, link=getattr(session, 'youtube_url', None) or None
+    )
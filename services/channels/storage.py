@@ -18,6 +18,8 @@ class ChannelsStorage:
     
     def __init__(self, file_path: str = "channels.json"):
         self.file_path = Path(file_path)
+        # מונה שינויים - עולה בכל save, כדי ש-caches נגזרים (peer_cache) יידעו להתרענן
+        self.revision = 0
         self.data = self._load()
     
     def _load(self) -> Dict[str, Any]:
@@ -40,6 +42,8 @@ class ChannelsStorage:
                 "telegram": [],  # רשימת ערוצי טלגרם - כל ערך הוא dict עם peer_id_b64 ו-title
                 "whatsapp": []   # רשימת קבוצות וואטסאפ (נשאר string - שם קבוצה)
             },
+            # שם קבוצת וואטסאפ → chat ID יציב (xxx@g.us), נפתר פעם אחת מול השירות
+            "whatsapp_chat_ids": {},
             "template_links": {
                 # כל תבנית יכולה להיות מקושרת לערוצים/קבוצות מהמאגר
                 # "telegram_image": {"telegram": ["peer_id_b64_1", "peer_id_b64_2"], "whatsapp": []},
@@ -64,6 +68,9 @@ class ChannelsStorage:
         if "template_links" not in data:
             data["template_links"] = {}
         
+        if "whatsapp_chat_ids" not in data:
+            data["whatsapp_chat_ids"] = {}
+        
         # מיגרציה: אם יש ערכים ישנים (strings), נמיר אותם
         # זה יקרה רק פעם אחת
         self._migrate_old_format(data)
@@ -125,6 +132,7 @@ class ChannelsStorage:
     
     def save(self):
         """שומר נתונים לקובץ"""
+        self.revision += 1
         try:
             with open(self.file_path, 'w', encoding='utf-8') as f:
                 json.dump(self.data, f, ensure_ascii=False, indent=2)
@@ -239,6 +247,7 @@ class ChannelsStorage:
             # עבור whatsapp - נשאר string
             if peer_id_b64 in self.data["repository"][platform]:
                 self.data["repository"][platform].remove(peer_id_b64)
+                self.data["whatsapp_chat_ids"].pop(peer_id_b64, None)
                 # הסרה גם מכל הקישורים לתבניות
                 self._remove_from_all_template_links(platform, peer_id_b64)
                 self.save()
@@ -246,6 +255,24 @@ class ChannelsStorage:
             else:
                 logger.warning(f"{platform} group not found: {peer_id_b64}")
     
+    def get_whatsapp_chat_id(self, group_name: str) -> Optional[str]:
+        """chat ID שמור של קבוצת וואטסאפ (או None אם עוד לא נפתר)"""
+        return self.data["whatsapp_chat_ids"].get(group_name)
+    
+    def set_whatsapp_chat_id(self, group_name: str, chat_id: str):
+        """
+        שמירת chat ID של קבוצת וואטסאפ ליד שם התצוגה
+        
+        Args:
+            group_name: שם הקבוצה (כפי שמופיע במאגר ובתבניות)
+            chat_id: ID יציב מהשירות (xxx@g.us)
+        """
+        if self.data["whatsapp_chat_ids"].get(group_name) == chat_id:
+            return
+        self.data["whatsapp_chat_ids"][group_name] = chat_id
+        self.save()
+        logger.info(f"WhatsApp group '{group_name}' resolved to {chat_id}")
+    
     def _remove_from_all_template_links(self, platform: str, peer_id_b64: str):
         """מסיר ערוץ/קבוצה מכל הקישורים לתבניות"""
         for template_name, links in self.data["template_links"].items():
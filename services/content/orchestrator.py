@@ -10,7 +10,7 @@ from pyrogram.types import Message
 from pyrogram.errors import PeerIdInvalid
 
 from core import (
-    WHATSAPP_ENABLED, WHATSAPP_CHAT_NAME, WHATSAPP_DRY_RUN,
+    WHATSAPP_ENABLED, WHATSAPP_CHAT_NAME,
     PUBLISH_TO_CHANNELS, AUDIO_CONTENT_CHANNEL_ID, VIDEO_CONTENT_CHANNEL_ID,
     executor_manager, DOWNLOADS_PATH, TELEGRAM_MAX_FILE_SIZE_MB,
     WHATSAPP_MAX_FILE_SIZE_BYTES
@@ -22,22 +22,82 @@ from services.media import (
     fetch_youtube_thumbnail,
     prepare_telegram_thumbnail,
     prepare_mp3_thumbnail,
+    generate_video_thumbnail,
     build_target_filename,
     create_upload_copy
 )
 from services.media.ffmpeg_utils import get_video_duration
+from services.media.ffmpeg.whatsapp_ready import ensure_whatsapp_ready
 from services.media.downloaders.video_downloader import download_video_with_retry
 from services.templates import template_manager
 from core.context import get_context
 from services.content.progress_tracker import ProgressTracker
-from services.channels import channels_manager, send_to_telegram_channels, send_to_whatsapp_groups
-from services.whatsapp.delivery import WhatsAppDelivery
+from services.content.status_renderer import get_status_renderer, release_status_renderer
+from services.channels import channels_manager, send_to_whatsapp_groups, queue_whatsapp_groups
+from services.delivery import (
+    create_telegram_fallback_callback,
+    send_failed_whatsapp_files_to_user,
+    remember_channel_post,
+    publish_channel_posts
+)
+from services.channels.client_pool import send_to_telegram_channels_pooled
+from services.whatsapp import whatsapp_client, WhatsAppDeliveryError, media_router
 # Import common functions
 from .common import get_progress_stage, create_progress_bar, _import_cleanup
 
 logger = logging.getLogger(__name__)
 
 
+async def _prepare_video_thumbnail(session, video_path: str, youtube_url: str = None):
+    """
+    מכין thumbnail ו-dimensions לוידאו במקביל:
+    - thumbnail מקומי מפריים של הוידאו (JPEG מוכן לטלגרם, ללא רשת)
+    - fallback ל-thumbnail של YouTube רק אם החילוץ המקומי נכשל
+    
+    Returns:
+        (thumb_path, width, height) - כל אחד יכול להיות None
+    """
+    video_thumb_path = None
+    video_width = None
+    video_height = None
+    
+    try:
+        logger.info("📐🎞️ [TELEGRAM] מחלץ ממדי וידאו ו-thumbnail מפריים...")
+        dimensions, video_thumb_path = await asyncio.gather(
+            get_video_dimensions(video_path),
+            generate_video_thumbnail(video_path)
+        )
+        if dimensions:
+            video_width, video_height = dimensions
+            logger.info(f"✅ [TELEGRAM] ממדי וידאו: {video_width}x{video_height}")
+        else:
+            logger.warning("⚠️ [TELEGRAM] לא ניתן לחלץ ממדי וידאו")
+        
+        if video_thumb_path:
+            session.add_file_for_cleanup(video_thumb_path)
+            logger.info(f"✅ [TELEGRAM] Thumbnail מוכן: {video_thumb_path}")
+        elif youtube_url and video_width and video_height:
+            logger.info("🖼️ [YOUTUBE] חילוץ פריים נכשל, מוריד thumbnail...")
+            raw_thumbnail = await fetch_youtube_thumbnail(url=youtube_url, cookies_path="cookies.txt")
+            if raw_thumbnail:
+                session.add_file_for_cleanup(raw_thumbnail)
+                video_thumb_path = await prepare_telegram_thumbnail(
+                    input_image_path=raw_thumbnail,
+                    video_aspect_ratio=video_width / video_height
+                )
+                if video_thumb_path:
+                    session.add_file_for_cleanup(video_thumb_path)
+                    logger.info(f"✅ [TELEGRAM] Thumbnail מוכן: {video_thumb_path}")
+            else:
+                logger.warning("⚠️ [YOUTUBE] הורדת thumbnail נכשלה")
+        else:
+            logger.warning("⚠️ [TELEGRAM] הכנת thumbnail נכשלה")
+    except Exception as e:
+        logger.error(f"❌ [TELEGRAM] שגיאה בהכנת thumbnail/dimensions: {e}", exc_info=True)
+    
+    return video_thumb_path, video_width, video_height
+
+
 # ========== עיבוד התוכן ==========
 
 async def process_content(client: Client, message: Message, session, status_msg: Message):
@@ -95,9 +155,8 @@ async def process_content(client: Client, message: Message, session, status_msg:
         session.add_file_for_cleanup(upload_image_path)  # למחיקה אחרי העלאה
         logger.info(f"✅ Created image copy for upload: {target_image_name}")
         
-        # ========== שלב 2: עיבוד MP3 ==========
+        # ========== שלב 2: עיבוד MP3 (ברקע) ==========
         await tracker.update_status("הורדה של סינגל", 12, 1)
-        logger.info(f"🎵 Updating MP3 tags for user {user_id}")
         
         metadata = {
             'title': session.song_name,
@@ -130,19 +189,73 @@ async def process_content(client: Client, message: Message, session, status_msg:
         )
         output_mp3_path = DOWNLOADS_PATH / target_mp3_name
         
-        processed_mp3 = await update_mp3_tags(
-            mp3_path=session.mp3_path,
-            image_path=session.image_path,  # תמונה מקורית (לא המעובדת)
-            metadata=metadata,
-            output_path=str(output_mp3_path)
-        )
+        async def _tag_mp3() -> str:
+            logger.info(f"🎵 Updating MP3 tags for user {user_id}")
+            processed_mp3 = await update_mp3_tags(
+                mp3_path=session.mp3_path,
+                image_path=session.image_path,  # תמונה מקורית (לא המעובדת)
+                metadata=metadata,
+                output_path=str(output_mp3_path)
+            )
+            
+            if not processed_mp3:
+                raise Exception("Failed to update MP3 tags")
+            
+            session.processed_mp3_path = processed_mp3
+            session.add_file_for_cleanup(processed_mp3)
+            logger.info(f"✅ MP3 tags updated: {processed_mp3}")
+            
+            mp3_size_mb = os.path.getsize(processed_mp3) / (1024 * 1024)
+            logger.info(f"ℹ️ [TELEGRAM] גודל MP3: {mp3_size_mb:.2f} MB")
+            
+            # בדיקת גודל מקסימלי ל-Telegram (2GB)
+            if mp3_size_mb > TELEGRAM_MAX_FILE_SIZE_MB:
+                raise Exception(f"MP3 גדול מדי ל-Telegram: {mp3_size_mb:.2f}MB > {TELEGRAM_MAX_FILE_SIZE_MB}MB")
+            return processed_mp3
+        
+        # הכנת thumbnail ל-MP3 (JPEG ≤320px, ממירה ומקטינה את התמונה המקורית)
+        async def _prepare_mp3_thumb():
+            try:
+                logger.info("🎨 [TELEGRAM] מכין thumbnail ל-MP3...")
+                mp3_thumb_path = await prepare_mp3_thumbnail(
+                    input_image_path=session.image_path  # תמונה מקורית
+                )
+                
+                if mp3_thumb_path:
+                    session.add_file_for_cleanup(mp3_thumb_path)
+                    logger.info(f"✅ [TELEGRAM] MP3 thumbnail מוכן: {mp3_thumb_path}")
+                else:
+                    logger.warning("⚠️ [TELEGRAM] הכנת MP3 thumbnail נכשלה")
+                return mp3_thumb_path
+            except Exception as e:
+                logger.error(f"❌ [TELEGRAM] שגיאה בהכנת MP3 thumbnail: {e}", exc_info=True)
+                return None
+        
+        # משך הזמן של ה-MP3 (לצורך הצגה בטלגרם) - מהקובץ המקורי, התיוג לא משנה אותו
+        async def _probe_mp3_duration():
+            try:
+                logger.info("⏱️ [TELEGRAM] מחלץ משך זמן של MP3...")
+                mp3_duration = await get_video_duration(session.mp3_path)
+                if mp3_duration:
+                    logger.info(f"✅ [TELEGRAM] משך זמן MP3: {int(mp3_duration)} שניות ({int(mp3_duration//60)}:{int(mp3_duration%60):02d})")
+                else:
+                    logger.warning("⚠️ [TELEGRAM] לא ניתן לחלץ משך זמן MP3")
+                return mp3_duration
+            except Exception as e:
+                logger.error(f"❌ [TELEGRAM] שגיאה בחילוץ משך זמן MP3: {e}", exc_info=True)
+                return None
         
-        if not processed_mp3:
-            raise Exception("Failed to update MP3 tags")
+        # כל תוצר נשלח ברגע שהקלט שלו מוכן: התמונה לא ממתינה לתיוג / thumbnail / משך של ה-MP3
+        mp3_task = asyncio.create_task(_tag_mp3())
+        mp3_thumb_task = asyncio.create_task(_prepare_mp3_thumb())
+        mp3_duration_task = asyncio.create_task(_probe_mp3_duration())
         
-        session.processed_mp3_path = processed_mp3
-        session.add_file_for_cleanup(processed_mp3)
-        logger.info("✅ MP3 tags updated: {processed_mp3}")
+        async def _tagged_mp3():
+            """ה-MP3 המתויג, או None אם התיוג נכשל (השגיאה עצמה עולה אחרי שליחת התמונה)"""
+            try:
+                return await mp3_task
+            except Exception:
+                return None
         
         # ========== שלב 3: הורדת וידאו ברקע ==========
         video_download_task = None
@@ -195,240 +308,163 @@ async def process_content(client: Client, message: Message, session, status_msg:
             logger.error(f"❌ [TELEGRAM] קובץ תמונה לא נמצא: {image_to_send}")
             raise Exception(f"Image file not found: {image_to_send}")
         
-        mp3_to_send = session.processed_mp3_path
-        if not mp3_to_send or not os.path.exists(mp3_to_send):
-            logger.error(f"❌ [TELEGRAM] קובץ MP3 לא נמצא: {mp3_to_send}")
-            raise Exception(f"MP3 file not found: {mp3_to_send}")
-        
-        mp3_size_mb = os.path.getsize(mp3_to_send) / (1024 * 1024)
-        logger.info(f"ℹ️ [TELEGRAM] גודל MP3: {mp3_size_mb:.2f} MB")
-        
-        # בדיקת גודל מקסימלי ל-Telegram (2GB)
-        if mp3_size_mb > TELEGRAM_MAX_FILE_SIZE_MB:
-            raise Exception(f"MP3 גדול מדי ל-Telegram: {mp3_size_mb:.2f}MB > {TELEGRAM_MAX_FILE_SIZE_MB}MB")
-        
-        # הכנת thumbnail ל-MP3 (JPEG ≤320px, ממירה ומקטינה את התמונה המקורית)
-        mp3_thumb_path = None
-        try:
-            logger.info("🎨 [TELEGRAM] מכין thumbnail ל-MP3...")
-            mp3_thumb_path = await prepare_mp3_thumbnail(
-                input_image_path=session.image_path  # תמונה מקורית
-            )
-            
-            if mp3_thumb_path:
-                session.add_file_for_cleanup(mp3_thumb_path)
-                logger.info(f"✅ [TELEGRAM] MP3 thumbnail מוכן: {mp3_thumb_path}")
-            else:
-                logger.warning("⚠️ [TELEGRAM] הכנת MP3 thumbnail נכשלה")
-        except Exception as e:
-            logger.error(f"❌ [TELEGRAM] שגיאה בהכנת MP3 thumbnail: {e}", exc_info=True)
-        
-        # קבלת משך הזמן של ה-MP3 (לצורך הצגה בטלגרם)
-        mp3_duration = None
-        try:
-            logger.info("⏱️ [TELEGRAM] מחלץ משך זמן של MP3...")
-            mp3_duration = await get_video_duration(session.processed_mp3_path)
-            if mp3_duration:
-                logger.info(f"✅ [TELEGRAM] משך זמן MP3: {int(mp3_duration)} שניות ({int(mp3_duration//60)}:{int(mp3_duration%60):02d})")
-            else:
-                logger.warning("⚠️ [TELEGRAM] לא ניתן לחלץ משך זמן MP3")
-        except Exception as e:
-            logger.error(f"❌ [TELEGRAM] שגיאה בחילוץ משך זמן MP3: {e}", exc_info=True)
-        
-        # עדכון סטטוס - לא שולחים למשתמש, רק לערוצים
-        tracker.upload_status['telegram']['image'] = True
-        tracker.upload_status['telegram']['audio'] = True
-        tracker.upload_progress['telegram']['image'] = 100
-        tracker.upload_progress['telegram']['audio'] = 100
+        # עדכון סטטוס - לא שולחים למשתמש, רק לערוצים (ההתקדמות מתעדכנת לפי bytes שהועלו)
         await tracker.update_status("העלאת סינגל לטלגרם", 67, 0)
         
         # ========== העלאה לערוצי טלגרם (תמונה + MP3) ==========
-        if PUBLISH_TO_CHANNELS:
-            try:
-                # ⚡ שימוש ב-Userbot לפרסום בערוצים
-                channel_client = userbot if userbot else bot
-                logger.info(f"ℹ️ [TELEGRAM → CHANNEL] משתמש ב-{'Userbot' if userbot else 'Bot'} לפרסום")
+        async def _deliver_single_to_telegram():
+            if PUBLISH_TO_CHANNELS:
+                try:
+                    # ⚡ שימוש ב-Userbot לפרסום בערוצים
+                    channel_client = userbot if userbot else bot
+                    logger.info(f"ℹ️ [TELEGRAM → CHANNEL] משתמש ב-{'Userbot' if userbot else 'Bot'} לפרסום")
                 
-                # איסוף רשימת ערוצים: רק מהמאגר (המשתמש מוסיף בעצמו)
-                telegram_channels = []
+                    # איסוף רשימת ערוצים: רק מהמאגר (המשתמש מוסיף בעצמו)
+                    telegram_channels = []
                 
-                # ערוצים מהמאגר (לפי תבנית telegram_image)
-                template_channels = channels_manager.get_template_channels("telegram_image", "telegram")
-                if template_channels:
-                    telegram_channels.extend(template_channels)
+                    # ערוצים מהמאגר (לפי תבנית telegram_image)
+                    template_channels = channels_manager.get_template_channels("telegram_image", "telegram")
+                    if template_channels:
+                        telegram_channels.extend(template_channels)
                 
-                # הסרת כפילויות
-                telegram_channels = list(dict.fromkeys(telegram_channels))
+                    # הסרת כפילויות
+                    telegram_channels = list(dict.fromkeys(telegram_channels))
                 
-                # שליחה רק אם יש ערוצים מהמאגר
-                if telegram_channels:
-                    logger.info(f"📢 [TELEGRAM → CHANNEL] מעלה תוכן אודיו ל-{len(telegram_channels)} ערוצים")
-                    logger.info(f"📋 [TELEGRAM → CHANNEL] רשימת ערוצים (peer_id_b64): {[ch[:20] + '...' if len(ch) > 20 else ch for ch in telegram_channels]}")
-                    
-                    # שליחת תמונה
-                    logger.info("📤 [TELEGRAM → CHANNEL] שלב 1/2 - שולח תמונה")
-                    channel_image_caption = template_manager.render(
-                        "telegram_image",
-                        song_name=session.song_name,
-                        artist_name=session.artist_name,
-                        year=session.year,
-                        composer=session.composer,
-                        arranger=session.arranger,
-                        mixer=session.mixer,
-                        credits=credits_text,
-                        youtube_url=session.youtube_url
-                    )
-                    
-                    image_result = await send_to_telegram_channels(
-                        client=channel_client,
-                        file_path=image_to_send,
-                        file_type='photo',
-                        caption=channel_image_caption,
-                        channels=telegram_channels,
-                        first_channel_peer_id_b64=None,
-                        protected_channels=[]
-                    )
-                    
-                    if image_result['success']:
-                        logger.info(f"✅ [TELEGRAM → CHANNEL] תמונה נשלחה ל-{len(image_result['sent_to'])} ערוצים")
-                    else:
-                        logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בשליחת תמונה: {image_result.get('error')}")
-                    
-                    # שליחת MP3
-                    logger.info("📤 [TELEGRAM → CHANNEL] שלב 2/2 - שולח MP3")
-                    channel_audio_caption = template_manager.render(
-                        "telegram_audio",
-                        song_name=session.song_name,
-                        artist_name=session.artist_name,
-                        year=session.year,
-                        composer=session.composer,
-                        arranger=session.arranger,
-                        mixer=session.mixer,
-                        credits=credits_text,
-                        youtube_url=session.youtube_url
-                    )
-                    
-                    audio_kwargs = {
-                        'title': session.song_name,
-                        'performer': session.artist_name
-                    }
-                    
-                    if mp3_thumb_path and os.path.exists(mp3_thumb_path):
-                        audio_kwargs['thumb'] = mp3_thumb_path
+                    # שליחה רק אם יש ערוצים מהמאגר
+                    if telegram_channels:
+                        logger.info(f"📢 [TELEGRAM → CHANNEL] מעלה תוכן אודיו ל-{len(telegram_channels)} ערוצים")
+                        logger.info(f"📋 [TELEGRAM → CHANNEL] רשימת ערוצים (peer_id_b64): {[ch[:20] + '...' if len(ch) > 20 else ch for ch in telegram_channels]}")
                     
-                    if mp3_duration:
-                        audio_kwargs['duration'] = int(mp3_duration)
+                        async def _send_image():
+                            logger.info("📤 [TELEGRAM → CHANNEL] שולח תמונה")
+                            channel_image_caption = template_manager.render(
+                                "telegram_image",
+                                song_name=session.song_name,
+                                artist_name=session.artist_name,
+                                year=session.year,
+                                composer=session.composer,
+                                arranger=session.arranger,
+                                mixer=session.mixer,
+                                credits=credits_text,
+                                youtube_url=session.youtube_url
+                            )
+                        
+                            image_result = await send_to_telegram_channels_pooled(
+                                client=channel_client,
+                                file_path=image_to_send,
+                                file_type='photo',
+                                caption=channel_image_caption,
+                                channels=telegram_channels,
+                                first_channel_peer_id_b64=None,
+                                protected_channels=[],
+                                progress=tracker.upload_callback('telegram', 'image')
+                            )
+                            tracker.mark_completed('telegram', 'image', image_result['success'])
+                            remember_channel_post(session, 'photo', image_result, channel_client)
+                        
+                            if image_result['success']:
+                                logger.info(f"✅ [TELEGRAM → CHANNEL] תמונה נשלחה ל-{len(image_result['sent_to'])} ערוצים")
+                            else:
+                                logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בשליחת תמונה: {image_result.get('error')}")
                     
-                    audio_result = await send_to_telegram_channels(
-                        client=channel_client,
-                        file_path=session.processed_mp3_path,
-                        file_type='audio',
-                        caption=channel_audio_caption,
-                        channels=telegram_channels,
-                        first_channel_peer_id_b64=None,
-                        protected_channels=[],
-                        **audio_kwargs
-                    )
+                        async def _send_audio():
+                            mp3_path = await _tagged_mp3()
+                            if not mp3_path:
+                                tracker.mark_completed('telegram', 'audio', False)
+                                return
+                            logger.info("📤 [TELEGRAM → CHANNEL] שולח MP3")
+                            channel_audio_caption = template_manager.render(
+                                "telegram_audio",
+                                song_name=session.song_name,
+                                artist_name=session.artist_name,
+                                year=session.year,
+                                composer=session.composer,
+                                arranger=session.arranger,
+                                mixer=session.mixer,
+                                credits=credits_text,
+                                youtube_url=session.youtube_url
+                            )
+                        
+                            audio_kwargs = {
+                                'title': session.song_name,
+                                'performer': session.artist_name
+                            }
+                        
+                            mp3_thumb_path = await mp3_thumb_task
+                            if mp3_thumb_path and os.path.exists(mp3_thumb_path):
+                                audio_kwargs['thumb'] = mp3_thumb_path
+                        
+                            mp3_duration = await mp3_duration_task
+                            if mp3_duration:
+                                audio_kwargs['duration'] = int(mp3_duration)
+                        
+                            audio_kwargs['progress'] = tracker.upload_callback('telegram', 'audio')
+                            audio_result = await send_to_telegram_channels_pooled(
+                                client=channel_client,
+                                file_path=mp3_path,
+                                file_type='audio',
+                                caption=channel_audio_caption,
+                                channels=telegram_channels,
+                                first_channel_peer_id_b64=None,
+                                protected_channels=[],
+                                **audio_kwargs
+                            )
+                            tracker.mark_completed('telegram', 'audio', audio_result['success'])
+                            remember_channel_post(session, 'audio', audio_result, channel_client)
+                        
+                            if audio_result['success']:
+                                logger.info(f"✅ [TELEGRAM → CHANNEL] MP3 נשלח ל-{len(audio_result['sent_to'])} ערוצים")
+                            else:
+                                logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בשליחת MP3: {audio_result.get('error')}")
                     
-                    if audio_result['success']:
-                        logger.info(f"✅ [TELEGRAM → CHANNEL] MP3 נשלח ל-{len(audio_result['sent_to'])} ערוצים")
+                        # התמונה יוצאת מיד; ה-MP3 יוצא כשהתיוג, ה-thumbnail והמשך שלו מוכנים
+                        await asyncio.gather(_send_image(), _send_audio())
                     else:
-                        logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בשליחת MP3: {audio_result.get('error')}")
-                else:
-                    logger.info("ℹ️ [TELEGRAM → CHANNEL] אין ערוצים להעלאה")
+                        logger.info("ℹ️ [TELEGRAM → CHANNEL] אין ערוצים להעלאה")
+                        tracker.mark_completed('telegram', 'image')
+                        tracker.mark_completed('telegram', 'audio')
                 
-            except Exception as e:
-                logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בפרסום לערוצים: {e}", exc_info=True)
-        else:
-            logger.info("ℹ️ [TELEGRAM → CHANNEL] פרסום לערוצים מנוטרל")
+                except Exception as e:
+                    logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בפרסום לערוצים: {e}", exc_info=True)
+            else:
+                logger.info("ℹ️ [TELEGRAM → CHANNEL] פרסום לערוצים מנוטרל")
+                tracker.mark_completed('telegram', 'image')
+                tracker.mark_completed('telegram', 'audio')
         
         # ========== Telegram Fallback Callback ==========
-        def telegram_fallback_callback(user_id: int, file_path: str, template_text: str, failure_summary: str) -> bool:
-            """
-            Callback function for sending failed WhatsApp files back to user via Telegram
-            """
-            try:
-                logger.info(f"📨 [TELEGRAM FALLBACK] Sending failed file to user {user_id}")
-                logger.info(f"   File: {os.path.basename(file_path)}")
-                logger.info(f"   Reason: {failure_summary}")
-                
-                # זיהוי סוג הקובץ
-                ext = os.path.splitext(file_path)[1].lower()
-                
-                # יצירת הודעת שגיאה
-                error_msg = f"⚠️ **העלאה לוואטסאפ נכשלה**\n\n{failure_summary}\n\n{template_text}"
-                
-                # שליחה למשתמש בטלגרם (סינכרוני - נריץ בthread)
-                async def send_to_telegram():
-                    try:
-                        if ext in ['.jpg', '.jpeg', '.png', '.webp']:
-                            await client.send_photo(user_id, file_path, caption=error_msg)
-                        elif ext in ['.mp3', '.m4a', '.wav']:
-                            # הוספת title ו-performer להצגה יפה בטלגרם
-                            audio_params = {
-                                'chat_id': user_id,
-                                'audio': file_path,
-                                'caption': error_msg,
-                                'title': session.song_name if hasattr(session, 'song_name') else None,  # שם השיר - יוצג בגדול
-                                'performer': session.artist_name if hasattr(session, 'artist_name') else None  # שם האמנים - יוצג בקטן
-                            }
-                            
-                            # הוספת משך זמן אם אפשר
-                            try:
-                                audio_duration = await get_video_duration(file_path)
-                                if audio_duration:
-                                    audio_params['duration'] = int(audio_duration)
-                            except:
-                                pass  # אם נכשל, ממשיכים בלי duration
-                            
-                            await client.send_audio(**audio_params)
-                        elif ext in ['.mp4', '.avi', '.mov', '.mkv']:
-                            await client.send_video(user_id, file_path, caption=error_msg)
-                        else:
-                            await client.send_document(user_id, file_path, caption=error_msg)
-                        return True
-                    except Exception as e:
-                        logger.error(f"❌ [TELEGRAM FALLBACK] Error: {e}", exc_info=True)
-                        return False
-                
-                # הרצה אסינכרונית
-                result = asyncio.run_coroutine_threadsafe(send_to_telegram(), asyncio.get_event_loop())
-                return result.result(timeout=30)
-                
-            except Exception as e:
-                logger.error(f"❌ [TELEGRAM FALLBACK] Callback error: {e}", exc_info=True)
-                return False
+        # קבצים שנכשלו בוואטסאפ נשלחים למשתמש - מהפוסט בערוץ אם יש, אחרת מהדיסק
+        telegram_fallback_callback = create_telegram_fallback_callback(client, session)
         
         # ========== שלב 5: שליחה לוואטסאפ (תמונה ו-MP3) ==========
-        whatsapp_success = True
-        if WHATSAPP_ENABLED:
-            try:
-                await tracker.update_status("העלאת תמונה לוואטסאפ", 79, 0)
+        async def _deliver_single_to_whatsapp() -> bool:
+            whatsapp_success = True
+            if WHATSAPP_ENABLED:
+                try:
+                    await tracker.update_status("העלאת תמונה לוואטסאפ", 79, 0)
                 
-                # איסוף רשימת קבוצות: קבועה + מהמאגר
-                whatsapp_groups = []
+                    # איסוף רשימת קבוצות: קבועה + מהמאגר
+                    whatsapp_groups = []
                 
-                # קבוצות מהמאגר (לפי תבנית whatsapp_image) - המשתמש מוסיף בעצמו
-                template_groups = channels_manager.get_template_channels("whatsapp_image", "whatsapp")
-                if template_groups:
-                    whatsapp_groups.extend(template_groups)
+                    # קבוצות מהמאגר (לפי תבנית whatsapp_image) - המשתמש מוסיף בעצמו
+                    template_groups = channels_manager.get_template_channels("whatsapp_image", "whatsapp")
+                    if template_groups:
+                        whatsapp_groups.extend(template_groups)
                 
-                # הסרת כפילויות
-                whatsapp_groups = list(dict.fromkeys(whatsapp_groups))
+                    # הסרת כפילויות
+                    whatsapp_groups = list(dict.fromkeys(whatsapp_groups))
                 
-                # שליחה תמיד אם יש קבוצה קבועה, גם אם אין קבוצות ידניות
-                if whatsapp_groups:
-                    logger.info(f"📱 [WHATSAPP] התחלת שליחה ל-{len(whatsapp_groups)} קבוצות")
+                    # שליחה תמיד אם יש קבוצה קבועה, גם אם אין קבוצות ידניות
+                    if whatsapp_groups:
+                        logger.info(f"📱 [WHATSAPP] התחלת שליחה ל-{len(whatsapp_groups)} קבוצות")
                     
-                    executor = executor_manager.get_executor()
-                    loop = asyncio.get_event_loop()
-                    whatsapp = WhatsAppDelivery(dry_run=WHATSAPP_DRY_RUN)
+                        whatsapp = whatsapp_client
                     
-                    try:
-                        # שליחת תמונה (שלב 1/2)
-                        if session.processed_image_path and os.path.exists(session.processed_image_path):
-                            logger.info("📤 [WHATSAPP] שלב 1/2 - שולח תמונה...")
-                            
+                        async def _send_image() -> bool:
+                            if not (session.processed_image_path and os.path.exists(session.processed_image_path)):
+                                logger.warning("⚠️ [WHATSAPP] קובץ תמונה לא נמצא")
+                                return True
+                            logger.info("📤 [WHATSAPP] שולח תמונה...")
+                        
                             whatsapp_image_caption = template_manager.render(
                                 "whatsapp_image",
                                 song_name=session.song_name,
@@ -440,7 +476,7 @@ async def process_content(client: Client, message: Message, session, status_msg:
                                 credits=credits_text,
                                 youtube_url=session.youtube_url
                             )
-                            
+                        
                             image_result = await send_to_whatsapp_groups(
                                 whatsapp_delivery=whatsapp,
                                 file_path=session.processed_image_path,
@@ -451,7 +487,7 @@ async def process_content(client: Client, message: Message, session, status_msg:
                                 telegram_fallback_callback=telegram_fallback_callback,
                                 session=session
                             )
-                            
+                        
                             if image_result.get('success') and image_result.get('sent_to'):
                                 logger.info(f"✅ [WHATSAPP] תמונה נשלחה ל-{len(image_result['sent_to'])} קבוצות")
                                 tracker.upload_status['whatsapp']['image'] = True
@@ -462,75 +498,84 @@ async def process_content(client: Client, message: Message, session, status_msg:
                                     "sent_to": len(image_result['sent_to'])
                                 }
                                 await tracker.update_status("העלאת תמונה לוואטסאפ", 80, 0)
-                            else:
-                                logger.warning(f"⚠️ [WHATSAPP] שליחת תמונה נכשלה: {image_result.get('errors', [])}")
-                                tracker.errors.append({"platform": "whatsapp", "file_type": "image", "error": str(image_result.get('errors', []))})
-                                whatsapp_success = False
-                                await tracker.update_status("העלאת תמונה לוואטסאפ - נכשל", 80, 0)
-                        else:
-                            logger.warning("⚠️ [WHATSAPP] קובץ תמונה לא נמצא")
+                                return True
+                            logger.warning(f"⚠️ [WHATSAPP] שליחת תמונה נכשלה: {image_result.get('errors', [])}")
+                            tracker.errors.append({"platform": "whatsapp", "file_type": "image", "error": str(image_result.get('errors', []))})
+                            await tracker.update_status("העלאת תמונה לוואטסאפ - נכשל", 80, 0)
+                            return False
+                    
+                        async def _send_audio() -> bool:
+                            mp3_path = await _tagged_mp3()
+                            if not (mp3_path and os.path.exists(mp3_path)):
+                                logger.warning("⚠️ [WHATSAPP] קובץ MP3 לא נמצא")
+                                return mp3_path is not None
+                            mp3_size = os.path.getsize(mp3_path)
+                            logger.info(f"📤 [WHATSAPP] שולח MP3 ({mp3_size / (1024*1024):.2f} MB)...")
                         
-                        # שליחת MP3 (שלב 2/2)
-                        if session.processed_mp3_path and os.path.exists(session.processed_mp3_path):
-                            mp3_size = os.path.getsize(session.processed_mp3_path)
-                            logger.info(f"📤 [WHATSAPP] שלב 2/2 - שולח MP3 ({mp3_size / (1024*1024):.2f} MB)...")
-                            
-                            if mp3_size <= WHATSAPP_MAX_FILE_SIZE_BYTES:
-                                whatsapp_audio_caption = template_manager.render(
-                                    "whatsapp_audio",
-                                    song_name=session.song_name,
-                                    artist_name=session.artist_name,
-                                    year=session.year,
-                                    composer=session.composer,
-                                    arranger=session.arranger,
-                                    mixer=session.mixer,
-                                    credits=credits_text,
-                                    youtube_url=session.youtube_url
-                                )
-                                
-                                mp3_result = await send_to_whatsapp_groups(
-                                    whatsapp_delivery=whatsapp,
-                                    file_path=session.processed_mp3_path,
-                                    file_type='audio',
-                                    caption=whatsapp_audio_caption,
-                                    groups=whatsapp_groups,
-                                    telegram_user_id=user_id,
-                                    telegram_fallback_callback=telegram_fallback_callback,
-                                    session=session
-                                )
-                                
-                                if mp3_result.get('success') and mp3_result.get('sent_to'):
-                                    logger.info(f"✅ [WHATSAPP] MP3 נשלח ל-{len(mp3_result['sent_to'])} קבוצות")
-                                    tracker.upload_status['whatsapp']['audio'] = True
-                                    tracker.upload_progress['whatsapp']['audio'] = 100
-                                    tracker.upload_results['whatsapp']['audio'] = {
-                                        "success": True,
-                                        "size_mb": round(mp3_size / (1024*1024), 1),
-                                        "sent_to": len(mp3_result['sent_to'])
-                                    }
-                                    await tracker.update_status("העלאת סינגל לוואטסאפ", 85, 0)
-                                else:
-                                    logger.warning(f"⚠️ [WHATSAPP] שליחת MP3 נכשלה: {mp3_result.get('errors', [])}")
-                                    tracker.errors.append({"platform": "whatsapp", "file_type": "audio", "error": str(mp3_result.get('errors', []))})
-                                    whatsapp_success = False
-                                    await tracker.update_status("העלאת סינגל לוואטסאפ - נכשל", 85, 0)
-                            else:
+                            if mp3_size > WHATSAPP_MAX_FILE_SIZE_BYTES:
                                 logger.warning(f"⚠️ [WHATSAPP] MP3 גדול מדי ({mp3_size / (1024*1024):.2f} MB), דילוג")
-                        else:
-                            logger.warning("⚠️ [WHATSAPP] קובץ MP3 לא נמצא")
-                    finally:
-                        if 'whatsapp' in locals():
-                            whatsapp.close()
-                        logger.info("✅ [WHATSAPP] שליחה סדרתית הושלמה")
-                else:
-                    logger.info("ℹ️ [WHATSAPP] אין קבוצות לשליחה - לא נשלח תוכן לוואטסאפ (תמונה ו-MP3)")
+                                return True
+                            whatsapp_audio_caption = template_manager.render(
+                                "whatsapp_audio",
+                                song_name=session.song_name,
+                                artist_name=session.artist_name,
+                                year=session.year,
+                                composer=session.composer,
+                                arranger=session.arranger,
+                                mixer=session.mixer,
+                                credits=credits_text,
+                                youtube_url=session.youtube_url
+                            )
+                        
+                            mp3_result = await send_to_whatsapp_groups(
+                                whatsapp_delivery=whatsapp,
+                                file_path=mp3_path,
+                                file_type='audio',
+                                caption=whatsapp_audio_caption,
+                                groups=whatsapp_groups,
+                                telegram_user_id=user_id,
+                                telegram_fallback_callback=telegram_fallback_callback,
+                                session=session
+                            )
+                        
+                            if mp3_result.get('success') and mp3_result.get('sent_to'):
+                                logger.info(f"✅ [WHATSAPP] MP3 נשלח ל-{len(mp3_result['sent_to'])} קבוצות")
+                                tracker.upload_status['whatsapp']['audio'] = True
+                                tracker.upload_progress['whatsapp']['audio'] = 100
+                                tracker.upload_results['whatsapp']['audio'] = {
+                                    "success": True,
+                                    "size_mb": round(mp3_size / (1024*1024), 1),
+                                    "sent_to": len(mp3_result['sent_to'])
+                                }
+                                await tracker.update_status("העלאת סינגל לוואטסאפ", 85, 0)
+                                return True
+                            logger.warning(f"⚠️ [WHATSAPP] שליחת MP3 נכשלה: {mp3_result.get('errors', [])}")
+                            tracker.errors.append({"platform": "whatsapp", "file_type": "audio", "error": str(mp3_result.get('errors', []))})
+                            await tracker.update_status("העלאת סינגל לוואטסאפ - נכשל", 85, 0)
+                            return False
                     
-            except Exception as e:
-                logger.error(f"❌ [WHATSAPP] שגיאה בשליחה: {e}", exc_info=True)
-                whatsapp_success = False
-                # לא נעצור את התהליך - רק נוודא שהשגיאה מתועדת
-        else:
-            logger.info("ℹ️ [WHATSAPP] שליחה לוואטסאפ מנוטרלת או לא הוגדרה")
+                        # התמונה יוצאת מיד; ה-MP3 יוצא כשהתיוג שלו מסתיים
+                        image_sent, audio_sent = await asyncio.gather(_send_image(), _send_audio())
+                        whatsapp_success = image_sent and audio_sent
+                    else:
+                        logger.info("ℹ️ [WHATSAPP] אין קבוצות לשליחה - לא נשלח תוכן לוואטסאפ (תמונה ו-MP3)")
+                    
+                except Exception as e:
+                    logger.error(f"❌ [WHATSAPP] שגיאה בשליחה: {e}", exc_info=True)
+                    whatsapp_success = False
+                    # לא נעצור את התהליך - רק נוודא שהשגיאה מתועדת
+            else:
+                logger.info("ℹ️ [WHATSAPP] שליחה לוואטסאפ מנוטרלת או לא הוגדרה")
+            return whatsapp_success
+
+        # טלגרם ווואטסאפ הם רשתות נפרדות - שליחה במקביל במקום סכום ה-latency של שתיהן
+        # (fallback לטלגרם מכישלון בוואטסאפ ממתין לפוסט בערוץ ושולח ממנו)
+        _, whatsapp_success = await asyncio.gather(
+            publish_channel_posts(session, _deliver_single_to_telegram(), 'photo', 'audio'),
+            _deliver_single_to_whatsapp()
+        )
+        # כישלון בתיוג ה-MP3 עוצר את התהליך כמו קודם (אחרי שהתמונה כבר נשלחה)
+        await mp3_task
         
         # ========== שלב 6: המתנה לסיום הורדת וידאו והעלאה ==========
         # הגדרת משתנים לוידאו לפני השימוש (למניעת NameError)
@@ -557,10 +602,15 @@ async def process_content(client: Client, message: Message, session, status_msg:
                     original_filename=original_video_filename
                 )
                 
+                # thumbnail + dimensions רצים במקביל ליצירת העותק להעלאה
+                thumbnail_task = asyncio.create_task(
+                    _prepare_video_thumbnail(session, session.video_high_path, session.youtube_url)
+                )
+                
                 # יצירת עותק של הוידאו עם שם חדש להעלאה
-                upload_video_path = create_upload_copy(
-                    original_path=session.video_high_path,
-                    new_filename=target_video_name
+                loop = asyncio.get_event_loop()
+                upload_video_path = await loop.run_in_executor(
+                    None, create_upload_copy, session.video_high_path, target_video_name
                 )
                 if not upload_video_path:
                     raise Exception("Failed to create video copy for upload")
@@ -578,220 +628,192 @@ async def process_content(client: Client, message: Message, session, status_msg:
                 if video_size_mb > TELEGRAM_MAX_FILE_SIZE_MB:
                     raise Exception(f"וידאו גדול מדי ל-Telegram: {video_size_mb:.2f}MB > {TELEGRAM_MAX_FILE_SIZE_MB}MB")
                 
-                # ========== הכנת thumbnail ו-dimensions לוידאו ==========
+                # ========== thumbnail ו-dimensions לוידאו ==========
+                video_thumb_path, video_width, video_height = await thumbnail_task
                 
-                try:
-                    # 1. חילוץ ממדי הוידאו (עם תמיכה ב-rotation)
-                    logger.info("📐 [TELEGRAM] מחלץ ממדי וידאו...")
-                    dimensions = await get_video_dimensions(session.video_high_path)
-                    if dimensions:
-                        video_width, video_height = dimensions
-                        logger.info(f"✅ [TELEGRAM] ממדי וידאו: {video_width}x{video_height}")
-                    else:
-                        logger.warning("⚠️ [TELEGRAM] לא ניתן לחלץ ממדי וידאו")
-                    
-                    # 2. הורדת thumbnail מ-YouTube
-                    logger.info("🖼️ [YOUTUBE] מוריד thumbnail...")
-                    raw_thumbnail = await fetch_youtube_thumbnail(
-                        url=session.youtube_url,
-                        cookies_path="cookies.txt"
-                    )
-                    
-                    if raw_thumbnail:
-                        session.add_file_for_cleanup(raw_thumbnail)
-                        logger.info(f"✅ [YOUTUBE] Thumbnail הורד: {raw_thumbnail}")
-                        
-                        # 3. הכנת thumbnail לדרישות Telegram
-                        if video_width and video_height:
-                            aspect_ratio = video_width / video_height
-                            logger.info(f"🎨 [TELEGRAM] מכין thumbnail (aspect ratio: {aspect_ratio:.3f})...")
-                            
-                            video_thumb_path = await prepare_telegram_thumbnail(
-                                input_image_path=raw_thumbnail,
-                                video_aspect_ratio=aspect_ratio
-                            )
-                            
-                            if video_thumb_path:
-                                session.add_file_for_cleanup(video_thumb_path)
-                                logger.info(f"✅ [TELEGRAM] Thumbnail מוכן: {video_thumb_path}")
-                            else:
-                                logger.warning("⚠️ [TELEGRAM] הכנת thumbnail נכשלה")
-                        else:
-                            logger.warning("⚠️ [TELEGRAM] לא ניתן להכין thumbnail ללא ממדי וידאו")
-                    else:
-                        logger.warning("⚠️ [YOUTUBE] הורדת thumbnail נכשלה")
-                        
-                except Exception as e:
-                    logger.error(f"❌ [TELEGRAM] שגיאה בהכנת thumbnail/dimensions: {e}", exc_info=True)
-                
-                # עדכון סטטוס - וידאו מוכן לערוץ
-                tracker.upload_status['telegram']['video'] = True
-                tracker.upload_progress['telegram']['video'] = 100
+                # עדכון סטטוס - וידאו מוכן לערוץ (ההתקדמות מתעדכנת לפי bytes שהועלו)
                 await tracker.update_status("העלאת קליפ לטלגרם", 100, 0)
                 
                 # ========== העלאה לערוצי טלגרם (וידאו) ==========
-                if PUBLISH_TO_CHANNELS:
-                    try:
-                        # בדיקה ש-upload_video_path קיים
-                        if not hasattr(session, 'upload_video_path') or not session.upload_video_path:
-                            logger.error("❌ [TELEGRAM → CHANNEL] upload_video_path לא קיים - לא ניתן לשלוח לערוץ")
-                        else:
-                            # שימוש ב-Userbot לפרסום בערוצים (כמו שהיה מקודם)
-                            channel_client = userbot if userbot else bot
-                            client_type = "Userbot" if userbot else "Bot"
-                            logger.info(f"ℹ️ [TELEGRAM → CHANNEL] משתמש ב-{client_type} לפרסום")
+                async def _deliver_video_to_telegram():
+                    if PUBLISH_TO_CHANNELS:
+                        try:
+                            # בדיקה ש-upload_video_path קיים
+                            if not hasattr(session, 'upload_video_path') or not session.upload_video_path:
+                                logger.error("❌ [TELEGRAM → CHANNEL] upload_video_path לא קיים - לא ניתן לשלוח לערוץ")
+                            else:
+                                # שימוש ב-Userbot לפרסום בערוצים (כמו שהיה מקודם)
+                                channel_client = userbot if userbot else bot
+                                client_type = "Userbot" if userbot else "Bot"
+                                logger.info(f"ℹ️ [TELEGRAM → CHANNEL] משתמש ב-{client_type} לפרסום")
                             
-                            # איסוף רשימת ערוצים: רק מהמאגר (המשתמש מוסיף בעצמו)
-                            telegram_video_channels = []
+                                # איסוף רשימת ערוצים: רק מהמאגר (המשתמש מוסיף בעצמו)
+                                telegram_video_channels = []
                             
-                            # ערוצים מהמאגר (לפי תבנית telegram_video)
-                            template_channels = channels_manager.get_template_channels("telegram_video", "telegram")
-                            if template_channels:
-                                telegram_video_channels.extend(template_channels)
+                                # ערוצים מהמאגר (לפי תבנית telegram_video)
+                                template_channels = channels_manager.get_template_channels("telegram_video", "telegram")
+                                if template_channels:
+                                    telegram_video_channels.extend(template_channels)
                             
-                            # הסרת כפילויות
-                            telegram_video_channels = list(dict.fromkeys(telegram_video_channels))
+                                # הסרת כפילויות
+                                telegram_video_channels = list(dict.fromkeys(telegram_video_channels))
                             
-                            # שליחה רק אם יש ערוצים מהמאגר
-                            if telegram_video_channels:
-                                logger.info(f"📢 [TELEGRAM → CHANNEL] מעלה וידאו ל-{len(telegram_video_channels)} ערוצים")
-                                logger.info(f"📋 [TELEGRAM → CHANNEL] רשימת ערוצים: {telegram_video_channels}")
+                                # שליחה רק אם יש ערוצים מהמאגר
+                                if telegram_video_channels:
+                                    logger.info(f"📢 [TELEGRAM → CHANNEL] מעלה וידאו ל-{len(telegram_video_channels)} ערוצים")
+                                    logger.info(f"📋 [TELEGRAM → CHANNEL] רשימת ערוצים: {telegram_video_channels}")
                                 
-                                logger.info(f"📋 [TELEGRAM → CHANNEL] רשימת ערוצים (peer_id_b64): {[ch[:20] + '...' if len(ch) > 20 else ch for ch in telegram_video_channels]}")
+                                    logger.info(f"📋 [TELEGRAM → CHANNEL] רשימת ערוצים (peer_id_b64): {[ch[:20] + '...' if len(ch) > 20 else ch for ch in telegram_video_channels]}")
                                 
-                                channel_video_caption = template_manager.render(
-                                    "telegram_video",
-                                    song_name=session.song_name,
-                                    artist_name=session.artist_name,
-                                    year=session.year,
-                                    composer=session.composer,
-                                    arranger=session.arranger,
-                                    mixer=session.mixer,
-                                    credits=credits_text,
-                                    youtube_url=session.youtube_url
-                                )
+                                    channel_video_caption = template_manager.render(
+                                        "telegram_video",
+                                        song_name=session.song_name,
+                                        artist_name=session.artist_name,
+                                        year=session.year,
+                                        composer=session.composer,
+                                        arranger=session.arranger,
+                                        mixer=session.mixer,
+                                        credits=credits_text,
+                                        youtube_url=session.youtube_url
+                                    )
                                 
-                                video_kwargs = {}
-                                if video_width and video_height:
-                                    video_kwargs['width'] = video_width
-                                    video_kwargs['height'] = video_height
+                                    video_kwargs = {}
+                                    if video_width and video_height:
+                                        video_kwargs['width'] = video_width
+                                        video_kwargs['height'] = video_height
                                 
-                                if video_thumb_path and os.path.exists(video_thumb_path):
-                                    video_kwargs['thumb'] = video_thumb_path
+                                    if video_thumb_path and os.path.exists(video_thumb_path):
+                                        video_kwargs['thumb'] = video_thumb_path
                                 
-                                logger.info(f"📤 [TELEGRAM → CHANNEL] מתחיל שליחה ל-{len(telegram_video_channels)} ערוצים...")
-                                video_result = await send_to_telegram_channels(
-                                    client=channel_client,
-                                    file_path=session.upload_video_path,
-                                    file_type='video',
-                                    caption=channel_video_caption,
-                                    channels=telegram_video_channels,
-                                    first_channel_peer_id_b64=telegram_video_channels[0] if telegram_video_channels else None,
-                                    protected_channels=[],
-                                    **video_kwargs
-                                )
+                                    # התקדמות ברמת bytes של העלאת הוידאו (גם בהעלאה המקבילית)
+                                    video_kwargs['progress'] = tracker.upload_callback('telegram', 'video')
                                 
-                                if video_result['success']:
-                                    logger.info(f"✅ [TELEGRAM → CHANNEL] וידאו נשלח ל-{len(video_result['sent_to'])} ערוצים")
+                                    logger.info(f"📤 [TELEGRAM → CHANNEL] מתחיל שליחה ל-{len(telegram_video_channels)} ערוצים...")
+                                    video_result = await send_to_telegram_channels_pooled(
+                                        client=channel_client,
+                                        file_path=session.upload_video_path,
+                                        file_type='video',
+                                        caption=channel_video_caption,
+                                        channels=telegram_video_channels,
+                                        first_channel_peer_id_b64=telegram_video_channels[0] if telegram_video_channels else None,
+                                        protected_channels=[],
+                                        **video_kwargs
+                                    )
+                                
+                                    tracker.mark_completed('telegram', 'video', video_result['success'])
+                                    remember_channel_post(session, 'video', video_result, channel_client)
+                                    if video_result['success']:
+                                        logger.info(f"✅ [TELEGRAM → CHANNEL] וידאו נשלח ל-{len(video_result['sent_to'])} ערוצים")
+                                    else:
+                                        error_msg = video_result.get('error', 'Unknown error')
+                                        logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בשליחת וידאו: {error_msg}")
                                 else:
-                                    error_msg = video_result.get('error', 'Unknown error')
-                                    logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בשליחת וידאו: {error_msg}")
-                            else:
-                                logger.info("ℹ️ [TELEGRAM → CHANNEL] אין ערוצים להעלאת וידאו")
+                                    logger.info("ℹ️ [TELEGRAM → CHANNEL] אין ערוצים להעלאת וידאו")
+                                    tracker.mark_completed('telegram', 'video')
                         
-                    except Exception as e:
-                        logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בפרסום וידאו לערוצים: {e}", exc_info=True)
-                else:
-                    logger.info("ℹ️ [TELEGRAM → CHANNEL] פרסום וידאו לערוצים מנוטרל")
+                        except Exception as e:
+                            logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בפרסום וידאו לערוצים: {e}", exc_info=True)
+                    else:
+                        logger.info("ℹ️ [TELEGRAM → CHANNEL] פרסום וידאו לערוצים מנוטרל")
+                        tracker.mark_completed('telegram', 'video')
                 
                 # העלאת וידאו לוואטסאפ
-                if WHATSAPP_ENABLED:
-                    try:
-                        await tracker.update_status("עיבוד קליפ וואטסאפ", 80, 0)
-                        logger.info(f"📱 [WHATSAPP] שלב 3/3 - שולח וידאו")
+                async def _deliver_video_to_whatsapp():
+                    if WHATSAPP_ENABLED:
+                        try:
+                            await tracker.update_status("עיבוד קליפ וואטסאפ", 80, 0)
+                            logger.info(f"📱 [WHATSAPP] שלב 3/3 - שולח וידאו")
                         
-                        # 🔧 בחירת הקובץ הקטן ביותר לוואטסאפ (עד 100MB)
-                        # 1. אם יש video_medium_path (720-ish/≤70MB) - משתמשים בו
-                        # 2. אם לא, משתמשים ב-upload_video_path (1080-ish)
-                        # הערה: דחיסה ל-70MB תתבצע אוטומטית ב-WhatsApp service אם נדרש
+                            # 🔧 בחירת הקובץ הקטן ביותר לוואטסאפ (עד 100MB)
+                            # 1. אם יש video_medium_path (720-ish/≤70MB) - משתמשים בו
+                            # 2. אם לא, משתמשים ב-upload_video_path (1080-ish)
+                            # הערה: הוידאו מוכן ל-WhatsApp כאן (ensure_whatsapp_ready) - ה-service לא דוחס שוב
                         
-                        # בחירת קובץ התחלתי
-                        initial_video_path = None
-                        if session.video_medium_path and os.path.exists(session.video_medium_path):
-                            initial_video_path = session.video_medium_path
-                            logger.info(f"✅ [WHATSAPP] משתמש בגרסת 720-ish/100MB: {os.path.basename(initial_video_path)}")
-                        elif hasattr(session, 'upload_video_path') and session.upload_video_path and os.path.exists(session.upload_video_path):
-                            initial_video_path = session.upload_video_path
-                            logger.info(f"ℹ️ [WHATSAPP] משתמש בגרסת 1080-ish: {os.path.basename(initial_video_path)}")
-                        elif session.video_high_path and os.path.exists(session.video_high_path):
-                            initial_video_path = session.video_high_path
-                            logger.info(f"ℹ️ [WHATSAPP] משתמש ב-video_high_path: {os.path.basename(initial_video_path)}")
-                        else:
-                            logger.error("❌ [WHATSAPP] לא נמצא קובץ וידאו לשליחה")
-                            raise Exception("No video file available for WhatsApp")
+                            # בחירת קובץ התחלתי
+                            initial_video_path = None
+                            if session.video_medium_path and os.path.exists(session.video_medium_path):
+                                initial_video_path = session.video_medium_path
+                                logger.info(f"✅ [WHATSAPP] משתמש בגרסת 720-ish/100MB: {os.path.basename(initial_video_path)}")
+                            elif hasattr(session, 'upload_video_path') and session.upload_video_path and os.path.exists(session.upload_video_path):
+                                initial_video_path = session.upload_video_path
+                                logger.info(f"ℹ️ [WHATSAPP] משתמש בגרסת 1080-ish: {os.path.basename(initial_video_path)}")
+                            elif session.video_high_path and os.path.exists(session.video_high_path):
+                                initial_video_path = session.video_high_path
+                                logger.info(f"ℹ️ [WHATSAPP] משתמש ב-video_high_path: {os.path.basename(initial_video_path)}")
+                            else:
+                                logger.error("❌ [WHATSAPP] לא נמצא קובץ וידאו לשליחה")
+                                raise Exception("No video file available for WhatsApp")
                         
-                        # בדיקת גודל (דחיסה תתבצע ב-Node.js service)
-                        initial_size = os.path.getsize(initial_video_path)
-                        initial_size_mb = initial_size / (1024 * 1024)
-                        logger.info(f"ℹ️ [WHATSAPP] גודל וידאו: {initial_size_mb:.2f} MB (דחיסה תתבצע ב-WhatsApp service אם נדרש)")
+                            # איסוף רשימת קבוצות: קבועה + מהמאגר
+                            whatsapp_video_groups = []
                         
-                        # יצירת עותק עם שם נכון (דחיסה תתבצע ב-Node.js service)
-                        original_video_filename = os.path.basename(initial_video_path)
-                        target_video_name = build_target_filename(
-                            artist_name=session.artist_name,
-                            song_name=session.song_name,
-                            original_filename=original_video_filename
-                        )
-                        video_to_send_whatsapp = create_upload_copy(
-                            original_path=initial_video_path,
-                            new_filename=target_video_name
-                        )
-                        if video_to_send_whatsapp:
-                            session.add_file_for_cleanup(video_to_send_whatsapp)
-                            logger.info(f"✅ [WHATSAPP] קובץ מוכן לשליחה: {os.path.basename(video_to_send_whatsapp)}")
-                        else:
-                            video_to_send_whatsapp = initial_video_path
-                            logger.warning(f"⚠️ [WHATSAPP] לא הצליח ליצור עותק, משתמש בקובץ המקורי")
+                            # קבוצות מהמאגר (לפי תבנית whatsapp_video) - המשתמש מוסיף בעצמו
+                            template_groups = channels_manager.get_template_channels("whatsapp_video", "whatsapp")
+                            if template_groups:
+                                whatsapp_video_groups.extend(template_groups)
                         
-                        # בדיקת גודל סופי
-                        video_size = os.path.getsize(video_to_send_whatsapp)
-                        video_size_mb = video_size / (1024 * 1024)
-                        logger.info(f"✅ [WHATSAPP] גודל וידאו: {video_size_mb:.2f} MB")
+                            # הסרת כפילויות
+                            whatsapp_video_groups = list(dict.fromkeys(whatsapp_video_groups))
                         
-                        # הערה: דחיסה ל-70MB תתבצע אוטומטית ב-WhatsApp service אם הקובץ גדול מדי
-                        # שולחים את הוידאו בכל מקרה - ה-service ידחוס אם צריך
+                            # הכנה ל-WhatsApp בצד ה-Python (קודק/פרופיל/גודל) - השירות לא ידחוס שוב
+                            # (רק אם קבוצה כלשהי מנותבת לוידאו מוטמע - מסמך / קליפ לא צריכים את הקידוד)
+                            if await media_router.wants_inline_video(whatsapp_video_groups, initial_video_path):
+                                wa_ready_path = await ensure_whatsapp_ready(initial_video_path)
+                                if wa_ready_path:
+                                    if wa_ready_path != initial_video_path:
+                                        session.add_file_for_cleanup(wa_ready_path)
+                                    initial_video_path = wa_ready_path
+                                else:
+                                    logger.warning("⚠️ [WHATSAPP] הכנה ל-WhatsApp נכשלה - השירות ידחוס אם נדרש")
+                            else:
+                                logger.info("🧭 [WHATSAPP] אף קבוצה לא מנותבת לוידאו מוטמע - מדלג על הקידוד ל-WhatsApp")
+                            
+                            initial_size = os.path.getsize(initial_video_path)
+                            initial_size_mb = initial_size / (1024 * 1024)
+                            logger.info(f"ℹ️ [WHATSAPP] גודל וידאו: {initial_size_mb:.2f} MB")
                         
-                        # איסוף רשימת קבוצות: קבועה + מהמאגר
-                        whatsapp_video_groups = []
+                            # יצירת עותק עם שם נכון
+                            original_video_filename = os.path.basename(initial_video_path)
+                            target_video_name = build_target_filename(
+                                artist_name=session.artist_name,
+                                song_name=session.song_name,
+                                original_filename=original_video_filename
+                            )
+                            video_to_send_whatsapp = create_upload_copy(
+                                original_path=initial_video_path,
+                                new_filename=target_video_name
+                            )
+                            if video_to_send_whatsapp:
+                                session.add_file_for_cleanup(video_to_send_whatsapp)
+                                logger.info(f"✅ [WHATSAPP] קובץ מוכן לשליחה: {os.path.basename(video_to_send_whatsapp)}")
+                            else:
+                                video_to_send_whatsapp = initial_video_path
+                                logger.warning(f"⚠️ [WHATSAPP] לא הצליח ליצור עותק, משתמש בקובץ המקורי")
                         
-                        # קבוצות מהמאגר (לפי תבנית whatsapp_video) - המשתמש מוסיף בעצמו
-                        template_groups = channels_manager.get_template_channels("whatsapp_video", "whatsapp")
-                        if template_groups:
-                            whatsapp_video_groups.extend(template_groups)
+                            # בדיקת גודל סופי
+                            video_size = os.path.getsize(video_to_send_whatsapp)
+                            video_size_mb = video_size / (1024 * 1024)
+                            logger.info(f"✅ [WHATSAPP] גודל וידאו: {video_size_mb:.2f} MB")
                         
-                        # הסרת כפילויות
-                        whatsapp_video_groups = list(dict.fromkeys(whatsapp_video_groups))
+                            # אם ההכנה נכשלה - שולחים בכל מקרה, ה-service ידחוס אם צריך
                         
-                        if whatsapp_video_groups:
-                            logger.info(f"📱 [WHATSAPP] שלב 3/3 - שולח וידאו ל-{len(whatsapp_video_groups)} קבוצות")
+                            if whatsapp_video_groups:
+                                logger.info(f"📱 [WHATSAPP] שלב 3/3 - שולח וידאו ל-{len(whatsapp_video_groups)} קבוצות")
                             
-                            whatsapp_video_caption = template_manager.render(
-                                "whatsapp_video",
-                                song_name=session.song_name,
-                                artist_name=session.artist_name,
-                                year=session.year,
-                                composer=session.composer,
-                                arranger=session.arranger,
-                                mixer=session.mixer,
-                                credits=credits_text,
-                                youtube_url=session.youtube_url
-                            )
+                                whatsapp_video_caption = template_manager.render(
+                                    "whatsapp_video",
+                                    song_name=session.song_name,
+                                    artist_name=session.artist_name,
+                                    year=session.year,
+                                    composer=session.composer,
+                                    arranger=session.arranger,
+                                    mixer=session.mixer,
+                                    credits=credits_text,
+                                    youtube_url=session.youtube_url
+                                )
                             
-                            executor = executor_manager.get_executor()
-                            loop = asyncio.get_event_loop()
-                            whatsapp = WhatsAppDelivery(dry_run=WHATSAPP_DRY_RUN)
+                                whatsapp = whatsapp_client
                             
-                            try:
                                 video_result = await send_to_whatsapp_groups(
                                     whatsapp_delivery=whatsapp,
                                     file_path=video_to_send_whatsapp,
@@ -819,14 +841,17 @@ async def process_content(client: Client, message: Message, session, status_msg:
                                     logger.warning(f"⚠️ [WHATSAPP] שליחת וידאו נכשלה: {video_result.get('errors', [])}")
                                     tracker.errors.append({"platform": "whatsapp", "file_type": "video", "error": str(video_result.get('errors', []))})
                                     await tracker.update_status("העלאת קליפ לוואטסאפ - נכשל", 99, 0)
-                            finally:
-                                if 'whatsapp' in locals():
-                                    whatsapp.close()
-                        else:
-                            logger.info("ℹ️ [WHATSAPP] אין קבוצות לשליחת וידאו - לא נשלח וידאו לוואטסאפ")
+                            else:
+                                logger.info("ℹ️ [WHATSAPP] אין קבוצות לשליחת וידאו - לא נשלח וידאו לוואטסאפ")
                             
-                    except Exception as e:
-                        logger.error(f"❌ [WHATSAPP] שגיאה בשליחת וידאו: {e}", exc_info=True)
+                        except Exception as e:
+                            logger.error(f"❌ [WHATSAPP] שגיאה בשליחת וידאו: {e}", exc_info=True)
+
+                # הוידאו נשלח לשתי הפלטפורמות במקביל (fallback לטלגרם ממתין לפוסט בערוץ)
+                await asyncio.gather(
+                    publish_channel_posts(session, _deliver_video_to_telegram(), 'video'),
+                    _deliver_video_to_whatsapp()
+                )
                 
             else:
                 logger.warning("⚠️ [YOUTUBE] הורדת וידאו נכשלה לאחר 3 ניסיונות - הבוט ממשיך לעבוד")
@@ -860,9 +885,8 @@ async def process_content(client: Client, message: Message, session, status_msg:
         # עדכון הודעת סיכום סופית ב-status_msg
         tracker.is_completed = True
         
-        # עדכון הודעת הסטטוס הסופית
-        status_text = tracker.get_status_text()
-        await status_msg.edit_text(status_text)
+        # עדכון הודעת הסטטוס הסופית (מיידי, מבטל עדכונים ממתינים)
+        await tracker.flush_status()
         
         # מחיקת הודעות ישנות
         from plugins.content_creator.utils import delete_old_messages
@@ -877,104 +901,18 @@ async def process_content(client: Client, message: Message, session, status_msg:
         
         # ========== שליחה למשתמש בטלגרם - רק מה שנכשל בוואטסאפ ==========
         if WHATSAPP_ENABLED:
-            failed_whatsapp = []
-            
-            # בדיקה מה נכשל
-            if not tracker.upload_status['whatsapp']['image']:
-                failed_whatsapp.append('image')
-            if not tracker.upload_status['whatsapp']['audio']:
-                failed_whatsapp.append('audio')
-            if session.need_video and not tracker.upload_status['whatsapp']['video']:
-                failed_whatsapp.append('video')
-            
-            if failed_whatsapp:
-                logger.info(f"📤 [TELEGRAM → USER] שולח קבצים שנכשלו בוואטסאפ למשתמש: {', '.join(failed_whatsapp)}")
-                
-                try:
-                    # תמונה
-                    if 'image' in failed_whatsapp and session.processed_image_path and os.path.exists(session.processed_image_path):
-                        image_caption = template_manager.render(
-                            "whatsapp_image",  # משתמש באותה תבנית
-                            song_name=session.song_name,
-                            artist_name=session.artist_name,
-                            year=session.year,
-                            composer=session.composer,
-                            arranger=session.arranger,
-                            mixer=session.mixer,
-                            credits=credits_text,
-                            youtube_url=session.youtube_url
-                        )
-                        await message.reply_photo(
-                            session.processed_image_path,
-                            caption=f"⚠️ **תמונה לא נשלחה לוואטסאפ**\n\n{image_caption}"
-                        )
-                        logger.info("✅ [TELEGRAM → USER] תמונה נשלחה למשתמש")
-                    
-                    # MP3
-                    if 'audio' in failed_whatsapp and session.processed_mp3_path and os.path.exists(session.processed_mp3_path):
-                        audio_caption = template_manager.render(
-                            "whatsapp_audio",
-                            song_name=session.song_name,
-                            artist_name=session.artist_name,
-                            year=session.year,
-                            composer=session.composer,
-                            arranger=session.arranger,
-                            mixer=session.mixer,
-                            credits=credits_text,
-                            youtube_url=session.youtube_url
-                        )
-                        
-                        mp3_thumb_path_user = None
-                        if mp3_thumb_path and os.path.exists(mp3_thumb_path):
-                            mp3_thumb_path_user = mp3_thumb_path
-                        
-                        audio_params = {
-                            'audio': session.processed_mp3_path,
-                            'thumb': mp3_thumb_path_user,
-                            'caption': f"⚠️ **MP3 לא נשלח לוואטסאפ** (גדול מדי - {os.path.getsize(session.processed_mp3_path) / (1024*1024):.1f} MB)\n\n{audio_caption}",
-                            'title': session.song_name,  # שם השיר - יוצג בגדול בטלגרם
-                            'performer': session.artist_name  # שם האמנים - יוצג בקטן בטלגרם
-                        }
-                        
-                        # הוספת משך זמן אם כבר חילצנו אותו
-                        if mp3_duration:
-                            audio_params['duration'] = int(mp3_duration)
-                        
-                        await message.reply_audio(**audio_params)
-                        logger.info("✅ [TELEGRAM → USER] MP3 נשלח למשתמש")
-                    
-                    # וידאו
-                    if 'video' in failed_whatsapp and hasattr(session, 'upload_video_path') and session.upload_video_path and os.path.exists(session.upload_video_path):
-                        video_caption = template_manager.render(
-                            "whatsapp_video",
-                            song_name=session.song_name,
-                            artist_name=session.artist_name,
-                            year=session.year,
-                            composer=session.composer,
-                            arranger=session.arranger,
-                            mixer=session.mixer,
-                            credits=credits_text,
-                            youtube_url=session.youtube_url
-                        )
-                        
-                        # Thumbnail לוידאו
-                        video_thumb_for_user = None
-                        if video_thumb_path and os.path.exists(video_thumb_path):
-                            video_thumb_for_user = video_thumb_path
-                        
-                        await message.reply_video(
-                            session.upload_video_path,
-                            thumb=video_thumb_for_user,
-                            width=video_width if video_width else None,
-                            height=video_height if video_height else None,
-                            caption=f"⚠️ **וידאו לא נשלח לוואטסאפ** (גדול מדי - {os.path.getsize(session.upload_video_path) / (1024*1024):.1f} MB)\n\n{video_caption}"
-                        )
-                        logger.info("✅ [TELEGRAM → USER] וידאו נשלח למשתמש")
-                    
-                except Exception as e:
-                    logger.error(f"❌ [TELEGRAM → USER] שגיאה בשליחה למשתמש: {e}", exc_info=True)
-            else:
-                logger.info("ℹ️ [TELEGRAM → USER] כל הקבצים נשלחו בהצלחה לוואטסאפ - אין צורך לשלוח למשתמש")
+            await send_failed_whatsapp_files_to_user(
+                client=client,
+                message=message,
+                session=session,
+                upload_status=tracker.upload_status,
+                credits_text=credits_text,
+                mp3_thumb_path=await mp3_thumb_task,
+                mp3_duration=await mp3_duration_task,
+                video_thumb_path=video_thumb_path,
+                video_width=video_width,
+                video_height=video_height
+            )
         
         # ========== מחיקת עותקים אחרי העלאה מוצלחת ==========
         # העותקים כבר ברשימת הניקוי (session.files_to_cleanup)
@@ -1005,7 +943,11 @@ async def process_content(client: Client, message: Message, session, status_msg:
                 f"פרטי שגיאה: {str(e)}\n\n"
                 f"שלח /cancel להתחלה מחדש"
             )
-            await status_msg.edit_text(error_text)
+            # דרך ה-renderer - כדי שעדכון ממתין לא ידרוס את הודעת השגיאה
+            renderer = get_status_renderer(status_msg)
+            release_status_renderer(status_msg)
+            if not await renderer.flush(lambda: error_text):
+                raise RuntimeError("status message edit failed")
         except:
             from plugins.start import get_main_keyboard
             await message.reply_text(
@@ -1082,11 +1024,8 @@ async def process_instagram_upload(client: Client, message: Message, session, st
             # המרה לאחוז הקרוב ביותר מבין המצבים המבוקשים
             current_operation_percent = get_progress_stage(percent)
         
-        status_text = get_status_text()
-        try:
-            await status_msg.edit_text(status_text)
-        except Exception as e:
-            logger.warning(f"Failed to update status message: {e}")
+        # העדכונים מתאחדים - ה-renderer עורך את ההודעה לכל היותר פעם ב-STATUS_EDIT_MIN_INTERVAL
+        get_status_renderer(status_msg).request(get_status_text)
     
     try:
         # בדיקה שיש קובץ
@@ -1110,6 +1049,11 @@ async def process_instagram_upload(client: Client, message: Message, session, st
         logger.info(f"  Media type: {media_type}")
         logger.info(f"  Text: {session.instagram_text[:100]}...")
         
+        # thumbnail מקומי לוידאו - מתחיל ברקע, במקביל לרינדור הטקסטים
+        thumbnail_task = None
+        if media_type == "video":
+            thumbnail_task = asyncio.create_task(_prepare_video_thumbnail(session, file_path))
+        
         # יצירת טקסט מהתבנית
         try:
             telegram_caption = template_manager.render(
@@ -1173,15 +1117,25 @@ async def process_instagram_upload(client: Client, message: Message, session, st
             else:
                 telegram_file_type = "photo"
             
+            video_kwargs = {}
+            if thumbnail_task:
+                video_thumb_path, video_width, video_height = await thumbnail_task
+                if video_width and video_height:
+                    video_kwargs['width'] = video_width
+                    video_kwargs['height'] = video_height
+                if video_thumb_path:
+                    video_kwargs['thumb'] = video_thumb_path
+            
             try:
-                telegram_result = await send_to_telegram_channels(
+                telegram_result = await send_to_telegram_channels_pooled(
                     client=client,
                     file_path=file_path,
                     file_type=telegram_file_type,
                     caption=telegram_caption,
                     channels=telegram_channels,
                     first_channel_peer_id_b64=telegram_channels[0] if telegram_channels else None,
-                    protected_channels=[]
+                    protected_channels=[],
+                    **video_kwargs
                 )
                 
                 if telegram_result.get('success'):
@@ -1233,12 +1187,18 @@ async def process_instagram_upload(client: Client, message: Message, session, st
                     executor = executor_manager.get_executor()
                     loop = asyncio.get_event_loop()
                     
-                    # ניסיון לאתחל WhatsApp - אם נכשל, נמשיך בלי וואטסאפ
+                    # השירות לא מוכן (לפי בדיקת הרקע) - נמשיך בלי וואטסאפ
                     try:
-                        whatsapp = WhatsAppDelivery(dry_run=WHATSAPP_DRY_RUN)
-                    except Exception as whatsapp_init_error:
+                        await whatsapp_client.ensure_ready()
+                        whatsapp = whatsapp_client
+                    except WhatsAppDeliveryError as whatsapp_init_error:
                         logger.warning(f"⚠️ [WHATSAPP] לא ניתן לאתחל WhatsApp: {whatsapp_init_error}")
-                        logger.info("💡 [WHATSAPP] המשך בלי וואטסאפ - נשלח רק לטלגרם")
+                        # הקבוצות נכנסות לתור - יישלחו כשהשירות יחזור
+                        queued = await queue_whatsapp_groups(
+                            file_path, whatsapp_file_type, whatsapp_caption, whatsapp_groups,
+                            telegram_user_id=user_id, session=session, error=str(whatsapp_init_error)
+                        )
+                        logger.info(f"💡 [WHATSAPP] המשך בלי וואטסאפ - נשלח רק לטלגרם ({len(queued)} קבוצות בתור)")
                         tracker.errors.append({
                             "platform": "whatsapp", 
                             "file_type": media_type, 
@@ -1311,9 +1271,9 @@ async def process_instagram_upload(client: Client, message: Message, session, st
         is_completed = True
         success_count = sum([telegram_success, whatsapp_success])
         
-        # עדכון הודעת הסטטוס הסופית
-        status_text = get_status_text()
-        await status_msg.edit_text(status_text)
+        # עדכון הודעת הסטטוס הסופית (מיידי, מבטל עדכונים ממתינים)
+        await get_status_renderer(status_msg).flush(get_status_text)
+        release_status_renderer(status_msg)
         
         # מחיקת הודעות ישנות
         from plugins.content_creator.utils import delete_old_messages
@@ -1423,11 +1383,8 @@ async def process_video_only(client: Client, message: Message, session, status_m
             current_operation = operation_name
             current_operation_percent = percent
         
-        status_text = get_status_text()
-        try:
-            await status_msg.edit_text(status_text)
-        except Exception as e:
-            logger.warning(f"Failed to update status message: {e}")
+        # העדכונים מתאחדים - ה-renderer עורך את ההודעה לכל היותר פעם ב-STATUS_EDIT_MIN_INTERVAL
+        get_status_renderer(status_msg).request(get_status_text)
     
     try:
         # ========== שלב 1: הורדת וידאו מיוטיוב ==========
@@ -1461,10 +1418,15 @@ async def process_video_only(client: Client, message: Message, session, status_m
             original_filename=original_video_filename
         )
         
+        # thumbnail + dimensions רצים במקביל ליצירת העותק להעלאה
+        thumbnail_task = asyncio.create_task(
+            _prepare_video_thumbnail(session, session.video_high_path, session.youtube_url)
+        )
+        
         # יצירת עותק של הוידאו עם שם חדש להעלאה
-        upload_video_path = create_upload_copy(
-            original_path=session.video_high_path,
-            new_filename=target_video_name
+        loop = asyncio.get_event_loop()
+        upload_video_path = await loop.run_in_executor(
+            None, create_upload_copy, session.video_high_path, target_video_name
         )
         if not upload_video_path:
             raise Exception("Failed to create video copy for upload")
@@ -1480,42 +1442,8 @@ async def process_video_only(client: Client, message: Message, session, status_m
         if video_size_mb > TELEGRAM_MAX_FILE_SIZE_MB:
             raise Exception(f"וידאו גדול מדי ל-Telegram: {video_size_mb:.2f}MB > {TELEGRAM_MAX_FILE_SIZE_MB}MB")
         
-        # הכנת thumbnail ו-dimensions לוידאו
-        video_thumb_path = None
-        video_width = None
-        video_height = None
-        
-        try:
-            logger.info("📐 [TELEGRAM] מחלץ ממדי וידאו...")
-            dimensions = await get_video_dimensions(session.video_high_path)
-            if dimensions:
-                video_width, video_height = dimensions
-                logger.info(f"✅ [TELEGRAM] ממדי וידאו: {video_width}x{video_height}")
-            
-            logger.info("🖼️ [YOUTUBE] מוריד thumbnail...")
-            raw_thumbnail = await fetch_youtube_thumbnail(
-                url=session.youtube_url,
-                cookies_path="cookies.txt"
-            )
-            
-            if raw_thumbnail:
-                session.add_file_for_cleanup(raw_thumbnail)
-                logger.info(f"✅ [YOUTUBE] Thumbnail הורד: {raw_thumbnail}")
-                
-                if video_width and video_height:
-                    aspect_ratio = video_width / video_height
-                    logger.info(f"🎨 [TELEGRAM] מכין thumbnail (aspect ratio: {aspect_ratio:.3f})...")
-                    
-                    video_thumb_path = await prepare_telegram_thumbnail(
-                        input_image_path=raw_thumbnail,
-                        video_aspect_ratio=aspect_ratio
-                    )
-                    
-                    if video_thumb_path:
-                        session.add_file_for_cleanup(video_thumb_path)
-                        logger.info(f"✅ [TELEGRAM] Thumbnail מוכן: {video_thumb_path}")
-        except Exception as e:
-            logger.error(f"❌ [TELEGRAM] שגיאה בהכנת thumbnail/dimensions: {e}", exc_info=True)
+        # thumbnail ו-dimensions לוידאו
+        video_thumb_path, video_width, video_height = await thumbnail_task
         
         # ========== שלב 3: העלאה לטלגרם ==========
         await tracker.update_status("העלאת קליפ לטלגרם", 67, 0)
@@ -1582,8 +1510,11 @@ async def process_video_only(client: Client, message: Message, session, status_m
                     if video_thumb_path and os.path.exists(video_thumb_path):
                         video_kwargs['thumb'] = video_thumb_path
                     
+                    # התקדמות ברמת bytes של העלאת הוידאו (גם בהעלאה המקבילית)
+                    video_kwargs['progress'] = tracker.upload_callback('telegram', 'video')
+                    
                     logger.info(f"📤 [TELEGRAM → CHANNEL] מתחיל שליחה ל-{len(telegram_video_channels)} ערוצים...")
-                    video_result = await send_to_telegram_channels(
+                    video_result = await send_to_telegram_channels_pooled(
                         client=channel_client,
                         file_path=session.upload_video_path,
                         file_type='video',
@@ -1594,6 +1525,7 @@ async def process_video_only(client: Client, message: Message, session, status_m
                         **video_kwargs
                     )
                     
+                    remember_channel_post(session, 'video', video_result, channel_client)
                     if video_result['success']:
                         logger.info(f"✅ [TELEGRAM → CHANNEL] וידאו נשלח ל-{len(video_result['sent_to'])} ערוצים")
                         tracker.upload_status['telegram']['video'] = True
@@ -1645,6 +1577,28 @@ async def process_video_only(client: Client, message: Message, session, status_m
                     logger.warning(f"  upload_video_path: {session.upload_video_path} (קיים: {os.path.exists(session.upload_video_path) if session.upload_video_path else False})")
                     raise Exception("No video file available for WhatsApp")
                 
+                # איסוף רשימת קבוצות
+                whatsapp_video_groups = []
+                
+                # קבוצות מהמאגר - המשתמש מוסיף בעצמו
+                template_groups = channels_manager.get_template_channels("whatsapp_video", "whatsapp")
+                if template_groups:
+                    whatsapp_video_groups.extend(template_groups)
+                whatsapp_video_groups = list(dict.fromkeys(whatsapp_video_groups))
+                
+                # הכנה ל-WhatsApp בצד ה-Python (קודק/פרופיל/גודל) - השירות לא ידחוס שוב
+                # (רק אם קבוצה כלשהי מנותבת לוידאו מוטמע - מסמך / קליפ לא צריכים את הקידוד)
+                if await media_router.wants_inline_video(whatsapp_video_groups, initial_video_path):
+                    wa_ready_path = await ensure_whatsapp_ready(initial_video_path)
+                    if wa_ready_path:
+                        if wa_ready_path != initial_video_path:
+                            session.add_file_for_cleanup(wa_ready_path)
+                        initial_video_path = wa_ready_path
+                    else:
+                        logger.warning("⚠️ [WHATSAPP] הכנה ל-WhatsApp נכשלה - השירות ידחוס אם נדרש")
+                else:
+                    logger.info("🧭 [WHATSAPP] אף קבוצה לא מנותבת לוידאו מוטמע - מדלג על הקידוד ל-WhatsApp")
+                
                 # יצירת עותק עם שם נכון
                 original_video_filename = os.path.basename(initial_video_path)
                 target_video_name = build_target_filename(
@@ -1663,15 +1617,6 @@ async def process_video_only(client: Client, message: Message, session, status_m
                 else:
                     video_to_send_whatsapp = initial_video_path
                 
-                # איסוף רשימת קבוצות
-                whatsapp_video_groups = []
-                
-                # קבוצות מהמאגר - המשתמש מוסיף בעצמו
-                template_groups = channels_manager.get_template_channels("whatsapp_video", "whatsapp")
-                if template_groups:
-                    whatsapp_video_groups.extend(template_groups)
-                whatsapp_video_groups = list(dict.fromkeys(whatsapp_video_groups))
-                
                 # שליחה תמיד אם יש קבוצה קבועה, גם אם אין קבוצות ידניות
                 if whatsapp_video_groups:
                     logger.info(f"📱 [WHATSAPP] שולח וידאו ל-{len(whatsapp_video_groups)} קבוצות")
@@ -1694,31 +1639,10 @@ async def process_video_only(client: Client, message: Message, session, status_m
                     
                     executor = executor_manager.get_executor()
                     loop = asyncio.get_event_loop()
-                    whatsapp = WhatsAppDelivery(dry_run=WHATSAPP_DRY_RUN)
+                    whatsapp = whatsapp_client
                     
-                    # Telegram Fallback Callback
-                    def telegram_fallback_callback(user_id: int, file_path: str, template_text: str, failure_summary: str) -> bool:
-                        try:
-                            logger.info(f"📨 [TELEGRAM FALLBACK] Sending failed file to user {user_id}")
-                            ext = os.path.splitext(file_path)[1].lower()
-                            error_msg = f"⚠️ **העלאה לוואטסאפ נכשלה**\n\n{failure_summary}\n\n{template_text}"
-                            
-                            async def send_to_telegram():
-                                try:
-                                    if ext in ['.mp4', '.avi', '.mov', '.mkv']:
-                                        await client.send_video(user_id, file_path, caption=error_msg)
-                                    else:
-                                        await client.send_document(user_id, file_path, caption=error_msg)
-                                    return True
-                                except Exception as e:
-                                    logger.error(f"❌ [TELEGRAM FALLBACK] Error: {e}", exc_info=True)
-                                    return False
-                            
-                            result = asyncio.run_coroutine_threadsafe(send_to_telegram(), asyncio.get_event_loop())
-                            return result.result(timeout=30)
-                        except Exception as e:
-                            logger.error(f"❌ [TELEGRAM FALLBACK] Callback error: {e}", exc_info=True)
-                            return False
+                    # Telegram Fallback Callback (מהפוסט בערוץ אם יש, אחרת מהדיסק)
+                    telegram_fallback_callback = create_telegram_fallback_callback(client, session)
                     
                     try:
                         video_result = await send_to_whatsapp_groups(
@@ -1746,8 +1670,6 @@ async def process_video_only(client: Client, message: Message, session, status_m
                         if video_to_send_whatsapp and os.path.exists(video_to_send_whatsapp):
                             session.add_file_for_cleanup(video_to_send_whatsapp)
                             logger.debug(f"🗑️ [WHATSAPP] קובץ נוסף ל-cleanup: {os.path.basename(video_to_send_whatsapp)}")
-                        if 'whatsapp' in locals():
-                            whatsapp.close()
                 else:
                     logger.info("ℹ️ [WHATSAPP] אין קבוצות לשליחת וידאו")
             except Exception as e:
@@ -1762,8 +1684,7 @@ async def process_video_only(client: Client, message: Message, session, status_m
         
         tracker.is_completed = True
         
-        status_text = tracker.get_status_text()
-        await status_msg.edit_text(status_text)
+        await tracker.flush_status()
         
         # מחיקת הודעות ישנות
         from plugins.content_creator.utils import delete_old_messages
@@ -1790,7 +1711,11 @@ async def process_video_only(client: Client, message: Message, session, status_m
                 f"פרטי שגיאה: {str(e)}\n\n"
                 f"שלח /cancel להתחלה מחדש"
             )
-            await status_msg.edit_text(error_text)
+            # דרך ה-renderer - כדי שעדכון ממתין לא ידרוס את הודעת השגיאה
+            renderer = get_status_renderer(status_msg)
+            release_status_renderer(status_msg)
+            if not await renderer.flush(lambda: error_text):
+                raise RuntimeError("status message edit failed")
         except:
             from plugins.start import get_main_keyboard
             await message.reply_text(
@@ -4,9 +4,40 @@ Progress Tracker for Content Processing
 Manages progress tracking and status text generation for content uploads.
 """
 import logging
+import time
+
+from .status_renderer import get_status_renderer, release_status_renderer
 
 logger = logging.getLogger(__name__)
 
+PLATFORM_NAMES = {"telegram": "טלגרם", "whatsapp": "וואטסאפ"}
+FILE_TYPE_NAMES = {"image": "תמונה", "audio": "MP3", "video": "וידאו"}
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def _transfer_lines(upload_transfers: dict) -> str:
+    """שורת התקדמות לכל העלאה פעילה: אחוז, MB, קצב ו-ETA"""
+    text = ""
+    for platform, transfers in upload_transfers.items():
+        for file_type, transfer in transfers.items():
+            current, total = transfer["current"], transfer["total"]
+            if not total or current >= total:
+                continue
+            line = (
+                f"⬆️ {PLATFORM_NAMES.get(platform, platform)} {FILE_TYPE_NAMES.get(file_type, file_type)}: "
+                f"{int(current * 100 / total)}% • {current / (1024 * 1024):.1f}/{total / (1024 * 1024):.1f} MB"
+            )
+            if transfer.get("mbps"):
+                line += f" • {transfer['mbps']:.1f} MB/s"
+            if transfer.get("eta") is not None:
+                line += f" • ~{_format_eta(transfer['eta'])} נותרו"
+            text += line + "\n"
+    return text
+
 
 def create_status_text(
     session,
@@ -16,7 +47,8 @@ def create_status_text(
     current_operation_percent: int = 0,
     is_completed: bool = False,
     include_queue_info: bool = False,
-    queue_status: dict = None
+    queue_status: dict = None,
+    upload_transfers: dict = None
 ) -> str:
     """
     מחזיר טקסט סטטוס מעודכן בתבנית החדשה
@@ -30,6 +62,7 @@ def create_status_text(
         is_completed: Whether processing is complete
         include_queue_info: Whether to include queue information
         queue_status: Queue status dictionary
+        upload_transfers: Byte-level upload state per platform/file type (current, total, MB/s, ETA)
     
     Returns:
         Formatted status text
@@ -66,6 +99,12 @@ def create_status_text(
         text += f"{current_operation} {current_operation_percent}%\n"
         text += f"{create_progress_bar(current_operation_percent)}\n\n"
     
+    # העלאות פעילות ברמת bytes (רק אם לא הושלם)
+    if not is_completed and upload_transfers:
+        transfer_text = _transfer_lines(upload_transfers)
+        if transfer_text:
+            text += transfer_text + "\n"
+    
     # חישוב אחוז התקדמות כללי
     total_items = 0
     completed_items = 0
@@ -114,6 +153,12 @@ class ProgressTracker:
             "whatsapp": {"image": 0, "audio": 0, "video": 0}
         }
         
+        # ========== מעקב העלאה ברמת bytes (current, total, קצב, ETA) ==========
+        self.upload_transfers = {
+            "telegram": {},
+            "whatsapp": {}
+        }
+        
         # ========== מעקב שגיאות ==========
         self.errors = []
         
@@ -140,7 +185,8 @@ class ProgressTracker:
             current_operation_percent=self.current_operation_percent,
             is_completed=self.is_completed,
             include_queue_info=include_queue_info,
-            queue_status=queue_status
+            queue_status=queue_status,
+            upload_transfers=self.upload_transfers
         )
     
     async def update_status(self, operation_name="", percent=0, emoji_index=0):
@@ -157,11 +203,23 @@ class ProgressTracker:
             self.current_operation = operation_name
             self.current_operation_percent = percent
         
-        status_text = self.get_status_text()
-        try:
-            await self.status_msg.edit_text(status_text)
-        except Exception as e:
-            logger.warning(f"Failed to update status message: {e}")
+        # העדכונים מתאחדים - ה-renderer עורך את ההודעה לכל היותר פעם ב-STATUS_EDIT_MIN_INTERVAL
+        self._request_render()
+    
+    def _request_render(self):
+        if self.status_msg is not None:
+            get_status_renderer(self.status_msg).request(self.get_status_text)
+    
+    async def flush_status(self):
+        """
+        Immediately render the final status (cancels pending coalesced updates)
+        """
+        if self.status_msg is None:
+            return
+        renderer = get_status_renderer(self.status_msg)
+        await renderer.flush(self.get_status_text)
+        if self.is_completed:
+            release_status_renderer(self.status_msg)
     
     def mark_completed(self, platform: str, file_type: str, success: bool = True, **kwargs):
         """
@@ -176,6 +234,7 @@ class ProgressTracker:
         if platform in self.upload_status and file_type in self.upload_status[platform]:
             self.upload_status[platform][file_type] = success
             self.upload_progress[platform][file_type] = 100 if success else 0
+            self.upload_transfers.get(platform, {}).pop(file_type, None)
             
             if success and kwargs:
                 self.upload_results[platform][file_type] = kwargs
@@ -192,6 +251,38 @@ class ProgressTracker:
         if platform in self.upload_progress and file_type in self.upload_progress[platform]:
             self.upload_progress[platform][file_type] = percent
     
+    def upload_callback(self, platform: str, file_type: str):
+        """
+        Create a Pyrogram-style progress callback (current, total) for an upload
+        
+        Records bytes sent, throughput (MB/s) and ETA, and keeps upload_progress
+        below 100 until mark_completed is called.
+        
+        The callback is a coroutine function: Pyrogram awaits it on the event loop
+        (a plain function would be called from its upload thread, where the
+        renderer's asyncio.Event / create_task are not safe to use).
+        
+        Args:
+            platform: 'telegram' or 'whatsapp'
+            file_type: 'image', 'audio', or 'video'
+        """
+        transfer = {"current": 0, "total": 0, "started": time.monotonic(), "mbps": 0.0, "eta": None}
+        self.upload_transfers.setdefault(platform, {})[file_type] = transfer
+        
+        async def _on_progress(current: int, total: int):
+            transfer["current"] = current
+            transfer["total"] = total
+            elapsed = time.monotonic() - transfer["started"]
+            if elapsed > 0 and current > 0:
+                bytes_per_second = current / elapsed
+                transfer["mbps"] = bytes_per_second / (1024 * 1024)
+                transfer["eta"] = (total - current) / bytes_per_second if total else None
+            if total:
+                self.update_progress(platform, file_type, min(99, int(current * 100 / total)))
+            self._request_render()
+        
+        return _on_progress
+    
     def add_error(self, platform: str, file_type: str, error: str, **kwargs):
         """
         Add an error to the error list
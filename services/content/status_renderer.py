@@ -0,0 +1,140 @@
+"""
+Status Message Renderer
+עדכון הודעת סטטוס עם throttling ואיחוד עדכונים
+
+כל עדכון רק מסמן שהסטטוס השתנה. לולאה אחת לכל הודעה מרנדרת את המצב האחרון,
+לכל היותר פעם ב-STATUS_EDIT_MIN_INTERVAL שניות, ומדלגת על edit כשהטקסט לא השתנה.
+flush() תמיד שולח את המצב הסופי.
+FloodWait לא נחכה בתוך ה-edit - הלולאה פשוט מתזמנת את הסיבוב הבא לסוף ההמתנה.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from pyrogram.errors import FloodWait, MessageNotModified
+
+from core import STATUS_EDIT_MIN_INTERVAL
+from services.channels.fanout import get_wait_seconds
+from services.rate_limiter import outbound_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class StatusRenderer:
+    """לולאת רינדור להודעת סטטוס אחת"""
+
+    def __init__(self, message, min_interval: float = STATUS_EDIT_MIN_INTERVAL):
+        self.message = message
+        self.min_interval = min_interval
+        self._render: Optional[Callable[[], str]] = None
+        self._last_text: Optional[str] = None
+        self._last_edit = 0.0
+        # FloodWait - אין edit לפני הזמן הזה (monotonic)
+        self._flood_until = 0.0
+        self._dirty = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._edit_lock = asyncio.Lock()
+
+    def request(self, render: Callable[[], str]):
+        """
+        סימון שהסטטוס השתנה (ללא IO, לא חוסם)
+
+        Args:
+            render: פונקציה שמחזירה את הטקסט העדכני (נקראת רק בזמן ה-edit)
+        """
+        self._render = render
+        self._dirty.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self):
+        while self._dirty.is_set():
+            delay = max(self._last_edit + self.min_interval, self._flood_until) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._dirty.clear()
+            await self._edit()
+
+    async def _edit(self) -> bool:
+        """
+        Returns:
+            True אם ההודעה מציגה את הטקסט העדכני
+        """
+        if not self._render:
+            return True
+        async with self._edit_lock:
+            text = self._render()
+            if not text or text == self._last_text:
+                return True
+            try:
+                chat = getattr(self.message, 'chat', None)
+                await outbound_scheduler.acquire(getattr(self.message, '_client', None), getattr(chat, 'id', None))
+                await self.message.edit_text(text)
+                self._last_text = text
+                return True
+            except MessageNotModified:
+                self._last_text = text
+                return True
+            except FloodWait as e:
+                wait = get_wait_seconds(e)
+                logger.warning(f"⏳ [STATUS] FloodWait על עדכון סטטוס - העדכון הבא בעוד {wait}s")
+                self._flood_until = time.monotonic() + wait
+                self._dirty.set()  # המצב האחרון יישלח בסיבוב הבא
+                return False
+            except Exception as e:
+                logger.warning(f"Failed to update status message: {e}")
+                return False
+            finally:
+                self._last_edit = time.monotonic()
+
+    async def _wait_flood(self):
+        """המתנה לסוף FloodWait פעיל (מחוץ ל-_edit_lock)"""
+        delay = self._flood_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def flush(self, render: Optional[Callable[[], str]] = None) -> bool:
+        """
+        שליחה מיידית של המצב הסופי (מבטל עדכונים ממתינים)
+
+        Returns:
+            True אם ההודעה עודכנה (או כבר הציגה את הטקסט)
+        """
+        if render:
+            self._render = render
+        self._dirty.clear()
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self._wait_flood()
+        if await self._edit():
+            return True
+        if self._dirty.is_set():
+            # FloodWait - ממתינים לסופו וניסיון נוסף למצב הסופי
+            self._dirty.clear()
+            await self._wait_flood()
+            return await self._edit()
+        return False
+
+
+# renderer אחד לכל הודעה - (chat_id, message_id) → StatusRenderer
+_renderers: Dict[Tuple[int, int], StatusRenderer] = {}
+
+
+def get_status_renderer(message) -> StatusRenderer:
+    """ה-renderer של הודעת סטטוס (נוצר בפעם הראשונה)"""
+    chat = getattr(message, 'chat', None)
+    key = (getattr(chat, 'id', 0), getattr(message, 'id', id(message)))
+    if key not in _renderers:
+        _renderers[key] = StatusRenderer(message)
+    return _renderers[key]
+
+
+def release_status_renderer(message):
+    """שחרור ה-renderer בסוף התהליך"""
+    chat = getattr(message, 'chat', None)
+    _renderers.pop((getattr(chat, 'id', 0), getattr(message, 'id', id(message))), None)
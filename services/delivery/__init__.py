@@ -7,7 +7,9 @@ Handles delivery of content to various platforms (Telegram, WhatsApp).
 from .telegram_fallback import (
     send_failed_file_to_telegram,
     create_telegram_fallback_callback,
-    send_failed_whatsapp_files_to_user
+    send_failed_whatsapp_files_to_user,
+    remember_channel_post,
+    publish_channel_posts
 )
 from .telegram_delivery import send_content_to_telegram
 from .whatsapp_delivery import send_content_to_whatsapp
@@ -16,6 +18,8 @@ __all__ = [
     'send_failed_file_to_telegram',
     'create_telegram_fallback_callback',
     'send_failed_whatsapp_files_to_user',
+    'remember_channel_post',
+    'publish_channel_posts',
     'send_content_to_telegram',
     'send_content_to_whatsapp',
 ]
@@ -6,9 +6,10 @@ import logging
 import os
 from typing import Dict, Any, List, Optional
 from pyrogram import Client
-from pyrogram.errors import PeerIdInvalid
 
-from services.channels import channels_manager, send_to_telegram_channels
+from services.channels import channels_manager
+from services.channels.peer_cache import peer_cache
+from services.channels.client_pool import send_to_telegram_channels_pooled
 from services.templates import template_manager
 from core.context import get_context
 
@@ -80,28 +81,21 @@ async def send_content_to_telegram(
         client_type = "Userbot" if userbot else "Bot"
         logger.info(f"ℹ️ [TELEGRAM → CHANNEL] משתמש ב-{client_type} לפרסום")
         
-        # טעינת ערוצים ל-storage לפני שליחה (חשוב מאוד!)
-        logger.info(f"🔄 [TELEGRAM → CHANNEL] טוען ערוצים ל-storage של ה-{client_type}...")
-        for channel_id in channels:
-            try:
-                logger.info(f"🔍 [TELEGRAM → CHANNEL] בודק ערוץ: {channel_id}")
-                chat_obj = await channel_client.get_chat(channel_id)
-                logger.info(f"✅ [TELEGRAM → CHANNEL] ערוץ {channel_id} נטען בהצלחה: {chat_obj.title if hasattr(chat_obj, 'title') else 'N/A'}")
-            except PeerIdInvalid as e:
-                logger.error(f"❌ [TELEGRAM → CHANNEL] ערוץ {channel_id} לא נגיש: PeerIdInvalid")
-                logger.error(f"💡 [TELEGRAM → CHANNEL] פתרון: שלח הודעה מה-{client_type} לערוץ {channel_id} כדי לטעון אותו ל-storage")
-                logger.error(f"💡 [TELEGRAM → CHANNEL] או וודא שה-{client_type} חבר בערוץ {channel_id}")
-            except Exception as e:
-                logger.error(f"❌ [TELEGRAM → CHANNEL] שגיאה בטעינת ערוץ {channel_id}: {e}")
+        # טעינת ערוצים ל-storage לפני שליחה - במקביל, ומה-cache אם כבר נפתרו
+        ready = await peer_cache.warm_up(channel_client, channels)
+        if ready < len(channels):
+            logger.error(f"❌ [TELEGRAM → CHANNEL] {len(channels) - ready} ערוצים לא נגישים ל-{client_type}")
+            logger.error(f"💡 [TELEGRAM → CHANNEL] פתרון: שלח הודעה מה-{client_type} לערוצים כדי לטעון אותם ל-storage, או וודא שה-{client_type} חבר בהם")
         
         # שליחה
-        result = await send_to_telegram_channels(
+        # שליחה דרך ה-client pool (client אחר אם זה חסום / לא נגיש)
+        result = await send_to_telegram_channels_pooled(
             client=channel_client,
             file_path=file_path,
             file_type=file_type,
             caption=caption,
             channels=channels,
-            first_channel_id=first_channel_id or (channels[0] if channels else None),
+            first_channel_peer_id_b64=first_channel_id or (channels[0] if channels else None),
             protected_channels=protected_channels or [],
             **kwargs
         )
@@ -3,16 +3,121 @@ Telegram Fallback Delivery
 
 Handles sending failed WhatsApp files back to users via Telegram.
 """
-import logging
 import asyncio
+import logging
 import os
+from typing import Awaitable
 
 from pyrogram import Client
 from pyrogram.types import Message
 from services.media.ffmpeg_utils import get_video_duration
+from services.channels.file_id_cache import send_cached_media, _client_key
+from services.templates import template_manager
 
 logger = logging.getLogger(__name__)
 
+# סוג הקובץ לפי סיומת → סוג המדיה בטלגרם
+_KIND_BY_EXT = {
+    '.jpg': 'photo', '.jpeg': 'photo', '.png': 'photo', '.webp': 'photo',
+    '.mp3': 'audio', '.m4a': 'audio', '.wav': 'audio',
+    '.mp4': 'video', '.avi': 'video', '.mov': 'video', '.mkv': 'video',
+}
+
+
+def remember_channel_post(session, kind: str, result: dict, client: Client):
+    """
+    שמירת מיקום הפוסט בערוץ (מתוצאת send_to_telegram_channels) לשימוש חוזר ב-fallback
+
+    Args:
+        session: סשן המשתמש
+        kind: 'photo' / 'audio' / 'video'
+        result: תוצאת השליחה לערוצים
+        client: ה-client ששלח (אם התוצאה לא מציינת client אחר מהמאגר)
+    """
+    if session and result and result.get('success') and result.get('file_id'):
+        session.channel_posts[kind] = {
+            'client': result.get('client') or _client_key(client),
+            'chat_id': result.get('chat_id'),
+            'message_id': result.get('message_id'),
+            'file_id': result['file_id'],
+        }
+    settle_channel_posts(session, kind)
+
+
+def publish_channel_posts(session, publishing: Awaitable, *kinds: str) -> Awaitable:
+    """
+    פרסום לערוצים שרץ במקביל לשליחה לוואטסאפ: fallback לטלגרם של אותו סוג
+    ממתין לפוסט (ושולח ממנו) במקום להעלות את הקובץ שוב מהדיסק
+
+    הסימון נוצר כבר בקריאה - לפני שהשליחה לוואטסאפ מתחילה - ומשוחרר
+    ב-remember_channel_post, או בסיום הפרסום בכל מקרה (כישלון / בלי ערוצים)
+
+    Args:
+        session: סשן המשתמש
+        publishing: ה-coroutine של הפרסום לערוצים
+        *kinds: סוגי הפוסטים ('photo' / 'audio' / 'video')
+    """
+    if session is not None:
+        for kind in kinds:
+            session.channel_posts_pending[kind] = asyncio.Event()
+
+    async def _run():
+        try:
+            return await publishing
+        finally:
+            settle_channel_posts(session, *kinds)
+
+    return _run()
+
+
+def settle_channel_posts(session, *kinds: str):
+    """הפרסום לערוץ הסתיים (בהצלחה או לא) - fallbacks שממתינים ממשיכים"""
+    pending = getattr(session, 'channel_posts_pending', None)
+    if not pending:
+        return
+    for kind in kinds:
+        event = pending.pop(kind, None)
+        if event is not None:
+            event.set()
+
+
+async def _send_from_channel_post(client: Client, chat_id: int, kind: str, caption: str, session, **params) -> bool:
+    """
+    שליחת קובץ שכבר פורסם בערוץ - בלי העלאה מחדש
+
+    file_id תקף רק לחשבון שהעלה אותו: אם זה אותו client - שליחה לפי file_id,
+    אחרת copy_message מהערוץ (דורש שה-client חבר בערוץ).
+
+    Returns:
+        True אם נשלח, False אם צריך להעלות מהדיסק
+    """
+    pending = (getattr(session, 'channel_posts_pending', None) or {}).get(kind)
+    if pending is not None:
+        logger.info(f"⏳ [TELEGRAM FALLBACK] ממתין לפרסום ה-{kind} בערוץ (שימוש חוזר במקום העלאה)")
+        await pending.wait()
+    post = (getattr(session, 'channel_posts', None) or {}).get(kind)
+    if not post:
+        return False
+    try:
+        if post['client'] == _client_key(client):
+            send_method = getattr(client, f"send_{kind}")
+            await send_method(chat_id=chat_id, caption=caption, **{kind: post['file_id']}, **params)
+            logger.info(f"♻️ [TELEGRAM FALLBACK] {kind} נשלח לפי file_id מהערוץ (ללא העלאה)")
+        elif post.get('chat_id') and post.get('message_id'):
+            await client.copy_message(
+                chat_id=chat_id,
+                from_chat_id=post['chat_id'],
+                message_id=post['message_id'],
+                caption=caption
+            )
+            logger.info(f"♻️ [TELEGRAM FALLBACK] {kind} הועתק מהערוץ (ללא העלאה)")
+        else:
+            return False
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ [TELEGRAM FALLBACK] שימוש חוזר בפוסט מהערוץ נכשל ({e}) - מעלה מהדיסק")
+        return False
+
 
 async def send_failed_file_to_telegram(
     client: Client,
@@ -47,14 +152,17 @@ async def send_failed_file_to_telegram(
         # יצירת הודעת שגיאה
         error_msg = f"⚠️ **העלאה לוואטסאפ נכשלה**\n\n{failure_summary}\n\n{template_text}"
         
+        # הקובץ כבר בערוץ? שליחה משם במקום העלאה חוזרת
+        kind = _KIND_BY_EXT.get(ext)
+        if kind and await _send_from_channel_post(client, user_id, kind, error_msg, session):
+            pass  # נשלח מהפוסט בערוץ
         # שליחה למשתמש בטלגרם
-        if ext in ['.jpg', '.jpeg', '.png', '.webp']:
-            await client.send_photo(user_id, file_path, caption=error_msg)
+        elif ext in ['.jpg', '.jpeg', '.png', '.webp']:
+            await send_cached_media(client, client.send_photo, 'photo', file_path, chat_id=user_id, caption=error_msg)
         elif ext in ['.mp3', '.m4a', '.wav']:
             # הוספת title ו-performer להצגה יפה בטלגרם
             audio_params = {
                 'chat_id': user_id,
-                'audio': file_path,
                 'caption': error_msg,
                 'title': session.song_name if session and hasattr(session, 'song_name') else None,
                 'performer': session.artist_name if session and hasattr(session, 'artist_name') else None
@@ -68,11 +176,11 @@ async def send_failed_file_to_telegram(
             except:
                 pass  # אם נכשל, ממשיכים בלי duration
             
-            await client.send_audio(**audio_params)
+            await send_cached_media(client, client.send_audio, 'audio', file_path, **audio_params)
         elif ext in ['.mp4', '.avi', '.mov', '.mkv']:
-            await client.send_video(user_id, file_path, caption=error_msg)
+            await send_cached_media(client, client.send_video, 'video', file_path, chat_id=user_id, caption=error_msg)
         else:
-            await client.send_document(user_id, file_path, caption=error_msg)
+            await send_cached_media(client, client.send_document, 'document', file_path, chat_id=user_id, caption=error_msg)
         
         logger.info(f"✅ [TELEGRAM FALLBACK] File sent successfully")
         return True
@@ -93,28 +201,19 @@ def create_telegram_fallback_callback(client: Client, session):
     Returns:
         Callback function
     """
-    def telegram_fallback_callback(user_id: int, file_path: str, template_text: str, failure_summary: str) -> bool:
+    async def telegram_fallback_callback(user_id: int, file_path: str, template_text: str, failure_summary: str) -> bool:
         """
         Callback function for sending failed WhatsApp files back to user via Telegram
+        (נקרא ע"י whatsapp_client.send_file בתוך ה-event loop)
         """
-        try:
-            # הרצה אסינכרונית - נריץ ב-event loop הקיים
-            result = asyncio.run_coroutine_threadsafe(
-                send_failed_file_to_telegram(
-                    client=client,
-                    user_id=user_id,
-                    file_path=file_path,
-                    template_text=template_text,
-                    failure_summary=failure_summary,
-                    session=session
-                ),
-                asyncio.get_event_loop()
-            )
-            return result.result(timeout=30)
-            
-        except Exception as e:
-            logger.error(f"❌ [TELEGRAM FALLBACK] Callback error: {e}", exc_info=True)
-            return False
+        return await send_failed_file_to_telegram(
+            client=client,
+            user_id=user_id,
+            file_path=file_path,
+            template_text=template_text,
+            failure_summary=failure_summary,
+            session=session
+        )
     
     return telegram_fallback_callback
 
@@ -176,10 +275,12 @@ async def send_failed_whatsapp_files_to_user(
                 credits=credits_text,
                 youtube_url=session.youtube_url
             )
-            await message.reply_photo(
-                session.processed_image_path,
-                caption=f"⚠️ **תמונה לא נשלחה לוואטסאפ**\n\n{image_caption}"
-            )
+            image_caption = f"⚠️ **תמונה לא נשלחה לוואטסאפ**\n\n{image_caption}"
+            if not await _send_from_channel_post(client, message.chat.id, 'photo', image_caption, session):
+                await send_cached_media(
+                    message._client, message.reply_photo, 'photo', session.processed_image_path,
+                    caption=image_caption
+                )
             logger.info("✅ [TELEGRAM → USER] תמונה נשלחה למשתמש")
         
         # MP3
@@ -201,7 +302,6 @@ async def send_failed_whatsapp_files_to_user(
                 mp3_thumb_path_user = mp3_thumb_path
             
             audio_params = {
-                'audio': session.processed_mp3_path,
                 'thumb': mp3_thumb_path_user,
                 'caption': f"⚠️ **MP3 לא נשלח לוואטסאפ** (גדול מדי - {os.path.getsize(session.processed_mp3_path) / (1024*1024):.1f} MB)\n\n{audio_caption}",
                 'title': session.song_name,
@@ -211,7 +311,10 @@ async def send_failed_whatsapp_files_to_user(
             if mp3_duration:
                 audio_params['duration'] = int(mp3_duration)
             
-            await message.reply_audio(**audio_params)
+            if not await _send_from_channel_post(client, message.chat.id, 'audio', audio_params['caption'], session):
+                await send_cached_media(
+                    message._client, message.reply_audio, 'audio', session.processed_mp3_path, **audio_params
+                )
             logger.info("✅ [TELEGRAM → USER] MP3 נשלח למשתמש")
         
         # וידאו
@@ -232,13 +335,15 @@ async def send_failed_whatsapp_files_to_user(
             if video_thumb_path and os.path.exists(video_thumb_path):
                 video_thumb_for_user = video_thumb_path
             
-            await message.reply_video(
-                session.upload_video_path,
-                thumb=video_thumb_for_user,
-                width=video_width if video_width else None,
-                height=video_height if video_height else None,
-                caption=f"⚠️ **וידאו לא נשלח לוואטסאפ** (גדול מדי - {os.path.getsize(session.upload_video_path) / (1024*1024):.1f} MB)\n\n{video_caption}"
-            )
+            video_caption = f"⚠️ **וידאו לא נשלח לוואטסאפ** (גדול מדי - {os.path.getsize(session.upload_video_path) / (1024*1024):.1f} MB)\n\n{video_caption}"
+            if not await _send_from_channel_post(client, message.chat.id, 'video', video_caption, session):
+                await send_cached_media(
+                    message._client, message.reply_video, 'video', session.upload_video_path,
+                    thumb=video_thumb_for_user,
+                    width=video_width if video_width else None,
+                    height=video_height if video_height else None,
+                    caption=video_caption
+                )
             logger.info("✅ [TELEGRAM → USER] וידאו נשלח למשתמש")
         
     except Exception as e:
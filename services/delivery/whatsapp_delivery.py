@@ -8,8 +8,8 @@ import asyncio
 from typing import Dict, Any, List, Optional, Callable
 
 import config
-from services.whatsapp import WhatsAppDelivery
-from services.channels import channels_manager, send_to_whatsapp_groups
+from services.whatsapp import whatsapp_client, WhatsAppDeliveryError
+from services.channels import channels_manager, send_to_whatsapp_groups, queue_whatsapp_groups
 from services.templates import template_manager
 
 logger = logging.getLogger(__name__)
@@ -78,43 +78,42 @@ async def send_content_to_whatsapp(
             except Exception as e:
                 logger.warning(f"⚠️ [WHATSAPP] Failed to render status template, using default: {e}")
         
-        # ניסיון לאתחל WhatsApp
+        # השירות לא מוכן (לפי בדיקת הרקע) - הקבוצות נכנסות לתור וממשיכים בלי וואטסאפ
         try:
-            whatsapp = WhatsAppDelivery(dry_run=config.WHATSAPP_DRY_RUN)
-        except Exception as whatsapp_init_error:
+            await whatsapp_client.ensure_ready()
+        except WhatsAppDeliveryError as whatsapp_init_error:
             logger.warning(f"⚠️ [WHATSAPP] לא ניתן לאתחל WhatsApp: {whatsapp_init_error}")
-            logger.info("💡 [WHATSAPP] המשך בלי וואטסאפ")
+            queued = await queue_whatsapp_groups(
+                file_path, file_type, current_caption, groups,
+                telegram_user_id=telegram_user_id, session=session, error=str(whatsapp_init_error)
+            )
+            logger.info(f"💡 [WHATSAPP] המשך בלי וואטסאפ ({len(queued)} קבוצות בתור לשליחה חוזרת)")
             return {
                 'success': False,
                 'error': f"WhatsApp service not ready: {str(whatsapp_init_error)}",
                 'sent_to': [],
-                'errors': [str(whatsapp_init_error)]
+                'errors': [str(whatsapp_init_error)],
+                'queued': queued
             }
         
-        try:
-            # שליחה
-            result = await send_to_whatsapp_groups(
-                whatsapp_delivery=whatsapp,
-                file_path=file_path,
-                file_type=file_type,
-                caption=current_caption,
-                groups=groups,
-                telegram_user_id=telegram_user_id,
-                telegram_fallback_callback=telegram_fallback_callback,
-                session=session
-            )
-            
-            if result.get('success') and result.get('sent_to'):
-                logger.info(f"✅ [WHATSAPP] נשלח ל-{len(result['sent_to'])} קבוצות")
-            else:
-                logger.warning(f"⚠️ [WHATSAPP] שליחה נכשלה: {result.get('errors', [])}")
-            
-            return result
-            
-        finally:
-            if 'whatsapp' in locals():
-                whatsapp.close()
-                logger.info("✅ [WHATSAPP] שליחה הושלמה")
+        # שליחה
+        result = await send_to_whatsapp_groups(
+            whatsapp_delivery=whatsapp_client,
+            file_path=file_path,
+            file_type=file_type,
+            caption=current_caption,
+            groups=groups,
+            telegram_user_id=telegram_user_id,
+            telegram_fallback_callback=telegram_fallback_callback,
+            session=session
+        )
+        
+        if result.get('success') and result.get('sent_to'):
+            logger.info(f"✅ [WHATSAPP] נשלח ל-{len(result['sent_to'])} קבוצות")
+        else:
+            logger.warning(f"⚠️ [WHATSAPP] שליחה נכשלה: {result.get('errors', [])}")
+        
+        return result
         
     except Exception as e:
         logger.error(f"❌ [WHATSAPP] שגיאה בשליחה: {e}", exc_info=True)
@@ -22,7 +22,8 @@ from .image import (
     add_text_to_image,
     fetch_youtube_thumbnail,
     prepare_mp3_thumbnail,
-    prepare_telegram_thumbnail
+    prepare_telegram_thumbnail,
+    generate_video_thumbnail
 )
 
 # Audio Processing
@@ -66,6 +67,7 @@ __all__ = [
     'fetch_youtube_thumbnail',
     'prepare_mp3_thumbnail',
     'prepare_telegram_thumbnail',
+    'generate_video_thumbnail',
     
     # Audio
     'update_mp3_tags',
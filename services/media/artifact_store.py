@@ -0,0 +1,416 @@
+"""
+Artifact Store
+מאגר תוצרי מדיה מבוסס תוכן (content-addressed) - וידאו מומר, MP3 מתויג, thumbnails
+
+כל תוצר נשמר פעם אחת לפי ה-SHA-256 של התוכן שלו, ומפתחות לוגיים
+(מקור + תוכנית פורמט + הגדרות קידוד) מצביעים אליו. כך פרסום חוזר של אותו
+קליפ (תיקון כיתוב, ערוץ חדש) לא מריץ שוב את כל שרשרת ההורדה וההמרה.
+
+פינוי: LRU לפי זמן גישה אחרון עד שהגודל הכולל מתחת ל-ARTIFACT_STORE_MAX_MB.
+
+אובייקטים במאגר הם עותקים לקריאה בלבד, ו-get מחזיר עותק עבודה נפרד - כתיבה
+במקום (תיוג MP3, שמירת thumbnail מעל עצמו, copy2 על אותו שם) לא משנה את התוצר השמור.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from core import (
+    DOWNLOADS_PATH,
+    ARTIFACT_STORE_ENABLED,
+    ARTIFACT_STORE_PATH,
+    ARTIFACT_STORE_MAX_MB,
+)
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Cache ל-hash של קבצים: path -> (size, mtime, sha256)
+_file_hash_cache: Dict[str, tuple] = {}
+
+
+def make_key(*parts: Any) -> str:
+    """
+    בונה מפתח לוגי יציב מרכיבים (מקור, תוכנית פורמט, הגדרות קידוד...)
+
+    Args:
+        *parts: רכיבים הניתנים ל-JSON (מחרוזות, מספרים, dicts)
+
+    Returns:
+        מפתח hex
+    """
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def hash_file_sync(file_path: str) -> Optional[str]:
+    """
+    מחשב SHA-256 של קובץ (עם cache לפי גודל + mtime)
+
+    Returns:
+        hash hex או None אם הקובץ לא קיים
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+
+    cached = _file_hash_cache.get(file_path)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime:
+        return cached[2]
+
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    _file_hash_cache[file_path] = (stat.st_size, stat.st_mtime, digest)
+    return digest
+
+
+def known_hash(file_path: str) -> Optional[str]:
+    """
+    SHA-256 שכבר חושב לקובץ (ללא קריאת תוכן - stat בלבד), או None
+
+    קבצים שנשמרו במאגר או שהוחזרו ממנו מוכרים כבר; לשאר אין hash עד ש-hash_file רץ
+    """
+    cached = _file_hash_cache.get(file_path)
+    if not cached:
+        return None
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return None
+    if cached[0] == stat_result.st_size and cached[1] == stat_result.st_mtime:
+        return cached[2]
+    return None
+
+
+def _remember_hash(file_path: str, sha: str):
+    """רישום hash ידוע לקובץ שתוכנו הועתק מאובייקט (בלי לקרוא אותו שוב)"""
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return
+    _file_hash_cache[file_path] = (stat_result.st_size, stat_result.st_mtime, sha)
+
+
+def carry_known_hash(src_path: str, dst_path: str):
+    """העברת ה-hash הידוע של src לעותק זהה בתוכן (dst) - כדי שגם העותק יזוהה בלי קריאה"""
+    sha = known_hash(src_path)
+    if sha:
+        _remember_hash(dst_path, sha)
+
+
+async def hash_file(file_path: str) -> Optional[str]:
+    """גרסה אסינכרונית של hash_file_sync (רצה ב-executor)"""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, hash_file_sync, file_path)
+
+
+def _link_or_copy(src: str, dst: str):
+    """hardlink אם אפשר (אותה מערכת קבצים), אחרת העתקה"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _copy_file(src: str, dst: str):
+    """העתקה ל-dst דרך קובץ זמני והחלפה אטומית (ללא הרשאות המקור - עותק עבודה כתיב)"""
+    tmp_dst = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        shutil.copyfile(src, tmp_dst)
+        os.replace(tmp_dst, dst)
+    finally:
+        if os.path.exists(tmp_dst):
+            os.remove(tmp_dst)
+
+
+class ArtifactStore:
+    """
+    מאגר תוצרים עם אינדקס JSON:
+    {
+        "keys": {logical_key: sha256},
+        "objects": {sha256: {"file", "size", "kind", "name", "created_at", "last_access"}}
+    }
+    """
+
+    def __init__(self, root_path: Path = ARTIFACT_STORE_PATH, max_size_mb: int = ARTIFACT_STORE_MAX_MB):
+        self.root_path = Path(root_path)
+        self.objects_path = self.root_path / "objects"
+        self.index_path = self.root_path / "index.json"
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        # _lock מגן על האינדקס בזיכרון בלבד (contains נקרא מה-event loop) - בלי IO בתוכו
+        self._lock = threading.Lock()
+        # _save_lock מסדר את הכתיבות לקובץ האינדקס
+        self._save_lock = threading.Lock()
+        self._index = self._load()
+        # שמירות ברקע (put_background) - הפניה חזקה עד שהן מסתיימות
+        self._background: Set[asyncio.Task] = set()
+
+    def _load(self) -> Dict[str, Any]:
+        """טוען אינדקס מקובץ, או יוצר מבנה ריק"""
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                data.setdefault("keys", {})
+                data.setdefault("objects", {})
+                return data
+            except Exception as e:
+                logger.error(f"❌ [ARTIFACTS] Failed to load index: {e}")
+        return {"keys": {}, "objects": {}}
+
+    def _save(self):
+        """
+        שמירת האינדקס (אטומית - כתיבה לקובץ זמני והחלפה), מחוץ ל-_lock
+
+        ה-snapshot נלקח אחרי _save_lock, כך שהכתיבה האחרונה תמיד מכילה את המצב העדכני
+        """
+        try:
+            with self._save_lock:
+                with self._lock:
+                    data = json.dumps(self._index, ensure_ascii=False, indent=2)
+                self.root_path.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.index_path.with_suffix('.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            logger.error(f"❌ [ARTIFACTS] Failed to save index: {e}")
+
+    def _object_file(self, sha: str) -> Path:
+        return self.objects_path / self._index["objects"][sha]["file"]
+
+    # ========== פעולות סינכרוניות (רצות ב-executor) ==========
+
+    def _get_sync(self, key: str, dest_path: Optional[str]) -> Optional[str]:
+        with self._lock:
+            sha = self._index["keys"].get(key)
+            if not sha or sha not in self._index["objects"]:
+                return None
+            name = self._index["objects"][sha]["name"]
+            object_file = self._object_file(sha)
+
+        target = Path(dest_path) if dest_path else Path(DOWNLOADS_PATH) / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            # עותק עבודה (לא hardlink) - הקורא רשאי לשנות אותו במקום
+            _copy_file(str(object_file), str(target))
+            _remember_hash(str(target), sha)
+        except FileNotFoundError:
+            # הקובץ נמחק מבחוץ (או פונה במקביל) - מנקים את הרשומה
+            logger.warning(f"⚠️ [ARTIFACTS] Missing object file, dropping: {object_file.name}")
+            with self._lock:
+                if self._index["keys"].get(key) == sha:
+                    self._drop_object(sha)
+            self._save()
+            return None
+
+        with self._lock:
+            if sha in self._index["objects"]:
+                self._index["objects"][sha]["last_access"] = time.time()
+        self._save()
+        return str(target)
+
+    def _put_sync(self, key: str, file_path: str, kind: str, name: Optional[str] = None) -> Optional[str]:
+        sha = hash_file_sync(file_path)
+        if not sha:
+            return None
+
+        name = name or os.path.basename(file_path)
+        ext = os.path.splitext(name)[1]
+        rel_file = f"{sha[:2]}/{sha}{ext}"
+        object_file = self.objects_path / rel_file
+
+        with self._lock:
+            exists = sha in self._index["objects"]
+
+        tmp_file = None
+        if not exists:
+            # עותק פרטי (לא hardlink) - כתיבה עתידית לקובץ המקור לא תגיע למאגר
+            object_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = f"{object_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(file_path, tmp_file)
+            os.chmod(tmp_file, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+        with self._lock:
+            if sha not in self._index["objects"] and tmp_file:
+                os.replace(tmp_file, object_file)
+                tmp_file = None
+                now = time.time()
+                self._index["objects"][sha] = {
+                    "file": rel_file,
+                    "size": os.path.getsize(object_file),
+                    "kind": kind,
+                    "name": name,
+                    "created_at": now,
+                    "last_access": now,
+                }
+            elif sha in self._index["objects"]:
+                self._index["objects"][sha]["last_access"] = time.time()
+            else:
+                # האובייקט פונה בין הבדיקה לנעילה - ננסה שוב בשמירה הבאה
+                return None
+
+            self._index["keys"][key] = sha
+            self._evict()
+
+        if tmp_file:
+            # put מקביל של אותו תוכן הקדים אותנו
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+        self._save()
+        return sha
+
+    def _drop_object(self, sha: str):
+        """מחיקת אובייקט וכל המפתחות שמצביעים אליו (בתוך lock)"""
+        obj = self._index["objects"].pop(sha, None)
+        if obj:
+            try:
+                (self.objects_path / obj["file"]).unlink()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"⚠️ [ARTIFACTS] Could not delete object {obj['file']}: {e}")
+        for key in [k for k, v in self._index["keys"].items() if v == sha]:
+            del self._index["keys"][key]
+
+    def _evict(self):
+        """פינוי LRU עד שהגודל הכולל מתחת למגבלה (בתוך lock)"""
+        objects = self._index["objects"]
+        total = sum(obj["size"] for obj in objects.values())
+        if total <= self.max_size_bytes:
+            return
+
+        for sha, obj in sorted(objects.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_size_bytes:
+                break
+            total -= obj["size"]
+            logger.info(f"🧹 [ARTIFACTS] Evicting {obj['kind']} {obj['name']} ({obj['size'] / (1024 * 1024):.1f}MB)")
+            self._drop_object(sha)
+
+    # ========== API אסינכרוני ==========
+
+    async def get(self, key: str, dest_path: Optional[str] = None) -> Optional[str]:
+        """
+        מחזיר עותק עבודה של תוצר שמור
+
+        Args:
+            key: מפתח לוגי (make_key)
+            dest_path: נתיב יעד (ברירת מחדל: downloads/<שם מקורי>)
+
+        Returns:
+            נתיב לקובץ או None אם אין תוצר שמור
+        """
+        if not ARTIFACT_STORE_ENABLED:
+            return None
+        try:
+            loop = asyncio.get_event_loop()
+            result = await loop.run_in_executor(None, self._get_sync, key, dest_path)
+            if result:
+                logger.info(f"♻️ [ARTIFACTS] Cache hit: {os.path.basename(result)}")
+            return result
+        except Exception as e:
+            logger.error(f"❌ [ARTIFACTS] Error reading artifact: {e}", exc_info=True)
+            return None
+
+    async def put(self, key: str, file_path: str, kind: str, name: Optional[str] = None) -> Optional[str]:
+        """
+        שומר תוצר במאגר
+
+        Args:
+            key: מפתח לוגי (make_key)
+            file_path: נתיב לקובץ התוצר
+            kind: סוג התוצר ("video", "audio", "thumbnail")
+            name: שם הקובץ שיוחזר ב-get (ברירת מחדל: השם של file_path)
+
+        Returns:
+            SHA-256 של התוכן או None אם נכשל
+        """
+        if not ARTIFACT_STORE_ENABLED or not file_path or not os.path.exists(file_path):
+            return None
+        try:
+            loop = asyncio.get_event_loop()
+            sha = await loop.run_in_executor(None, self._put_sync, key, file_path, kind, name)
+            if sha:
+                logger.info(f"📦 [ARTIFACTS] Stored {kind}: {name or os.path.basename(file_path)} ({sha[:12]})")
+            return sha
+        except Exception as e:
+            logger.error(f"❌ [ARTIFACTS] Error storing artifact: {e}", exc_info=True)
+            return None
+
+    def put_background(self, key: str, file_path: str, kind: str) -> Optional[asyncio.Task]:
+        """
+        שמירת תוצר ברקע - לא חוסמת את השלבים הבאים (וידאו של עד 2GB)
+
+        נוצר hardlink זמני לקובץ (מיידי, באותה תיקייה), וה-hash + ההעתקה למאגר
+        רצים ב-task מתוכו. הקורא רשאי למחוק את הקובץ מיד - ה-hardlink מחזיק את התוכן.
+        אם אין hardlink (מערכת קבצים שלא תומכת) - שמירה רגילה שממתינה להעתקה.
+
+        Returns:
+            ה-task של השמירה, או None אם המאגר כבוי / הקובץ חסר
+        """
+        if not ARTIFACT_STORE_ENABLED or not file_path or not os.path.exists(file_path):
+            return None
+        staged = f"{file_path}.{uuid.uuid4().hex[:8]}.store"
+        try:
+            os.link(file_path, staged)
+        except OSError:
+            task = asyncio.ensure_future(self.put(key, file_path, kind))
+        else:
+            task = asyncio.ensure_future(self._put_staged(key, file_path, staged, kind))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def _put_staged(self, key: str, file_path: str, staged: str, kind: str) -> Optional[str]:
+        try:
+            sha = await self.put(key, staged, kind, name=os.path.basename(file_path))
+            if sha and os.path.exists(file_path) and os.path.samefile(file_path, staged):
+                # אותו inode - ה-hash ידוע גם לקובץ המקורי (file_id cache, WhatsApp)
+                _remember_hash(file_path, sha)
+            return sha
+        finally:
+            try:
+                os.remove(staged)
+            except OSError:
+                pass
+
+    def contains(self, key: str) -> bool:
+        """בדיקה מהירה (ללא IO) אם קיים תוצר למפתח"""
+        if not ARTIFACT_STORE_ENABLED:
+            return False
+        with self._lock:
+            sha = self._index["keys"].get(key)
+            return bool(sha and sha in self._index["objects"])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """סטטיסטיקות מאגר"""
+        with self._lock:
+            objects = self._index["objects"].values()
+            return {
+                "objects": len(self._index["objects"]),
+                "keys": len(self._index["keys"]),
+                "total_mb": round(sum(obj["size"] for obj in objects) / (1024 * 1024), 1),
+                "max_mb": self.max_size_bytes // (1024 * 1024),
+            }
+
+
+# מופע גלובלי
+artifact_store = ArtifactStore()
@@ -15,6 +15,9 @@ from mutagen.id3 import (
 
 logger = logging.getLogger(__name__)
 
+# גרסת לוגיקת התיוג - חלק ממפתח ה-artifact store (להעלות בכל שינוי בתגיות)
+MP3_TAGS_VERSION = 1
+
 
 async def update_mp3_tags(
     mp3_path: str,
@@ -53,6 +56,17 @@ async def update_mp3_tags(
             logger.error(f"❌ תמונה לא נמצאה: {image_path}")
             return None
         
+        # בדיקת artifact store - אותו MP3 + אותה תמונה + אותו metadata
+        from services.media.artifact_store import artifact_store, hash_file, make_key
+        mp3_hash = await hash_file(mp3_path)
+        image_hash = await hash_file(image_path)
+        cache_key = make_key("mp3_tags", mp3_hash, image_hash, metadata, MP3_TAGS_VERSION)
+        if artifact_store.contains(cache_key):
+            cached_path = await artifact_store.get(cache_key, dest_path=output_path or mp3_path)
+            if cached_path:
+                logger.info(f"♻️ משתמש ב-MP3 מתויג שמור: {cached_path}")
+                return cached_path
+        
         # ערך הקרדיט הקבוע
         CREDIT_TEXT = "חסידי〽️יוזיק ~ https://linktr.ee/hasidim_music"
         
@@ -345,6 +359,9 @@ async def update_mp3_tags(
         loop = asyncio.get_event_loop()
         result = await loop.run_in_executor(None, _update_tags)
         
+        if result:
+            await artifact_store.put(cache_key, result, "audio")
+        
         return result
         
     except Exception as e:
@@ -0,0 +1,326 @@
+"""
+YouTube Prefetcher
+הורדה מוקדמת (ספקולטיבית) של קליפ מיוטיוב ברגע שהפרטים מתקבלים
+
+המשימה בתור מגיעה להורדת הוידאו רק כשהיא בראש התור ובשלב 3 של process_content,
+אבל הקישור ידוע כבר מהרגע שהמשתמש שלח את הפרטים. ה-prefetcher מתחיל מיד
+שליפת מידע + הורדה כפולה ברקע, וכשהמשימה רצה היא "מאמצת" את ההורדה
+(בתהליך או שהסתיימה) במקום להתחיל מחדש.
+
+כל הורדה מוקדמת כותבת לתיקייה משלה (downloads/.prefetch/<id>) - הקבצים עוברים
+ל-downloads רק כשהמשימה מאמצת אותם, כך שהורדה מוקדמת שבוטלה ומסתיימת מאוחר
+לא נוגעת בקבצים שהמשימה מורידה בעצמה לאותם שמות.
+
+מגבלות:
+- מספר הורדות מוקדמות במקביל מוגבל (YOUTUBE_PREFETCH_MAX_CONCURRENT)
+- רוחב פס מוגבל דרך ratelimit של yt-dlp (YOUTUBE_PREFETCH_RATE_LIMIT_KBPS)
+- תקציב דיסק לקבצים שלא נלקחו + מקום פנוי מינימלי בדיסק
+- קבצים שלא נלקחו נמחקים אחרי TTL
+"""
+import asyncio
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import yt_dlp
+
+from core import (
+    DOWNLOADS_PATH,
+    YOUTUBE_PREFETCH_ENABLED,
+    YOUTUBE_PREFETCH_MAX_CONCURRENT,
+    YOUTUBE_PREFETCH_RATE_LIMIT_KBPS,
+    YOUTUBE_PREFETCH_MAX_DISK_MB,
+    YOUTUBE_PREFETCH_MIN_FREE_DISK_MB,
+    YOUTUBE_PREFETCH_TTL_MINUTES,
+)
+from services.media.youtube import download_youtube_video_dual, get_video_info, get_video_artifact_keys
+from services.media.artifact_store import artifact_store
+
+logger = logging.getLogger(__name__)
+
+# הערכת bitrate (Mbps) לשתי הגרסאות יחד (1080-ish ~8 + 720-ish ~5) לצורך תקציב דיסק
+_ESTIMATED_DUAL_BITRATE_MBPS = 13.0
+
+# תיקיית העבודה של ההורדות המוקדמות (תת-תיקייה לכל הורדה)
+PREFETCH_DIR = DOWNLOADS_PATH / ".prefetch"
+
+
+@dataclass
+class PrefetchEntry:
+    """הורדה מוקדמת בודדת"""
+    url: str
+    owner_id: Optional[int] = None
+    work_dir: Path = field(default_factory=lambda: PREFETCH_DIR / uuid.uuid4().hex[:12])
+    task: Optional[asyncio.Task] = None
+    result: Optional[Tuple[str, Optional[str]]] = None
+    estimated_size_mb: float = 0.0
+    cancelled: bool = False
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def is_done(self) -> bool:
+        return self.task is not None and self.task.done()
+
+    def files(self) -> list:
+        """קבצים שנוצרו בהורדה (אם הסתיימה)"""
+        if not self.result:
+            return []
+        return [path for path in self.result if path and os.path.exists(path)]
+
+    def size_on_disk_mb(self) -> float:
+        return sum(os.path.getsize(path) for path in self.files()) / (1024 * 1024)
+
+
+class YouTubePrefetcher:
+    """
+    מנהל הורדות מוקדמות מיוטיוב
+    מופע גלובלי אחד (youtube_prefetcher)
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, PrefetchEntry] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # נוצר בעצלות כדי להיקשר ל-event loop הפעיל
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, YOUTUBE_PREFETCH_MAX_CONCURRENT))
+        return self._semaphore
+
+    def _reserved_disk_mb(self) -> float:
+        """נפח דיסק שתפוס / שמור ע"י הורדות מוקדמות שעדיין לא נלקחו"""
+        total = 0.0
+        for entry in self._entries.values():
+            total += entry.size_on_disk_mb() if entry.is_done else entry.estimated_size_mb
+        return total
+
+    def _has_disk_budget(self, estimated_size_mb: float) -> bool:
+        """בדיקת תקציב דיסק לפני תחילת הורדה מוקדמת"""
+        try:
+            DOWNLOADS_PATH.mkdir(exist_ok=True)
+            free_mb = shutil.disk_usage(str(DOWNLOADS_PATH)).free / (1024 * 1024)
+        except Exception as e:
+            logger.warning(f"⚠️ [PREFETCH] לא ניתן לבדוק מקום פנוי בדיסק: {e}")
+            return False
+
+        if free_mb - estimated_size_mb < YOUTUBE_PREFETCH_MIN_FREE_DISK_MB:
+            logger.info(f"💾 [PREFETCH] אין מספיק מקום פנוי ({free_mb:.0f}MB פנוי, נדרש ~{estimated_size_mb:.0f}MB)")
+            return False
+
+        reserved_mb = self._reserved_disk_mb()
+        if reserved_mb + estimated_size_mb > YOUTUBE_PREFETCH_MAX_DISK_MB:
+            logger.info(
+                f"💾 [PREFETCH] חריגה מתקציב הדיסק "
+                f"({reserved_mb:.0f}MB + ~{estimated_size_mb:.0f}MB > {YOUTUBE_PREFETCH_MAX_DISK_MB}MB)"
+            )
+            return False
+
+        return True
+
+    def prefetch(self, url: str, owner_id: Optional[int] = None) -> bool:
+        """
+        מתחיל הורדה מוקדמת ברקע (לא חוסם)
+
+        Args:
+            url: קישור YouTube (כבר עבר ולידציה)
+            owner_id: מזהה המשתמש שביקש (לצורך ביטול)
+
+        Returns:
+            True אם הורדה מוקדמת התחילה או כבר קיימת, False אחרת
+        """
+        if not YOUTUBE_PREFETCH_ENABLED or not url:
+            return False
+
+        if url in self._entries and not self._entries[url].cancelled:
+            logger.debug(f"📦 [PREFETCH] כבר קיימת הורדה מוקדמת עבור: {url}")
+            return True
+
+        if all(artifact_store.contains(key) for key in get_video_artifact_keys(url)):
+            logger.info(f"📦 [PREFETCH] הוידאו כבר קיים ב-artifact store, אין צורך בהורדה מוקדמת: {url}")
+            return False
+
+        entry = PrefetchEntry(url=url, owner_id=owner_id)
+        self._entries[url] = entry
+        entry.task = asyncio.create_task(self._run(entry))
+        logger.info(f"🚀 [PREFETCH] הורדה מוקדמת נקבעה עבור user {owner_id}: {url}")
+        return True
+
+    def _build_ydl_opts(self, entry: PrefetchEntry) -> dict:
+        """הגדרות yt-dlp להורדה מוקדמת: הגבלת רוחב פס + hook לביטול"""
+
+        def _cancel_hook(_status):
+            # רץ בתוך thread ההורדה - עוצר את yt-dlp אם ההורדה בוטלה
+            if entry.cancelled:
+                raise yt_dlp.utils.DownloadCancelled("prefetch cancelled")
+
+        opts = {'progress_hooks': [_cancel_hook]}
+        if YOUTUBE_PREFETCH_RATE_LIMIT_KBPS > 0:
+            opts['ratelimit'] = YOUTUBE_PREFETCH_RATE_LIMIT_KBPS * 1024
+        return opts
+
+    async def _run(self, entry: PrefetchEntry) -> Optional[Tuple[str, Optional[str]]]:
+        """שליפת מידע + הורדה כפולה, בכפוף למגבלות"""
+        async with self._get_semaphore():
+            if entry.cancelled:
+                return None
+
+            # שלב 1: שליפת מידע (גם מחמם את ה-cache של get_video_info)
+            info = await get_video_info(entry.url)
+            duration = (info or {}).get('duration') or 0
+            entry.estimated_size_mb = (_ESTIMATED_DUAL_BITRATE_MBPS * duration) / 8 if duration else 0.0
+
+            if not self._has_disk_budget(entry.estimated_size_mb):
+                logger.info(f"⏭️ [PREFETCH] מדלג על הורדה מוקדמת (מידע בלבד): {entry.url}")
+                return None
+
+            # שלב 2: הורדה כפולה (כולל המרה) ל-downloads
+            logger.info(f"📥 [PREFETCH] מתחיל הורדה מוקדמת: {entry.url}")
+            started = time.time()
+            result = await download_youtube_video_dual(
+                url=entry.url,
+                cookies_path="cookies.txt",
+                extra_ydl_opts=self._build_ydl_opts(entry),
+                output_dir=entry.work_dir
+            )
+
+            entry.result = result
+            if entry.cancelled:
+                # בוטל בזמן ההורדה - לא משאירים קבצים (כולל כאלה שנכתבו אחרי הביטול)
+                self._delete_files(entry)
+                return None
+
+            entry.finished_at = time.time()
+            if result and result[0]:
+                logger.info(
+                    f"✅ [PREFETCH] הורדה מוקדמת הושלמה תוך {entry.finished_at - started:.1f}s: "
+                    f"{os.path.basename(result[0])}"
+                )
+            else:
+                logger.warning(f"⚠️ [PREFETCH] הורדה מוקדמת נכשלה: {entry.url}")
+            return result
+
+    async def adopt(self, url: str, timeout: Optional[float] = None) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        אימוץ הורדה מוקדמת ע"י המשימה - ממתין להורדה בתהליך או מחזיר תוצאה מוכנה
+
+        Args:
+            url: קישור YouTube
+            timeout: זמן המתנה מקסימלי להורדה שעדיין בתהליך
+
+        Returns:
+            (נתיב_1080ish, נתיב_720ish_or_70mb) או None אם אין הורדה מוקדמת שמישה.
+            הקבצים מועברים ל-downloads ועוברים לבעלות המשימה (ה-prefetcher לא ימחק אותם)
+
+        Raises:
+            asyncio.TimeoutError: ההורדה לא הסתיימה בזמן (והיא בוטלה) - ההמתנה כבר
+            ניצלה את ה-timeout, והמשימה סופרת אותה כניסיון הורדה
+        """
+        entry = self._entries.get(url)
+        if not entry or entry.cancelled or not entry.task:
+            return None
+
+        if not entry.is_done:
+            logger.info(f"⏳ [PREFETCH] ממתין להורדה מוקדמת שבתהליך: {url}")
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(entry.task), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ [PREFETCH] ההורדה המוקדמת לא הסתיימה בזמן, מבטל: {url}")
+            self.cancel(url)
+            raise
+        except Exception as e:
+            logger.error(f"❌ [PREFETCH] שגיאה בהורדה מוקדמת: {e}", exc_info=True)
+            self._entries.pop(url, None)
+            self._delete_files(entry)
+            return None
+
+        self._entries.pop(url, None)
+
+        if entry.cancelled:
+            # בוטל בזמן ההמתנה - _run כבר מחק את הקבצים
+            return None
+
+        if not result or not result[0] or not os.path.exists(result[0]):
+            self._delete_files(entry)
+            return None
+
+        result = self._hand_over(entry)
+        logger.info(f"♻️ [PREFETCH] משתמש בהורדה מוקדמת: {os.path.basename(result[0])}")
+        return result
+
+    @staticmethod
+    def _hand_over(entry: PrefetchEntry) -> Tuple[str, Optional[str]]:
+        """העברת הקבצים מתיקיית ההורדה המוקדמת ל-downloads (rename באותו דיסק)"""
+        moved = []
+        for path in entry.result:
+            if not path or not os.path.exists(path):
+                moved.append(None)
+                continue
+            target = DOWNLOADS_PATH / os.path.basename(path)
+            if target.exists():
+                # קובץ של משימה אחרת באותו שם - לא דורסים אותו
+                target = DOWNLOADS_PATH / f"{entry.work_dir.name}_{os.path.basename(path)}"
+            os.replace(path, target)
+            moved.append(str(target))
+        shutil.rmtree(entry.work_dir, ignore_errors=True)
+        return moved[0], moved[1] if len(moved) > 1 else None
+
+    def cancel(self, url: str) -> bool:
+        """
+        ביטול הורדה מוקדמת ומחיקת קבצים שכבר נוצרו
+
+        הורדה שבתהליך לא מבוטלת עם task.cancel() - ה-hook של yt-dlp עוצר אותה,
+        ו-_run מוחק את הקבצים אחרי שההורדה/ההמרה ב-thread באמת הסתיימה
+        """
+        entry = self._entries.pop(url, None)
+        if not entry:
+            return False
+
+        entry.cancelled = True
+        if not entry.task or entry.task.done():
+            self._delete_files(entry)
+
+        logger.info(f"🚫 [PREFETCH] הורדה מוקדמת בוטלה: {url}")
+        return True
+
+    def cancel_for_owner(self, owner_id: int) -> int:
+        """ביטול כל ההורדות המוקדמות של משתמש"""
+        urls = [url for url, entry in self._entries.items() if entry.owner_id == owner_id]
+        for url in urls:
+            self.cancel(url)
+        return len(urls)
+
+    def cleanup_expired(self) -> int:
+        """מחיקת הורדות מוקדמות שהסתיימו ולא נלקחו בתוך ה-TTL"""
+        ttl_seconds = YOUTUBE_PREFETCH_TTL_MINUTES * 60
+        now = time.time()
+        expired = [
+            url for url, entry in self._entries.items()
+            if entry.is_done and now - (entry.finished_at or entry.created_at) > ttl_seconds
+        ]
+        for url in expired:
+            entry = self._entries.pop(url)
+            self._delete_files(entry)
+            logger.info(f"🧹 [PREFETCH] הורדה מוקדמת שלא נלקחה נמחקה: {url}")
+        return len(expired)
+
+    @staticmethod
+    def _delete_files(entry: PrefetchEntry):
+        """מחיקת תיקיית ההורדה המוקדמת (כולל קבצי ביניים) - קבצי המשימות לא שם"""
+        if not entry.work_dir.exists():
+            return
+        try:
+            shutil.rmtree(entry.work_dir)
+            logger.debug(f"🗑️ [PREFETCH] נמחק: {entry.work_dir}")
+        except Exception as e:
+            logger.warning(f"⚠️ [PREFETCH] לא ניתן למחוק {entry.work_dir}: {e}")
+
+
+# מופע גלובלי
+youtube_prefetcher = YouTubePrefetcher()
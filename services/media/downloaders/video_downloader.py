@@ -5,9 +5,15 @@ Video Downloader Service
 import logging
 import asyncio
 import os
-from typing import Callable, Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional, Tuple
 
-from services.media.youtube import calculate_timeout, download_youtube_video_dual
+from services.media.youtube import (
+    calculate_timeout,
+    download_youtube_video_dual,
+    get_video_artifact_keys
+)
+from services.media.downloaders.prefetcher import youtube_prefetcher
+from services.media.artifact_store import artifact_store
 
 # Import get_progress_stage directly to avoid circular import
 def get_progress_stage(percent: float) -> int:
@@ -29,6 +35,38 @@ def get_progress_stage(percent: float) -> int:
 logger = logging.getLogger(__name__)
 
 
+async def _load_cached_video(url: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    מחזיר את שתי הגרסאות השמורות מה-artifact store
+
+    רק שתיהן יחד נחשבות פגיעה - בלי הגרסה הבינונית וואטסאפ היה מקבל את
+    הגרסה הגבוהה (דחיסה בשירות / כישלון), לכן מורידים מחדש
+    """
+    high_key, medium_key = get_video_artifact_keys(url)
+    if not (artifact_store.contains(high_key) and artifact_store.contains(medium_key)):
+        return None
+    high_path = await artifact_store.get(high_key)
+    if not high_path:
+        return None
+    medium_path = await artifact_store.get(medium_key)
+    if not medium_path:
+        # הגרסה הבינונית פונתה בינתיים
+        try:
+            os.remove(high_path)
+        except OSError:
+            pass
+        return None
+    return (high_path, medium_path)
+
+
+def _store_video_result(url: str, high_path: str, medium_path: Optional[str]):
+    """שמירת התוצרים ב-artifact store ברקע (hardlink זמני - ההעתקה לא מעכבת את הפרסום)"""
+    high_key, medium_key = get_video_artifact_keys(url)
+    artifact_store.put_background(high_key, high_path, "video")
+    if medium_path:
+        artifact_store.put_background(medium_key, medium_path, "video")
+
+
 async def download_video_with_retry(
     session,
     upload_progress: Dict[str, Dict[str, Any]],
@@ -57,7 +95,30 @@ async def download_video_with_retry(
     
     logger.info(f"⏱️ [YOUTUBE] Timeout כולל: {dynamic_timeout}s ({dynamic_timeout//60} דקות) = הורדה ({download_timeout//60} דקות) + המרה ({conversion_timeout//60} דקות) + מרווח")
     
-    for attempt in range(max_retries):
+    # 1. תוצר שמור מפרסום קודם של אותו קליפ
+    prefetched = await _load_cached_video(session.youtube_url)
+    from_store = bool(prefetched)
+    first_attempt = 0
+    if from_store:
+        youtube_prefetcher.cancel(session.youtube_url)
+    else:
+        # 2. אימוץ הורדה מוקדמת (אם התחילה כשהפרטים התקבלו)
+        try:
+            prefetched = await youtube_prefetcher.adopt(session.youtube_url, timeout=dynamic_timeout)
+        except asyncio.TimeoutError:
+            # ההמתנה ניצלה timeout שלם - נחשבת כניסיון ההורדה הראשון (הזמן הכולל לא מוכפל)
+            prefetched = None
+            first_attempt = 1
+    
+    # עדכוני סטטוס מה-callback של FFmpeg מתאחדים (לא task לכל אחוז)
+    pending_status = {'args': None, 'task': None}
+    
+    async def _push_pending_status():
+        while pending_status['args']:
+            args, pending_status['args'] = pending_status['args'], None
+            await update_status_func(*args)
+    
+    for attempt in range(first_attempt, max_retries):
         try:
             logger.info(f"🎬 [YOUTUBE] ניסיון הורדה {attempt + 1}/{max_retries}...")
             logger.info(f"⏱️ Timeout: {dynamic_timeout}s ({dynamic_timeout//60} דקות)")
@@ -70,23 +131,28 @@ async def download_video_with_retry(
                 
                 # עדכון סטטוס נוכחי - המרה לאחוז הקרוב ביותר
                 progress_stage = get_progress_stage(percent)
-                # עדכון סטטוס דרך callback (אם יש)
+                # עדכון סטטוס דרך callback (אם יש) - task אחד בכל רגע, עם המצב האחרון
                 if update_status_func:
-                    asyncio.create_task(update_status_func(
-                        f"עיבוד קליפ טלגרם: {percent}%",
-                        progress_stage,
-                        0
-                    ))
+                    pending_status['args'] = (f"עיבוד קליפ טלגרם: {percent}%", progress_stage, 0)
+                    if pending_status['task'] is None or pending_status['task'].done():
+                        pending_status['task'] = asyncio.create_task(_push_pending_status())
             
-            # Timeout דינמי לפי גודל משוער
-            video_result = await asyncio.wait_for(
-                download_youtube_video_dual(
-                    url=session.youtube_url,
-                    cookies_path="cookies.txt",
-                    progress_callback=ffmpeg_progress_callback
-                ),
-                timeout=dynamic_timeout
-            )
+            if prefetched:
+                # הוידאו כבר הורד ברקע - משתמשים בו פעם אחת (בניסיון חוזר מורידים מחדש)
+                video_result, prefetched = prefetched, None
+                store_result = not from_store
+                logger.info("♻️ [YOUTUBE] משתמש בוידאו שהורד מראש" if store_result else "♻️ [YOUTUBE] משתמש בוידאו שמור (artifact store)")
+            else:
+                store_result = True
+                # Timeout דינמי לפי גודל משוער
+                video_result = await asyncio.wait_for(
+                    download_youtube_video_dual(
+                        url=session.youtube_url,
+                        cookies_path="cookies.txt",
+                        progress_callback=ffmpeg_progress_callback
+                    ),
+                    timeout=dynamic_timeout
+                )
             
             if video_result and video_result[0] and os.path.exists(video_result[0]):
                 # בדיקת גודל הקובץ
@@ -109,6 +175,12 @@ async def download_video_with_retry(
                 else:
                     logger.info(f"ℹ️ [YOUTUBE] וידאו איכות בינונית לא זמין")
                 
+                if store_result:
+                    # ברקע - ניקוי הסשן רשאי למחוק את הקבצים (ה-hardlink הזמני מחזיק אותם)
+                    _store_video_result(
+                        session.youtube_url, session.video_high_path, session.video_medium_path
+                    )
+                
                 # עדכון progress ל-100%
                 upload_progress['telegram']['video'] = 100
                 upload_progress['whatsapp']['video'] = 100
@@ -0,0 +1,53 @@
+"""
+FFmpeg Pass Metrics
+ספירת מעברים מלאים על קובץ (קריאה + כתיבה של כל הקובץ) לכל משימה
+
+כל מעבר של merge / remux / transcode / compress קורא וכותב את הקובץ כולו.
+המדד הזה מאפשר לראות כמה מעברים כאלה קרו בפועל לכל הורדה.
+"""
+import logging
+from contextvars import ContextVar
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# רשימת המעברים של המשימה הנוכחית (משותפת ל-tasks שנוצרו בתוך המשימה)
+_job_passes: ContextVar[Optional[List[str]]] = ContextVar("ffmpeg_job_passes", default=None)
+
+
+def start_pass_metrics():
+    """
+    מתחיל מעקב מעברים למשימה הנוכחית
+
+    Returns:
+        token לשימוש ב-finish_pass_metrics
+    """
+    return _job_passes.set([])
+
+
+def record_full_pass(kind: str, path: str = ""):
+    """
+    רישום מעבר מלא על קובץ
+
+    Args:
+        kind: סוג המעבר ("ytdlp_merge", "transcode", "compress", "planned", "streaming")
+        path: הקובץ שנכתב (לתיעוד)
+    """
+    passes = _job_passes.get()
+    if passes is not None:
+        passes.append(kind)
+    logger.debug(f"📏 [METRICS] full-file pass: {kind} {path}")
+
+
+def finish_pass_metrics(token, job_name: str) -> int:
+    """
+    מסיים מעקב ומדפיס את מספר המעברים
+
+    Returns:
+        מספר המעברים המלאים שנרשמו
+    """
+    passes = _job_passes.get() or []
+    _job_passes.reset(token)
+    summary = ", ".join(passes) if passes else "none"
+    logger.info(f"📏 [METRICS] {job_name}: {len(passes)} full-file pass(es) ({summary})")
+    return len(passes)
@@ -0,0 +1,171 @@
+"""
+Post-Processing Planner
+תכנון עיבוד-המשך במעבר FFmpeg יחיד
+
+במקום שרשרת של מעברים מלאים על הקובץ (merge של yt-dlp → FFmpegVideoConvertor →
+convert_to_compatible_format → faststart → compress_video), ה-planner בודק את
+ה-streams שהורדו פעם אחת ומפיק פקודת FFmpeg אחת שמבצעת מיזוג, remux/transcode,
+תיקון אודיו, הגבלת גודל (אם נדרש) ו-faststart יחד.
+"""
+import logging
+import os
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from services.media.ffmpeg_utils import (
+    _detect_hardware_encoder,
+    _get_hardware_encoder_params,
+    _get_optimal_threads,
+    get_video_codec,
+    get_audio_codec,
+    get_video_duration,
+    _is_h264_compatible,
+    _is_aac_compatible,
+)
+from services.media.ffmpeg.metrics import record_full_pass
+from services.media.ffmpeg.streaming import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+AUDIO_BITRATE_KBPS = 128
+MIN_VIDEO_BITRATE_KBPS = 300
+
+
+@dataclass
+class PostProcessPlan:
+    """תוכנית עיבוד למעבר FFmpeg יחיד"""
+    video_path: str
+    audio_path: Optional[str]  # None = האודיו באותו קובץ עם הוידאו
+    output_path: str
+    video_action: str  # "copy" / "transcode"
+    audio_action: str  # "copy" / "transcode"
+    duration: Optional[float] = None
+    target_video_bitrate_kbps: Optional[int] = None  # הגבלת גודל (למשל ≤70MB)
+
+    def describe(self) -> str:
+        merge = "merge+" if self.audio_path else ""
+        size = f"+{self.target_video_bitrate_kbps}k" if self.target_video_bitrate_kbps else ""
+        return f"{merge}v:{self.video_action}{size}+a:{self.audio_action}+faststart"
+
+    def build_command(self, encoder: str = 'libx264', preset: str = 'veryfast') -> List[str]:
+        """בניית פקודת FFmpeg יחידה לתוכנית"""
+        cmd = ['ffmpeg', '-hide_banner', '-nostdin', '-i', self.video_path]
+        if self.audio_path:
+            cmd.extend(['-i', self.audio_path])
+        audio_input = 1 if self.audio_path else 0
+        cmd.extend(['-map', '0:v:0', '-map', f'{audio_input}:a:0'])
+
+        if self.video_action == "copy":
+            cmd.extend(['-c:v', 'copy'])
+        elif self.target_video_bitrate_kbps:
+            bitrate = self.target_video_bitrate_kbps
+            cmd.extend([
+                '-c:v', 'libx264',
+                '-preset', 'medium',
+                '-b:v', f'{bitrate}k',
+                '-maxrate', f'{bitrate}k',
+                '-bufsize', f'{bitrate * 2}k',
+            ])
+        elif encoder != 'libx264':
+            cmd.extend(['-c:v', encoder])
+            cmd.extend(_get_hardware_encoder_params(encoder, preset))
+        else:
+            cmd.extend(['-c:v', 'libx264', '-preset', preset, '-crf', '23'])
+
+        cmd.extend(['-threads', str(_get_optimal_threads())])
+
+        if self.audio_action == "copy":
+            cmd.extend(['-c:a', 'copy'])
+        else:
+            cmd.extend(['-c:a', 'aac', '-b:a', f'{AUDIO_BITRATE_KBPS}k', '-ar', '44100', '-ac', '2'])
+
+        cmd.extend(['-movflags', '+faststart', '-y', self.output_path])
+        return cmd
+
+
+async def plan_post_processing(
+    video_path: str,
+    audio_path: Optional[str],
+    output_path: str,
+    target_size_mb: Optional[float] = None
+) -> Optional[PostProcessPlan]:
+    """
+    בודק את ה-streams פעם אחת ובונה תוכנית עיבוד
+
+    Args:
+        video_path: קובץ הוידאו (או קובץ משולב וידאו+אודיו)
+        audio_path: קובץ אודיו נפרד (אם יש)
+        output_path: נתיב פלט mp4
+        target_size_mb: גודל מקסימלי לפלט (אופציונלי)
+
+    Returns:
+        PostProcessPlan או None אם חסר track וידאו/אודיו
+    """
+    video_info = await get_video_codec(video_path)
+    audio_info = await get_audio_codec(audio_path or video_path)
+    if not video_info or not audio_info or not audio_info[0]:
+        logger.error(f"❌ [PLANNER] חסר track וידאו/אודיו: {os.path.basename(video_path)}")
+        return None
+
+    duration = await get_video_duration(video_path)
+    plan = PostProcessPlan(
+        video_path=video_path,
+        audio_path=audio_path,
+        output_path=output_path,
+        video_action="copy" if _is_h264_compatible(*video_info) else "transcode",
+        audio_action="copy" if _is_aac_compatible(*audio_info) else "transcode",
+        duration=duration,
+    )
+
+    if target_size_mb and duration:
+        input_size_mb = sum(
+            os.path.getsize(path) for path in (video_path, audio_path) if path
+        ) / (1024 * 1024)
+        if input_size_mb > target_size_mb:
+            # אותו חישוב כמו compress_video - 95% מהיעד, פחות האודיו
+            target_bits = target_size_mb * 8 * 1024 * 1024 * 0.95
+            video_bits = target_bits - AUDIO_BITRATE_KBPS * 1024 * duration
+            plan.target_video_bitrate_kbps = max(int(video_bits / duration / 1024), MIN_VIDEO_BITRATE_KBPS)
+            plan.video_action = "transcode"
+            plan.audio_action = "transcode"
+
+    logger.info(
+        f"🧭 [PLANNER] {os.path.basename(output_path)}: video {video_info[0]} → {plan.video_action}, "
+        f"audio {audio_info[0]} → {plan.audio_action} ({plan.describe()})"
+    )
+    return plan
+
+
+async def execute_plan(plan: PostProcessPlan, progress_callback: Optional[Callable] = None) -> Optional[str]:
+    """
+    מריץ את התוכנית במעבר FFmpeg יחיד
+
+    Returns:
+        נתיב לקובץ תואם (H.264 + AAC) או None אם נכשל
+    """
+    encoders = ['libx264']
+    if plan.video_action == "transcode" and not plan.target_video_bitrate_kbps:
+        hw_encoder = _detect_hardware_encoder()
+        if hw_encoder:
+            encoders.insert(0, hw_encoder)
+
+    for encoder in encoders:
+        cmd = plan.build_command(encoder=encoder)
+        returncode = await run_ffmpeg(cmd, plan.duration, progress_callback, log_tag="PLANNER")
+        if returncode == 0 and os.path.exists(plan.output_path):
+            record_full_pass("planned", plan.output_path)
+            video_info = await get_video_codec(plan.output_path, use_cache=False)
+            audio_info = await get_audio_codec(plan.output_path, use_cache=False)
+            if (video_info and audio_info
+                    and _is_h264_compatible(*video_info)
+                    and _is_aac_compatible(*audio_info)):
+                logger.info(f"✅ [PLANNER] מעבר יחיד הושלם: {os.path.basename(plan.output_path)}")
+                return plan.output_path
+
+        if os.path.exists(plan.output_path):
+            try:
+                os.remove(plan.output_path)
+            except Exception:
+                pass
+
+    return None
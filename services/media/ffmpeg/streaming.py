@@ -0,0 +1,211 @@
+"""
+Streaming Transcode
+המרה תוך כדי הורדה - FFmpeg קורא ישירות את ה-streams מהרשת ומקודד כשהנתונים מגיעים
+
+במקום: הורדה מלאה (yt-dlp) → מיזוג → convert_to_compatible_format,
+זמן הרשת וזמן ה-CPU חופפים, וההמרה מסתיימת זמן קצר אחרי שהבייט האחרון הגיע.
+"""
+import asyncio
+import logging
+import os
+import re
+from typing import Callable, Dict, List, Optional
+
+from services.media.ffmpeg_utils import (
+    _detect_hardware_encoder,
+    _get_hardware_encoder_params,
+    _get_optimal_threads,
+    get_video_codec,
+    get_audio_codec,
+    _is_h264_compatible,
+    _is_aac_compatible,
+)
+from services.media.ffmpeg.metrics import record_full_pass
+
+logger = logging.getLogger(__name__)
+
+# פרוטוקולים ש-FFmpeg יודע לקרוא ישירות (DASH fragments של yt-dlp - לא)
+STREAMABLE_PROTOCOLS = ('http', 'https', 'm3u8', 'm3u8_native')
+
+_TIME_PATTERN = re.compile(r'time=(\d{2}):(\d{2}):(\d{2}\.\d{2})')
+
+
+def _build_input_args(url: str, headers: Optional[Dict[str, str]]) -> List[str]:
+    """ארגומנטים ל-input רשת בודד (headers + reconnect)"""
+    args = []
+    if headers:
+        header_blob = ''.join(f"{key}: {value}\r\n" for key, value in headers.items())
+        args.extend(['-headers', header_blob])
+    args.extend([
+        '-reconnect', '1',
+        '-reconnect_streamed', '1',
+        '-reconnect_delay_max', '5',
+        '-i', url,
+    ])
+    return args
+
+
+def build_streaming_command(
+    inputs: List[Dict],
+    output_path: str,
+    video_compatible: bool,
+    audio_compatible: bool,
+    encoder: str = 'libx264',
+    preset: str = 'veryfast'
+) -> List[str]:
+    """
+    בונה פקודת FFmpeg אחת שקוראת את ה-streams מהרשת, ממזגת, ממירה ומוסיפה faststart
+
+    Args:
+        inputs: רשימת {'url', 'headers'} - וידאו ראשון, אודיו (אם נפרד) שני
+        output_path: נתיב פלט mp4
+        video_compatible: האם הוידאו כבר H.264 (copy)
+        audio_compatible: האם האודיו כבר AAC (copy)
+        encoder: encoder לוידאו ('libx264' או hardware encoder)
+        preset: preset קידוד
+    """
+    cmd = ['ffmpeg', '-hide_banner', '-nostdin']
+    for item in inputs:
+        cmd.extend(_build_input_args(item['url'], item.get('headers')))
+
+    audio_input = 1 if len(inputs) > 1 else 0
+    cmd.extend(['-map', '0:v:0', '-map', f'{audio_input}:a:0'])
+
+    if video_compatible:
+        cmd.extend(['-c:v', 'copy'])
+    elif encoder != 'libx264':
+        cmd.extend(['-c:v', encoder])
+        cmd.extend(_get_hardware_encoder_params(encoder, preset))
+    else:
+        cmd.extend(['-c:v', 'libx264', '-preset', preset, '-crf', '23'])
+
+    cmd.extend(['-threads', str(_get_optimal_threads())])
+
+    if audio_compatible:
+        cmd.extend(['-c:a', 'copy'])
+    else:
+        cmd.extend(['-c:a', 'aac', '-b:a', '128k', '-ar', '44100', '-ac', '2'])
+
+    cmd.extend(['-movflags', '+faststart', '-y', output_path])
+    return cmd
+
+
+async def run_ffmpeg(
+    cmd: List[str],
+    duration: Optional[float],
+    progress_callback: Optional[Callable],
+    log_tag: str = "STREAMING"
+) -> int:
+    """
+    מריץ FFmpeg כ-subprocess אסינכרוני עם מעקב התקדמות.
+    ביטול (CancelledError / timeout) הורג את התהליך.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+    last_percent = 0
+    error_output = []
+    try:
+        while True:
+            # FFmpeg כותב progress עם \r - קוראים בלוקים ומפצלים
+            chunk = await process.stderr.read(4096)
+            if not chunk:
+                break
+            text = chunk.decode('utf-8', errors='ignore')
+            for line in re.split(r'[\r\n]+', text):
+                if not line:
+                    continue
+                if 'error' in line.lower():
+                    error_output.append(line.strip())
+                match = _TIME_PATTERN.search(line)
+                if match and duration and duration > 0:
+                    current_time = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3))
+                    percent = min(int((current_time / duration) * 100), 99)
+                    if percent >= last_percent + 1:
+                        last_percent = percent
+                        eta = int(duration - current_time)
+                        logger.info(f"⏳ [{log_tag}] FFmpeg: {percent}% | ETA מדיה: ~{eta}s")
+                        if progress_callback:
+                            try:
+                                progress_callback(percent, int(current_time), eta)
+                            except Exception:
+                                pass
+        returncode = await process.wait()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+
+    if returncode != 0:
+        logger.error(f"❌ [{log_tag}] FFmpeg נכשל (code {returncode}): {' | '.join(error_output[-5:])}")
+    return returncode
+
+
+async def transcode_from_stream(
+    inputs: List[Dict],
+    output_path: str,
+    video_compatible: bool,
+    audio_compatible: bool,
+    duration: Optional[float] = None,
+    progress_callback: Optional[Callable] = None,
+    timeout: Optional[float] = None
+) -> Optional[str]:
+    """
+    מוריד וממיר במעבר אחד, ישירות מה-URLs של ה-streams
+
+    Args:
+        inputs: רשימת {'url', 'headers'} (וידאו, ואודיו אם נפרד)
+        output_path: נתיב פלט
+        video_compatible / audio_compatible: האם אפשר להעתיק את ה-stream כמו שהוא
+        duration: משך (לחישוב התקדמות)
+        progress_callback: callback(percent, current_time, eta)
+        timeout: timeout כולל (הורדה + המרה)
+
+    Returns:
+        נתיב לקובץ תואם (H.264 + AAC) או None אם נכשל
+    """
+    hw_encoder = None if video_compatible else _detect_hardware_encoder()
+    encoders = ([hw_encoder] if hw_encoder else []) + ['libx264']
+
+    for encoder in encoders:
+        cmd = build_streaming_command(inputs, output_path, video_compatible, audio_compatible, encoder=encoder)
+        logger.info(f"🚀 [STREAMING] מתחיל הורדה+המרה במקביל (encoder: {'copy' if video_compatible else encoder})")
+        try:
+            returncode = await asyncio.wait_for(run_ffmpeg(cmd, duration, progress_callback), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"❌ [STREAMING] timeout ({timeout}s)")
+            returncode = -1
+            _remove_partial(output_path)
+            break
+
+        if returncode == 0 and os.path.exists(output_path):
+            video_info = await get_video_codec(output_path, use_cache=False)
+            audio_info = await get_audio_codec(output_path, use_cache=False)
+            if (video_info and audio_info
+                    and _is_h264_compatible(*video_info)
+                    and _is_aac_compatible(*audio_info)):
+                record_full_pass("streaming", output_path)
+                size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                logger.info(f"✅ [STREAMING] הושלם: {os.path.basename(output_path)} ({size_mb:.2f} MB)")
+                if progress_callback:
+                    try:
+                        progress_callback(100, int(duration) if duration else 0, 0)
+                    except Exception:
+                        pass
+                return output_path
+
+        _remove_partial(output_path)
+
+    return None
+
+
+def _remove_partial(path: str):
+    if os.path.exists(path):
+        try:
+            os.remove(path)
+        except Exception:
+            pass
@@ -0,0 +1,282 @@
+"""
+WhatsApp-Ready Encode
+הכנת וידאו שעומד בכל מגבלות WhatsApp כבר בצד ה-Python
+
+שירות ה-Node דוחס מחדש (עד 3 ניסיונות, בתהליך Node יחיד) כל וידאו מעל 70MB.
+כאן הוידאו נבדק פעם אחת (ffprobe) ואם צריך - מקודד במעבר FFmpeg יחיד לפרופיל תואם.
+קובץ שעבר את הבדיקה נרשם לפי hash התוכן, והשליחה מצרפת manifest שאומר לשירות לא לדחוס.
+וידאו שלא נרשם בתהליך הנוכחי (למשל מה-outbox אחרי הפעלה מחדש) נבדק שוב ב-ffprobe בזמן השליחה.
+"""
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core import WHATSAPP_MAX_FILE_SIZE_MB
+from services.media.artifact_store import hash_file
+from services.media.ffmpeg_utils import _get_optimal_threads, get_video_duration
+from services.media.ffmpeg.metrics import record_full_pass
+from services.media.ffmpeg.streaming import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+# מגבלות הפרופיל (תואם ל-WhatsApp Web על כל המכשירים)
+MAX_LONG_SIDE = 1280
+ALLOWED_PROFILES = ('baseline', 'constrained baseline', 'main', 'high')
+AUDIO_BITRATE_KBPS = 128
+MIN_VIDEO_BITRATE_KBPS = 300
+# מרווח ביטחון מהגודל המקסימלי (overhead של container + חריגות bitrate)
+SIZE_SAFETY = 0.92
+ENCODE_ATTEMPTS = 2
+# קליפ תצוגה מקדימה - קטן ומהיר לשליחה
+PREVIEW_MAX_MB = 16
+PREVIEW_MAX_BITRATE_KBPS = 2500
+
+# hash תוכן → manifest (קבצים שנבדקו/קודדו; None - נבדק ולא תואם)
+_MAX_MANIFESTS = 500
+_manifests: 'OrderedDict[str, Optional[Dict[str, Any]]]' = OrderedDict()
+
+
+def _probe_sync(file_path: str) -> Optional[Dict[str, Any]]:
+    """ffprobe אחד לכל ה-streams (JSON)"""
+    try:
+        output = subprocess.check_output(
+            [
+                'ffprobe', '-v', 'error',
+                '-show_entries',
+                'stream=codec_type,codec_name,profile,pix_fmt,width,height:format=duration',
+                '-of', 'json',
+                file_path
+            ],
+            timeout=30
+        )
+        return json.loads(output)
+    except Exception as e:
+        logger.warning(f"⚠️ [WA_READY] ffprobe נכשל: {e}")
+        return None
+
+
+def check_compliance(probe: Dict[str, Any], size_bytes: int, max_mb: float) -> Tuple[bool, str]:
+    """
+    בדיקה אם הקובץ עומד במגבלות WhatsApp
+
+    Returns:
+        (תואם, סיבה אם לא)
+    """
+    streams = probe.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+
+    if size_bytes > max_mb * 1024 * 1024:
+        return False, f"size {size_bytes / (1024 * 1024):.1f}MB > {max_mb}MB"
+    if not video or video.get('codec_name') != 'h264':
+        return False, f"video codec {video.get('codec_name') if video else 'missing'}"
+    if (video.get('profile') or '').lower() not in ALLOWED_PROFILES:
+        return False, f"profile {video.get('profile')}"
+    if video.get('pix_fmt') != 'yuv420p':
+        return False, f"pix_fmt {video.get('pix_fmt')}"
+    if max(video.get('width') or 0, video.get('height') or 0) > MAX_LONG_SIDE:
+        return False, f"resolution {video.get('width')}x{video.get('height')}"
+    if audio and audio.get('codec_name') != 'aac':
+        return False, f"audio codec {audio.get('codec_name')}"
+    return True, ""
+
+
+def _build_command(
+    input_path: str,
+    output_path: str,
+    video_bitrate_kbps: int,
+    max_seconds: Optional[float] = None
+) -> list:
+    """מעבר יחיד: H.264 High/yuv420p, צד ארוך ≤1280, bitrate מוגבל, AAC, faststart (max_seconds - חיתוך)"""
+    scale = (
+        f"scale='if(gte(iw,ih),min({MAX_LONG_SIDE},iw),-2)':"
+        f"'if(gte(iw,ih),-2,min({MAX_LONG_SIDE},ih))'"
+    )
+    trim = ['-t', f'{max_seconds:.2f}'] if max_seconds else []
+    return [
+        'ffmpeg', '-hide_banner', '-nostdin', '-i', input_path, *trim,
+        '-map', '0:v:0', '-map', '0:a:0?',
+        '-vf', scale,
+        '-c:v', 'libx264', '-profile:v', 'high', '-level', '4.0', '-pix_fmt', 'yuv420p',
+        '-preset', 'medium',
+        '-b:v', f'{video_bitrate_kbps}k',
+        '-maxrate', f'{video_bitrate_kbps}k',
+        '-bufsize', f'{video_bitrate_kbps * 2}k',
+        '-threads', str(_get_optimal_threads()),
+        '-c:a', 'aac', '-b:a', f'{AUDIO_BITRATE_KBPS}k', '-ar', '44100', '-ac', '2',
+        '-movflags', '+faststart',
+        '-y', output_path
+    ]
+
+
+def _output_path(input_path: str, suffix: str) -> str:
+    """נתיב פלט ייחודי ליד הקלט (שתי משימות על אותו קובץ לא דורסות זו את זו)"""
+    return f"{os.path.splitext(input_path)[0]}_{suffix}_{uuid.uuid4().hex[:8]}.mp4"
+
+
+def _remember(sha: str, manifest: Optional[Dict[str, Any]]):
+    _manifests[sha] = manifest
+    _manifests.move_to_end(sha)
+    while len(_manifests) > _MAX_MANIFESTS:
+        _manifests.popitem(last=False)
+
+
+def _build_manifest(sha: str, size_bytes: int, probe: Dict[str, Any]) -> Dict[str, Any]:
+    video = next((s for s in probe.get('streams', []) if s.get('codec_type') == 'video'), {})
+    return {
+        "whatsapp_ready": True,
+        "sha256": sha,
+        "size_bytes": size_bytes,
+        "video_codec": video.get('codec_name'),
+        "profile": video.get('profile'),
+        "width": video.get('width'),
+        "height": video.get('height'),
+    }
+
+
+async def get_whatsapp_manifest(
+    file_path: str,
+    sha: Optional[str],
+    max_mb: float = WHATSAPP_MAX_FILE_SIZE_MB
+) -> Optional[Dict[str, Any]]:
+    """
+    manifest של וידאו שמוכן ל-WhatsApp (לפי hash), או None
+
+    קובץ שלא נרשם בתהליך הנוכחי נבדק ב-ffprobe והתוצאה נשמרת -
+    כך קובץ תואם לא נדחס שוב בשירות גם אחרי הפעלה מחדש.
+    """
+    if not sha:
+        return None
+    if sha in _manifests:
+        _manifests.move_to_end(sha)
+        return _manifests[sha]
+
+    probe = await asyncio.get_event_loop().run_in_executor(None, _probe_sync, file_path)
+    if not probe:
+        return None
+    size_bytes = os.path.getsize(file_path)
+    compliant, reason = check_compliance(probe, size_bytes, max_mb)
+    manifest = _build_manifest(sha, size_bytes, probe) if compliant else None
+    _remember(sha, manifest)
+    if compliant:
+        logger.info(f"✅ [WA_READY] {os.path.basename(file_path)} תואם ל-WhatsApp (נבדק בשליחה)")
+    return manifest
+
+
+async def ensure_whatsapp_ready(
+    input_path: str,
+    max_mb: float = WHATSAPP_MAX_FILE_SIZE_MB,
+    progress_callback=None
+) -> Optional[str]:
+    """
+    מחזיר וידאו שעומד במגבלות WhatsApp - הקובץ עצמו אם כבר תואם, אחרת קידוד חדש
+
+    Args:
+        input_path: קובץ הוידאו
+        max_mb: גודל מקסימלי
+        progress_callback: callback(percent, current_time, eta) לקידוד
+
+    Returns:
+        נתיב לקובץ תואם (רשום עם manifest), או None אם לא ניתן להכין
+    """
+    loop = asyncio.get_event_loop()
+    probe = await loop.run_in_executor(None, _probe_sync, input_path)
+    if not probe:
+        return None
+
+    compliant, reason = check_compliance(probe, os.path.getsize(input_path), max_mb)
+    if compliant:
+        output_path = input_path
+        logger.info(f"✅ [WA_READY] {os.path.basename(input_path)} כבר תואם ל-WhatsApp - אין צורך בקידוד")
+    else:
+        logger.info(f"🔄 [WA_READY] {os.path.basename(input_path)} לא תואם ({reason}) - מקודד במעבר יחיד")
+        output_path = await _encode(input_path, max_mb, progress_callback)
+        if not output_path:
+            return None
+        probe = await loop.run_in_executor(None, _probe_sync, output_path)
+        if not probe:
+            return None
+
+    await _register(output_path, probe)
+    return output_path
+
+
+async def _register(output_path: str, probe: Dict[str, Any]):
+    """רישום manifest לקובץ תואם (לפי hash התוכן)"""
+    sha = await hash_file(output_path)
+    if sha:
+        _remember(sha, _build_manifest(sha, os.path.getsize(output_path), probe))
+
+
+async def _encode(input_path: str, max_mb: float, progress_callback=None) -> Optional[str]:
+    """קידוד לפרופיל תואם בגודל ≤ max_mb (ניסיון שני עם bitrate מוקטן אם חרג)"""
+    duration = await get_video_duration(input_path)
+    if not duration or duration <= 0:
+        logger.error("❌ [WA_READY] לא ניתן לקבל משך וידאו")
+        return None
+
+    output_path = _output_path(input_path, "wa")
+    target_bits = max_mb * 8 * 1024 * 1024 * SIZE_SAFETY
+    video_bitrate = int((target_bits / duration - AUDIO_BITRATE_KBPS * 1024) / 1024)
+
+    for attempt in range(1, ENCODE_ATTEMPTS + 1):
+        video_bitrate = max(video_bitrate, MIN_VIDEO_BITRATE_KBPS)
+        cmd = _build_command(input_path, output_path, video_bitrate)
+        returncode = await run_ffmpeg(cmd, duration, progress_callback, log_tag="WA_READY")
+        if returncode != 0 or not os.path.exists(output_path):
+            return None
+        record_full_pass("whatsapp_ready", output_path)
+
+        size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        if size_mb <= max_mb:
+            logger.info(f"✅ [WA_READY] קידוד הושלם: {size_mb:.1f}MB ({video_bitrate}k, ניסיון {attempt})")
+            return output_path
+
+        logger.warning(f"⚠️ [WA_READY] {size_mb:.1f}MB > {max_mb}MB - מקטין bitrate")
+        video_bitrate = int(video_bitrate * max_mb / size_mb * SIZE_SAFETY)
+
+    try:
+        os.remove(output_path)
+    except OSError:
+        pass
+    return None
+
+
+async def make_preview_clip(
+    input_path: str,
+    seconds: float,
+    max_mb: float = PREVIEW_MAX_MB
+) -> Optional[str]:
+    """
+    קליפ תצוגה מקדימה: N השניות הראשונות בפרופיל תואם, קטן מספיק לשליחה מהירה
+
+    Returns:
+        נתיב לקליפ (רשום עם manifest), או None אם הקידוד נכשל
+    """
+    duration = await get_video_duration(input_path)
+    if not duration or duration <= 0:
+        logger.error("❌ [WA_READY] לא ניתן לקבל משך וידאו לקליפ")
+        return None
+
+    clip_seconds = min(seconds, duration)
+    output_path = _output_path(input_path, "preview")
+    target_bits = max_mb * 8 * 1024 * 1024 * SIZE_SAFETY
+    video_bitrate = int((target_bits / clip_seconds - AUDIO_BITRATE_KBPS * 1024) / 1024)
+    video_bitrate = min(max(video_bitrate, MIN_VIDEO_BITRATE_KBPS), PREVIEW_MAX_BITRATE_KBPS)
+
+    logger.info(f"✂️ [WA_READY] יוצר קליפ תצוגה מקדימה: {clip_seconds:.0f}s ({video_bitrate}k)")
+    cmd = _build_command(input_path, output_path, video_bitrate, max_seconds=clip_seconds)
+    returncode = await run_ffmpeg(cmd, clip_seconds, None, log_tag="WA_PREVIEW")
+    if returncode != 0 or not os.path.exists(output_path):
+        return None
+    record_full_pass("whatsapp_preview", output_path)
+
+    probe = await asyncio.get_event_loop().run_in_executor(None, _probe_sync, output_path)
+    if probe:
+        await _register(output_path, probe)
+    return output_path
@@ -13,6 +13,8 @@ from functools import lru_cache
 import time
 import multiprocessing
 
+from .ffmpeg.metrics import record_full_pass
+
 logger = logging.getLogger(__name__)
 
 # פונקציה עזר לחישוב מספר threads
@@ -856,6 +858,7 @@ async def _try_convert(
             conv_audio_codec, conv_audio_tag = converted_audio_info
             
             if _is_h264_compatible(conv_video_codec, conv_video_tag) and _is_aac_compatible(conv_audio_codec, conv_audio_tag):
+                record_full_pass("transcode", output_path)
                 return output_path
         
         # הקובץ לא תואם - נמחק ונחזיר None
@@ -980,6 +983,10 @@ async def compress_video(
             logger.error(f"❌ קובץ דחוס לא נוצר: {output_path}")
             return None
         
+        # two-pass = שני מעברים מלאים על הקובץ
+        for _ in range(2 if method == "two_pass" else 1):
+            record_full_pass("compress", output_path)
+        
         # בדיקת גודל סופי
         if check_size:
             final_size_mb = os.path.getsize(output_path) / (1024 * 1024)
@@ -10,6 +10,8 @@ from typing import Optional, Tuple
 from PIL import Image, ImageDraw, ImageFont
 import yt_dlp
 import config
+from services.media.artifact_store import artifact_store, hash_file, make_key
+from services.media.ffmpeg_utils import get_video_duration
 
 logger = logging.getLogger(__name__)
 
@@ -143,6 +145,17 @@ async def fetch_youtube_thumbnail(url: str, cookies_path: str = "cookies.txt") -
     try:
         logger.info(f"🖼️ מוריד thumbnail מ-YouTube...")
         
+        # בדיקת artifact store לפי video id (ללא קריאת רשת)
+        from services.media.youtube import extract_youtube_video_id
+        known_video_id = extract_youtube_video_id(url)
+        if known_video_id:
+            cached_path = await artifact_store.get(
+                make_key("yt_thumbnail", known_video_id),
+                dest_path=str(Path(config.DOWNLOADS_PATH) / f"yt_thumb_{known_video_id}.jpg")
+            )
+            if cached_path:
+                return cached_path
+        
         # קבלת מידע על הוידאו
         ydl_opts = {
             'quiet': True,
@@ -190,6 +203,7 @@ async def fetch_youtube_thumbnail(url: str, cookies_path: str = "cookies.txt") -
             return None
         
         logger.info(f"✅ Thumbnail הורד: {thumbnail_path}")
+        await artifact_store.put(make_key("yt_thumbnail", video_id), str(thumbnail_path), "thumbnail")
         return str(thumbnail_path)
         
     except Exception as e:
@@ -225,6 +239,11 @@ async def prepare_mp3_thumbnail(
         if not output_path:
             output_path = input_image_path.rsplit('.', 1)[0] + '_mp3_thumb.jpg'
         
+        cache_key = make_key("mp3_thumbnail", await hash_file(input_image_path), 320)
+        cached_path = await artifact_store.get(cache_key, dest_path=output_path)
+        if cached_path:
+            return cached_path
+        
         def _process():
             # טעינת התמונה
             img = Image.open(input_image_path)
@@ -264,6 +283,9 @@ async def prepare_mp3_thumbnail(
         loop = asyncio.get_event_loop()
         result = await loop.run_in_executor(None, _process)
         
+        if result:
+            await artifact_store.put(cache_key, result, "thumbnail")
+        
         return result
         
     except Exception as e:
@@ -304,6 +326,11 @@ async def prepare_telegram_thumbnail(
         if not output_path:
             output_path = input_image_path.rsplit('.', 1)[0] + '_telegram_thumb.jpg'
         
+        cache_key = make_key("telegram_thumbnail", await hash_file(input_image_path), round(video_aspect_ratio, 3))
+        cached_path = await artifact_store.get(cache_key, dest_path=output_path)
+        if cached_path:
+            return cached_path
+        
         def _process():
             # טעינת התמונה
             img = Image.open(input_image_path)
@@ -360,9 +387,97 @@ async def prepare_telegram_thumbnail(
         loop = asyncio.get_event_loop()
         result = await loop.run_in_executor(None, _process)
         
+        if result:
+            await artifact_store.put(cache_key, result, "thumbnail")
+        
         return result
         
     except Exception as e:
         logger.error(f"❌ שגיאה בהכנת thumbnail: {e}", exc_info=True)
         return None
 
+
+async def generate_video_thumbnail(
+    video_path: str,
+    output_path: Optional[str] = None,
+    max_size: int = 320,
+    max_size_kb: int = 200
+) -> Optional[str]:
+    """
+    מייצר thumbnail מקומי מפריים מייצג של הוידאו שכבר הורד (ללא רשת):
+    - קפיצה מהירה (keyframe seek) ל-~10% מהוידאו, כדי לדלג על פתיח שחור
+    - פילטר thumbnail של FFmpeg בוחר את הפריים המייצג מתוך קבוצת פריימים
+    - JPEG ≤ 320px בכל ציר, aspect ratio של הוידאו (כולל rotation), ≤ 200 KB
+    
+    הפלט מתאים ישירות ל-send_video(thumb=...) - אין צורך ב-prepare_telegram_thumbnail.
+    עובד גם עבור וידאו מאינסטגרם.
+    
+    Args:
+        video_path: נתיב לקובץ הוידאו
+        output_path: נתיב פלט אופציונלי
+        max_size: מקסימום פיקסלים בכל ציר
+        max_size_kb: גודל מקסימלי ב-KB
+    
+    Returns:
+        נתיב ל-thumbnail מוכן או None אם נכשל
+    """
+    try:
+        logger.info(f"🎞️ מייצר thumbnail מפריים של הוידאו: {os.path.basename(video_path)}")
+        
+        if not os.path.exists(video_path):
+            logger.error(f"❌ קובץ וידאו לא נמצא: {video_path}")
+            return None
+        
+        if not output_path:
+            output_path = video_path.rsplit('.', 1)[0] + '_frame_thumb.jpg'
+        
+        duration = await get_video_duration(video_path)
+        seek_seconds = min(duration * 0.1, 30) if duration else 0
+        
+        # הקטנה לפני פילטר thumbnail - ניתוח זול יותר וזיכרון קטן (הפילטר שומר את כל הקבוצה)
+        video_filter = (
+            f"scale='if(gt(iw,ih),{max_size},-2)':'if(gt(iw,ih),-2,{max_size})',"
+            f"thumbnail=50"
+        )
+        
+        # quality של mjpeg: 2 = הכי טוב, 31 = הכי גרוע
+        for quality in (3, 6, 10, 16):
+            cmd = [
+                'ffmpeg', '-hide_banner', '-nostdin', '-loglevel', 'error',
+                '-ss', f'{seek_seconds:.2f}',
+                '-i', video_path,
+                '-vf', video_filter,
+                '-frames:v', '1',
+                '-q:v', str(quality),
+                '-y', output_path
+            ]
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), timeout=30)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                logger.error("❌ חילוץ פריים עבר timeout (30s)")
+                return None
+            
+            if process.returncode != 0 or not os.path.exists(output_path):
+                error_text = stderr.decode('utf-8', errors='ignore').strip()
+                logger.error(f"❌ חילוץ פריים נכשל: {error_text[-300:]}")
+                return None
+            
+            file_size_kb = os.path.getsize(output_path) / 1024
+            if file_size_kb <= max_size_kb:
+                logger.info(f"✅ Thumbnail מפריים נוצר: {file_size_kb:.1f} KB (q={quality}, t={seek_seconds:.1f}s)")
+                return output_path
+        
+        logger.warning(f"⚠️ Thumbnail מפריים גדול מ-{max_size_kb} KB גם באיכות נמוכה")
+        os.remove(output_path)
+        return None
+        
+    except Exception as e:
+        logger.error(f"❌ שגיאה ביצירת thumbnail מפריים: {e}", exc_info=True)
+        return None
@@ -119,7 +119,10 @@ def create_upload_copy(original_path: str, new_filename: str) -> Optional[str]:
         
         # העתקת הקובץ
         import shutil
+        from services.media.artifact_store import carry_known_hash
         shutil.copy2(original_path, new_path)
+        # אותו תוכן - ה-hash הידוע עובר לעותק (שימוש חוזר ב-file_id בלי hashing)
+        carry_known_hash(original_path, new_path)
         
         logger.info(f"📋 יצירת עותק להעלאה: {os.path.basename(original_path)} → {new_filename}")
         return new_path
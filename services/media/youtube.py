@@ -8,10 +8,12 @@ import asyncio
 import subprocess
 import re
 import time
+from copy import deepcopy
 from pathlib import Path
 from typing import Optional, Tuple
 import yt_dlp
-from core import ROOT_DIR
+from core import ROOT_DIR, YOUTUBE_STREAMING_TRANSCODE
+from .artifact_store import make_key
 from .ffmpeg_utils import (
     get_video_codec,
     get_audio_codec,
@@ -22,9 +24,60 @@ from .ffmpeg_utils import (
     _is_h264_compatible,
     _is_aac_compatible
 )
+from .ffmpeg.streaming import STREAMABLE_PROTOCOLS, transcode_from_stream
+from .ffmpeg.planner import plan_post_processing, execute_plan
+from .ffmpeg.metrics import start_pass_metrics, record_full_pass, finish_pass_metrics
 
 logger = logging.getLogger(__name__)
 
+# תוכנית הפורמט וההמרה של download_youtube_video_dual - חלק ממפתח ה-artifact store.
+# יש להעלות את version בכל שינוי בבחירת הפורמטים או בהגדרות ההמרה/הדחיסה
+DUAL_DOWNLOAD_PLAN = {
+    "high": "1080ish:930-1230",
+    "medium": "720ish:570-870|<=70MB",
+    "codecs": "h264+aac",
+    "faststart": True,
+    "version": 1,
+}
+
+_YOUTUBE_ID_PATTERNS = [
+    r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([a-zA-Z0-9_-]{11})',
+    r'youtube\.com\/embed\/([a-zA-Z0-9_-]{11})',
+    r'youtube\.com\/v\/([a-zA-Z0-9_-]{11})',
+    r'youtube\.com\/shorts\/([a-zA-Z0-9_-]{11})',
+]
+
+
+def extract_youtube_video_id(url: str) -> Optional[str]:
+    """
+    מחלץ video id מקישור YouTube (ללא רשת)
+    
+    Returns:
+        video id בן 11 תווים או None
+    """
+    if not url:
+        return None
+    for pattern in _YOUTUBE_ID_PATTERNS:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def get_video_artifact_keys(url: str) -> Tuple[str, str]:
+    """
+    מפתחות artifact store לשתי הגרסאות של הורדה כפולה
+    (מקור: video id או URL, תוכנית פורמט + הגדרות קידוד)
+    
+    Returns:
+        (מפתח_1080ish, מפתח_720ish_or_70mb)
+    """
+    source = extract_youtube_video_id(url) or url
+    return (
+        make_key("youtube_dual", source, "high", DUAL_DOWNLOAD_PLAN),
+        make_key("youtube_dual", source, "medium", DUAL_DOWNLOAD_PLAN),
+    )
+
 
 def calculate_timeout(
     file_size_mb: float, 
@@ -85,7 +138,9 @@ def calculate_conversion_timeout(file_size_mb: float, video_codec: str = "", aud
 async def download_youtube_video_dual(
     url: str,
     cookies_path: str = "cookies.txt",
-    progress_callback=None
+    progress_callback=None,
+    extra_ydl_opts: Optional[dict] = None,
+    output_dir: Optional[Path] = None
 ) -> Optional[Tuple[str, str]]:
     """
     מורידה וידאו מ-YouTube בשתי איכויות תואמות לכל המכשירים (H.264 + AAC)
@@ -108,10 +163,14 @@ async def download_youtube_video_dual(
         url: קישור YouTube
         cookies_path: נתיב לקובץ cookies.txt
         progress_callback: פונקציה לעדכון התקדמות המרת FFmpeg
+        extra_ydl_opts: הגדרות yt-dlp נוספות (למשל ratelimit / progress_hooks בהורדה מוקדמת)
+        output_dir: תיקיית הפלט (ברירת מחדל downloads; הורדה מוקדמת כותבת לתיקייה משלה)
     
     Returns:
         Tuple של (נתיב_1080ish, נתיב_720ish_or_100mb) או None אם נכשל
     """
+    metrics_token = start_pass_metrics()
+    high_quality_file = None
     try:
         logger.info(f"📥 מתחיל הורדה כפולה: {url}")
         logger.info("🎬 מצב: 1080-ish (930-1230px) + 720-ish OR <=100MB (570-870px)")
@@ -134,6 +193,8 @@ async def download_youtube_video_dual(
                 'bestvideo[height>=930][height<=1230]+bestaudio'
             ),
             cookies_path=cookies_path,
+            extra_ydl_opts=extra_ydl_opts,
+            output_dir=output_dir,
             filename_suffix="_1080ish",
             progress_callback=progress_callback
         )
@@ -151,6 +212,8 @@ async def download_youtube_video_dual(
                     'bestvideo[height>=930][height<=1230]+bestaudio'
                 ),
                 cookies_path=cookies_path,
+                extra_ydl_opts=extra_ydl_opts,
+                output_dir=output_dir,
                 filename_suffix="_1080ish",
                 progress_callback=progress_callback
             )
@@ -195,7 +258,10 @@ async def download_youtube_video_dual(
                         quality_name=f"{target_height}p (תואם, ≤70MB)",
                         format_string=format_lower_string,
                         cookies_path=cookies_path,
-                        filename_suffix="_720ish_temp"
+                        extra_ydl_opts=extra_ydl_opts,
+                        output_dir=output_dir,
+                        filename_suffix="_720ish_temp",
+                        target_size_mb=70
                     )
                     if medium_quality_file:
                         break
@@ -208,7 +274,10 @@ async def download_youtube_video_dual(
                 quality_name="720-ish (תואם)",
                 format_string=format_720_string,
                 cookies_path=cookies_path,
-                filename_suffix="_720ish_temp"
+                extra_ydl_opts=extra_ydl_opts,
+                output_dir=output_dir,
+                filename_suffix="_720ish_temp",
+                target_size_mb=70
             )
         
         # אם נכשל, ננסה כל קודק בטווח זה (אבל עדיין עם אודיו!)
@@ -223,7 +292,10 @@ async def download_youtube_video_dual(
                     'bestvideo[height>=570][height<=870]+bestaudio'
                 ),
                 cookies_path=cookies_path,
-                filename_suffix="_720ish_temp"
+                extra_ydl_opts=extra_ydl_opts,
+                output_dir=output_dir,
+                filename_suffix="_720ish_temp",
+                target_size_mb=70
             )
         
         if not medium_quality_file:
@@ -301,9 +373,15 @@ async def download_youtube_video_dual(
         
         return (high_quality_file, final_medium_file)
         
+    except yt_dlp.utils.DownloadCancelled:
+        logger.info(f"🚫 הורדה כפולה בוטלה: {url}")
+        # מחזירים את מה שכבר נוצר כדי שהמבטל ימחק אותו
+        return (high_quality_file, None) if high_quality_file else None
     except Exception as e:
         logger.error(f"❌ שגיאה בהורדה כפולה: {e}", exc_info=True)
         return None
+    finally:
+        finish_pass_metrics(metrics_token, f"dual download {url}")
 
 
 async def _download_single_quality(
@@ -312,7 +390,10 @@ async def _download_single_quality(
     format_string: str,
     cookies_path: str,
     filename_suffix: str = "",
-    progress_callback=None
+    progress_callback=None,
+    extra_ydl_opts: Optional[dict] = None,
+    target_size_mb: Optional[float] = None,
+    output_dir: Optional[Path] = None
 ) -> Optional[str]:
     """
     מורידה וידאו באיכות ספציפית
@@ -324,6 +405,9 @@ async def _download_single_quality(
         cookies_path: נתיב לקובץ cookies
         filename_suffix: סיומת לשם הקובץ (למשל "_high" או "_medium")
         progress_callback: פונקציה לעדכון התקדמות המרה
+        extra_ydl_opts: הגדרות yt-dlp נוספות שמתמזגות להגדרות ברירת המחדל
+        target_size_mb: גודל מקסימלי לפלט - נאכף באותו מעבר FFmpeg (אופציונלי)
+        output_dir: תיקיית הפלט (ברירת מחדל downloads)
     
     Returns:
         נתיב לקובץ שהורד והומר, או None אם נכשל
@@ -331,9 +415,9 @@ async def _download_single_quality(
     try:
         logger.info(f"📥 מוריד גרסה {quality_name}...")
         
-        # וידוא שתיקיית downloads קיימת
-        downloads_dir = Path(ROOT_DIR) / "downloads"
-        downloads_dir.mkdir(exist_ok=True)
+        # וידוא שתיקיית הפלט קיימת
+        downloads_dir = Path(output_dir) if output_dir else Path(ROOT_DIR) / "downloads"
+        downloads_dir.mkdir(parents=True, exist_ok=True)
         
         # בדיקת קיום cookies
         if not os.path.exists(cookies_path):
@@ -343,6 +427,32 @@ async def _download_single_quality(
         # תבנית שם קובץ עם סיומת
         output_template = str(downloads_dir / f"%(title)s_%(id)s{filename_suffix}.%(ext)s")
         
+        # מצב streaming: אם צריך המרה (AV1/VP9/Opus) - הורדה והמרה במקביל ב-FFmpeg אחד
+        try:
+            streamed_file = await _try_streaming_download(
+                url, quality_name, format_string, cookies_path,
+                output_template, progress_callback, extra_ydl_opts
+            )
+            if streamed_file:
+                return streamed_file
+        except yt_dlp.utils.DownloadCancelled:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ [STREAMING] נכשל עבור {quality_name}, חוזר להורדה רגילה: {e}")
+        
+        # מצב מתוכנן: הורדת ה-streams בלי מיזוג, ואז מעבר FFmpeg יחיד (מיזוג + המרה + faststart)
+        try:
+            planned_file = await _download_planned(
+                url, quality_name, format_string, cookies_path,
+                output_template, progress_callback, extra_ydl_opts, target_size_mb
+            )
+            if planned_file:
+                return planned_file
+        except yt_dlp.utils.DownloadCancelled:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ [PLANNER] נכשל עבור {quality_name}, חוזר להורדה רגילה: {e}")
+        
         # הגדרות yt-dlp
         ydl_opts = {
             'format': format_string,
@@ -356,6 +466,8 @@ async def _download_single_quality(
                 'preferedformat': 'mp4',
             }],
         }
+        if extra_ydl_opts:
+            ydl_opts.update(extra_ydl_opts)
         
         # הורדה ב-thread נפרד עם retry logic ל-rate limiting
         max_attempts = 3
@@ -366,11 +478,13 @@ async def _download_single_quality(
                     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                         info = ydl.extract_info(url, download=True)
                         filename = ydl.prepare_filename(info)
-                        return filename
+                        return filename, bool(info.get('requested_formats'))
                 
                 # הרצה אסינכרונית
                 loop = asyncio.get_event_loop()
-                downloaded_file = await loop.run_in_executor(None, _download)
+                downloaded_file, merged = await loop.run_in_executor(None, _download)
+                if merged:
+                    record_full_pass("ytdlp_merge", downloaded_file)
                 break  # הצליח - יוצאים מהלולאה
             except Exception as e:
                 error_str = str(e).lower()
@@ -484,11 +598,191 @@ async def _download_single_quality(
             logger.error(f"❌ המרת {quality_name} נכשלה - קובץ מומר לא נוצר")
             return None
             
+    except yt_dlp.utils.DownloadCancelled:
+        # ביטול (hook של הורדה מוקדמת) - לא ממשיכים לאיכות / מסלול הבא
+        raise
     except Exception as e:
         logger.error(f"❌ שגיאה בהורדת {quality_name}: {e}", exc_info=True)
         return None
 
 
+async def _try_streaming_download(
+    url: str,
+    quality_name: str,
+    format_string: str,
+    cookies_path: Optional[str],
+    output_template: str,
+    progress_callback=None,
+    extra_ydl_opts: Optional[dict] = None
+) -> Optional[str]:
+    """
+    הורדה + המרה במקביל עבור streams שדורשים קידוד מחדש
+    
+    yt-dlp משמש רק לבחירת ה-format ולקבלת ה-URLs הישירים; FFmpeg קורא את
+    ה-streams מהרשת ומקודד תוך כדי, כך שההמרה מסתיימת זמן קצר אחרי ההורדה.
+    
+    Returns:
+        נתיב לקובץ תואם, או None אם המצב לא רלוונטי (כבר תואם / פרוטוקול לא נתמך /
+        הורדה מוגבלת ברוחב פס) או נכשל - ואז ממשיכים במסלול הרגיל
+    """
+    if not YOUTUBE_STREAMING_TRANSCODE:
+        return None
+    
+    # FFmpeg לא מכבד ratelimit / progress_hooks של yt-dlp (הורדה מוקדמת מוגבלת / ניתנת לביטול)
+    if extra_ydl_opts and (extra_ydl_opts.get('ratelimit') or extra_ydl_opts.get('progress_hooks')):
+        return None
+    
+    ydl_opts = {
+        'format': format_string,
+        'outtmpl': output_template,
+        'quiet': True,
+        'no_warnings': True,
+        'cookiefile': cookies_path if cookies_path else None,
+    }
+    
+    def _resolve():
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+            return info, ydl.prepare_filename(info)
+    
+    loop = asyncio.get_event_loop()
+    info, filename = await loop.run_in_executor(None, _resolve)
+    
+    formats = info.get('requested_formats') or [info]
+    video_fmt = next((f for f in formats if f.get('vcodec') not in (None, 'none')), None)
+    audio_fmt = next((f for f in formats if f.get('acodec') not in (None, 'none')), None)
+    if not video_fmt or not audio_fmt:
+        return None
+    
+    if any(f.get('protocol') not in STREAMABLE_PROTOCOLS for f in (video_fmt, audio_fmt)):
+        logger.info(f"ℹ️ [STREAMING] פרוטוקול לא נתמך ל-{quality_name}, הורדה רגילה")
+        return None
+    
+    vcodec = video_fmt.get('vcodec') or ""
+    acodec = audio_fmt.get('acodec') or ""
+    video_compatible = _is_h264_compatible(vcodec, vcodec)
+    audio_compatible = _is_aac_compatible(acodec, acodec)
+    if video_compatible and audio_compatible:
+        # רק מיזוג - המסלול הרגיל זול ממילא
+        return None
+    
+    stream_formats = [video_fmt] if audio_fmt is video_fmt else [video_fmt, audio_fmt]
+    inputs = [{'url': f['url'], 'headers': f.get('http_headers')} for f in stream_formats]
+    
+    size_bytes = sum((f.get('filesize') or f.get('filesize_approx') or 0) for f in stream_formats)
+    size_mb = size_bytes / (1024 * 1024) if size_bytes else 300
+    timeout = calculate_timeout(size_mb, "download") + calculate_conversion_timeout(size_mb, vcodec, acodec)
+    
+    output_path = os.path.splitext(filename)[0] + '.mp4'
+    logger.info(f"🔀 [STREAMING] {quality_name}: {vcodec} + {acodec} → H.264 + AAC תוך כדי הורדה")
+    
+    return await transcode_from_stream(
+        inputs=inputs,
+        output_path=output_path,
+        video_compatible=video_compatible,
+        audio_compatible=audio_compatible,
+        duration=info.get('duration'),
+        progress_callback=progress_callback,
+        timeout=timeout
+    )
+
+
+
+async def _download_planned(
+    url: str,
+    quality_name: str,
+    format_string: str,
+    cookies_path: Optional[str],
+    output_template: str,
+    progress_callback=None,
+    extra_ydl_opts: Optional[dict] = None,
+    target_size_mb: Optional[float] = None
+) -> Optional[str]:
+    """
+    הורדת ה-streams שנבחרו כקבצים נפרדים ועיבוד במעבר FFmpeg יחיד
+    
+    במקום: merge של yt-dlp → FFmpegVideoConvertor → convert_to_compatible_format →
+    compress_video (כל אחד קורא וכותב את כל הקובץ), ה-planner בודק את ה-streams
+    ומריץ פקודה אחת שממזגת, מעתיקה/ממירה, אוכפת גודל ומוסיפה faststart.
+    
+    Returns:
+        נתיב לקובץ תואם, או None אם נכשל (ואז ממשיכים במסלול הרגיל)
+    """
+    base_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'cookiefile': cookies_path if cookies_path else None,
+    }
+    
+    def _resolve():
+        # שליפת מידע פעם אחת - ה-streams עצמם יורדו מאותו מידע
+        with yt_dlp.YoutubeDL({**base_opts, 'format': format_string, 'outtmpl': output_template}) as ydl:
+            raw_info = ydl.extract_info(url, download=False, process=False)
+            info = ydl.process_ie_result(deepcopy(raw_info), download=False)
+            return raw_info, info, ydl.prepare_filename(info)
+    
+    loop = asyncio.get_event_loop()
+    raw_info, info, filename = await loop.run_in_executor(None, _resolve)
+    
+    formats = info.get('requested_formats') or [info]
+    base_path = os.path.splitext(filename)[0]
+    output_path = base_path + '.mp4'
+    
+    def _download_stream(format_id: str) -> str:
+        opts = {
+            **base_opts,
+            'quiet': False,
+            'format': format_id,
+            # '%' בשם הקובץ הוא חלק מהתבנית של yt-dlp - escape
+            'outtmpl': base_path.replace('%', '%%') + f'.f{format_id}.%(ext)s',
+        }
+        if extra_ydl_opts:
+            opts.update(extra_ydl_opts)
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            stream_info = ydl.process_ie_result(deepcopy(raw_info), download=True)
+            downloads = stream_info.get('requested_downloads') or [{}]
+            return downloads[0].get('filepath') or ydl.prepare_filename(stream_info)
+    
+    stream_files = []
+    try:
+        for fmt in formats:
+            stream_files.append(await loop.run_in_executor(None, _download_stream, fmt['format_id']))
+        
+        if not all(os.path.exists(path) for path in stream_files):
+            logger.error(f"❌ [PLANNER] קבצי stream של {quality_name} לא נמצאו")
+            return None
+        
+        streams_mb = sum(os.path.getsize(path) for path in stream_files) / (1024 * 1024)
+        logger.info(f"✅ הורדה {quality_name} הושלמה: {streams_mb:.2f} MB ({len(stream_files)} streams)")
+        
+        plan = await plan_post_processing(
+            video_path=stream_files[0],
+            audio_path=stream_files[1] if len(stream_files) > 1 else None,
+            output_path=output_path,
+            target_size_mb=target_size_mb
+        )
+        if not plan:
+            return None
+        
+        conversion_timeout = calculate_conversion_timeout(
+            streams_mb, formats[0].get('vcodec') or "", formats[-1].get('acodec') or ""
+        )
+        try:
+            return await asyncio.wait_for(execute_plan(plan, progress_callback), timeout=conversion_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"❌ [PLANNER] עיבוד {quality_name} עבר timeout ({conversion_timeout}s)")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return None
+    finally:
+        for path in stream_files:
+            if path != output_path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except Exception as e:
+                    logger.warning(f"⚠️ לא ניתן למחוק stream זמני: {e}")
+
+
 async def download_youtube_video(
     url: str,
     quality: str = "1080p",
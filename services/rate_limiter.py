@@ -1,29 +1,124 @@
 """
 Rate Limiting Service
-מגביל מספר בקשות לכל משתמש בפרק זמן מסוים
+מגביל מספר בקשות לכל משתמש בפרק זמן מסוים, ומתזמן קריאות יוצאות ל-Telegram API
+
+- נכנס: @rate_limit - token bucket לכל משתמש (O(1) לבקשה), משתמשים לא פעילים נמחקים
+- יוצא: outbound_scheduler - תקציב קריאות לכל client ולכל צ'אט לפי המגבלות של טלגרם,
+  כך שפרצי שליחות מתפזרים במקום לקבל FloodWait
 """
+import asyncio
 import logging
+import time
+from collections import OrderedDict
 from functools import wraps
-from datetime import datetime, timedelta
-from typing import Dict, List, Union
+from typing import Hashable, Tuple, Union
 from pyrogram.types import Message, CallbackQuery
 
+from core import TELEGRAM_API_CALLS_PER_SECOND, TELEGRAM_GROUP_CALLS_PER_MINUTE
+
 logger = logging.getLogger(__name__)
 
-# Dictionary לשמירת בקשות משתמשים
-user_requests: Dict[int, List[datetime]] = {}
+# קריאות לצ'אט פרטי - טלגרם מאפשר בערך הודעה לשנייה לכל צ'אט
+PRIVATE_CHAT_CALLS_PER_SECOND = 1.0
+
+
+class TokenBucket:
+    """
+    Token bucket: עד capacity בקשות ברצף, ומתמלא בקצב rate לשנייה
+    """
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """לוקח token אם יש (לא חוסם)"""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """שניות עד שיהיה token"""
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def reserve(self) -> float:
+        """
+        לוקח token (גם בחוב) ומחזיר כמה זמן צריך להמתין לפני הקריאה
+        הזמנות עוקבות מסתדרות בתור לפי הקצב
+        """
+        self._refill(time.monotonic())
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def idle_for(self, now: float) -> float:
+        """כמה זמן ה-bucket מלא (ללא שימוש) - 0 אם עדיין לא התמלא"""
+        full_at = self.updated + (self.capacity - self.tokens) / self.rate
+        return max(0.0, now - full_at)
+
+
+class BucketRegistry:
+    """
+    buckets לפי מפתח, עם מחיקה של buckets שמלאים ולא בשימוש
+    OrderedDict לפי שימוש אחרון - המחיקה בודקת רק את הישנים (O(1) לשליפה)
+    """
+
+    def __init__(self, idle_ttl: float = 600.0):
+        self.idle_ttl = idle_ttl
+        self._buckets: 'OrderedDict[Hashable, TokenBucket]' = OrderedDict()
+
+    def get(self, key: Hashable, capacity: float, rate: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(capacity, rate)
+            self._buckets[key] = bucket
+        else:
+            self._buckets.move_to_end(key)
+        self._evict_idle()
+        return bucket
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        while self._buckets:
+            oldest_key, oldest = next(iter(self._buckets.items()))
+            if oldest.idle_for(now) < self.idle_ttl:
+                break
+            del self._buckets[oldest_key]
+
+    def discard(self, predicate):
+        for key in [key for key in self._buckets if predicate(key)]:
+            del self._buckets[key]
+
+    def clear(self):
+        self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# buckets של משתמשים: (user_id, max_requests, window) → TokenBucket
+user_buckets = BucketRegistry()
 
 
 def rate_limit(max_requests: int = 10, window: int = 60, skip_for_authorized: bool = True):
     """
     Decorator להגבלת מספר בקשות לכל משתמש
     תומך גם ב-Message וגם ב-CallbackQuery
-    
+
     Args:
         max_requests: מספר מקסימלי של בקשות בחלון זמן (ברירת מחדל: 10)
         window: חלון זמן בשניות (ברירת מחדל: 60 שניות)
         skip_for_authorized: אם True, משתמשים מורשים לא מוגבלים (ברירת מחדל: True)
-    
+
     Returns:
         Decorator function
     """
@@ -40,11 +135,11 @@ def rate_limit(max_requests: int = 10, window: int = 60, skip_for_authorized: bo
             else:
                 # אם זה משהו אחר, ממשיכים ללא rate limiting
                 return await func(client, obj, *args, **kwargs)
-            
+
             if not user_id:
                 # אם אין user_id, ממשיכים ללא rate limiting
                 return await func(client, obj, *args, **kwargs)
-            
+
             # בדיקה אם המשתמש מורשה - אם כן, דילוג על rate limiting
             if skip_for_authorized:
                 try:
@@ -54,47 +149,35 @@ def rate_limit(max_requests: int = 10, window: int = 60, skip_for_authorized: bo
                         return await func(client, obj, *args, **kwargs)
                 except:
                     pass  # אם יש שגיאה, ממשיכים עם rate limiting
-            
-            now = datetime.now()
-            
-            # אתחול רשימת בקשות למשתמש אם לא קיימת
-            if user_id not in user_requests:
-                user_requests[user_id] = []
-            
-            # ניקוי בקשות ישנות (מחוץ לחלון הזמן)
-            user_requests[user_id] = [
-                req_time for req_time in user_requests[user_id]
-                if now - req_time < timedelta(seconds=window)
-            ]
-            
+
+            # token bucket: max_requests ברצף, מתמלא בקצב max_requests / window
+            bucket = user_buckets.get((user_id, max_requests, window), max_requests, max_requests / window)
+
             # בדיקה אם חרג מהמגבלה
-            if len(user_requests[user_id]) >= max_requests:
-                remaining_time = window - (now - user_requests[user_id][0]).total_seconds()
-                logger.warning(f"⛔ Rate limit exceeded for user {user_id}: {len(user_requests[user_id])}/{max_requests} requests in {window}s")
+            if not bucket.try_acquire():
+                remaining_time = max(1, int(bucket.wait_time()))
+                logger.warning(f"⛔ Rate limit exceeded for user {user_id}: {max_requests} requests in {window}s")
                 try:
                     if isinstance(obj, CallbackQuery):
                         # ל-CallbackQuery נשלח answer
                         await obj.answer(
-                            f"⚠️ יותר מדי בקשות! נסה שוב בעוד {int(remaining_time)} שניות.",
+                            f"⚠️ יותר מדי בקשות! נסה שוב בעוד {remaining_time} שניות.",
                             show_alert=True
                         )
                     else:
                         # ל-Message נשלח reply
                         await message_obj.reply_text(
                             f"⚠️ **יותר מדי בקשות!**\n\n"
-                            f"נשלחו {len(user_requests[user_id])} בקשות ב-{window} שניות.\n"
-                            f"נסה שוב בעוד {int(remaining_time)} שניות."
+                            f"נשלחו יותר מ-{max_requests} בקשות ב-{window} שניות.\n"
+                            f"נסה שוב בעוד {remaining_time} שניות."
                         )
                 except Exception as e:
                     logger.error(f"Error sending rate limit message: {e}")
                 return
-            
-            # הוספת בקשה נוכחית
-            user_requests[user_id].append(now)
-            
+
             # הרצת הפונקציה המקורית
             return await func(client, obj, *args, **kwargs)
-        
+
         return wrapper
     return decorator
 
@@ -102,15 +185,70 @@ def rate_limit(max_requests: int = 10, window: int = 60, skip_for_authorized: bo
 def clear_user_requests(user_id: int = None):
     """
     מנקה בקשות ישנות של משתמש מסוים או של כל המשתמשים
-    
+
     Args:
         user_id: ID של משתמש ספציפי (אם None, מנקה את כל המשתמשים)
     """
     if user_id:
-        if user_id in user_requests:
-            del user_requests[user_id]
-            logger.debug(f"🧹 Cleared requests for user {user_id}")
+        user_buckets.discard(lambda key: key[0] == user_id)
+        logger.debug(f"🧹 Cleared requests for user {user_id}")
     else:
-        user_requests.clear()
+        user_buckets.clear()
         logger.debug("🧹 Cleared all user requests")
 
+
+class OutboundScheduler:
+    """
+    תקציב קריאות יוצאות ל-Telegram API (שליחה, עריכה, מחיקה, get_chat)
+
+    - לכל client: עד TELEGRAM_API_CALLS_PER_SECOND קריאות בשנייה
+    - לכל צ'אט: קבוצה/ערוץ עד TELEGRAM_GROUP_CALLS_PER_MINUTE בדקה, צ'אט פרטי עד ~1 בשנייה
+    קריאה שחורגת ממתינה לתורה (הזמנות מסתדרות לפי הקצב) במקום לקבל FloodWait.
+    """
+
+    def __init__(
+        self,
+        calls_per_second: float = TELEGRAM_API_CALLS_PER_SECOND,
+        group_calls_per_minute: float = TELEGRAM_GROUP_CALLS_PER_MINUTE
+    ):
+        self.calls_per_second = calls_per_second
+        self.group_calls_per_minute = group_calls_per_minute
+        self._clients = BucketRegistry()
+        self._chats = BucketRegistry()
+
+    @staticmethod
+    def _client_key(client) -> str:
+        return getattr(client, 'name', None) or str(id(client))
+
+    def _chat_limits(self, chat_id) -> Tuple[float, float]:
+        """(burst, קצב לשנייה) לצ'אט - קבוצות/ערוצים (ID שלילי או peer) מוגבלים יותר"""
+        if isinstance(chat_id, int) and chat_id > 0:
+            return 3, PRIVATE_CHAT_CALLS_PER_SECOND
+        return 3, self.group_calls_per_minute / 60
+
+    async def acquire(self, client, chat_id=None):
+        """
+        ממתין עד שיש תקציב לקריאה של client (ולצ'אט, אם צוין)
+
+        Args:
+            client: ה-client שמבצע את הקריאה
+            chat_id: הצ'אט (int / peer_id_b64) או None לקריאות שאינן לצ'אט מסוים
+        """
+        if self.calls_per_second <= 0:
+            return
+        client_key = self._client_key(client)
+        delays = [
+            self._clients.get(client_key, self.calls_per_second, self.calls_per_second).reserve()
+        ]
+        if chat_id is not None:
+            burst, rate = self._chat_limits(chat_id)
+            delays.append(self._chats.get((client_key, str(chat_id)), burst, rate).reserve())
+        delay = max(delays)
+        if delay > 0:
+            if delay >= 1:
+                logger.debug(f"🚦 [RATE] {client_key} → {chat_id}: ממתין {delay:.1f}s לתקציב")
+            await asyncio.sleep(delay)
+
+
+# מופע גלובלי - משותף לכל הקריאות היוצאות
+outbound_scheduler = OutboundScheduler()
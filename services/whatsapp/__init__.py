@@ -3,6 +3,12 @@ WhatsApp Delivery Service
 שירות שליחה לוואטסאפ דרך WhatsApp Web
 """
 from .delivery import WhatsAppDelivery, WhatsAppDeliveryError
+from .pool import WhatsAppPool, whatsapp_client
+from .routing import MediaRouter, media_router, routed_broadcast
+from .outbox import WhatsAppOutbox, whatsapp_outbox
 
-__all__ = ['WhatsAppDelivery', 'WhatsAppDeliveryError']
+__all__ = [
+    'WhatsAppDelivery', 'WhatsAppDeliveryError', 'WhatsAppPool', 'whatsapp_client',
+    'MediaRouter', 'media_router', 'routed_broadcast', 'WhatsAppOutbox', 'whatsapp_outbox'
+]
 
@@ -1,16 +1,29 @@
 """
 WhatsApp Delivery Module - New Version
 שליחת קבצים לוואטסאפ דרך whatsapp-web.js (Node.js service)
+
+client אסינכרוני אחד לכל התהליך (whatsapp_client) עם session HTTP משותף (keep-alive).
+זמינות השירות נבדקת ברקע - שליחה לא חוסמת את ה-event loop ולא משלמת על בדיקת /status.
+
+כל שליחה כוללת את ה-SHA-256 של הקובץ - השירות מכין את המדיה פעם אחת לכל תוכן
+ומשתמש בה לכל הקבוצות. ב-WHATSAPP_UPLOAD_MODE=stream הקובץ מועלה בזרימה (פעם אחת לכל תוכן).
+קבוצות נשלחות לפי chat ID יציב (נשמר במאגר הערוצים) - לא לפי חיפוש שם בכל שליחה.
+שליחות רצות כ-jobs בשירות: הבקשה חוזרת מיד, ו-long-poll אחד משלים את כל ה-futures הפתוחים.
 """
+import asyncio
+import inspect
 import logging
 import os
 import time
-import requests
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+import aiohttp
 
 import config
+from services.channels.manager import channels_manager
+from services.media.artifact_store import hash_file
+from services.media.ffmpeg.whatsapp_ready import get_whatsapp_manifest
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +40,7 @@ class WhatsAppDelivery:
     
     def __init__(self, dry_run: bool = False, service_url: str = None):
         """
-        אתחול שירות שליחת WhatsApp
+        אתחול שירות שליחת WhatsApp (ללא IO - החיבור והבדיקות מתחילים בשימוש הראשון)
         
         Args:
             dry_run: אם True, לא ישלח בפועל (simulation mode)
@@ -44,64 +57,225 @@ class WhatsAppDelivery:
         self.screenshots_dir.mkdir(parents=True, exist_ok=True)
         self.artifacts_dir.mkdir(parents=True, exist_ok=True)
         
-        logger.info(f"📱 WhatsApp Delivery initialized (dry_run={dry_run}, service={service_url})")
+        # session משותף ובדיקת זמינות ברקע (נוצרים בתוך ה-event loop)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._prober: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._status: Dict[str, Any] = {"ready": False, "checked_at": None}
+        self._qr_logged = False
+        # job_id → future של התוצאה (long-poll משותף אחד לכל ה-jobs)
+        self._jobs: Dict[str, asyncio.Future] = {}
+        self._job_poller: Optional[asyncio.Task] = None
+        # עומס ומצב ניקוז (לבחירת מופע ב-WhatsAppPool)
+        self.in_flight = 0
+        self.draining = False
         
-        # בדיקת חיבור לשרת
-        self._wait_for_service()
+        logger.info(f"📱 WhatsApp Delivery initialized (dry_run={dry_run}, service={self.service_url})")
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """session HTTP משותף עם pool חיבורים (נוצר מחדש אם נסגר)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=config.WHATSAPP_HTTP_POOL_SIZE)
+            )
+        return self._session
     
-    def _wait_for_service(self, max_retries: int = 30, retry_delay: int = 2):
+    def _ready_event(self) -> asyncio.Event:
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        return self._ready
+    
+    @property
+    def is_ready(self) -> bool:
+        """מצב הזמינות האחרון שנמדד (ללא IO)"""
+        return self.dry_run or bool(self._status.get("ready"))
+    
+    @property
+    def under_pressure(self) -> bool:
+        """השירות מדווח עומס (תור שליחות כמעט מלא / זיכרון קרוב למגבלה / מחזור דפדפן)"""
+        return bool((self._status.get("resources") or {}).get("pressure"))
+    
+    async def start(self):
+        """הפעלת בדיקת הזמינות ברקע (נקרא גם אוטומטית בשליחה הראשונה)"""
+        if self.dry_run:
+            return
+        if self._prober is None or self._prober.done():
+            self._prober = asyncio.create_task(self._probe_loop())
+    
+    async def _probe_loop(self):
+        """בדיקת /status כל WHATSAPP_HEALTH_CHECK_INTERVAL שניות (ובתדירות גבוהה כשהשירות לא מוכן)"""
+        while True:
+            await self.refresh_status()
+            interval = config.WHATSAPP_HEALTH_CHECK_INTERVAL
+            await asyncio.sleep(interval if self.is_ready else min(interval, 2))
+    
+    async def refresh_status(self) -> Dict[str, Any]:
         """
-        המתנה לזמינות השרת
+        בדיקת /status ועדכון מצב הזמינות השמור
         
-        Args:
-            max_retries: מספר ניסיונות מקסימלי
-            retry_delay: זמן המתנה בין ניסיונות (שניות)
+        Returns:
+            מילון עם מצב השרת
         """
-        logger.info("🔍 Checking WhatsApp service availability...")
+        was_ready = self._status.get("ready")
+        was_reachable = self._status.get("reachable", True)
+        try:
+            async with self._get_session().get(
+                f"{self.service_url}/status",
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                response.raise_for_status()
+                data = await response.json()
+            data["reachable"] = True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            data = {"ready": False, "reachable": False, "error": str(e)}
+            if was_reachable:
+                logger.warning(f"⚠️ Cannot connect to WhatsApp service at {self.service_url}")
+                logger.info("💡 Make sure to start the Node.js server first:")
+                logger.info(f"   cd whatsapp_service && npm install && npm start")
         
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(f"{self.service_url}/status", timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('ready'):
-                        logger.info("✅ WhatsApp service is ready!")
-                        return
-                    elif data.get('hasQR'):
-                        logger.warning("⚠️ WhatsApp requires QR code scan!")
-                        logger.info(f"📱 Please scan QR code or check: {self.service_url}/qr")
-                    else:
-                        logger.info(f"⏳ WhatsApp is initializing... ({attempt + 1}/{max_retries})")
-            except requests.exceptions.RequestException as e:
-                if attempt == 0:
-                    logger.warning(f"⚠️ Cannot connect to WhatsApp service at {self.service_url}")
-                    logger.info("💡 Make sure to start the Node.js server first:")
-                    logger.info(f"   cd whatsapp_service && npm install && npm start")
-                
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
+        data["checked_at"] = time.time()
+        self._status = data
         
-        raise WhatsAppDeliveryError(
-            f"WhatsApp service is not ready after {max_retries} attempts. "
-            f"Please check the Node.js server at {self.service_url}"
-        )
+        if data.get('ready'):
+            self._ready_event().set()
+            if not was_ready:
+                logger.info("✅ WhatsApp service is ready!")
+        else:
+            self._ready_event().clear()
+            if data.get('hasQR') and not self._qr_logged:
+                logger.warning("⚠️ WhatsApp requires QR code scan!")
+                logger.info(f"📱 Please scan QR code or check: {self.service_url}/qr")
+            elif was_ready:
+                logger.warning("⚠️ WhatsApp service is no longer ready")
+        self._qr_logged = bool(data.get('hasQR'))
+        return data
     
-    def get_status(self) -> Dict[str, Any]:
+    async def ensure_ready(self, timeout: float = None):
         """
-        קבלת סטטוס השרת
+        המתנה עד שהשירות מוכן לפי בדיקת הרקע (ללא קריאת /status נוספת)
         
-        Returns:
-            מילון עם מצב השרת
+        Raises:
+            WhatsAppDeliveryError: אם השירות לא מוכן תוך timeout שניות
         """
+        if self.is_ready:
+            return
+        await self.start()
+        timeout = config.WHATSAPP_READY_TIMEOUT if timeout is None else timeout
         try:
-            response = requests.get(f"{self.service_url}/status", timeout=5)
+            await asyncio.wait_for(self._ready_event().wait(), timeout)
+        except asyncio.TimeoutError:
+            raise WhatsAppDeliveryError(
+                f"WhatsApp service is not ready after {timeout:.0f}s. "
+                f"Please check the Node.js server at {self.service_url}"
+            )
+    
+    def _mark_unreachable(self, error: Exception):
+        """שגיאת חיבור בשליחה - השליחות הבאות ימתינו לבדיקת הרקע במקום להיכשל שוב"""
+        self._status = {"ready": False, "reachable": False, "error": str(error), "checked_at": time.time()}
+        self._ready_event().clear()
+    
+    async def _stream_upload(self, file_path: str, sha: str) -> str:
+        """
+        העלאת קובץ לשירות בזרימה (בלי לטעון אותו לזיכרון) - פעם אחת לכל תוכן
+        
+        אין cache מקומי: השירות מוחק העלאות אחרי UPLOAD_TTL_SEC, לכן תמיד שואלים אותו
+        (GET /upload/{sha} זול, ומרענן את ה-mtime כך שהקובץ לא יימחק באמצע השליחה)
+        
+        Returns:
+            נתיב הקובץ בצד השירות
+        """
+        session = self._get_session()
+        async with session.get(
+            f"{self.service_url}/upload/{sha}",
+            timeout=aiohttp.ClientTimeout(total=10)
+        ) as response:
+            if response.status == 200:
+                return (await response.json())['file_path']
+        
+        started = time.monotonic()
+        with open(file_path, 'rb') as f:
+            # aiohttp קורא את הקובץ ב-chunks (ב-executor) ומזרים אותו
+            async with session.put(
+                f"{self.service_url}/upload/{sha}",
+                params={'ext': Path(file_path).suffix.lower()},
+                data=f,
+                headers={'Content-Type': 'application/octet-stream'},
+                timeout=aiohttp.ClientTimeout(total=600)
+            ) as response:
+                result = await response.json()
+                if response.status != 200 or not result.get('success'):
+                    raise WhatsAppDeliveryError(f"Streaming upload failed: {result.get('error', response.status)}")
+        
+        size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        logger.info(f"📦 Streamed {Path(file_path).name} to WhatsApp service ({size_mb:.1f} MB, {time.monotonic() - started:.1f}s)")
+        return result['file_path']
+    
+    async def resolve_group(self, group_name: str, ready_timeout: float = None) -> List[Dict[str, Any]]:
+        """
+        חיפוש צ'אט לפי שם מדויק בשירות
+        
+        Returns:
+            רשימת התאמות [{id, name, is_group}] (יותר מאחת = שם כפול)
+        """
+        await self.ensure_ready(ready_timeout)
+        async with self._get_session().get(
+            f"{self.service_url}/chats/resolve",
+            params={'name': group_name},
+            timeout=aiohttp.ClientTimeout(total=60)
+        ) as response:
             response.raise_for_status()
-            return response.json()
+            data = await response.json()
+        return data.get('matches', [])
+    
+    async def _chat_target(self, chat_name: str) -> str:
+        """
+        יעד השליחה: chat ID שמור, או פתרון חד-פעמי לפי שם (נשמר במאגר)
+        IDs, מספרים (+972...) ו-"הסטטוס שלי" עוברים כמו שהם
+        """
+        if '@' in chat_name or chat_name.startswith('+') or chat_name == "הסטטוס שלי":
+            return chat_name
+        chat_id = channels_manager.get_whatsapp_chat_id(chat_name)
+        if chat_id:
+            return chat_id
+        if not channels_manager.is_in_repository("whatsapp", chat_name):
+            return chat_name
+        try:
+            matches = await self.resolve_group(chat_name)
         except Exception as e:
-            logger.error(f"❌ Error getting status: {e}")
-            return {"ready": False, "error": str(e)}
+            logger.warning(f"⚠️ Could not resolve WhatsApp group '{chat_name}': {e}")
+            return chat_name
+        if len(matches) == 1:
+            channels_manager.set_whatsapp_chat_id(chat_name, matches[0]['id'])
+            return matches[0]['id']
+        if len(matches) > 1:
+            logger.warning(f"⚠️ {len(matches)} WhatsApp chats named '{chat_name}' - re-add the group from settings")
+        return chat_name
+    
+    async def reset(self):
+        """
+        POST /reset - השירות מתחיל session חדש (QR / התחברות מחדש)
+        המופע מסומן כלא מוכן עד שבדיקת הרקע תראה שהוא חזר
+        """
+        async with self._get_session().post(
+            f"{self.service_url}/reset",
+            timeout=aiohttp.ClientTimeout(total=30)
+        ) as response:
+            response.raise_for_status()
+        self._status = {"ready": False, "reachable": True, "resetting": True, "checked_at": time.time()}
+        self._ready_event().clear()
+        await self.start()
+        logger.info(f"🔄 WhatsApp service reset: {self.service_url}")
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        קבלת סטטוס השרת (המצב האחרון מבדיקת הרקע)
+        
+        Returns:
+            מילון עם מצב השרת
+        """
+        return dict(self._status)
     
-    def send_text(self, chat_name: str, message: str) -> bool:
+    async def send_text(self, chat_name: str, message: str) -> Dict[str, Any]:
         """
         שליחת הודעת טקסט
         
@@ -110,40 +284,198 @@ class WhatsAppDelivery:
             message: טקסט ההודעה
             
         Returns:
-            True אם ההודעה נשלחה בהצלחה
+            Dict: {success, error}
         """
         if self.dry_run:
             logger.info(f"🔍 DRY RUN: Would send text to '{chat_name}': {message[:50]}...")
-            return True
+            return {'success': True}
         
         try:
+            await self.ensure_ready()
             logger.info(f"💬 Sending text message to: {chat_name}")
             
-            response = requests.post(
+            async with self._get_session().post(
                 f"{self.service_url}/send/text",
                 json={
-                    "chat": chat_name,
+                    "chat": await self._chat_target(chat_name),
                     "message": message
                 },
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            data = response.json()
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                response.raise_for_status()
+                data = await response.json()
             
             if data.get('success'):
                 logger.info(f"✅ Text message sent successfully to: {chat_name}")
-                return True
+                return {'success': True}
             else:
                 error_msg = data.get('error', 'Unknown error')
                 logger.error(f"❌ Failed to send text: {error_msg}")
-                return False
+                return {'success': False, 'error': error_msg}
                 
+        except aiohttp.ClientConnectionError as e:
+            self._mark_unreachable(e)
+            logger.error(f"❌ Error sending text message: {e}")
+            return {'success': False, 'error': str(e)}
         except Exception as e:
             logger.error(f"❌ Error sending text message: {e}", exc_info=True)
-            return False
+            return {'success': False, 'error': str(e)}
+    
+    async def _run_job(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        שליחה כ-job: POST /jobs חוזר מיד עם job_id, והתוצאה מגיעה דרך ה-long-poll המשותף
+        
+        Args:
+            kind: 'send' (צ'אט אחד) או 'broadcast' (כמה צ'אטים)
+            payload: גוף הבקשה (כמו /send/enhanced או /send/broadcast)
+        
+        Returns:
+            תוצאת השליחה מהשירות
+        
+        Raises:
+            WhatsAppDeliveryError: אם ה-job לא הסתיים תוך WHATSAPP_JOB_TIMEOUT או אבד
+        """
+        self.in_flight += 1
+        job_id = None
+        deadline = time.monotonic() + config.WHATSAPP_JOB_TIMEOUT
+        try:
+            while job_id is None:
+                async with self._get_session().post(
+                    f"{self.service_url}/jobs",
+                    json={"kind": kind, **payload},
+                    timeout=aiohttp.ClientTimeout(total=30)
+                ) as response:
+                    if response.status == 429:
+                        # תור השליחות של השירות מלא - ממתינים ומנסים שוב
+                        retry_after = float((await response.json()).get('retry_after', 10))
+                    else:
+                        response.raise_for_status()
+                        job_id = (await response.json())['job_id']
+                        break
+                if time.monotonic() + retry_after > deadline:
+                    raise WhatsAppDeliveryError(f"WhatsApp send queue at {self.service_url} stayed full")
+                logger.info(f"🚦 WhatsApp send queue full at {self.service_url} - retrying in {retry_after:.0f}s")
+                await asyncio.sleep(retry_after)
+            
+            future = asyncio.get_running_loop().create_future()
+            self._jobs[job_id] = future
+            if self._job_poller is None or self._job_poller.done():
+                self._job_poller = asyncio.create_task(self._poll_jobs())
+            logger.debug(f"🧾 WhatsApp job {job_id} ({kind}) submitted")
+            
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), config.WHATSAPP_JOB_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise WhatsAppDeliveryError(
+                    f"WhatsApp job {job_id} did not finish within {config.WHATSAPP_JOB_TIMEOUT:.0f}s"
+                )
+        finally:
+            # timeout / ביטול - לא ממתינים יותר לתוצאה
+            if job_id:
+                self._jobs.pop(job_id, None)
+            self.in_flight -= 1
     
-    def send_file(
+    async def _poll_jobs(self):
+        """long-poll אחד לכל ה-jobs הפתוחים - משלים את ה-futures כשה-jobs מסתיימים"""
+        while self._jobs:
+            wait = config.WHATSAPP_JOB_POLL_WAIT
+            try:
+                async with self._get_session().get(
+                    f"{self.service_url}/jobs",
+                    params={'ids': ','.join(self._jobs), 'wait': str(wait)},
+                    timeout=aiohttp.ClientTimeout(total=wait + 15)
+                ) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"⚠️ WhatsApp job poll failed: {e}")
+                await asyncio.sleep(2)
+                continue
+            
+            for job in data.get('jobs', []):
+                if job.get('status') == 'running':
+                    continue
+                future = self._jobs.pop(job['id'], None)
+                if future is None or future.done():
+                    continue
+                if job.get('status') == 'unknown':
+                    future.set_exception(WhatsAppDeliveryError(
+                        f"WhatsApp job {job['id']} was lost (service restarted?)"
+                    ))
+                else:
+                    future.set_result(job.get('result') or {'success': False, 'error': 'Empty job result'})
+    
+    async def _file_payload(self, file_path: str) -> Dict[str, Any]:
+        """
+        פרטי הקובץ לבקשת שליחה (נתיב בצד השירות, hash, manifest, MIME, גודל)
+        """
+        # המרה לנתיב מוחלט
+        abs_file_path = str(Path(file_path).absolute())
+        
+        # זיהוי MIME type
+        ext = Path(abs_file_path).suffix.lower()
+        mime_map = {
+            '.mp4': 'video/mp4', '.avi': 'video/x-msvideo', '.mov': 'video/quicktime',
+            '.mkv': 'video/x-matroska', '.webm': 'video/webm',
+            '.mp3': 'audio/mpeg', '.wav': 'audio/wav', '.m4a': 'audio/mp4',
+            '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png',
+            '.gif': 'image/gif', '.webp': 'image/webp'
+        }
+        
+        mime_type = mime_map.get(ext, 'application/octet-stream')
+        
+        # hash התוכן - מפתח המדיה המוכנה בשירות (משותף לכל הקבוצות)
+        content_sha256 = await hash_file(abs_file_path)
+        service_file_path = abs_file_path
+        if config.WHATSAPP_UPLOAD_MODE == 'stream' and content_sha256:
+            service_file_path = await self._stream_upload(abs_file_path, content_sha256)
+        
+        return {
+            "file_path": service_file_path,
+            "content_sha256": content_sha256,
+            # קובץ שהוכן ל-WhatsApp בצד ה-Python - השירות לא ידחוס אותו שוב
+            "manifest": (
+                await get_whatsapp_manifest(abs_file_path, content_sha256)
+                if mime_type.startswith('video/') else None
+            ),
+            "mime_type": mime_type,
+            "file_size_mb": os.path.getsize(abs_file_path) / (1024 * 1024)
+        }
+    
+    async def _run_telegram_fallback(self, result: Dict[str, Any], telegram_user_id, telegram_fallback_callback):
+        """קריאה ל-callback של טלגרם אם השירות ביקש fallback (מעדכן את result)"""
+        if not result.get('should_send_telegram'):
+            return
+        logger.info("📨 Telegram fallback required")
+        
+        if not (telegram_fallback_callback and callable(telegram_fallback_callback)):
+            logger.warning("⚠️ No Telegram fallback callback provided")
+            return
+        
+        telegram_payload = result.get('telegram_payload', {})
+        try:
+            logger.info("📤 Calling Telegram fallback callback...")
+            telegram_result = telegram_fallback_callback(
+                user_id=telegram_user_id,
+                file_path=telegram_payload.get('file_path'),
+                template_text=telegram_payload.get('template_payload', ''),
+                failure_summary=telegram_payload.get('failure_summary', '')
+            )
+            if inspect.isawaitable(telegram_result):
+                telegram_result = await telegram_result
+            
+            if telegram_result:
+                logger.info("✅ Telegram fallback succeeded")
+                result['telegram_sent'] = True
+            else:
+                logger.error("❌ Telegram fallback failed")
+                result['telegram_sent'] = False
+        except Exception as tg_error:
+            logger.error(f"❌ Telegram fallback error: {tg_error}", exc_info=True)
+            result['telegram_sent'] = False
+            result['telegram_error'] = str(tg_error)
+    
+    async def send_file(
         self,
         file_path: str,
         chat_name: str,
@@ -183,41 +515,16 @@ class WhatsAppDelivery:
             }
         
         try:
+            await self.ensure_ready()
             logger.info(f"📤 Sending {file_type} to '{chat_name}': {Path(file_path).name}")
             
-            # המרה לנתיב מוחלט
-            abs_file_path = str(Path(file_path).absolute())
-            
-            # קבלת גודל וסוג קובץ
-            file_size_mb = os.path.getsize(abs_file_path) / (1024 * 1024)
-            
-            # זיהוי MIME type
-            ext = Path(abs_file_path).suffix.lower()
-            mime_map = {
-                '.mp4': 'video/mp4', '.avi': 'video/x-msvideo', '.mov': 'video/quicktime',
-                '.mkv': 'video/x-matroska', '.webm': 'video/webm',
-                '.mp3': 'audio/mpeg', '.wav': 'audio/wav', '.m4a': 'audio/mp4',
-                '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png',
-                '.gif': 'image/gif', '.webp': 'image/webp'
-            }
-            mime_type = mime_map.get(ext, 'application/octet-stream')
-            
-            # שליחה עם enhanced endpoint
-            response = requests.post(
-                f"{self.service_url}/send/enhanced",
-                json={
-                    "file_path": abs_file_path,
-                    "wa_chat_id": chat_name,
-                    "template_payload": caption,
-                    "mime_type": mime_type,
-                    "file_size_mb": file_size_mb,
-                    "tg_target": telegram_user_id
-                },
-                timeout=300  # 5 דקות למקרה של retries
-            )
-            
-            response.raise_for_status()
-            result = response.json()
+            # שליחה כ-job - הבקשה חוזרת מיד, התוצאה מגיעה ב-long-poll
+            result = await self._run_job('send', {
+                **await self._file_payload(file_path),
+                "wa_chat_id": await self._chat_target(chat_name),
+                "template_payload": caption,
+                "tg_target": telegram_user_id
+            })
             
             # לוג מפורט של התוצאה
             delivered_via = result.get('delivered_via', 'unknown')
@@ -233,35 +540,18 @@ class WhatsAppDelivery:
             logger.warning(f"   Attempts: {result.get('attempts', {})}")
             
             # אם יש צורך ב-Telegram fallback
-            if result.get('should_send_telegram'):
-                logger.info("📨 Telegram fallback required")
-                
-                if telegram_fallback_callback and callable(telegram_fallback_callback):
-                    telegram_payload = result.get('telegram_payload', {})
-                    try:
-                        logger.info("📤 Calling Telegram fallback callback...")
-                        telegram_result = telegram_fallback_callback(
-                            user_id=telegram_user_id,
-                            file_path=telegram_payload.get('file_path'),
-                            template_text=telegram_payload.get('template_payload', ''),
-                            failure_summary=telegram_payload.get('failure_summary', '')
-                        )
-                        
-                        if telegram_result:
-                            logger.info("✅ Telegram fallback succeeded")
-                            result['telegram_sent'] = True
-                        else:
-                            logger.error("❌ Telegram fallback failed")
-                            result['telegram_sent'] = False
-                    except Exception as tg_error:
-                        logger.error(f"❌ Telegram fallback error: {tg_error}", exc_info=True)
-                        result['telegram_sent'] = False
-                        result['telegram_error'] = str(tg_error)
-                else:
-                    logger.warning("⚠️ No Telegram fallback callback provided")
+            await self._run_telegram_fallback(result, telegram_user_id, telegram_fallback_callback)
             
             return result
                 
+        except aiohttp.ClientConnectionError as e:
+            self._mark_unreachable(e)
+            logger.error(f"❌ Error sending file {file_path}: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'delivered_via': 'failed'
+            }
         except Exception as e:
             error_reason = str(e)
             logger.error(f"❌ Error sending file {file_path}: {error_reason}", exc_info=True)
@@ -271,7 +561,83 @@ class WhatsAppDelivery:
                 'delivered_via': 'failed'
             }
     
-    def send_files(
+    async def broadcast_file(
+        self,
+        file_path: str,
+        targets: List[Tuple[str, str]],
+        file_type: str = "unknown",
+        telegram_user_id: int = None,
+        telegram_fallback_callback = None,
+        send_as: str = "media"
+    ) -> Dict[str, Any]:
+        """
+        שליחת קובץ אחד לכמה צ'אטים בבקשה אחת (/send/broadcast)
+        השירות מכין את המדיה פעם אחת ושולח במקביל מוגבל עם השהיות אקראיות
+        
+        Args:
+            file_path: נתיב לקובץ
+            targets: [(שם צ'אט/קבוצה, caption)]
+            file_type: סוג הקובץ (לצורכי לוג)
+            telegram_user_id: מזהה משתמש בטלגרם (לצורך fallback)
+            telegram_fallback_callback: פונקציה לקריאה במקרה של fallback לטלגרם
+            send_as: 'media' (ברירת מחדל) או 'document' (מסמך, השירות לא דוחס)
+        
+        Returns:
+            {success, sent, failed, results: [{chat, success, elapsed_ms?, error?}]} - chat הוא השם מ-targets
+        """
+        if not os.path.exists(file_path):
+            error_msg = f"File not found: {file_path}"
+            logger.error(f"❌ {error_msg}")
+            return {
+                'success': False,
+                'error': error_msg,
+                'results': [{'chat': chat, 'success': False, 'error': error_msg} for chat, _ in targets]
+            }
+        
+        if self.dry_run:
+            logger.info(f"🔍 DRY RUN: Would broadcast {file_path} to {len(targets)} chats")
+            return {
+                'success': True,
+                'results': [{'chat': chat, 'success': True, 'delivered_via': 'dry_run'} for chat, _ in targets]
+            }
+        
+        try:
+            await self.ensure_ready()
+            logger.info(f"📣 Broadcasting {file_type} to {len(targets)} chats: {Path(file_path).name}")
+            
+            result = await self._run_job('broadcast', {
+                **await self._file_payload(file_path),
+                "send_as": send_as,
+                "targets": [
+                    {"chat": await self._chat_target(chat), "caption": caption}
+                    for chat, caption in targets
+                ],
+                "tg_target": telegram_user_id
+            })
+        except aiohttp.ClientConnectionError as e:
+            self._mark_unreachable(e)
+            logger.error(f"❌ Error broadcasting file {file_path}: {e}")
+            result = {'success': False, 'error': str(e)}
+        except Exception as e:
+            logger.error(f"❌ Error broadcasting file {file_path}: {e}", exc_info=True)
+            result = {'success': False, 'error': str(e)}
+        
+        # התוצאות חוזרות לפי סדר ה-targets - מחזירים את השם ולא את ה-ID
+        group_results = result.get('results') or [
+            {'success': False, 'error': result.get('error', 'Unknown error')} for _ in targets
+        ]
+        for (chat, _), group_result in zip(targets, group_results):
+            group_result['chat'] = chat
+        # fallbacks לטלגרם רצים כ-tasks במקביל (לא אחד אחרי השני)
+        await asyncio.gather(*(
+            self._run_telegram_fallback(group_result, telegram_user_id, telegram_fallback_callback)
+            for group_result in group_results
+            if group_result.get('should_send_telegram')
+        ))
+        result['results'] = group_results
+        return result
+    
+    async def send_files(
         self,
         files: List[Dict[str, str]],
         chat_name: str,
@@ -320,7 +686,7 @@ class WhatsAppDelivery:
                     caption = credits_text
             
             # שליחת הקובץ באמצעות send_file המשודרג
-            result = self.send_file(
+            result = await self.send_file(
                 file_path=file_path,
                 chat_name=chat_name,
                 caption=caption,
@@ -348,6 +714,16 @@ class WhatsAppDelivery:
         
         return results
     
-    def close(self):
-        """סגירת החיבור (placeholder לתאימות עם הקוד הישן)"""
+    async def close(self):
+        """עצירת בדיקת הרקע וה-long-poll וסגירת ה-session (בכיבוי)"""
+        for task in (self._prober, self._job_poller):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        if self._session and not self._session.closed:
+            await self._session.close()
         logger.info("📱 WhatsApp Delivery closed")
+
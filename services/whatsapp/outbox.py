@@ -0,0 +1,333 @@
+"""
+WhatsApp Outbox
+תור שליחות לוואטסאפ על הדיסק (SQLite) - שליחה שנכשלה לא הולכת לאיבוד
+
+כל שורה היא (קובץ, קבוצה) שעוד לא נמסרה. הקובץ נשמר בעותק משלו (לפי hash התוכן,
+hardlink אם אפשר) כי קבצי הסשן נמחקים בסוף העיבוד. לולאת רקע אחת שולחת שוב
+כשהשירות מוכן - broadcast אחד לכל קובץ - עם המתנה שמוכפלת בכל ניסיון.
+שורה נמחקת כשנמסרה, כשהשגיאה קבועה (קבוצה לא קיימת) או אחרי WHATSAPP_OUTBOX_TTL_HOURS,
+והעותק של הקובץ נמחק כשאין לו יותר שורות ממתינות.
+"""
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from services.media.artifact_store import hash_file, _link_or_copy
+
+from .delivery import WhatsAppDeliveryError
+from .pool import whatsapp_client
+from .routing import routed_broadcast
+
+logger = logging.getLogger(__name__)
+
+# שגיאות שניסיון חוזר לא יתקן
+PERMANENT_ERRORS = ('chat not found', 'ambiguous chat name', 'file not found')
+# כמה זמן הלולאה ישנה לכל היותר כשאין שורות שהגיע זמנן
+IDLE_SLEEP = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sha TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    chat TEXT NOT NULL,
+    caption TEXT NOT NULL DEFAULT '',
+    link TEXT,
+    telegram_user_id INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS outbox_sha_chat ON outbox (sha, chat);
+CREATE INDEX IF NOT EXISTS outbox_next_attempt ON outbox (next_attempt_at);
+"""
+
+
+def is_retryable(error: Optional[str]) -> bool:
+    """האם כדאי לנסות שוב שליחה שנכשלה בשגיאה הזו"""
+    error = (error or '').lower()
+    return not any(permanent in error for permanent in PERMANENT_ERRORS)
+
+
+class WhatsAppOutbox:
+    """
+    תור שליחות ממתינות לוואטסאפ עם לולאת שליחה חוזרת ברקע
+    מופע גלובלי אחד (whatsapp_outbox)
+    """
+
+    def __init__(self, path: Path, enabled: bool = True):
+        self.path = Path(path)
+        self.files_dir = self.path / "files"
+        self.enabled = enabled
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------- DB ----------
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.files_dir.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path / "outbox.db"), check_same_thread=False)
+            self._db.row_factory = sqlite3.Row
+            self._db.executescript(_SCHEMA)
+            # תור מגרסה קודמת - בלי עמודת הקישור
+            columns = {row['name'] for row in self._db.execute("PRAGMA table_info(outbox)")}
+            if 'link' not in columns:
+                self._db.execute("ALTER TABLE outbox ADD COLUMN link TEXT")
+                self._db.commit()
+        return self._db
+
+    def _execute_sync(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._db_lock:
+            conn = self._conn()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    def _write_sync(self, batches: List[Tuple[str, List[tuple]]]):
+        """כמה פקודות (executemany לכל אחת) בטרנזקציה אחת"""
+        with self._db_lock:
+            conn = self._conn()
+            with conn:
+                for sql, seq in batches:
+                    if seq:
+                        conn.executemany(sql, seq)
+
+    async def _execute(self, sql: str, params=()) -> List[sqlite3.Row]:
+        """שאילתה ב-executor - SQLite (כולל fsync ב-commit) לא רץ על ה-event loop"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._execute_sync, sql, params)
+
+    async def _write(self, *batches: Tuple[str, List[tuple]]):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._write_sync, list(batches))
+
+    def _backoff(self, attempts: int) -> float:
+        """המתנה לפני הניסיון הבא: RETRY_BASE * 2^attempts עד RETRY_MAX, עם פיזור אקראי"""
+        delay = min(config.WHATSAPP_OUTBOX_RETRY_BASE * (2 ** attempts), config.WHATSAPP_OUTBOX_RETRY_MAX)
+        return delay * random.uniform(0.8, 1.2)
+
+    async def pending_count(self) -> int:
+        if not self.enabled:
+            return 0
+        return (await self._execute("SELECT COUNT(*) FROM outbox"))[0][0]
+
+    # ---------- הוספה לתור ----------
+
+    async def enqueue(
+        self,
+        file_path: str,
+        file_type: str,
+        targets: List[Tuple[str, str]],
+        telegram_user_id: Optional[int] = None,
+        error: Optional[str] = None,
+        link: Optional[str] = None
+    ) -> List[str]:
+        """
+        הוספת שליחות שנכשלו לתור (קבוצה שכבר ממתינה לאותו קובץ לא נוספת פעמיים)
+
+        Args:
+            file_path: הקובץ (נשמר עותק בתור)
+            file_type: סוג הקובץ ('image', 'audio', 'video')
+            targets: [(קבוצה, caption)]
+            telegram_user_id: המשתמש שהעלה (לתיעוד)
+            error: השגיאה שגרמה לכישלון
+            link: קישור לגרסה המלאה (לקבוצות שינותבו לקליפ תצוגה מקדימה בשליחה החוזרת)
+
+        Returns:
+            הקבוצות שנמצאות בתור
+        """
+        if not self.enabled or not targets:
+            return []
+        try:
+            sha = await hash_file(file_path)
+            if not sha:
+                raise OSError(f"Cannot hash {file_path}")
+            retained = self.files_dir / f"{sha}{Path(file_path).suffix.lower()}"
+            if not retained.exists():
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, self._retain, file_path, retained)
+
+            now = time.time()
+            expires_at = now + config.WHATSAPP_OUTBOX_TTL_HOURS * 3600
+            await self._write((
+                "INSERT OR IGNORE INTO outbox (sha, file_path, file_type, chat, caption, link, telegram_user_id,"
+                " last_error, created_at, next_attempt_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(sha, str(retained), file_type, chat, caption or '', link, telegram_user_id,
+                  error, now, now + self._backoff(0), expires_at) for chat, caption in targets]
+            ))
+        except Exception as e:
+            logger.error(f"❌ [OUTBOX] לא ניתן להוסיף לתור: {e}", exc_info=True)
+            return []
+
+        chats = [chat for chat, _ in targets]
+        logger.info(f"📥 [OUTBOX] {Path(file_path).name} → {len(chats)} קבוצות ממתינות לשליחה חוזרת")
+        self._notify()
+        return chats
+
+    def _retain(self, file_path: str, retained: Path):
+        """עותק של הקובץ בתור (כתיבה לקובץ זמני ואז rename - אין עותק חלקי)"""
+        retained.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = retained.with_name(retained.name + ".tmp")
+        _link_or_copy(file_path, str(tmp_path))
+        os.replace(tmp_path, retained)
+
+    def _notify(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    # ---------- לולאת רקע ----------
+
+    async def start(self):
+        """הפעלת לולאת השליחה החוזרת (שורות ממתינות מהרצה קודמת נשלחות גם הן)"""
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        pending = await self.pending_count()
+        if pending:
+            logger.info(f"📬 [OUTBOX] {pending} שליחות ממתינות מהרצה קודמת")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._expire()
+                due = await self._execute(
+                    "SELECT * FROM outbox WHERE next_attempt_at <= ? ORDER BY id", (time.time(),)
+                )
+                if due and await self._service_ready():
+                    await self._dispatch(due)
+                    continue
+                await self._sleep_until_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ [OUTBOX] שגיאה בלולאת השליחה: {e}", exc_info=True)
+                await asyncio.sleep(IDLE_SLEEP)
+
+    async def _service_ready(self) -> bool:
+        """השירות מוכן ולא מדווח עומס - שליחות חוזרות לא מתחרות בשליחות חדשות"""
+        try:
+            await whatsapp_client.ensure_ready()
+        except WhatsAppDeliveryError:
+            return False
+        return not whatsapp_client.under_pressure
+
+    async def _sleep_until_due(self):
+        """שינה עד השורה הבאה שהגיע זמנה, עד IDLE_SLEEP, או עד שנוספה שורה"""
+        rows = await self._execute("SELECT MIN(next_attempt_at) FROM outbox")
+        next_at = rows[0][0] if rows else None
+        timeout = IDLE_SLEEP if next_at is None else min(IDLE_SLEEP, max(1.0, next_at - time.time()))
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch(self, due: List[sqlite3.Row]):
+        """broadcast אחד לכל קובץ, לכל הקבוצות שממתינות לו"""
+        by_sha: Dict[str, List[sqlite3.Row]] = {}
+        for row in due:
+            by_sha.setdefault(row['sha'], []).append(row)
+
+        for sha, rows in by_sha.items():
+            file_path = rows[0]['file_path']
+            if not os.path.exists(file_path):
+                logger.error(f"❌ [OUTBOX] הקובץ השמור חסר ({file_path}) - {len(rows)} שליחות נמחקות")
+                await self._resolve([row['id'] for row in rows])
+                continue
+
+            logger.info(f"🔁 [OUTBOX] שליחה חוזרת של {Path(file_path).name} ל-{len(rows)} קבוצות")
+            # בלי fallback לטלגרם - המשתמש כבר קיבל את הקובץ בכישלון הראשון
+            # וידאו מנותב מחדש לפי ההיסטוריה העדכנית של כל קבוצה
+            try:
+                result = await routed_broadcast(
+                    whatsapp_client,
+                    file_path=file_path,
+                    targets=[(row['chat'], row['caption']) for row in rows],
+                    file_type=rows[0]['file_type'],
+                    link=next((row['link'] for row in rows if row['link']), None)
+                )
+            except Exception as e:
+                # כישלון בהכנה (ffprobe / קליפ) - ניסיון שנכשל לכל השורות, עם המתנה כרגיל
+                logger.error(f"❌ [OUTBOX] שליחה חוזרת של {Path(file_path).name} נכשלה: {e}", exc_info=True)
+                result = {'results': [{'success': False, 'error': str(e)} for _ in rows]}
+            await self._record(rows, result.get('results') or [])
+            await self._release_file(sha, file_path)
+
+    async def _record(self, rows: List[sqlite3.Row], results: List[Optional[Dict[str, Any]]]):
+        """עדכון כל השורות של broadcast אחד בטרנזקציה אחת"""
+        done = []
+        retries = []
+        for index, row in enumerate(rows):
+            group_result = (results[index] if index < len(results) else None) or {}
+            error = group_result.get('error', 'Unknown error')
+            if group_result.get('success'):
+                logger.info(f"✅ [OUTBOX] נמסר ל-{row['chat']} (ניסיון {row['attempts'] + 1})")
+                done.append(row['id'])
+            elif not is_retryable(error):
+                logger.error(f"❌ [OUTBOX] {row['chat']}: {error} - לא ננסה שוב")
+                done.append(row['id'])
+            else:
+                attempts = row['attempts'] + 1
+                delay = self._backoff(attempts)
+                logger.warning(f"⚠️ [OUTBOX] {row['chat']}: {error} - ניסיון {attempts + 1} בעוד {delay:.0f}s")
+                retries.append((attempts, error, time.time() + delay, row['id']))
+        await self._write(
+            ("UPDATE outbox SET attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?", retries),
+            ("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id in done])
+        )
+
+    async def _resolve(self, ids: List[int]):
+        await self._write(("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id in ids]))
+
+    async def _expire(self):
+        """מחיקת שורות שעבר זמנן (והקבצים שלהן)"""
+        expired = await self._execute("SELECT * FROM outbox WHERE expires_at <= ?", (time.time(),))
+        for row in expired:
+            logger.warning(
+                f"⌛ [OUTBOX] ויתור על שליחה ל-{row['chat']} אחרי {row['attempts']} ניסיונות: {row['last_error']}"
+            )
+        await self._resolve([row['id'] for row in expired])
+        for sha, file_path in {(row['sha'], row['file_path']) for row in expired}:
+            await self._release_file(sha, file_path)
+
+    async def _release_file(self, sha: str, file_path: str):
+        """מחיקת העותק השמור כשאין לו יותר שורות ממתינות"""
+        if await self._execute("SELECT 1 FROM outbox WHERE sha = ? LIMIT 1", (sha,)):
+            return
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"⚠️ [OUTBOX] לא ניתן למחוק {file_path}: {e}")
+
+
+# מופע גלובלי
+whatsapp_outbox = WhatsAppOutbox(config.WHATSAPP_OUTBOX_PATH, enabled=config.WHATSAPP_OUTBOX_ENABLED)
@@ -0,0 +1,232 @@
+"""
+WhatsApp Service Pool
+כמה מופעי whatsapp_service (לכל אחד LocalAuth, Chromium ופורט משלו) מאחורי ממשק אחד
+
+כל שליחה הולכת למופע מוכן עם הכי מעט jobs פתוחים. קבוצה נשארת על המופע האחרון ששלח אליה
+(סדר ההודעות נשמר) כל עוד הוא זמין ולא עמוס יותר מהשאר. broadcast מתחלק בין המופעים לפי אותו כלל.
+reset של מופע מנקז אותו קודם: לא מקבל שליחות חדשות, וה-reset נשלח רק כשה-jobs שלו הסתיימו -
+כך reconnect / QR במופע אחד לא עוצר את כל השליחות.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+
+from .delivery import WhatsAppDelivery, WhatsAppDeliveryError
+
+logger = logging.getLogger(__name__)
+
+# כמה jobs פתוחים יותר מהמופע הכי פנוי עוד מאפשרים להישאר על המופע של הקבוצה
+AFFINITY_SLACK = 1
+
+
+class WhatsAppPool:
+    """
+    ממשק של WhatsAppDelivery (send_text / send_file / broadcast_file / resolve_group / ensure_ready)
+    מעל כמה מופעי שירות - מופע גלובלי אחד (whatsapp_client)
+    """
+
+    def __init__(self, service_urls: List[str], dry_run: bool = False):
+        self.instances = [WhatsAppDelivery(dry_run=dry_run, service_url=url) for url in service_urls]
+        self.dry_run = dry_run
+        # chat → המופע האחרון ששלח אליו
+        self._affinity: Dict[str, WhatsAppDelivery] = {}
+        # שליחות שנבחר להן מופע ועוד לא הגיעו ל-job (hash / העלאה) - id(instance) → כמות
+        self._leased: Dict[int, int] = {}
+        if len(self.instances) > 1:
+            logger.info(f"📱 WhatsApp pool: {len(self.instances)} instances ({', '.join(service_urls)})")
+
+    @property
+    def is_ready(self) -> bool:
+        return any(instance.is_ready and not instance.draining for instance in self.instances)
+
+    @property
+    def under_pressure(self) -> bool:
+        """כל המופעים המוכנים מדווחים עומס (/status → resources.pressure)"""
+        ready = [i for i in self.instances if i.is_ready and not i.draining]
+        return bool(ready) and all(instance.under_pressure for instance in ready)
+
+    def _pick(self, chat: Optional[str] = None, planned: Optional[Dict[int, int]] = None) -> WhatsAppDelivery:
+        """
+        המופע לשליחה: מוכנים ולא בניקוז, בלי עומס לפי השירות, הכי מעט jobs פתוחים, עדיפות למופע של הקבוצה
+
+        Args:
+            chat: הצ'אט (ל-affinity)
+            planned: jobs שכבר שובצו בסבב הנוכחי (id(instance) → כמות), לפיזור broadcast
+        """
+        planned = planned or {}
+        candidates = [i for i in self.instances if i.is_ready and not i.draining]
+        if not candidates:
+            # אין מופע מוכן - ensure_ready של המופע שנבחר ימתין לו
+            candidates = [i for i in self.instances if not i.draining] or self.instances
+        # מופע שמדווח עומס (תור מלא / זיכרון / מחזור דפדפן) - רק אם כולם עמוסים
+        candidates = [i for i in candidates if not i.under_pressure] or candidates
+
+        def load(instance: WhatsAppDelivery) -> int:
+            return instance.in_flight + self._leased.get(id(instance), 0) + planned.get(id(instance), 0)
+
+        chosen = min(candidates, key=load)
+        preferred = self._affinity.get(chat) if chat else None
+        if preferred in candidates and load(preferred) <= load(chosen) + AFFINITY_SLACK:
+            chosen = preferred
+        if chat:
+            self._affinity[chat] = chosen
+        return chosen
+
+    @asynccontextmanager
+    async def _lease(self, chat: Optional[str] = None):
+        """בחירת מופע ורישום העומס מיד (שליחות מקבילות לא ייבחרו כולן לאותו מופע)"""
+        instance = self._pick(chat)
+        self._leased[id(instance)] = self._leased.get(id(instance), 0) + 1
+        try:
+            yield instance
+        finally:
+            self._leased[id(instance)] -= 1
+
+    async def start(self):
+        for instance in self.instances:
+            await instance.start()
+
+    async def refresh_status(self) -> Dict[str, Any]:
+        await asyncio.gather(*(instance.refresh_status() for instance in self.instances))
+        return self.get_status()
+
+    async def ensure_ready(self, timeout: float = None):
+        """
+        המתנה עד שמופע אחד לפחות (שלא בניקוז) מוכן
+
+        Raises:
+            WhatsAppDeliveryError: אם אף מופע לא מוכן תוך timeout שניות
+        """
+        if self.is_ready:
+            return
+        timeout = config.WHATSAPP_READY_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        await self.start()
+        while not self.is_ready:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise WhatsAppDeliveryError(
+                    f"No WhatsApp service instance is ready after {timeout:.0f}s "
+                    f"({', '.join(i.service_url for i in self.instances)})"
+                )
+            waiters = [
+                asyncio.create_task(instance._ready_event().wait())
+                for instance in self.instances if not instance.draining
+            ]
+            if not waiters:
+                await asyncio.sleep(min(remaining, 1))
+                continue
+            await asyncio.wait(waiters, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def send_text(self, chat_name: str, message: str) -> Dict[str, Any]:
+        async with self._lease(chat_name) as instance:
+            return await instance.send_text(chat_name, message)
+
+    async def send_file(self, file_path: str, chat_name: str, **kwargs) -> Dict[str, Any]:
+        async with self._lease(chat_name) as instance:
+            return await instance.send_file(file_path=file_path, chat_name=chat_name, **kwargs)
+
+    async def send_files(self, files: List[str], chat_name: str, **kwargs) -> Dict[str, Any]:
+        async with self._lease(chat_name) as instance:
+            return await instance.send_files(files=files, chat_name=chat_name, **kwargs)
+
+    async def resolve_group(self, group_name: str, ready_timeout: float = None) -> List[Dict[str, Any]]:
+        if not self.is_ready:
+            await self.ensure_ready(ready_timeout)
+        return await self._pick().resolve_group(group_name, ready_timeout=ready_timeout)
+
+    async def broadcast_file(self, file_path: str, targets: List[Tuple[str, str]], **kwargs) -> Dict[str, Any]:
+        """
+        broadcast_file מחולק בין המופעים (כל מופע מכין את המדיה פעם אחת לקבוצות שלו)
+
+        Returns:
+            כמו WhatsAppDelivery.broadcast_file - התוצאות לפי סדר targets
+        """
+        planned: Dict[int, int] = {}
+        by_instance: Dict[int, Tuple[WhatsAppDelivery, List[int]]] = {}
+        for index, (chat, _) in enumerate(targets):
+            instance = self._pick(chat, planned)
+            planned[id(instance)] = planned.get(id(instance), 0) + 1
+            by_instance.setdefault(id(instance), (instance, []))[1].append(index)
+
+        for key in by_instance:
+            self._leased[key] = self._leased.get(key, 0) + 1
+        try:
+            if len(by_instance) == 1:
+                instance, _ = next(iter(by_instance.values()))
+                return await instance.broadcast_file(file_path, targets, **kwargs)
+
+            logger.info(f"📣 Broadcast split across {len(by_instance)} WhatsApp instances")
+            parts = await asyncio.gather(*(
+                instance.broadcast_file(file_path, [targets[i] for i in indexes], **kwargs)
+                for instance, indexes in by_instance.values()
+            ))
+        finally:
+            for key in by_instance:
+                self._leased[key] -= 1
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(targets)
+        for (_, indexes), part in zip(by_instance.values(), parts):
+            for index, group_result in zip(indexes, part.get('results', [])):
+                results[index] = group_result
+        sent = sum(1 for r in results if r and r.get('success'))
+        return {'success': sent > 0, 'sent': sent, 'failed': len(targets) - sent, 'results': results}
+
+    async def reset(self, service_url: str) -> bool:
+        """
+        reset למופע אחד אחרי ניקוז: שליחות חדשות עוברות למופעים האחרים,
+        וה-reset נשלח כשה-jobs הפתוחים שלו הסתיימו (או אחרי WHATSAPP_DRAIN_TIMEOUT)
+
+        Returns:
+            True אם ה-reset נשלח
+        """
+        instance = next((i for i in self.instances if i.service_url == service_url.rstrip('/')), None)
+        if instance is None:
+            logger.error(f"❌ Unknown WhatsApp instance: {service_url}")
+            return False
+
+        instance.draining = True
+        logger.info(f"🚰 Draining WhatsApp instance {instance.service_url} ({instance.in_flight} jobs in flight)")
+        try:
+            deadline = time.monotonic() + config.WHATSAPP_DRAIN_TIMEOUT
+            while (instance.in_flight or self._leased.get(id(instance), 0)) and time.monotonic() < deadline:
+                await asyncio.sleep(0.5)
+            if instance.in_flight > 0:
+                logger.warning(f"⚠️ Drain timeout - resetting with {instance.in_flight} jobs still in flight")
+            await instance.reset()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to reset WhatsApp instance {instance.service_url}: {e}")
+            return False
+        finally:
+            # אחרי ה-reset המופע לא מוכן - יחזור לשימוש כשבדיקת הרקע תראה שהוא מוכן
+            instance.draining = False
+
+    def get_status(self) -> Dict[str, Any]:
+        """מצב כל המופעים (מהבדיקות ברקע, ללא IO)"""
+        return {
+            "ready": self.is_ready,
+            "instances": [
+                {
+                    "url": instance.service_url,
+                    "in_flight": instance.in_flight,
+                    "draining": instance.draining,
+                    **instance.get_status()
+                }
+                for instance in self.instances
+            ]
+        }
+
+    async def close(self):
+        for instance in self.instances:
+            await instance.close()
+
+
+# מופע גלובלי - client אחד לכל התהליך (מופע שירות אחד או יותר)
+whatsapp_client = WhatsAppPool(config.WHATSAPP_SERVICE_URLS, dry_run=config.WHATSAPP_DRY_RUN)
@@ -0,0 +1,244 @@
+"""
+WhatsApp Media Routing
+בחירת אופן השליחה של וידאו לכל קבוצה: וידאו מוטמע, מסמך או קליפ תצוגה מקדימה
+
+וידאו מעל WHATSAPP_MAX_FILE_SIZE_MB נדחס (דקות) או נכשל ועובר לטלגרם - גם כשזה צפוי מראש.
+כאן כל קבוצה מקבלת את האפשרות הראשונה ב-WHATSAPP_ROUTE_ORDER שמתאימה לה:
+- video: הקובץ בגבול הגודל, או קצר מספיק לדחיסה סבירה (WHATSAPP_ROUTE_MAX_ENCODE_DURATION)
+- document: עד WHATSAPP_DOCUMENT_MAX_MB, נשלח כמו שהוא בלי דחיסה
+- preview: קליפ קצר (WHATSAPP_PREVIEW_SECONDS) + קישור - תמיד מתאים
+לכל קבוצה נשמרים אחוז הצלחה וזמן שליחה ל-MB לכל אפשרות. אפשרות שנכשלת בקבוצה,
+או שצפויה לקחת יותר מ-WHATSAPP_ROUTE_MAX_SEND_SEC, נפסלת לה עד WHATSAPP_ROUTE_REPROBE_HOURS.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from services.media.ffmpeg.whatsapp_ready import make_preview_clip
+from services.media.ffmpeg_utils import get_video_duration
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('video', 'document', 'preview')
+# משקל השליחה האחרונה בממוצע הנע (אחוז הצלחה, שניות ל-MB)
+EWMA_ALPHA = 0.3
+
+
+class MediaRouter:
+    """
+    מדיניות ניתוב + היסטוריה לכל קבוצה, בקובץ JSON:
+    {"<group>": {"<strategy>": {"samples", "success_rate", "sec_per_mb", "last_attempt_at"}}}
+    מופע גלובלי אחד (media_router)
+    """
+
+    def __init__(self, file_path: Path = config.WHATSAPP_ROUTE_STATS_PATH):
+        self.file_path = Path(file_path)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Dict[str, Any]]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        if self.file_path.exists():
+            try:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"❌ [WA_ROUTE] Failed to load routing stats: {e}")
+        return {}
+
+    def save(self):
+        """שמירה אטומית (כתיבה לקובץ זמני והחלפה) - פעם אחת אחרי כל broadcast, לא לכל קבוצה"""
+        try:
+            with self._lock:
+                data = json.dumps(self._stats, ensure_ascii=False, indent=2)
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.file_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.file_path)
+        except Exception as e:
+            logger.error(f"❌ [WA_ROUTE] Failed to save routing stats: {e}")
+
+    # ---------- מדיניות ----------
+
+    def _eligible(self, group: str, strategy: str, size_mb: float, duration: Optional[float]) -> Tuple[bool, str]:
+        """
+        Returns:
+            (מתאים, סיבה אם לא)
+        """
+        if strategy == 'video' and size_mb > config.WHATSAPP_MAX_FILE_SIZE_MB:
+            if not duration or duration > config.WHATSAPP_ROUTE_MAX_ENCODE_DURATION:
+                return False, f"{size_mb:.0f}MB needs an encode of {duration or 0:.0f}s"
+        if strategy == 'document' and size_mb > config.WHATSAPP_DOCUMENT_MAX_MB:
+            return False, f"{size_mb:.0f}MB > {config.WHATSAPP_DOCUMENT_MAX_MB:.0f}MB"
+        if strategy == 'preview':
+            return True, ""
+
+        stats = self._stats.get(group, {}).get(strategy)
+        if not stats:
+            return True, ""
+        # אפשרות שנפסלה נבדקת שוב מדי פעם (הקבוצה / השירות השתנו)
+        if time.time() - stats.get('last_attempt_at', 0) > config.WHATSAPP_ROUTE_REPROBE_HOURS * 3600:
+            return True, ""
+        if stats['samples'] >= config.WHATSAPP_ROUTE_MIN_SAMPLES and stats['success_rate'] < config.WHATSAPP_ROUTE_MIN_SUCCESS_RATE:
+            return False, f"success rate {stats['success_rate']:.0%}"
+        send_mb = min(size_mb, config.WHATSAPP_MAX_FILE_SIZE_MB) if strategy == 'video' else size_mb
+        predicted = (stats.get('sec_per_mb') or 0) * send_mb
+        if predicted > config.WHATSAPP_ROUTE_MAX_SEND_SEC:
+            return False, f"predicted {predicted:.0f}s > {config.WHATSAPP_ROUTE_MAX_SEND_SEC:.0f}s"
+        return True, ""
+
+    def choose(self, group: str, size_mb: float, duration: Optional[float]) -> str:
+        """האפשרות הראשונה ב-WHATSAPP_ROUTE_ORDER שמתאימה לקבוצה (preview אם אף אחת)"""
+        skipped = []
+        for strategy in config.WHATSAPP_ROUTE_ORDER:
+            if strategy not in STRATEGIES:
+                continue
+            eligible, reason = self._eligible(group, strategy, size_mb, duration)
+            if eligible:
+                if skipped:
+                    logger.info(f"🧭 [WA_ROUTE] {group} → {strategy} ({'; '.join(skipped)})")
+                return strategy
+            skipped.append(f"{strategy}: {reason}")
+        logger.info(f"🧭 [WA_ROUTE] {group} → preview ({'; '.join(skipped)})")
+        return 'preview'
+
+    def plan(self, groups: List[str], size_mb: float, duration: Optional[float]) -> Dict[str, str]:
+        """קבוצה → אופן שליחה"""
+        if not config.WHATSAPP_ROUTING_ENABLED:
+            return {group: 'video' for group in groups}
+        return {group: self.choose(group, size_mb, duration) for group in groups}
+
+    @staticmethod
+    async def describe(file_path: str) -> Tuple[float, Optional[float]]:
+        """(גודל ב-MB, אורך בשניות)"""
+        return os.path.getsize(file_path) / (1024 * 1024), await get_video_duration(file_path)
+
+    async def wants_inline_video(self, groups: List[str], file_path: str) -> bool:
+        """האם קבוצה כלשהי תקבל וידאו מוטמע - אם לא, אין טעם בקידוד ל-WhatsApp"""
+        if not config.WHATSAPP_ROUTING_ENABLED:
+            return True
+        if not groups:
+            return False
+        size_mb, duration = await self.describe(file_path)
+        return 'video' in self.plan(groups, size_mb, duration).values()
+
+    # ---------- היסטוריה ----------
+
+    def record(self, group: str, strategy: str, success: bool, elapsed_sec: float, size_mb: float):
+        """עדכון ההיסטוריה של הקבוצה אחרי שליחה (בזיכרון - save שומר לקובץ)"""
+        with self._lock:
+            stats = self._stats.setdefault(group, {}).setdefault(
+                strategy, {"samples": 0, "success_rate": 1.0, "sec_per_mb": None}
+            )
+            outcome = 1.0 if success else 0.0
+            if stats['samples'] == 0:
+                stats['success_rate'] = outcome
+            else:
+                stats['success_rate'] = (1 - EWMA_ALPHA) * stats['success_rate'] + EWMA_ALPHA * outcome
+            if success and size_mb > 0:
+                sec_per_mb = elapsed_sec / size_mb
+                previous = stats.get('sec_per_mb')
+                stats['sec_per_mb'] = sec_per_mb if previous is None else (
+                    (1 - EWMA_ALPHA) * previous + EWMA_ALPHA * sec_per_mb
+                )
+            stats['samples'] += 1
+            stats['last_attempt_at'] = time.time()
+
+    def get_stats(self, group: Optional[str] = None) -> Dict[str, Any]:
+        if group is not None:
+            return dict(self._stats.get(group, {}))
+        return dict(self._stats)
+
+
+async def routed_broadcast(
+    whatsapp_delivery,
+    file_path: str,
+    targets: List[Tuple[str, str]],
+    file_type: str = "unknown",
+    telegram_user_id: Optional[int] = None,
+    telegram_fallback_callback=None,
+    link: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    broadcast_file עם ניתוב לכל קבוצה (וידאו בלבד): broadcast אחד לכל אופן שליחה
+
+    Args:
+        whatsapp_delivery: WhatsAppDelivery / WhatsAppPool
+        link: קישור לגרסה המלאה (מצורף ל-caption של קליפ תצוגה מקדימה)
+
+    Returns:
+        כמו broadcast_file - התוצאות לפי סדר targets, עם 'route' לכל קבוצה
+    """
+    fallback = {'telegram_user_id': telegram_user_id, 'telegram_fallback_callback': telegram_fallback_callback}
+    if file_type != 'video' or not config.WHATSAPP_ROUTING_ENABLED or not os.path.exists(file_path):
+        return await whatsapp_delivery.broadcast_file(file_path, targets, file_type=file_type, **fallback)
+
+    size_mb, duration = await media_router.describe(file_path)
+    routes = media_router.plan([chat for chat, _ in targets], size_mb, duration)
+
+    preview_path = None
+    if 'preview' in routes.values():
+        preview_path = await make_preview_clip(file_path, config.WHATSAPP_PREVIEW_SECONDS)
+        if not preview_path:
+            logger.warning("⚠️ [WA_ROUTE] יצירת קליפ נכשלה - הקבוצות מקבלות את הוידאו (השירות ידחוס)")
+            routes = {chat: 'video' if route == 'preview' else route for chat, route in routes.items()}
+
+    by_route: Dict[str, List[int]] = {}
+    for index, (chat, _) in enumerate(targets):
+        by_route.setdefault(routes[chat], []).append(index)
+
+    def _caption(route: str, caption: str) -> str:
+        if route == 'preview' and link and link not in caption:
+            return f"{caption}\n\n🎬 לצפייה המלאה: {link}"
+        return caption
+
+    sources = {'video': file_path, 'document': file_path, 'preview': preview_path}
+    try:
+        parts = await asyncio.gather(*(
+            whatsapp_delivery.broadcast_file(
+                sources[route],
+                [(targets[i][0], _caption(route, targets[i][1])) for i in indexes],
+                file_type=file_type,
+                send_as='document' if route == 'document' else 'media',
+                **fallback
+            )
+            for route, indexes in by_route.items()
+        ))
+        sizes = {route: os.path.getsize(path) / (1024 * 1024) for route, path in sources.items() if path}
+    finally:
+        if preview_path:
+            try:
+                os.remove(preview_path)
+            except OSError:
+                pass
+
+    from .outbox import is_retryable
+
+    recorded = False
+    results: List[Optional[Dict[str, Any]]] = [None] * len(targets)
+    for (route, indexes), part in zip(by_route.items(), parts):
+        for index, group_result in zip(indexes, part.get('results', [])):
+            group_result['route'] = route
+            results[index] = group_result
+            # רק שליחות שהגיעו לקבוצה (יש זמן שליחה) ולא שגיאות קבועות מלמדות על הקבוצה
+            if 'elapsed_ms' in group_result and (group_result.get('success') or is_retryable(group_result.get('error'))):
+                media_router.record(
+                    targets[index][0], route, bool(group_result.get('success')),
+                    group_result['elapsed_ms'] / 1000, sizes[route]
+                )
+                recorded = True
+    if recorded:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, media_router.save)
+    sent = sum(1 for r in results if r and r.get('success'))
+    return {'success': sent > 0, 'sent': sent, 'failed': len(targets) - sent, 'results': results}
+
+
+# מופע גלובלי
+media_router = MediaRouter()
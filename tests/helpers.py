@@ -0,0 +1,48 @@
+"""
+עזרים משותפים לטסטי היחידה
+תיקייה זמנית לכל טסט, יצירת קבצים בתוכה ו-patch שמתבטל אוטומטית בסוף הטסט
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import sys
+
+# הוספת הנתיב של הפרויקט (תיקיית השורש)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class FakeClock:
+    """שעון ידני במקום time.monotonic (רק במודול הנבדק - לא ב-event loop)"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class UnitTestCase(unittest.IsolatedAsyncioTestCase):
+    """בסיס לטסטי היחידה (טסטים סינכרוניים ואסינכרוניים)"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def make_file(self, name: str, content: bytes = b'x') -> str:
+        """קובץ חדש בתיקייה הזמנית"""
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def patch(self, target, **attributes):
+        """החלפת מאפיינים של מודול / אובייקט עד סוף הטסט"""
+        patcher = mock.patch.multiple(target, **attributes)
+        patcher.start()
+        self.addCleanup(patcher.stop)
@@ -0,0 +1,127 @@
+"""
+טסט ל-artifact store
+שמירה ושליפה לפי מפתח לוגי, פינוי LRU לפי גודל, ובידוד בין עותק העבודה לתוצר השמור
+"""
+import os
+import shutil
+import unittest
+from pathlib import Path
+
+from helpers import UnitTestCase
+
+from services.media import artifact_store as artifact_store_module
+from services.media.artifact_store import ArtifactStore, known_hash, make_key
+
+
+class ArtifactStoreTest(UnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.patch(artifact_store_module, ARTIFACT_STORE_ENABLED=True)
+        self.store = ArtifactStore(Path(self.tmp_dir) / "store", max_size_mb=1)
+
+    async def test_put_then_get(self):
+        source = self.make_file("song.mp3", b'x' * 1000)
+        key = make_key("audio", "song", {"bitrate": 320})
+        sha = await self.store.put(key, source, "audio")
+        self.assertIsNotNone(sha)
+        self.assertTrue(self.store.contains(key))
+
+        dest = os.path.join(self.tmp_dir, "copy.mp3")
+        result = await self.store.get(key, dest_path=dest)
+        self.assertEqual(result, dest)
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 1000)
+        # ה-hash של עותק העבודה ידוע בלי לקרוא אותו שוב
+        self.assertEqual(known_hash(dest), sha)
+
+    async def test_get_missing_key(self):
+        self.assertIsNone(await self.store.get(make_key("nothing")))
+        self.assertFalse(self.store.contains(make_key("nothing")))
+
+    async def test_same_content_is_stored_once(self):
+        first = self.make_file("a.mp4", b'x' * 2000)
+        second = self.make_file("b.mp4", b'x' * 2000)
+        sha_a = await self.store.put("key-a", first, "video")
+        sha_b = await self.store.put("key-b", second, "video")
+        self.assertEqual(sha_a, sha_b)
+        stats = self.store.get_stats()
+        self.assertEqual(stats["objects"], 1)
+        self.assertEqual(stats["keys"], 2)
+
+    async def test_lru_eviction(self):
+        # 3 x 400KB במאגר של 1MB - הפחות שימושי מפונה
+        paths = [self.make_file(f"v{i}.mp4", bytes([65 + i]) * 400 * 1024) for i in range(3)]
+        await self.store.put("v0", paths[0], "video")
+        await self.store.put("v1", paths[1], "video")
+        # גישה ל-v0 הופכת את v1 לישן ביותר
+        await self.store.get("v0", dest_path=os.path.join(self.tmp_dir, "w0.mp4"))
+        await self.store.put("v2", paths[2], "video")
+
+        self.assertTrue(self.store.contains("v0"))
+        self.assertFalse(self.store.contains("v1"))
+        self.assertTrue(self.store.contains("v2"))
+        self.assertLessEqual(self.store.get_stats()["total_mb"], 1)
+
+    async def test_mutating_returned_file_does_not_change_stored_object(self):
+        source = self.make_file("thumb.jpg", b'x' * 500)
+        await self.store.put("thumb", source, "thumbnail")
+
+        working = await self.store.get("thumb", dest_path=os.path.join(self.tmp_dir, "w.jpg"))
+        # כתיבה במקום (כמו תיוג MP3 / שמירת PIL מעל אותו שם)
+        with open(working, 'r+b') as f:
+            f.write(b'CHANGED')
+        # והעתקה מעל אותו שם (כמו create_upload_copy)
+        shutil.copy2(self.make_file("other.jpg", b'z' * 10), working)
+
+        again = await self.store.get("thumb", dest_path=os.path.join(self.tmp_dir, "w2.jpg"))
+        with open(again, 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 500)
+
+    async def test_mutating_source_after_put_does_not_change_stored_object(self):
+        source = self.make_file("song.mp3", b'x' * 500)
+        await self.store.put("song", source, "audio")
+        with open(source, 'r+b') as f:
+            f.write(b'TAGGED')
+
+        copy = await self.store.get("song", dest_path=os.path.join(self.tmp_dir, "copy.mp3"))
+        with open(copy, 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 500)
+
+    async def test_missing_object_file_is_dropped(self):
+        source = self.make_file("clip.mp4", b'x' * 100)
+        sha = await self.store.put("clip", source, "video")
+        object_file = self.store._object_file(sha)
+        os.chmod(object_file, 0o644)
+        os.remove(object_file)
+
+        self.assertIsNone(await self.store.get("clip", dest_path=os.path.join(self.tmp_dir, "c.mp4")))
+        self.assertFalse(self.store.contains("clip"))
+
+    async def test_put_background_survives_source_removal(self):
+        source = self.make_file("clip_1080ish.mp4", b'v' * 3000)
+        task = self.store.put_background("clip", source, "video")
+        # ניקוי הסשן מוחק את הקובץ לפני שההעתקה למאגר הסתיימה
+        os.remove(source)
+        self.assertIsNotNone(await task)
+
+        copy = await self.store.get("clip", dest_path=os.path.join(self.tmp_dir, "again.mp4"))
+        with open(copy, 'rb') as f:
+            self.assertEqual(f.read(), b'v' * 3000)
+        self.assertEqual(self.store._index["objects"][self.store._index["keys"]["clip"]]["name"], "clip_1080ish.mp4")
+        self.assertEqual([name for name in os.listdir(self.tmp_dir) if name.endswith('.store')], [])
+
+    async def test_put_background_remembers_source_hash(self):
+        source = self.make_file("clip.mp4", b'w' * 100)
+        sha = await self.store.put_background("clip", source, "video")
+        self.assertEqual(known_hash(source), sha)
+
+    async def test_index_survives_reload(self):
+        source = self.make_file("a.mp3", b'x' * 100)
+        await self.store.put("persisted", source, "audio")
+        reloaded = ArtifactStore(Path(self.tmp_dir) / "store", max_size_mb=1)
+        self.assertTrue(reloaded.contains("persisted"))
+
+
+if __name__ == '__main__':
+    unittest.main()
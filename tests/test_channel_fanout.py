@@ -0,0 +1,63 @@
+"""
+טסט לשער ה-FloodWait של הפצה לערוצים
+חסימה גלובלית (FloodWait) / לפי צ'אט (SlowmodeWait) והמתנה עד סופה
+"""
+import unittest
+from unittest import mock
+
+from helpers import FakeClock, UnitTestCase
+
+from pyrogram.errors import FloodWait, SlowmodeWait
+
+from services.channels import fanout
+from services.channels.fanout import FloodWaitGate
+
+
+class FloodWaitGateTest(UnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.patch(fanout, time=mock.Mock(monotonic=self.clock))
+
+    def test_flood_wait_blocks_all_chats(self):
+        gate = FloodWaitGate()
+        self.assertTrue(gate.handle_error(FloodWait(value=5), 'chat-a'))
+        self.assertAlmostEqual(gate.blocked_for(), 6.0)
+        self.assertAlmostEqual(gate.blocked_for('chat-b'), 6.0)
+
+    def test_slowmode_blocks_only_its_chat(self):
+        gate = FloodWaitGate()
+        self.assertTrue(gate.handle_error(SlowmodeWait(value=10), 'chat-a'))
+        self.assertAlmostEqual(gate.blocked_for('chat-a'), 11.0)
+        self.assertEqual(gate.blocked_for('chat-b'), 0.0)
+        self.assertEqual(gate.blocked_for(), 0.0)
+
+    def test_shorter_block_does_not_shorten_existing(self):
+        gate = FloodWaitGate()
+        gate.block_global(30)
+        gate.block_global(5)
+        self.assertAlmostEqual(gate.blocked_for(), 30.0)
+
+    def test_other_errors_are_not_waits(self):
+        gate = FloodWaitGate()
+        self.assertFalse(gate.handle_error(ValueError('boom'), 'chat-a'))
+        self.assertEqual(gate.blocked_for('chat-a'), 0.0)
+
+    async def test_wait_sleeps_until_block_ends(self):
+        gate = FloodWaitGate()
+        gate.block_chat('chat-a', 3)
+        sleeps = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+            self.clock.advance(delay)
+
+        self.patch(fanout, asyncio=mock.Mock(sleep=fake_sleep))
+        await gate.wait('chat-a')
+        await gate.wait('chat-b')
+        self.assertEqual(sleeps, [3.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+טסט ל-cache של file_id בטלגרם
+שמירה אחרי העלאה, שימוש חוזר לפי hash ידוע, פינוי LRU ומחיקת file_id שפג תוקפו
+"""
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from helpers import UnitTestCase
+
+from pyrogram.errors import FileReferenceExpired
+
+from services.channels import file_id_cache as file_id_cache_module
+from services.channels.file_id_cache import FileIdCache, send_cached_media
+from services.media.utils import create_upload_copy
+
+
+def _message(kind: str, file_id: str):
+    """הודעה שנשלחה עם מדיה מסוג kind"""
+    return SimpleNamespace(**{kind: SimpleNamespace(file_id=file_id, file_unique_id=f"u-{file_id}")})
+
+
+class FileIdCacheTest(UnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = FileIdCache(Path(self.tmp_dir) / "file_ids.json")
+        self.client = SimpleNamespace(name="userbot")
+
+    async def test_remember_then_lookup(self):
+        path = self.make_file("a.mp3", b"audio")
+        self.assertIsNone(await self.cache.lookup(self.client, path, 'audio'))
+
+        await self.cache.remember(self.client, path, 'audio', _message('audio', 'FID1'))
+        self.assertEqual(await self.cache.lookup(self.client, path, 'audio'), 'FID1')
+        # file_id תקף רק ל-client שהעלה ולסוג המדיה
+        self.assertIsNone(await self.cache.lookup(SimpleNamespace(name="bot"), path, 'audio'))
+        self.assertIsNone(await self.cache.lookup(self.client, path, 'document'))
+
+    async def test_same_content_other_path(self):
+        first = self.make_file("a.mp3", b"same bytes")
+        await self.cache.remember(self.client, first, 'audio', _message('audio', 'FID1'))
+        second = self.make_file("b.mp3", b"same bytes")
+        # hash של קובץ שלא נראה עדיין לא ידוע - lookup לא קורא את התוכן
+        self.assertIsNone(await self.cache.lookup(self.client, second, 'audio'))
+        await file_id_cache_module.hash_file(second)
+        self.assertEqual(await self.cache.lookup(self.client, second, 'audio'), 'FID1')
+
+    async def test_upload_copy_keeps_known_hash(self):
+        first = self.make_file("clip.mp4", b"video bytes")
+        await self.cache.remember(self.client, first, 'video', _message('video', 'FID1'))
+        # כל פרסום שולח עותק חדש בשם היעד - ה-hash הידוע עובר אליו
+        upload_copy = create_upload_copy(first, "Artist - Song.mp4")
+        self.assertEqual(await self.cache.lookup(self.client, upload_copy, 'video'), 'FID1')
+
+    async def test_lru_eviction(self):
+        self.patch(file_id_cache_module, MAX_ENTRIES=2)
+        paths = [self.make_file(f"{i}.jpg", bytes([i]) * 10) for i in range(3)]
+        with mock.patch.object(file_id_cache_module, 'time', mock.Mock(time=mock.Mock(side_effect=[1.0, 2.0, 3.0, 4.0]))):
+            await self.cache.remember(self.client, paths[0], 'photo', _message('photo', 'P0'))
+            await self.cache.remember(self.client, paths[1], 'photo', _message('photo', 'P1'))
+            # שימוש ב-P0 - P1 הופך לישן ביותר
+            self.assertEqual(await self.cache.lookup(self.client, paths[0], 'photo'), 'P0')
+            await self.cache.remember(self.client, paths[2], 'photo', _message('photo', 'P2'))
+
+        self.assertEqual(len(self.cache._entries), 2)
+        self.assertEqual(await self.cache.lookup(self.client, paths[0], 'photo'), 'P0')
+        self.assertIsNone(await self.cache.lookup(self.client, paths[1], 'photo'))
+        self.assertEqual(await self.cache.lookup(self.client, paths[2], 'photo'), 'P2')
+
+    async def test_evict_stale_file_id(self):
+        path = self.make_file("v.mp4", b"video")
+        await self.cache.remember(self.client, path, 'video', _message('video', 'OLD'))
+        self.cache.evict('OLD')
+        self.assertIsNone(await self.cache.lookup(self.client, path, 'video'))
+
+    async def test_persisted_across_instances(self):
+        path = self.make_file("a.mp3", b"audio")
+        await self.cache.remember(self.client, path, 'audio', _message('audio', 'FID1'))
+        reloaded = FileIdCache(Path(self.tmp_dir) / "file_ids.json")
+        self.assertEqual(await reloaded.lookup(self.client, path, 'audio'), 'FID1')
+
+    async def test_send_cached_media_reuploads_stale_file_id(self):
+        path = self.make_file("a.mp3", b"audio")
+        sent = []
+
+        async def send_audio(**params):
+            sent.append(params['audio'])
+            if params['audio'] == 'STALE':
+                raise FileReferenceExpired()
+            return _message('audio', 'FRESH')
+
+        self.patch(file_id_cache_module, file_id_cache=self.cache)
+        await self.cache.remember(self.client, path, 'audio', _message('audio', 'STALE'))
+        await send_cached_media(self.client, send_audio, 'audio', path, chat_id=1)
+        self.assertEqual(sent, ['STALE', path])
+        self.assertEqual(await self.cache.lookup(self.client, path, 'audio'), 'FRESH')
+
+        await send_cached_media(self.client, send_audio, 'audio', path, chat_id=1)
+        self.assertEqual(sent[-1], 'FRESH')
+
+
+if __name__ == '__main__':
+    unittest.main()
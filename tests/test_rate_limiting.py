@@ -0,0 +1,104 @@
+"""
+טסט ל-token buckets
+בודק מילוי וצריכה של TokenBucket ופינוי buckets לא פעילים ב-BucketRegistry
+"""
+import unittest
+from unittest import mock
+
+from helpers import FakeClock, UnitTestCase
+
+from services import rate_limiter
+from services.rate_limiter import TokenBucket, BucketRegistry
+
+
+class TokenBucketTest(UnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.patch(rate_limiter, time=mock.Mock(monotonic=self.clock))
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(capacity=3, rate=1.0)
+        self.assertTrue(all(bucket.try_acquire() for _ in range(3)))
+        self.assertFalse(bucket.try_acquire())
+        self.assertAlmostEqual(bucket.wait_time(), 1.0)
+
+        self.clock.advance(1.0)
+        self.assertTrue(bucket.try_acquire())
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = TokenBucket(capacity=2, rate=10.0)
+        self.clock.advance(60)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def test_reserve_queues_by_rate(self):
+        bucket = TokenBucket(capacity=1, rate=2.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+    def test_idle_for(self):
+        bucket = TokenBucket(capacity=4, rate=1.0)
+        self.assertEqual(bucket.idle_for(self.clock.now), 0.0)
+        bucket.try_acquire()
+        # מתמלא אחרי שנייה - עד אז לא נחשב לא פעיל
+        self.assertEqual(bucket.idle_for(self.clock.now + 0.5), 0.0)
+        self.assertAlmostEqual(bucket.idle_for(self.clock.now + 5), 4.0)
+
+
+class BucketRegistryTest(UnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.patch(rate_limiter, time=mock.Mock(monotonic=self.clock))
+
+    def test_get_returns_same_bucket(self):
+        registry = BucketRegistry(idle_ttl=60)
+        bucket = registry.get('a', capacity=2, rate=1.0)
+        bucket.try_acquire()
+        self.assertIs(registry.get('a', capacity=2, rate=1.0), bucket)
+        self.assertEqual(len(registry), 1)
+
+    def test_evicts_full_idle_buckets(self):
+        registry = BucketRegistry(idle_ttl=60)
+        registry.get('old', capacity=2, rate=1.0).try_acquire()
+        # 'old' מתמלא אחרי שנייה ואז לא פעיל 60 שניות
+        self.clock.advance(61.5)
+        registry.get('new', capacity=2, rate=1.0)
+        self.assertEqual(len(registry), 1)
+        self.assertNotIn('old', registry._buckets)
+
+    def test_keeps_recently_used_buckets(self):
+        registry = BucketRegistry(idle_ttl=60)
+        registry.get('a', capacity=2, rate=1.0)
+        registry.get('b', capacity=2, rate=1.0)
+        self.clock.advance(30)
+        # שימוש ב-'a' מעביר אותו לסוף; ל-'b' (מלא) יש עוד 30 שניות
+        registry.get('a', capacity=2, rate=1.0).try_acquire()
+        self.clock.advance(31)
+        registry.get('c', capacity=2, rate=1.0)
+        self.assertEqual(set(registry._buckets), {'a', 'c'})
+
+    def test_bucket_in_debt_is_not_evicted(self):
+        registry = BucketRegistry(idle_ttl=10)
+        bucket = registry.get('busy', capacity=1, rate=0.01)
+        bucket.reserve()
+        bucket.reserve()
+        self.clock.advance(20)
+        registry.get('other', capacity=1, rate=1.0)
+        self.assertIn('busy', registry._buckets)
+
+    def test_discard(self):
+        registry = BucketRegistry()
+        for key in [(1, 'x'), (1, 'y'), (2, 'x')]:
+            registry.get(key, capacity=1, rate=1.0)
+        registry.discard(lambda key: key[0] == 1)
+        self.assertEqual(list(registry._buckets), [(2, 'x')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+טסט לתור השליחות של וואטסאפ (outbox)
+הוספה לתור עם DB זמני, המתנה שמוכפלת בכל ניסיון, עדכון אחרי שליחה חוזרת ומחיקת שורות שעבר זמנן
+"""
+import os
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from helpers import UnitTestCase
+
+import config
+from services.whatsapp.outbox import WhatsAppOutbox, is_retryable
+
+
+class WhatsAppOutboxTest(UnitTestCase):
+
+    async def asyncSetUp(self):
+        self.outbox = WhatsAppOutbox(Path(self.tmp_dir) / "outbox", enabled=True)
+        self.file_path = self.make_file("song.mp3", b'audio' * 100)
+
+    async def asyncTearDown(self):
+        await self.outbox.stop()
+
+    async def _rows(self):
+        return await self.outbox._execute("SELECT * FROM outbox ORDER BY id")
+
+    async def test_enqueue_retains_file(self):
+        chats = await self.outbox.enqueue(self.file_path, 'audio', [('group-a', 'cap'), ('group-b', '')], error='timeout')
+        self.assertEqual(chats, ['group-a', 'group-b'])
+        self.assertEqual(await self.outbox.pending_count(), 2)
+
+        rows = await self._rows()
+        retained = rows[0]['file_path']
+        self.assertNotEqual(retained, self.file_path)
+        self.assertTrue(os.path.exists(retained))
+        # קבצי הסשן נמחקים - העותק בתור נשאר
+        os.remove(self.file_path)
+        self.assertTrue(os.path.exists(retained))
+
+    async def test_duplicate_enqueue_is_ignored(self):
+        await self.outbox.enqueue(self.file_path, 'audio', [('group-a', 'cap')])
+        await self.outbox.enqueue(self.file_path, 'audio', [('group-a', 'cap'), ('group-b', 'cap')])
+        self.assertEqual(sorted(row['chat'] for row in await self._rows()), ['group-a', 'group-b'])
+
+    async def test_disabled_outbox_does_nothing(self):
+        outbox = WhatsAppOutbox(Path(self.tmp_dir) / "disabled", enabled=False)
+        self.assertEqual(await outbox.enqueue(self.file_path, 'audio', [('group-a', '')]), [])
+        self.assertEqual(await outbox.pending_count(), 0)
+        self.assertFalse((Path(self.tmp_dir) / "disabled").exists())
+
+    def test_backoff_doubles_up_to_max(self):
+        self.patch(config, WHATSAPP_OUTBOX_RETRY_BASE=30, WHATSAPP_OUTBOX_RETRY_MAX=600)
+        with mock.patch('services.whatsapp.outbox.random.uniform', return_value=1.0):
+            self.assertEqual([self.outbox._backoff(n) for n in range(6)], [30, 60, 120, 240, 480, 600])
+
+        for _ in range(20):
+            self.assertTrue(24 <= self.outbox._backoff(0) <= 36)
+
+    def test_is_retryable(self):
+        self.assertTrue(is_retryable('Service timeout'))
+        self.assertTrue(is_retryable(None))
+        self.assertFalse(is_retryable('Chat not found: group-x'))
+
+    async def test_record_updates_and_deletes_rows(self):
+        targets = [('sent', ''), ('busy', ''), ('missing', ''), ('no-result', '')]
+        await self.outbox.enqueue(self.file_path, 'audio', targets)
+        rows = await self._rows()
+
+        before = time.time()
+        await self.outbox._record(rows, [
+            {'chat': 'sent', 'success': True},
+            {'chat': 'busy', 'success': False, 'error': 'Service timeout'},
+            {'chat': 'missing', 'success': False, 'error': 'Chat not found'},
+        ])
+
+        left = {row['chat']: row for row in await self._rows()}
+        # נמסרה / שגיאה קבועה - נמחקות; שגיאה זמנית / בלי תוצאה - ניסיון נוסף בהמשך
+        self.assertEqual(set(left), {'busy', 'no-result'})
+        self.assertEqual(left['busy']['attempts'], 1)
+        self.assertEqual(left['busy']['last_error'], 'Service timeout')
+        self.assertGreater(left['busy']['next_attempt_at'], before)
+        self.assertEqual(left['no-result']['last_error'], 'Unknown error')
+
+    async def test_dispatch_passes_link_and_backs_off_on_error(self):
+        await self.outbox.enqueue(self.file_path, 'video', [('group-a', '')], link='https://youtu.be/x')
+        rows = await self._rows()
+        self.assertEqual(rows[0]['link'], 'https://youtu.be/x')
+
+        broadcast = mock.AsyncMock(side_effect=RuntimeError('ffprobe failed'))
+        with mock.patch('services.whatsapp.outbox.routed_broadcast', broadcast):
+            await self.outbox._dispatch(rows)
+        self.assertEqual(broadcast.call_args.kwargs['link'], 'https://youtu.be/x')
+
+        # חריגה בהכנה נרשמת כניסיון שנכשל - לא נשלחת שוב מיד
+        row = (await self._rows())[0]
+        self.assertEqual(row['attempts'], 1)
+        self.assertEqual(row['last_error'], 'ffprobe failed')
+        self.assertGreater(row['next_attempt_at'], time.time())
+
+    async def test_expire_removes_rows_and_retained_file(self):
+        await self.outbox.enqueue(self.file_path, 'audio', [('group-a', ''), ('group-b', '')])
+        retained = (await self._rows())[0]['file_path']
+
+        await self.outbox._execute("UPDATE outbox SET expires_at = ? WHERE chat = ?", (time.time() - 1, 'group-a'))
+        await self.outbox._expire()
+        # לקובץ יש עוד שורה ממתינה
+        self.assertEqual(await self.outbox.pending_count(), 1)
+        self.assertTrue(os.path.exists(retained))
+
+        await self.outbox._execute("UPDATE outbox SET expires_at = ?", (time.time() - 1,))
+        await self.outbox._expire()
+        self.assertEqual(await self.outbox.pending_count(), 0)
+        self.assertFalse(os.path.exists(retained))
+
+    async def test_rows_survive_restart(self):
+        await self.outbox.enqueue(self.file_path, 'audio', [('group-a', '')])
+        await self.outbox.stop()
+        self.assertEqual(await self.outbox.pending_count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+טסט לניתוב מדיה בוואטסאפ
+בחירת אופן השליחה לפי גודל ואורך, ופסילה / בדיקה מחדש לפי ההיסטוריה של כל קבוצה
+"""
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from helpers import UnitTestCase
+
+import config
+from services.whatsapp.routing import MediaRouter
+
+ROUTING_CONFIG = {
+    'WHATSAPP_ROUTING_ENABLED': True,
+    'WHATSAPP_ROUTE_ORDER': ['video', 'document', 'preview'],
+    'WHATSAPP_MAX_FILE_SIZE_MB': 70,
+    'WHATSAPP_DOCUMENT_MAX_MB': 100,
+    'WHATSAPP_ROUTE_MAX_ENCODE_DURATION': 900,
+    'WHATSAPP_ROUTE_MIN_SAMPLES': 3,
+    'WHATSAPP_ROUTE_MIN_SUCCESS_RATE': 0.5,
+    'WHATSAPP_ROUTE_MAX_SEND_SEC': 300,
+    'WHATSAPP_ROUTE_REPROBE_HOURS': 24,
+}
+
+
+class MediaRouterTest(UnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.patch(config, **ROUTING_CONFIG)
+        self.stats_path = Path(self.tmp_dir) / "routes.json"
+        self.router = MediaRouter(self.stats_path)
+
+    def test_choose_by_size_and_duration(self):
+        # בגבול הגודל
+        self.assertEqual(self.router.choose('g', 50, 200), 'video')
+        # מעל הגבול אבל קצר - הדחיסה סבירה
+        self.assertEqual(self.router.choose('g', 120, 200), 'video')
+        # ארוך מדי לדחיסה, נכנס כמסמך
+        self.assertEqual(self.router.choose('g', 95, 1500), 'document')
+        # ארוך מדי וגדול מדי למסמך
+        self.assertEqual(self.router.choose('g', 300, 1500), 'preview')
+        # אורך לא ידוע מעל הגבול - אין דחיסה
+        self.assertEqual(self.router.choose('g', 90, None), 'document')
+
+    def test_route_order_is_respected(self):
+        with mock.patch.object(config, 'WHATSAPP_ROUTE_ORDER', ['document', 'unknown', 'video']):
+            self.assertEqual(self.router.choose('g', 50, 200), 'document')
+            self.assertEqual(self.router.choose('g', 120, 200), 'video')
+
+    def test_failures_disqualify_strategy_for_group(self):
+        for _ in range(2):
+            self.router.record('bad', 'video', False, 5, 50)
+        # פחות מ-MIN_SAMPLES - ההיסטוריה עוד לא קובעת
+        self.assertEqual(self.router.choose('bad', 50, 200), 'video')
+
+        self.router.record('bad', 'video', False, 5, 50)
+        self.assertEqual(self.router.choose('bad', 50, 200), 'document')
+        # קבוצה אחרת לא מושפעת
+        self.assertEqual(self.router.choose('good', 50, 200), 'video')
+
+    def test_recovers_after_successes(self):
+        for success in (False, False, False):
+            self.router.record('g', 'video', success, 5, 50)
+        for _ in range(3):
+            self.router.record('g', 'video', True, 5, 50)
+        self.assertGreaterEqual(self.router.get_stats('g')['video']['success_rate'], 0.5)
+        self.assertEqual(self.router.choose('g', 50, 200), 'video')
+
+    def test_disqualified_strategy_is_reprobed(self):
+        for _ in range(3):
+            self.router.record('g', 'video', False, 5, 50)
+        self.assertEqual(self.router.choose('g', 50, 200), 'document')
+
+        self.router._stats['g']['video']['last_attempt_at'] = time.time() - 25 * 3600
+        self.assertEqual(self.router.choose('g', 50, 200), 'video')
+
+    def test_slow_group_is_disqualified(self):
+        # 10 שניות ל-MB: 50MB צפוי 500 שניות > MAX_SEND_SEC
+        self.router.record('slow', 'video', True, 500, 50)
+        self.assertEqual(self.router.choose('slow', 50, 200), 'document')
+        # קובץ קטן עדיין בזמן
+        self.assertEqual(self.router.choose('slow', 20, 200), 'video')
+
+    def test_record_is_saved_only_on_save(self):
+        self.router.record('g', 'video', True, 10, 50)
+        self.assertFalse(self.stats_path.exists())
+
+        self.router.save()
+        reloaded = MediaRouter(self.stats_path)
+        self.assertEqual(reloaded.get_stats('g')['video']['samples'], 1)
+
+    def test_plan_without_routing_is_all_video(self):
+        with mock.patch.object(config, 'WHATSAPP_ROUTING_ENABLED', False):
+            self.assertEqual(self.router.plan(['a', 'b'], 300, 1500), {'a': 'video', 'b': 'video'})
+        self.assertEqual(self.router.plan(['a', 'b'], 300, 1500), {'a': 'preview', 'b': 'preview'})
+
+
+if __name__ == '__main__':
+    unittest.main()
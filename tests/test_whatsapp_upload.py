@@ -7,6 +7,7 @@
     python test_whatsapp_upload.py --dry-run           # טסט ללא שליחה אמיתית
     python test_whatsapp_upload.py --list             # רשימת קבצים זמינים
 """
+import asyncio
 import os
 import sys
 import json
@@ -371,11 +372,16 @@ def test_whatsapp_upload(
     # יצירת WhatsApp delivery
     log_step(4, 5, "חיבור ל-WhatsApp Service")
     
+    # ה-client אסינכרוני - loop אחד לבדיקת הזמינות ולשליחה (ה-session קשור אליו)
+    whatsapp = WhatsAppDelivery(dry_run=use_dry_run)
+    loop = asyncio.new_event_loop()
     try:
-        whatsapp = WhatsAppDelivery(dry_run=use_dry_run)
+        loop.run_until_complete(whatsapp.ensure_ready())
         log_success("WhatsApp Service מוכן")
     except Exception as e:
         log_error(f"שגיאה בחיבור ל-WhatsApp Service: {e}")
+        loop.run_until_complete(whatsapp.close())
+        loop.close()
         return False
     
     # שליחה
@@ -384,14 +390,18 @@ def test_whatsapp_upload(
     start_time = time.time()
     
     try:
-        result = whatsapp.send_file(
-            file_path=file_path,
-            chat_name=WHATSAPP_CHAT_NAME,
-            caption=f"🧪 טסט העלאה | {file_info['file_size_mb']:.2f}MB | {datetime.now().strftime('%H:%M:%S')}",
-            file_type='video' if file_info['is_video'] else 'document',
-            telegram_user_id=None,
-            telegram_fallback_callback=None
-        )
+        try:
+            result = loop.run_until_complete(whatsapp.send_file(
+                file_path=file_path,
+                chat_name=WHATSAPP_CHAT_NAME,
+                caption=f"🧪 טסט העלאה | {file_info['file_size_mb']:.2f}MB | {datetime.now().strftime('%H:%M:%S')}",
+                file_type='video' if file_info['is_video'] else 'document',
+                telegram_user_id=None,
+                telegram_fallback_callback=None
+            ))
+        finally:
+            loop.run_until_complete(whatsapp.close())
+            loop.close()
         
         duration = time.time() - start_time
         
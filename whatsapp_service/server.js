@@ -12,8 +12,11 @@ const qrcode = require('qrcode-terminal');
 const fs = require('fs').promises; 
 const fsSync = require('fs');      
 const path = require('path');
+const crypto = require('crypto');
+const { EventEmitter } = require('events');
 const ffmpeg = require('fluent-ffmpeg');
-const { execSync } = require('child_process'); 
+const { execSync, execFile } = require('child_process'); 
+const { promisify } = require('util');
 
 // ============================================
 // ⚙️ הגדרות ותנאים (Configuration)
@@ -36,6 +39,39 @@ const CONFIG = {
     // זמנים
     TIMEOUT_PROCESSING_SEC: 1200, // 20 דקות (נותן זמן לקבצים ענקיים של 250MB+)
     
+    // זיכרון מדיה (base64 של whatsapp-web.js)
+    MEDIA_CACHE_MAX_MB: parseInt(process.env.MEDIA_CACHE_MAX_MB || '300', 10),       // MessageMedia מוכנים לפי hash תוכן (שימוש חוזר בין קבוצות)
+    MEDIA_CACHE_TTL_SEC: parseInt(process.env.MEDIA_CACHE_TTL_SEC || '900', 10),     // רשומה שלא שומשה - נמחקת
+    MEDIA_INFLIGHT_MAX_MB: parseInt(process.env.MEDIA_INFLIGHT_MAX_MB || '400', 10), // base64 שנטען במקביל (מעבר לזה - המתנה)
+    
+    // העלאה בזרימה (כשהשירות לא רואה את מערכת הקבצים של הבוט)
+    UPLOAD_DIR: process.env.UPLOAD_DIR || path.join(__dirname, 'uploads'),
+    UPLOAD_TTL_SEC: parseInt(process.env.UPLOAD_TTL_SEC || '3600', 10),
+    
+    // שידור לכמה קבוצות (/send/broadcast)
+    BROADCAST_CONCURRENCY: parseInt(process.env.BROADCAST_CONCURRENCY || '2', 10),     // שליחות במקביל
+    BROADCAST_DELAY_MIN_MS: parseInt(process.env.BROADCAST_DELAY_MIN_MS || '1500', 10), // השהיה אקראית בין שליחות
+    BROADCAST_DELAY_MAX_MS: parseInt(process.env.BROADCAST_DELAY_MAX_MS || '4000', 10),
+    
+    // jobs (/jobs)
+    JOB_TTL_SEC: parseInt(process.env.JOB_TTL_SEC || '900', 10),   // job שהסתיים נשמר לשליפה
+    JOB_MAX_WAIT_SEC: 60,                                           // long-poll מקסימלי
+    
+    // מופע: כמה שירותים במקביל - לכל אחד session, תיקיית auth ופורט (PORT) משלו
+    WA_CLIENT_ID: process.env.WA_CLIENT_ID || 'bot-session',
+    WA_AUTH_DIR: process.env.WA_AUTH_DIR || './whatsapp_auth',
+    
+    // governor: תור שליחות חסום, דחיסות במקביל וזיכרון (Node + Chromium)
+    SEND_CONCURRENCY: parseInt(process.env.SEND_CONCURRENCY || '2', 10),                     // שליחות (jobs) שרצות במקביל
+    SEND_QUEUE_MAX: parseInt(process.env.SEND_QUEUE_MAX || '20', 10),                         // ממתינות מעבר לזה - 429
+    MAX_CONCURRENT_COMPRESSIONS: parseInt(process.env.MAX_CONCURRENT_COMPRESSIONS || '1', 10), // תהליכי ffmpeg במקביל
+    MEMORY_CHECK_INTERVAL_SEC: parseInt(process.env.MEMORY_CHECK_INTERVAL_SEC || '30', 10),
+    NODE_RSS_LIMIT_MB: parseInt(process.env.NODE_RSS_LIMIT_MB || '1024', 10),                 // מעל - ניקוי cache המדיה
+    CHROMIUM_RSS_LIMIT_MB: parseInt(process.env.CHROMIUM_RSS_LIMIT_MB || '1536', 10),         // מעל - מחזור הדפדפן
+    RECYCLE_DRAIN_TIMEOUT_SEC: parseInt(process.env.RECYCLE_DRAIN_TIMEOUT_SEC || '300', 10),  // המתנה לשליחות פעילות לפני מחזור
+    RECYCLE_READY_TIMEOUT_SEC: 180,                                                           // השליחות ממשיכות גם אם ready לא הגיע
+    PRESSURE_RATIO: 0.85,                                                                     // מעל חלק זה מהמגבלות - /status מדווח pressure
+    
     LOG_VERBOSE: true
 };
 
@@ -85,7 +121,11 @@ let isReady = false;
 let qrCodeData = null;
 
 function initializeWhatsApp() {
-    log('🚀', 'Initializing WhatsApp Client...');
+    log('🚀', `Initializing WhatsApp Client (${CONFIG.WA_CLIENT_ID})...`);
+    
+    // צ'אטים באינדקס שייכים ל-client הקודם
+    chatIndex.clear();
+    chatIndexLoadedAt = 0;
     
     // ניקוי client קודם אם קיים
     if (client) {
@@ -100,8 +140,8 @@ function initializeWhatsApp() {
     try {
         client = new Client({
             authStrategy: new LocalAuth({
-                clientId: 'bot-session',
-                dataPath: './whatsapp_auth'
+                clientId: CONFIG.WA_CLIENT_ID,
+                dataPath: CONFIG.WA_AUTH_DIR
             }),
             // תיקון לשגיאת Evaluation Failed
             webVersionCache: {
@@ -135,8 +175,16 @@ function initializeWhatsApp() {
             logSuccess('WhatsApp Client is ready!');
             isReady = true;
             qrCodeData = null;
+            if (resourceState.recycling) finishRecycle();
+            refreshChatIndex().catch(e => logError('Failed to load chat index', e));
         });
 
+        // עדכון אינדקס הצ'אטים (שינוי שם/הצטרפות/עזיבה/מחיקה)
+        client.on('group_update', (notification) => refreshIndexedChat(notification.chatId));
+        client.on('group_join', (notification) => refreshIndexedChat(notification.chatId));
+        client.on('group_leave', (notification) => refreshIndexedChat(notification.chatId));
+        client.on('chat_removed', (chat) => chatIndex.delete(chat.id._serialized));
+
         client.on('authenticated', () => {
             logSuccess('Authenticated!');
         });
@@ -475,13 +523,311 @@ async function processMediaIfNeeded(inputPath) {
     });
 }
 
+// ============================================
+// 🧠 Media Cache & Memory Budget
+// ============================================
+// MessageMedia מחזיק את כל הקובץ כ-base64 (~1.33x מהגודל).
+// לכן: טעינה אחת לכל תוכן (hash) שמשותפת לכל הקבוצות, cache מוגבל בגודל,
+// ותקציב לטעינות במקביל - סה"כ הזיכרון ≈ MEDIA_CACHE_MAX_MB + MEDIA_INFLIGHT_MAX_MB.
+
+const mediaCache = new Map(); // key → { media, bytes, sizeMB, expiresAt } (סדר הכנסה = LRU)
+let mediaCacheBytes = 0;
+
+function mediaCacheDelete(key) {
+    const entry = mediaCache.get(key);
+    if (!entry) return;
+    mediaCache.delete(key);
+    mediaCacheBytes -= entry.bytes;
+}
+
+function mediaCacheGet(key) {
+    if (!key) return null;
+    const entry = mediaCache.get(key);
+    if (!entry) return null;
+    if (entry.expiresAt < Date.now()) {
+        mediaCacheDelete(key);
+        return null;
+    }
+    // LRU - העברה לסוף
+    mediaCache.delete(key);
+    mediaCache.set(key, entry);
+    entry.expiresAt = Date.now() + CONFIG.MEDIA_CACHE_TTL_SEC * 1000;
+    return entry;
+}
+
+function mediaCachePut(key, media, sizeMB) {
+    const maxBytes = CONFIG.MEDIA_CACHE_MAX_MB * 1024 * 1024;
+    const bytes = media.data.length;
+    if (!key || bytes > maxBytes) return;
+    mediaCacheDelete(key);
+    mediaCache.set(key, { media, bytes, sizeMB, expiresAt: Date.now() + CONFIG.MEDIA_CACHE_TTL_SEC * 1000 });
+    mediaCacheBytes += bytes;
+    while (mediaCacheBytes > maxBytes && mediaCache.size > 0) {
+        mediaCacheDelete(mediaCache.keys().next().value);
+    }
+}
+
+setInterval(() => {
+    const now = Date.now();
+    for (const [key, entry] of mediaCache) {
+        if (entry.expiresAt < now) mediaCacheDelete(key);
+    }
+}, 60 * 1000).unref();
+
+// תקציב base64 בטיסה - טעינה שחורגת ממתינה (תמיד מאפשרים לפחות טעינה אחת)
+let inflightBytes = 0;
+let budgetWaiters = [];
+
+async function acquireMediaBudget(bytes) {
+    const limit = CONFIG.MEDIA_INFLIGHT_MAX_MB * 1024 * 1024;
+    while (inflightBytes > 0 && inflightBytes + bytes > limit) {
+        log('⏳', `Media memory budget full (${(inflightBytes / 1024 / 1024).toFixed(0)}MB in flight), waiting...`);
+        await new Promise(resolve => budgetWaiters.push(resolve));
+    }
+    inflightBytes += bytes;
+}
+
+function releaseMediaBudget(bytes) {
+    inflightBytes -= bytes;
+    const waiters = budgetWaiters;
+    budgetWaiters = [];
+    waiters.forEach(resolve => resolve());
+}
+
+// ============================================
+// 🛡️ Resource Governor (תור שליחות, דחיסות, זיכרון)
+// ============================================
+// כל שליחה (/jobs, /send/enhanced, /send/broadcast) עוברת בתור חסום: עד SEND_CONCURRENCY
+// רצות, עד SEND_QUEUE_MAX ממתינות (מעבר לזה - 429 והבוט מנסה שוב). דחיסות ffmpeg מוגבלות
+// ל-MAX_CONCURRENT_COMPRESSIONS. watchdog מודד RSS של Node ושל עץ התהליכים של Chromium:
+// Node מעל המגבלה → ניקוי cache המדיה; Chromium מעל המגבלה → מחזור הדפדפן אחרי שהשליחות
+// הפעילות הסתיימו (שליחות חדשות ממתינות בתור עד שה-client מוכן שוב).
+
+function createLimiter(limit) {
+    const limiter = {
+        limit,
+        active: 0,
+        pending: 0,
+        paused: false,
+        waiters: [],
+        async acquire() {
+            limiter.pending++;
+            try {
+                while (limiter.paused || limiter.active >= limiter.limit) {
+                    await new Promise(resolve => limiter.waiters.push(resolve));
+                }
+            } finally {
+                limiter.pending--;
+            }
+            limiter.active++;
+        },
+        release() {
+            limiter.active--;
+            limiter.wake();
+        },
+        wake() {
+            const waiters = limiter.waiters;
+            limiter.waiters = [];
+            waiters.forEach(resolve => resolve());
+        },
+        async run(fn) {
+            await limiter.acquire();
+            try {
+                return await fn();
+            } finally {
+                limiter.release();
+            }
+        }
+    };
+    return limiter;
+}
+
+const sendLimiter = createLimiter(Math.max(1, CONFIG.SEND_CONCURRENCY));
+const compressionLimiter = createLimiter(Math.max(1, CONFIG.MAX_CONCURRENT_COMPRESSIONS));
+
+const resourceState = {
+    node_rss_mb: 0,
+    chromium_rss_mb: 0,
+    checked_at: null,
+    recycling: false,
+    recycles: 0,
+    last_recycle: null
+};
+
+function sendQueueFull() {
+    return sendLimiter.pending >= CONFIG.SEND_QUEUE_MAX;
+}
+
+/**
+ * הרצת שליחה דרך התור החסום
+ * @throws {Error} code=QUEUE_FULL אם התור מלא
+ */
+function governedSend(fn) {
+    if (sendQueueFull()) {
+        const error = new Error(`Send queue full (${sendLimiter.pending} waiting)`);
+        error.code = 'QUEUE_FULL';
+        throw error;
+    }
+    return sendLimiter.run(fn);
+}
+
+async function compressMedia(inputPath) {
+    if (compressionLimiter.active >= compressionLimiter.limit) {
+        log('⏳', `Compression slots busy (${compressionLimiter.active} running), waiting...`);
+    }
+    return compressionLimiter.run(() => processMediaIfNeeded(inputPath));
+}
+
+/**
+ * RSS של תהליך וכל צאצאיו (MB) - Chromium מריץ renderer/gpu/utility כתהליכים נפרדים
+ */
+async function processTreeRssMB(rootPid) {
+    const { stdout } = await promisify(execFile)('ps', ['-eo', 'pid=,ppid=,rss=']);
+    const children = new Map();
+    const rss = new Map();
+    for (const line of stdout.split('\n')) {
+        const [pid, ppid, kb] = line.trim().split(/\s+/).map(Number);
+        if (!pid) continue;
+        rss.set(pid, kb || 0);
+        if (!children.has(ppid)) children.set(ppid, []);
+        children.get(ppid).push(pid);
+    }
+    let totalKb = 0;
+    const stack = [rootPid];
+    const seen = new Set();
+    while (stack.length) {
+        const pid = stack.pop();
+        if (seen.has(pid)) continue;
+        seen.add(pid);
+        totalKb += rss.get(pid) || 0;
+        stack.push(...(children.get(pid) || []));
+    }
+    return totalKb / 1024;
+}
+
+function browserPid() {
+    try {
+        const proc = client && client.pupBrowser && client.pupBrowser.process();
+        return proc ? proc.pid : null;
+    } catch (e) {
+        return null;
+    }
+}
+
+/**
+ * מחזור הדפדפן: עצירת התור, המתנה לשליחות הפעילות, destroy ואתחול מחדש (אותו LocalAuth - בלי QR)
+ */
+async function recycleBrowser(reason) {
+    if (resourceState.recycling) return;
+    resourceState.recycling = true;
+    sendLimiter.paused = true;
+    log('♻️', `Recycling browser (${reason}) - waiting for ${sendLimiter.active} active send(s)`);
+    
+    const deadline = Date.now() + CONFIG.RECYCLE_DRAIN_TIMEOUT_SEC * 1000;
+    while (sendLimiter.active > 0 && Date.now() < deadline) {
+        await new Promise(r => setTimeout(r, 1000));
+    }
+    if (sendLimiter.active > 0) log('⚠️', `Drain timeout - recycling with ${sendLimiter.active} send(s) still active`);
+    
+    resourceState.recycles++;
+    resourceState.last_recycle = { reason, at: new Date().toISOString() };
+    isReady = false;
+    try {
+        if (client) await client.destroy();
+    } catch (e) {
+        log('⚠️', 'Error destroying client during recycle', { error: e.message });
+    }
+    client = null;
+    initializeWhatsApp();
+    
+    // אם ready לא מגיע - משחררים את התור (השליחות ייכשלו ב-"not ready" והבוט ינסה שוב)
+    setTimeout(() => {
+        if (resourceState.recycling) {
+            log('⚠️', `Client not ready ${CONFIG.RECYCLE_READY_TIMEOUT_SEC}s after recycle - resuming send queue`);
+            finishRecycle();
+        }
+    }, CONFIG.RECYCLE_READY_TIMEOUT_SEC * 1000).unref();
+}
+
+function finishRecycle() {
+    resourceState.recycling = false;
+    sendLimiter.paused = false;
+    sendLimiter.wake();
+    logSuccess(`Browser recycled - send queue resumed (${sendLimiter.pending} waiting)`);
+}
+
+async function checkResources() {
+    resourceState.node_rss_mb = process.memoryUsage().rss / (1024 * 1024);
+    const pid = browserPid();
+    try {
+        resourceState.chromium_rss_mb = pid ? await processTreeRssMB(pid) : 0;
+    } catch (e) {
+        log('⚠️', `Cannot measure Chromium memory: ${e.message}`);
+    }
+    resourceState.checked_at = new Date().toISOString();
+    
+    if (resourceState.node_rss_mb > CONFIG.NODE_RSS_LIMIT_MB && mediaCache.size > 0) {
+        log('🧹', `Node RSS ${resourceState.node_rss_mb.toFixed(0)}MB > ${CONFIG.NODE_RSS_LIMIT_MB}MB - clearing media cache`);
+        for (const key of [...mediaCache.keys()]) mediaCacheDelete(key);
+        if (global.gc) global.gc();
+    }
+    if (!resourceState.recycling && isReady && resourceState.chromium_rss_mb > CONFIG.CHROMIUM_RSS_LIMIT_MB) {
+        recycleBrowser(`Chromium RSS ${resourceState.chromium_rss_mb.toFixed(0)}MB > ${CONFIG.CHROMIUM_RSS_LIMIT_MB}MB`)
+            .catch(e => logError('Browser recycle failed', e));
+    }
+}
+
+setInterval(() => {
+    checkResources().catch(e => log('⚠️', `Resource check failed: ${e.message}`));
+}, CONFIG.MEMORY_CHECK_INTERVAL_SEC * 1000).unref();
+
+/**
+ * מדדי המשאבים ל-/status - pressure אומר לבוט להאט (תור כמעט מלא / זיכרון קרוב למגבלה / מחזור)
+ */
+function resourceSnapshot() {
+    const ratio = CONFIG.PRESSURE_RATIO;
+    const round = (mb) => Math.round(mb * 10) / 10;
+    return {
+        node_rss_mb: round(resourceState.node_rss_mb),
+        chromium_rss_mb: round(resourceState.chromium_rss_mb),
+        node_rss_limit_mb: CONFIG.NODE_RSS_LIMIT_MB,
+        chromium_rss_limit_mb: CONFIG.CHROMIUM_RSS_LIMIT_MB,
+        sends_active: sendLimiter.active,
+        sends_queued: sendLimiter.pending,
+        send_queue_max: CONFIG.SEND_QUEUE_MAX,
+        compressions_active: compressionLimiter.active,
+        compressions_queued: compressionLimiter.pending,
+        media_cache_mb: round(mediaCacheBytes / (1024 * 1024)),
+        media_inflight_mb: round(inflightBytes / (1024 * 1024)),
+        recycling: resourceState.recycling,
+        recycles: resourceState.recycles,
+        last_recycle: resourceState.last_recycle,
+        checked_at: resourceState.checked_at,
+        pressure: resourceState.recycling ||
+            sendLimiter.pending >= CONFIG.SEND_QUEUE_MAX * ratio ||
+            resourceState.chromium_rss_mb >= CONFIG.CHROMIUM_RSS_LIMIT_MB * ratio ||
+            resourceState.node_rss_mb >= CONFIG.NODE_RSS_LIMIT_MB * ratio
+    };
+}
+
+function getMimeType(filePath) {
+    const ext = path.extname(filePath).toLowerCase();
+    if (ext === '.mp4') return 'video/mp4';
+    if (ext === '.mov') return 'video/quicktime';
+    if (ext === '.mp3') return 'audio/mpeg';
+    if (ext === '.wav') return 'audio/wav';
+    if (ext === '.jpg') return 'image/jpeg';
+    if (ext === '.png') return 'image/png';
+    return 'application/octet-stream';
+}
+
 // ============================================
 // 📤 לוגיקת השליחה (Sending Logic)
 // ============================================
 
-async function sendAsMedia(chat, filePath, caption) {
-    const fileSizeMB = getFileSizeMB(filePath);
-    log('📤', `Uploading: ${path.basename(filePath)} (${fileSizeMB.toFixed(2)}MB)`);
+async function sendAsMedia(chat, filePath, caption, cacheKey = null, asDocument = false) {
+    let fileSizeMB = getFileSizeMB(filePath);
+    let budgetBytes = 0;
     
     try {
         // בדיקה אם ה-client עדיין פעיל
@@ -489,29 +835,35 @@ async function sendAsMedia(chat, filePath, caption) {
             throw new Error('WhatsApp client not ready or disconnected');
         }
         
-        const fileData = fsSync.readFileSync(filePath, { encoding: 'base64' });
-        
-        let mimetype = 'application/octet-stream';
-        const ext = path.extname(filePath).toLowerCase();
-        
-        // מיפוי MIME
-        if (ext === '.mp4') mimetype = 'video/mp4';
-        else if (ext === '.mov') mimetype = 'video/quicktime';
-        else if (ext === '.mp3') mimetype = 'audio/mpeg';
-        else if (ext === '.wav') mimetype = 'audio/wav';
-        else if (ext === '.jpg') mimetype = 'image/jpeg';
-        else if (ext === '.png') mimetype = 'image/png';
-        
-        log('📋', `MIME type: ${mimetype}, File size: ${(fileData.length / 1024 / 1024).toFixed(2)}MB (base64)`);
+        // אותו תוכן כבר הוכן (קבוצה קודמת באותה עבודה)? שימוש חוזר בלי קריאה/קידוד מחדש
+        const cached = mediaCacheGet(cacheKey);
+        let media;
+        if (cached) {
+            media = cached.media;
+            fileSizeMB = cached.sizeMB;
+            log('♻️', `Reusing prepared media: ${media.filename} (${cached.sizeMB.toFixed(2)}MB)`);
+        } else {
+            log('📤', `Uploading: ${path.basename(filePath)} (${fileSizeMB.toFixed(2)}MB)`);
+            budgetBytes = Math.ceil(fsSync.statSync(filePath).size / 3) * 4;
+            await acquireMediaBudget(budgetBytes);
+            // קריאה אסינכרונית - לא חוסמת את ה-event loop
+            const fileData = await fs.readFile(filePath, { encoding: 'base64' });
+            media = new MessageMedia(getMimeType(filePath), fileData, path.basename(filePath));
+        }
+        const mimetype = media.mimetype;
         
-        const media = new MessageMedia(mimetype, fileData, path.basename(filePath));
+        log('📋', `MIME type: ${mimetype}, File size: ${(media.data.length / 1024 / 1024).toFixed(2)}MB (base64)`);
         
         const options = {
             caption: caption || ''
         };
 
         // --- התיקון כאן ---
-        if (mimetype.startsWith('video/')) {
+        if (asDocument) {
+            // ניתוב מהבוט: מסמך (בלי מגבלת הגודל של וידאו ובלי דחיסה)
+            options.sendMediaAsDocument = true;
+            log('📎', 'Sending as document (routed by bot)');
+        } else if (mimetype.startsWith('video/')) {
             // וידאו: אנחנו רוצים צפייה ישירה
             options.sendMediaAsDocument = false; 
             log('🎬', 'Sending video as media (direct playback)');
@@ -526,9 +878,12 @@ async function sendAsMedia(chat, filePath, caption) {
         
         await chat.sendMessage(media, options);
         logSuccess(`File uploaded successfully! (${fileSizeMB.toFixed(2)}MB)`);
-        return { success: true, method: 'media' };
+        if (!cached) mediaCachePut(cacheKey, media, fileSizeMB);
+        return { success: true, method: asDocument ? 'document' : 'media' };
         
     } catch (error) {
+        // מדיה שנכשלה לא נשארת ב-cache
+        if (cacheKey) mediaCacheDelete(cacheKey);
         const errorMsg = error.message || String(error);
         logError('Upload failed', error, { 
             file: path.basename(filePath), 
@@ -542,242 +897,346 @@ async function sendAsMedia(chat, filePath, caption) {
             throw new Error('BROWSER_CRASH_FILE_TOO_LARGE');
         }
         throw error;
+    } finally {
+        if (budgetBytes) releaseMediaBudget(budgetBytes);
     }
 }
 
-async function deliverFile(fileInfo) {
-    const { file_path, wa_chat_id, template_payload = '' } = fileInfo;
-    let currentFilePath = file_path;
-    let isTempFile = false;
+// ============================================
+// 🗂️ אינדקס צ'אטים (ID → Chat)
+// ============================================
+// getChats() על חשבון עם אלפי צ'אטים איטי - נטען פעם אחת ב-ready ומתעדכן מאירועי הקבוצות.
+// שליחות מגיעות עם chat ID יציב (נשמר בבוט); חיפוש לפי שם נשאר רק לשמות ישנים.
 
-    log('═'.repeat(60));
-    log('📥', `Received: ${path.basename(file_path)}`);
-    
+const chatIndex = new Map(); // chat id (serialized) → Chat
+let chatIndexLoadedAt = 0;
+let chatIndexRefresh = null;
+
+function chatIndexPut(chat) {
+    if (chat && chat.id && chat.id._serialized) chatIndex.set(chat.id._serialized, chat);
+}
+
+async function refreshChatIndex() {
+    // רענון אחד בכל פעם - קריאות במקביל מחכות לאותו getChats
+    if (!chatIndexRefresh) {
+        chatIndexRefresh = (async () => {
+            const started = Date.now();
+            const chats = await client.getChats();
+            chatIndex.clear();
+            chats.forEach(chatIndexPut);
+            chatIndexLoadedAt = Date.now();
+            log('🗂️', `Chat index loaded: ${chatIndex.size} chats (${Date.now() - started}ms)`);
+        })().finally(() => { chatIndexRefresh = null; });
+    }
+    return chatIndexRefresh;
+}
+
+async function refreshIndexedChat(chatId) {
+    if (!chatId || !client) return;
     try {
-        if (!isReady || !client) throw new Error('WhatsApp client not ready');
+        chatIndexPut(await client.getChatById(chatId));
+    } catch (e) {
+        log('⚠️', `Could not refresh chat ${chatId}: ${e.message}`);
+    }
+}
 
-        // 🟢 שלב העיבוד (דחיסה חכמה) - לפני getChats כדי למנוע detached Frame
-        // לוגיקה: עד NO_COMPRESSION_LIMIT_MB לא לדחוס, מעל לדחוס, אם העלאה נכשלת - לדחוס עוד
-        const fileSizeMB = getFileSizeMB(file_path);
-        log('ℹ️', `Original file size: ${fileSizeMB.toFixed(2)}MB`);
-        
-        // עד NO_COMPRESSION_LIMIT_MB - לא לדחוס
-        if (fileSizeMB <= CONFIG.NO_COMPRESSION_LIMIT_MB) {
-            currentFilePath = file_path;
-            isTempFile = false;
-            log('✨', `File size (${fileSizeMB.toFixed(2)}MB) is safe (≤${CONFIG.NO_COMPRESSION_LIMIT_MB}MB). No compression needed.`);
-        } else {
-            // מעל NO_COMPRESSION_LIMIT_MB - לדחוס
-            log('⚠️', `File too large (${fileSizeMB.toFixed(2)}MB > ${CONFIG.NO_COMPRESSION_LIMIT_MB}MB), compressing to ≤${CONFIG.NO_COMPRESSION_LIMIT_MB}MB...`);
-            const processedResult = await processMediaIfNeeded(file_path);
-            currentFilePath = processedResult.processedPath;
-            isTempFile = processedResult.isTemp;
-        }
-        
-        const processedSizeMB = getFileSizeMB(currentFilePath);
-        log('ℹ️', `Processed file size: ${processedSizeMB.toFixed(2)}MB`);
+function findChatsByName(name) {
+    return [...chatIndex.values()].filter(c => c.name === name);
+}
 
-        // מציאת צ'אט עם retry logic
-        let chat = null;
-        let getChatsError = null;
-        let resolvedChatId = wa_chat_id;
-        
-        // 1. בדיקה אם זה "הסטטוס שלי"
-        if (wa_chat_id === "הסטטוס שלי") {
-            resolvedChatId = 'status@broadcast';
-            log('📱', 'Detected "הסטטוס שלי" - using status@broadcast');
-        }
-        // 2. בדיקה אם זה מספר בינלאומי (מתחיל ב-+ ואחריו ספרות)
-        else if (/^\+[0-9]+$/.test(wa_chat_id)) {
-            // הסרת ה-+ והוספת @c.us
-            resolvedChatId = wa_chat_id.substring(1) + '@c.us';
-            log('📞', `Detected international number: ${wa_chat_id} → ${resolvedChatId}`);
-        }
-        
-        for (let retry = 0; retry < 3; retry++) {
-            try {
-                // בדיקה אם ה-client עדיין פעיל
-                if (!isReady || !client) {
-                    throw new Error('WhatsApp client disconnected');
-                }
-                
-                log('🔍', `Finding chat '${resolvedChatId}' (attempt ${retry + 1}/3)...`);
-                
-                // אם זה ID ישיר (status@broadcast או מספר@c.us), ננסה getChatById
-                if (resolvedChatId.includes('@')) {
-                    try {
-                        chat = await client.getChatById(resolvedChatId);
-                        if (chat) {
-                            logSuccess(`Chat found by ID: ${resolvedChatId}`);
-                            break;
-                        }
-                    } catch (idError) {
-                        log('⚠️', `Could not get chat by ID ${resolvedChatId}: ${idError.message}`);
-                        // נמשיך עם החיפוש לפי שם
-                    }
-                }
-                
-                // חיפוש לפי שם (לוגיקה קיימת)
-                const chats = await client.getChats();
-                chat = chats.find(c => c.name === wa_chat_id) || 
-                       chats.find(c => c.name && c.name.includes(wa_chat_id));
-                
-                if (chat) {
-                    logSuccess(`Chat found: ${chat.name}`);
-                    break;
-                } else {
-                    log('⚠️', `Chat '${wa_chat_id}' not found in ${chats.length} chats`);
-                }
-            } catch (e) {
-                getChatsError = e;
-                const errorMsg = e.message || String(e);
-                
-                // אם זה detached Frame, ננסה שוב אחרי המתנה
-                if (errorMsg.includes('detached Frame') || errorMsg.includes('Target closed')) {
-                    log('⚠️', `Frame detached during getChats (attempt ${retry + 1}/3), waiting...`);
-                    if (retry < 2) {
-                        await new Promise(r => setTimeout(r, 3000)); // המתנה של 3 שניות
-                        continue;
-                    } else {
-                        logError('Failed to get chats after retries - browser may have crashed', e);
-                        throw new Error('BROWSER_CRASH_DURING_GET_CHATS');
-                    }
-                } else {
-                    // שגיאה אחרת - נזרוק אותה
-                    throw e;
-                }
-            }
+/**
+ * מציאת צ'אט לשליחה: ID (מהאינדקס, או getChatById), "הסטטוס שלי", מספר בינלאומי,
+ * או שם (legacy) - שם כפול נכשל במקום לשלוח לקבוצה הלא נכונה.
+ */
+async function resolveChat(target) {
+    let chatId = null;
+    if (target === 'הסטטוס שלי') {
+        chatId = 'status@broadcast';
+    } else if (/^\+[0-9]+$/.test(target)) {
+        chatId = target.substring(1) + '@c.us';
+    } else if (target.includes('@')) {
+        chatId = target;
+    }
+    
+    if (chatId) {
+        if (chatIndex.has(chatId)) return chatIndex.get(chatId);
+        const chat = await client.getChatById(chatId);
+        chatIndexPut(chat);
+        return chat;
+    }
+    
+    // חיפוש לפי שם - באינדקס, ואם לא נמצא רענון אחד
+    let matches = findChatsByName(target);
+    if (matches.length === 0) {
+        await refreshChatIndex();
+        matches = findChatsByName(target);
+    }
+    if (matches.length > 1) {
+        throw new Error(`Ambiguous chat name: ${target} (${matches.length} chats) - re-add the group by ID`);
+    }
+    if (matches.length === 1) return matches[0];
+    return [...chatIndex.values()].find(c => c.name && c.name.includes(target)) || null;
+}
+
+/**
+ * manifest מהבוט: הקובץ קודד בצד ה-Python למגבלות WhatsApp.
+ * סומכים עליו רק אם ה-hash והגודל תואמים לקובץ שנשלח ובגבול הגודל.
+ */
+function isPreparedByBot(manifest, contentSha, filePath) {
+    if (!manifest || !manifest.whatsapp_ready || !contentSha || manifest.sha256 !== contentSha) return false;
+    const stats = fsSync.statSync(filePath);
+    return stats.size === manifest.size_bytes && stats.size <= CONFIG.NO_COMPRESSION_LIMIT_MB * 1024 * 1024;
+}
+
+/**
+ * הכנת המדיה פעם אחת לכל השליחות של אותו קובץ (דחיסה אם נדרש)
+ */
+async function prepareMedia({ file_path, content_sha256 = null, manifest = null, send_as = 'media' }) {
+    const prep = {
+        originalPath: file_path,
+        currentFilePath: file_path,
+        asDocument: send_as === 'document',
+        // מפתח ה-cache: hash התוכן שנשלח ע"י הבוט + האם נשלח המקור או גרסה דחוסה
+        mediaKey: content_sha256 ? `${content_sha256}:original` : null,
+        preparedByBot: false,
+        tempFiles: new Set()
+    };
+    
+    // 🟢 שלב העיבוד (דחיסה חכמה) - לפני חיפוש הצ'אט כדי למנוע detached Frame
+    // לוגיקה: עד NO_COMPRESSION_LIMIT_MB לא לדחוס, מעל לדחוס, אם העלאה נכשלת - לדחוס עוד
+    const fileSizeMB = getFileSizeMB(file_path);
+    log('ℹ️', `Original file size: ${fileSizeMB.toFixed(2)}MB`);
+    
+    // הבוט כבר הכין את הקובץ ל-WhatsApp (manifest תואם לקובץ) - לא דוחסים בכלל
+    prep.preparedByBot = isPreparedByBot(manifest, content_sha256, file_path);
+    
+    if (prep.asDocument) {
+        if (fileSizeMB > CONFIG.MAX_INPUT_SIZE_MB) {
+            throw new Error(`File too large (${fileSizeMB.toFixed(2)}MB). Max limit is ${CONFIG.MAX_INPUT_SIZE_MB}MB.`);
         }
+        log('📎', `Sending as document (${fileSizeMB.toFixed(2)}MB) - no compression`);
+    } else if (prep.preparedByBot) {
+        log('🏷️', `File prepared by bot (${manifest.video_codec}/${manifest.profile}, ${manifest.width}x${manifest.height}) - skipping compression`);
+    } else if (fileSizeMB <= CONFIG.NO_COMPRESSION_LIMIT_MB) {
+        log('✨', `File size (${fileSizeMB.toFixed(2)}MB) is safe (≤${CONFIG.NO_COMPRESSION_LIMIT_MB}MB). No compression needed.`);
+    } else if (content_sha256 && mediaCacheGet(`${content_sha256}:processed`)) {
+        // כבר נדחס ונשלח לקבוצה קודמת - לא דוחסים שוב
+        prep.mediaKey = `${content_sha256}:processed`;
+        log('♻️', 'Compressed version already prepared for this content - skipping compression');
+    } else {
+        prep.mediaKey = content_sha256 ? `${content_sha256}:processed` : null;
+        // מעל NO_COMPRESSION_LIMIT_MB - לדחוס
+        log('⚠️', `File too large (${fileSizeMB.toFixed(2)}MB > ${CONFIG.NO_COMPRESSION_LIMIT_MB}MB), compressing to ≤${CONFIG.NO_COMPRESSION_LIMIT_MB}MB...`);
+        const processedResult = await compressMedia(file_path);
+        prep.currentFilePath = processedResult.processedPath;
+        if (processedResult.isTemp) prep.tempFiles.add(processedResult.processedPath);
+    }
+    
+    log('ℹ️', `Processed file size: ${getFileSizeMB(prep.currentFilePath).toFixed(2)}MB`);
+    return prep;
+}
 
-        if (!chat) {
-            // אם זה status@broadcast או מספר@c.us ולא מצאנו, ננסה ליצור chat object ישירות
-            if (resolvedChatId.includes('@')) {
-                try {
-                    // ניסיון ליצור chat object ישירות מה-ID
-                    chat = await client.getChatById(resolvedChatId);
-                    if (chat) {
-                        logSuccess(`Chat created from ID: ${resolvedChatId}`);
-                    } else {
-                        throw new Error(`Chat not found: ${wa_chat_id} (resolved: ${resolvedChatId})${getChatsError ? ` (${getChatsError.message})` : ''}`);
-                    }
-                } catch (idError) {
-                    throw new Error(`Chat not found: ${wa_chat_id} (resolved: ${resolvedChatId})${getChatsError ? ` (${getChatsError.message})` : ''}`);
+/**
+ * מציאת צ'אט (לפי ID מהאינדקס) עם retry ל-detached Frame
+ */
+async function findChatWithRetry(target) {
+    for (let retry = 0; retry < 3; retry++) {
+        try {
+            // בדיקה אם ה-client עדיין פעיל
+            if (!isReady || !client) {
+                throw new Error('WhatsApp client disconnected');
+            }
+            const chat = await resolveChat(target);
+            if (!chat) throw new Error('no match');
+            logSuccess(`Chat found: ${chat.name || chat.id._serialized}`);
+            return chat;
+        } catch (e) {
+            const errorMsg = e.message || String(e);
+            
+            // אם זה detached Frame, ננסה שוב אחרי המתנה
+            if (errorMsg.includes('detached Frame') || errorMsg.includes('Target closed')) {
+                log('⚠️', `Frame detached while resolving chat (attempt ${retry + 1}/3), waiting...`);
+                if (retry < 2) {
+                    await new Promise(r => setTimeout(r, 3000)); // המתנה של 3 שניות
+                    continue;
                 }
-            } else {
-                throw new Error(`Chat not found: ${wa_chat_id}${getChatsError ? ` (${getChatsError.message})` : ''}`);
+                logError('Failed to get chats after retries - browser may have crashed', e);
+                throw new Error('BROWSER_CRASH_DURING_GET_CHATS');
             }
+            throw new Error(`Chat not found: ${target} (${errorMsg})`);
         }
+    }
+}
 
-        // בדיקת מצב לפני שליחה
-        log('ℹ️', `File size: ${processedSizeMB.toFixed(2)}MB, Client ready: ${isReady}`);
-        
-        // 🟢 שליחה עם retry ודחיסה נוספת אם נדרש
-        let sent = false;
-        let lastError = null;
-        let currentFileForUpload = currentFilePath;
-        let currentFileIsTemp = isTempFile;
-        
-        for (let i = 0; i < 3; i++) { // 3 ניסיונות (הוגדל מ-2)
-            try {
-                // בדיקה נוספת לפני כל ניסיון
-                if (!isReady || !client) {
-                    throw new Error('WhatsApp client disconnected during upload');
-                }
-                
-                // בדיקה אם הקובץ גדול מ-NO_COMPRESSION_LIMIT_MB - אם כן, נדחוס עוד לפני העלאה
-                const currentSizeMB = getFileSizeMB(currentFileForUpload);
-                if (currentSizeMB > CONFIG.NO_COMPRESSION_LIMIT_MB && i > 0) {
-                    log('⚠️', `File still too large (${currentSizeMB.toFixed(2)}MB > ${CONFIG.NO_COMPRESSION_LIMIT_MB}MB) after failed upload, compressing more...`);
-                    const moreCompressedResult = await processMediaIfNeeded(currentFileForUpload);
-                    if (moreCompressedResult && moreCompressedResult.processedPath) {
-                        // מחיקת הקובץ הקודם אם הוא זמני
-                        if (currentFileIsTemp && currentFileForUpload !== file_path) {
-                            try {
-                                fs.unlinkSync(currentFileForUpload);
-                            } catch (e) {
-                                // ignore
-                            }
-                        }
-                        currentFileForUpload = moreCompressedResult.processedPath;
-                        currentFileIsTemp = moreCompressedResult.isTemp;
-                        const newSizeMB = getFileSizeMB(currentFileForUpload);
-                        log('✅', `More compressed file ready: ${newSizeMB.toFixed(2)}MB`);
-                    }
+/**
+ * שליחת המדיה המוכנה לצ'אט אחד (עד 3 ניסיונות, דחיסה נוספת אם ההעלאה נכשלה בגלל גודל)
+ */
+async function sendPrepared(prep, target, caption) {
+    const chat = await findChatWithRetry(target);
+    
+    let lastError = null;
+    for (let i = 0; i < 3; i++) { // 3 ניסיונות (הוגדל מ-2)
+        try {
+            // בדיקה נוספת לפני כל ניסיון
+            if (!isReady || !client) {
+                throw new Error('WhatsApp client disconnected during upload');
+            }
+            
+            // בדיקה אם הקובץ גדול מ-NO_COMPRESSION_LIMIT_MB - אם כן, נדחוס עוד לפני העלאה
+            const currentSizeMB = getFileSizeMB(prep.currentFilePath);
+            if (currentSizeMB > CONFIG.NO_COMPRESSION_LIMIT_MB && i > 0 && !prep.preparedByBot && !prep.asDocument) {
+                log('⚠️', `File still too large (${currentSizeMB.toFixed(2)}MB > ${CONFIG.NO_COMPRESSION_LIMIT_MB}MB) after failed upload, compressing more...`);
+                const moreCompressedResult = await compressMedia(prep.currentFilePath);
+                if (moreCompressedResult && moreCompressedResult.processedPath) {
+                    // הגרסה החדשה משמשת גם את שאר הקבוצות בשידור
+                    prep.currentFilePath = moreCompressedResult.processedPath;
+                    if (moreCompressedResult.isTemp) prep.tempFiles.add(moreCompressedResult.processedPath);
+                    // קובץ חדש - לא משתמשים במדיה שהוכנה קודם
+                    if (prep.mediaKey) mediaCacheDelete(prep.mediaKey);
+                    log('✅', `More compressed file ready: ${getFileSizeMB(prep.currentFilePath).toFixed(2)}MB`);
                 }
-                
-                await sendAsMedia(chat, currentFileForUpload, template_payload);
-                sent = true;
+            }
+            
+            await sendAsMedia(chat, prep.currentFilePath, caption, prep.mediaKey, prep.asDocument);
+            return;
+        } catch (e) {
+            lastError = e;
+            const errorMsg = e.message || String(e);
+            log('⚠️', `Upload attempt ${i+1}/3 failed: ${errorMsg}`);
+            
+            // אם זה detached Frame או Target closed, אין טעם לנסות שוב
+            if (errorMsg.includes('detached Frame') || errorMsg.includes('Target closed') || errorMsg.includes('BROWSER_CRASH')) {
+                log('🛑', 'Browser crashed - skipping retry');
                 break;
-            } catch (e) {
-                lastError = e;
-                const errorMsg = e.message || String(e);
-                log('⚠️', `Upload attempt ${i+1}/3 failed: ${errorMsg}`);
-                
-                // אם זה detached Frame או Target closed, אין טעם לנסות שוב
-                if (errorMsg.includes('detached Frame') || errorMsg.includes('Target closed') || errorMsg.includes('BROWSER_CRASH')) {
-                    log('🛑', 'Browser crashed - skipping retry');
-                    break;
-                }
-                
-                // אם הקובץ גדול מ-NO_COMPRESSION_LIMIT_MB, נדחוס עוד לפני הניסיון הבא
-                const currentSizeMB = getFileSizeMB(currentFileForUpload);
-                if (currentSizeMB > CONFIG.NO_COMPRESSION_LIMIT_MB && i < 2) {
-                    log('🔄', `File too large (${currentSizeMB.toFixed(2)}MB > ${CONFIG.NO_COMPRESSION_LIMIT_MB}MB), will compress more before next attempt...`);
-                }
-                
-                await new Promise(r => setTimeout(r, 3000)); // המתנה של 3 שניות (הוגדל מ-2)
             }
+            
+            // אם הקובץ גדול מ-NO_COMPRESSION_LIMIT_MB, נדחוס עוד לפני הניסיון הבא
+            const currentSizeMB = getFileSizeMB(prep.currentFilePath);
+            if (currentSizeMB > CONFIG.NO_COMPRESSION_LIMIT_MB && i < 2 && !prep.asDocument) {
+                log('🔄', `File too large (${currentSizeMB.toFixed(2)}MB > ${CONFIG.NO_COMPRESSION_LIMIT_MB}MB), will compress more before next attempt...`);
+            }
+            
+            await new Promise(r => setTimeout(r, 3000)); // המתנה של 3 שניות (הוגדל מ-2)
         }
-        
-        // עדכון currentFilePath אם השתנה
-        if (sent && currentFileForUpload !== currentFilePath) {
-            currentFilePath = currentFileForUpload;
-            isTempFile = currentFileIsTemp;
-        }
+    }
+    
+    logError('All retry attempts failed', lastError, {
+        file: path.basename(prep.originalPath),
+        chat: target,
+        attempts: 3
+    });
+    throw lastError;
+}
 
-        if (!sent) {
-            logError('All retry attempts failed', lastError, {
-                file: path.basename(file_path),
-                sizeMB: processedSizeMB.toFixed(2),
-                attempts: 3
-            });
-            throw lastError;
-        }
+/**
+ * רישום שגיאת שליחה (וסימון ה-client כלא מוכן אם הדפדפן קרס)
+ */
+function handleDeliveryError(error, filePath, target) {
+    const errorMsg = error.message || String(error);
+    const errorType = errorMsg.includes('BROWSER_CRASH_DURING_GET_CHATS') ? 'BROWSER_CRASH_GET_CHATS' :
+                     errorMsg.includes('BROWSER_CRASH') ? 'BROWSER_CRASH' :
+                     errorMsg.includes('detached') ? 'DETACHED_FRAME' :
+                     errorMsg.includes('Target closed') ? 'TARGET_CLOSED' :
+                     errorMsg.includes('not ready') ? 'CLIENT_NOT_READY' : 'UNKNOWN';
+    
+    logError('Delivery failed', error, {
+        file: path.basename(filePath),
+        chat: target,
+        errorType: errorType
+    });
+    
+    // אם זה browser crash, נסמן את ה-client כלא מוכן
+    if (errorType.includes('BROWSER_CRASH') || errorType === 'DETACHED_FRAME') {
+        log('⚠️', 'Marking client as not ready due to browser crash');
+        isReady = false;
+    }
+    return errorMsg;
+}
 
-        logSuccess('File sent successfully!');
-        return { success: true, delivered_via: 'wa_media' };
+function broadcastPause() {
+    const { BROADCAST_DELAY_MIN_MS: min, BROADCAST_DELAY_MAX_MS: max } = CONFIG;
+    return new Promise(r => setTimeout(r, min + Math.random() * Math.max(0, max - min)));
+}
 
-    } catch (error) {
-        const errorMsg = error.message || String(error);
-        const errorType = errorMsg.includes('BROWSER_CRASH_DURING_GET_CHATS') ? 'BROWSER_CRASH_GET_CHATS' :
-                         errorMsg.includes('BROWSER_CRASH') ? 'BROWSER_CRASH' :
-                         errorMsg.includes('detached') ? 'DETACHED_FRAME' :
-                         errorMsg.includes('Target closed') ? 'TARGET_CLOSED' :
-                         errorMsg.includes('not ready') ? 'CLIENT_NOT_READY' : 'UNKNOWN';
+/**
+ * שליחת קובץ אחד לכמה צ'אטים: המדיה מוכנה פעם אחת, השליחות רצות במקביל מוגבל
+ * עם השהיה אקראית בין שליחות (כדי לא להיראות כמו spam ולקבל חסימה).
+ *
+ * @param {Object} info - file_path, content_sha256, manifest, send_as ('media' / 'document'), targets: [{ chat, caption }]
+ * @returns {{ success, sent, failed, results: [{ chat, success, elapsed_ms, delivered_via?, error? }] }}
+ */
+async function broadcastFile(info) {
+    const { file_path, targets = [] } = info;
+    const results = new Array(targets.length);
+    let prep = null;
+
+    log('═'.repeat(60));
+    log('📥', `Received: ${path.basename(file_path)} → ${targets.length} chat(s)`);
+    
+    try {
+        if (!isReady || !client) throw new Error('WhatsApp client not ready');
+        prep = await prepareMedia(info);
         
-        logError('Delivery failed', error, {
-            file: path.basename(file_path),
-            chat: wa_chat_id,
-            errorType: errorType
+        let next = 0;
+        const worker = async () => {
+            while (next < targets.length) {
+                const index = next++;
+                const { chat: target, caption = '' } = targets[index];
+                if (index > 0) await broadcastPause();
+                // זמן השליחה לכל צ'אט (בלי ההשהיה) - הבוט לומד ממנו איך לנתב את הקבוצה
+                const startedAt = Date.now();
+                try {
+                    await sendPrepared(prep, target, caption);
+                    results[index] = {
+                        chat: target,
+                        success: true,
+                        elapsed_ms: Date.now() - startedAt,
+                        delivered_via: prep.asDocument ? 'wa_document' : 'wa_media'
+                    };
+                    logSuccess(`File sent successfully! (${index + 1}/${targets.length})`);
+                } catch (error) {
+                    results[index] = {
+                        chat: target,
+                        success: false,
+                        elapsed_ms: Date.now() - startedAt,
+                        error: handleDeliveryError(error, file_path, target)
+                    };
+                }
+            }
+        };
+        const workers = Math.max(1, Math.min(CONFIG.BROADCAST_CONCURRENCY, targets.length));
+        await Promise.all(Array.from({ length: workers }, worker));
+
+    } catch (error) {
+        // ההכנה נכשלה - כל הצ'אטים שעוד לא טופלו נכשלו באותה שגיאה
+        const errorMsg = handleDeliveryError(error, file_path, targets.map(t => t.chat).join(', '));
+        targets.forEach((t, i) => {
+            if (!results[i]) results[i] = { chat: t.chat, success: false, error: errorMsg };
         });
         
-        // אם זה browser crash, נסמן את ה-client כלא מוכן
-        if (errorType.includes('BROWSER_CRASH') || errorType === 'DETACHED_FRAME') {
-            log('⚠️', 'Marking client as not ready due to browser crash');
-            isReady = false;
-        }
-        
-        return { success: false, error: errorMsg };
-        
     } finally {
         // 🟢 ניקוי
-        if (isTempFile) {
+        for (const tempFile of (prep ? prep.tempFiles : [])) {
             try {
-                await fs.unlink(currentFilePath);
+                await fs.unlink(tempFile);
                 log('🧹', `Cleaned up temp file`);
             } catch (e) { console.error('Cleanup failed', e); }
         }
     }
+    
+    const sent = results.filter(r => r.success).length;
+    if (targets.length > 1) log('📣', `Broadcast finished: ${sent}/${targets.length} chats`);
+    return { success: sent > 0, sent, failed: targets.length - sent, results };
+}
+
+/**
+ * שליחה לצ'אט בודד (/send/enhanced) - שידור עם יעד אחד
+ */
+async function deliverFile(fileInfo) {
+    const { wa_chat_id, template_payload = '' } = fileInfo;
+    const { results } = await broadcastFile({ ...fileInfo, targets: [{ chat: wa_chat_id, caption: template_payload }] });
+    const { chat, ...result } = results[0];
+    return result;
 }
 
 // ============================================
@@ -788,6 +1247,9 @@ app.get('/status', (req, res) => {
     res.json({
         ready: isReady,
         hasQR: !!qrCodeData,
+        instance: CONFIG.WA_CLIENT_ID,
+        in_flight: [...jobs.values()].filter(job => job.status === 'running').length,
+        resources: resourceSnapshot(),
         timestamp: new Date().toISOString()
     });
 });
@@ -802,6 +1264,40 @@ app.get('/qr', (req, res) => {
     }
 });
 
+// חיפוש צ'אט לפי שם מדויק (הבוט שומר את ה-ID בהוספת קבוצה)
+app.get('/chats/resolve', async (req, res) => {
+    const name = req.query.name;
+    if (!name) return res.status(400).json({ success: false, error: 'Missing name' });
+    if (!isReady || !client) return res.status(503).json({ success: false, error: 'WhatsApp client not ready' });
+    try {
+        if (!chatIndexLoadedAt || findChatsByName(name).length === 0) await refreshChatIndex();
+        const matches = findChatsByName(name).map(c => ({
+            id: c.id._serialized,
+            name: c.name,
+            is_group: !!c.isGroup
+        }));
+        res.json({ success: true, matches });
+    } catch (error) {
+        logError('Error resolving chat', error, { name });
+        res.status(500).json({ success: false, error: error.message });
+    }
+});
+
+app.post('/send/text', async (req, res) => {
+    const { chat: target, message } = req.body;
+    try {
+        if (!isReady || !client) throw new Error('WhatsApp client not ready');
+        const chat = await resolveChat(target);
+        if (!chat) throw new Error(`Chat not found: ${target}`);
+        await chat.sendMessage(message);
+        logSuccess(`Text sent to ${chat.name || chat.id._serialized}`);
+        res.json({ success: true });
+    } catch (error) {
+        logError('Error sending text', error, { chat: target });
+        res.status(500).json({ success: false, error: error.message });
+    }
+});
+
 app.post('/reset', async (req, res) => {
     log('🔄', 'Resetting WhatsApp client...');
     try {
@@ -824,18 +1320,259 @@ app.post('/reset', async (req, res) => {
     }
 });
 
+// ============================================
+// 📦 העלאה בזרימה (Streaming Upload)
+// ============================================
+// הבוט מזרים את הקובץ (PUT, גוף raw) עם ה-SHA-256 שלו; הקובץ נכתב לדיסק בזרימה,
+// ה-hash נבדק תוך כדי, ואותו תוכן לא מועלה פעמיים (GET /upload/:sha).
+
+function uploadPathFor(sha, ext) {
+    return path.join(CONFIG.UPLOAD_DIR, `${sha}${ext}`);
+}
+
+function findUpload(sha) {
+    if (!fsSync.existsSync(CONFIG.UPLOAD_DIR)) return null;
+    const name = fsSync.readdirSync(CONFIG.UPLOAD_DIR).find(f => f.startsWith(sha) && !f.includes('.part'));
+    return name ? path.join(CONFIG.UPLOAD_DIR, name) : null;
+}
+
+app.get('/upload/:sha', (req, res) => {
+    const existing = /^[a-f0-9]{64}$/.test(req.params.sha) ? findUpload(req.params.sha) : null;
+    if (!existing) return res.status(404).json({ exists: false });
+    // רענון mtime - לא יימחק באמצע עבודה
+    const now = new Date();
+    fsSync.utimesSync(existing, now, now);
+    res.json({ exists: true, file_path: existing });
+});
+
+app.put('/upload/:sha', (req, res) => {
+    const sha = req.params.sha;
+    const ext = /^\.[a-z0-9]{1,5}$/.test(req.query.ext || '') ? req.query.ext : '';
+    if (!/^[a-f0-9]{64}$/.test(sha)) {
+        return res.status(400).json({ success: false, error: 'Invalid sha256' });
+    }
+    
+    fsSync.mkdirSync(CONFIG.UPLOAD_DIR, { recursive: true });
+    const finalPath = uploadPathFor(sha, ext);
+    if (fsSync.existsSync(finalPath)) {
+        req.resume();
+        return res.json({ success: true, file_path: finalPath, reused: true });
+    }
+    
+    const tmpPath = `${finalPath}.part-${process.pid}-${Date.now()}`;
+    const hash = crypto.createHash('sha256');
+    const out = fsSync.createWriteStream(tmpPath);
+    let failed = false;
+    
+    const fail = (status, message) => {
+        if (failed) return;
+        failed = true;
+        out.destroy();
+        fs.unlink(tmpPath).catch(() => {});
+        logError('Streaming upload failed', null, { sha, message });
+        res.status(status).json({ success: false, error: message });
+    };
+    
+    req.on('data', chunk => hash.update(chunk));
+    req.on('error', err => fail(500, err.message));
+    out.on('error', err => fail(500, err.message));
+    out.on('finish', async () => {
+        if (failed) return;
+        const digest = hash.digest('hex');
+        if (digest !== sha) {
+            return fail(400, `Hash mismatch (got ${digest})`);
+        }
+        try {
+            await fs.rename(tmpPath, finalPath);
+            log('📦', `Streamed upload stored: ${path.basename(finalPath)} (${getFileSizeMB(finalPath).toFixed(2)}MB)`);
+            res.json({ success: true, file_path: finalPath });
+        } catch (err) {
+            fail(500, err.message);
+        }
+    });
+    req.pipe(out);
+});
+
+// ניקוי העלאות ישנות
+setInterval(async () => {
+    try {
+        if (!fsSync.existsSync(CONFIG.UPLOAD_DIR)) return;
+        const cutoff = Date.now() - CONFIG.UPLOAD_TTL_SEC * 1000;
+        for (const name of await fs.readdir(CONFIG.UPLOAD_DIR)) {
+            const filePath = path.join(CONFIG.UPLOAD_DIR, name);
+            const stats = await fs.stat(filePath);
+            if (stats.mtimeMs < cutoff) {
+                await fs.unlink(filePath).catch(() => {});
+            }
+        }
+    } catch (e) {
+        log('⚠️', `Upload cleanup failed: ${e.message}`);
+    }
+}, 10 * 60 * 1000).unref();
+
 app.post('/send/enhanced', async (req, res) => {
     // Timeout ארוך לטובת דחיסת קבצים גדולים
     req.setTimeout(CONFIG.TIMEOUT_PROCESSING_SEC * 1000); 
 
     try {
-        const result = await deliverFile(req.body);
+        const result = await governedSend(() => deliverFile(req.body));
         res.json(result);
     } catch (error) {
-        res.status(500).json({ success: false, error: error.message });
+        res.status(error.code === 'QUEUE_FULL' ? 429 : 500).json({ success: false, error: error.message });
+    }
+});
+
+app.post('/send/broadcast', async (req, res) => {
+    const targets = Array.isArray(req.body.targets) ? req.body.targets : [];
+    if (!req.body.file_path || targets.length === 0) {
+        return res.status(400).json({ success: false, error: 'file_path and targets are required' });
+    }
+    // דחיסה פעם אחת + שליחה לכל הקבוצות עם השהיות
+    req.setTimeout((CONFIG.TIMEOUT_PROCESSING_SEC + targets.length * 120) * 1000);
+
+    try {
+        res.json(await governedSend(() => broadcastFile(req.body)));
+    } catch (error) {
+        res.status(error.code === 'QUEUE_FULL' ? 429 : 500).json({ success: false, error: error.message });
     }
 });
 
+// ============================================
+// 🧾 Jobs (שליחה כ-job: מחזיר ID מיד, התוצאה ב-polling או webhook)
+// ============================================
+// POST /jobs מחזיר job_id מיד; GET /jobs?ids=a,b&wait=25 חוזר ברגע שאחד מה-jobs הסתיים
+// (long-poll אחד לכל ה-jobs הפתוחים של הבוט). callback_url מקומי מקבל POST עם התוצאה.
+
+const jobs = new Map(); // job_id → { id, kind, status, created_at, finished_at, result, callback_url }
+const jobEvents = new EventEmitter();
+jobEvents.setMaxListeners(0);
+
+function isLocalCallback(url) {
+    try {
+        const { protocol, hostname } = new URL(url);
+        return ['http:', 'https:'].includes(protocol) && ['localhost', '127.0.0.1', '::1', '[::1]'].includes(hostname);
+    } catch (e) {
+        return false;
+    }
+}
+
+function jobView(job) {
+    const { callback_url, ...view } = job;
+    return view;
+}
+
+async function notifyJobCallback(job) {
+    try {
+        await fetch(job.callback_url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(jobView(job)),
+            signal: AbortSignal.timeout(10000)
+        });
+    } catch (e) {
+        log('⚠️', `Job ${job.id} callback failed: ${e.message}`);
+    }
+}
+
+function submitJob(kind, payload, callbackUrl) {
+    const job = {
+        id: crypto.randomUUID(),
+        kind,
+        status: 'running',
+        queued: true,
+        created_at: Date.now(),
+        started_at: null,
+        finished_at: null,
+        result: null,
+        callback_url: callbackUrl
+    };
+    // תור מלא - QUEUE_FULL נזרק לפני שה-job נרשם
+    const run = governedSend(() => {
+        job.queued = false;
+        job.started_at = Date.now();
+        return kind === 'broadcast' ? broadcastFile(payload) : deliverFile(payload);
+    });
+    jobs.set(job.id, job);
+    
+    run.then(
+        result => { job.result = result; job.status = 'done'; },
+        error => { job.result = { success: false, error: error.message }; job.status = 'failed'; }
+    ).finally(() => {
+        job.finished_at = Date.now();
+        log('🧾', `Job ${job.id} (${kind}) ${job.status} in ${((job.finished_at - job.created_at) / 1000).toFixed(1)}s`);
+        jobEvents.emit('finished', job.id);
+        if (job.callback_url) notifyJobCallback(job);
+    });
+    return job;
+}
+
+/**
+ * מצב ה-jobs המבוקשים - ממתין עד waitMs לסיום של אחד מהם (long-poll)
+ */
+function waitForJobs(ids, waitMs) {
+    const snapshot = () => ids.map(id => jobs.has(id) ? jobView(jobs.get(id)) : { id, status: 'unknown' });
+    const anyFinished = () => ids.some(id => !jobs.has(id) || jobs.get(id).status !== 'running');
+    if (waitMs <= 0 || anyFinished()) return Promise.resolve(snapshot());
+    
+    return new Promise(resolve => {
+        const onFinished = (id) => {
+            if (!ids.includes(id)) return;
+            cleanup();
+            resolve(snapshot());
+        };
+        const timer = setTimeout(() => { cleanup(); resolve(snapshot()); }, waitMs);
+        const cleanup = () => {
+            clearTimeout(timer);
+            jobEvents.off('finished', onFinished);
+        };
+        jobEvents.on('finished', onFinished);
+    });
+}
+
+// ניקוי jobs שהסתיימו
+setInterval(() => {
+    const cutoff = Date.now() - CONFIG.JOB_TTL_SEC * 1000;
+    for (const [id, job] of jobs) {
+        if (job.finished_at && job.finished_at < cutoff) jobs.delete(id);
+    }
+}, 60 * 1000).unref();
+
+app.post('/jobs', (req, res) => {
+    const { kind = 'send', callback_url: callbackUrl = null, ...payload } = req.body;
+    if (!['send', 'broadcast'].includes(kind)) {
+        return res.status(400).json({ success: false, error: `Unknown job kind: ${kind}` });
+    }
+    if (!payload.file_path) {
+        return res.status(400).json({ success: false, error: 'file_path is required' });
+    }
+    if (callbackUrl && !isLocalCallback(callbackUrl)) {
+        return res.status(400).json({ success: false, error: 'callback_url must point to localhost' });
+    }
+    let job;
+    try {
+        job = submitJob(kind, payload, callbackUrl);
+    } catch (error) {
+        if (error.code !== 'QUEUE_FULL') throw error;
+        log('🚦', `Job rejected: ${error.message}`);
+        return res.status(429).json({ success: false, error: error.message, retry_after: 10 });
+    }
+    res.status(202).json({ success: true, job_id: job.id, status: job.status });
+});
+
+app.get('/jobs', async (req, res) => {
+    const ids = String(req.query.ids || '').split(',').filter(Boolean);
+    if (ids.length === 0) return res.status(400).json({ success: false, error: 'ids is required' });
+    const waitMs = Math.min(Math.max(parseFloat(req.query.wait) || 0, 0), CONFIG.JOB_MAX_WAIT_SEC) * 1000;
+    res.json({ success: true, jobs: await waitForJobs(ids, waitMs) });
+});
+
+app.get('/jobs/:id', async (req, res) => {
+    const waitMs = Math.min(Math.max(parseFloat(req.query.wait) || 0, 0), CONFIG.JOB_MAX_WAIT_SEC) * 1000;
+    const [job] = await waitForJobs([req.params.id], waitMs);
+    if (job.status === 'unknown') return res.status(404).json({ success: false, ...job });
+    res.json({ success: true, ...job });
+});
+
 // הפעלה
 app.listen(PORT, () => {
     console.log('\n' + '═'.repeat(60));